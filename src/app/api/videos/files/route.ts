@@ -11,7 +11,18 @@ const corsHeaders = {
 };
 
 // KV 키: files:all - 전체 파일 목록 JSON
-// 구조: { files: [{ path, name, size, category, uploadedAt }] }
+// 구조: { files: [{ path, name, size, category, uploadedAt, hls? }], version }
+// version: 목록을 저장할 때마다 1씩 증가 (delta 요청의 동시 변경 확인용)
+
+type FilesData = { files: any[]; version?: number };
+
+// 증분 동기화 요청: 도구가 실제로 한 변경만 전송
+type DeltaBody = {
+    baseVersion?: number;
+    add?: any[];
+    update?: any[];
+    remove?: string[];
+};
 
 // OPTIONS (CORS preflight)
 export async function OPTIONS() {
@@ -50,34 +61,23 @@ export async function POST(request: NextRequest) {
             return NextResponse.json({ error: 'KV not available' }, { status: 500 });
         }
 
-        const body = await request.json() as { action?: string; file?: any; files?: any[] };
+        const body = await request.json() as { action?: string; file?: any; files?: any[] } & DeltaBody;
         const { action, file, files } = body;
 
         // 현재 파일 목록 가져오기
-        const currentData = await kv.get('files:all', 'json') as { files: any[] } | null;
-        const currentFiles = currentData?.files || [];
+        const currentData = await kv.get('files:all', 'json') as FilesData | null;
+        let currentFiles = currentData?.files || [];
+        const currentVersion = currentData?.version || 0;
 
         if (action === 'add') {
-            // 단일 파일 추가
-            if (file) {
-                const existingIndex = currentFiles.findIndex((f: any) => f.path === file.path);
-                if (existingIndex >= 0) {
-                    currentFiles[existingIndex] = { ...file, uploadedAt: Date.now() };
-                } else {
-                    currentFiles.push({ ...file, uploadedAt: Date.now() });
-                }
-            }
-            // 여러 파일 추가
-            if (files && Array.isArray(files)) {
-                for (const f of files) {
-                    const existingIndex = currentFiles.findIndex((cf: any) => cf.path === f.path);
-                    if (existingIndex >= 0) {
-                        currentFiles[existingIndex] = { ...f, uploadedAt: Date.now() };
-                    } else {
-                        currentFiles.push({ ...f, uploadedAt: Date.now() });
-                    }
-                }
+            // 단일 파일 또는 여러 파일(업로드 도구의 묶음 등록) 추가 - 경로 기준으로 합친 뒤 한 번만 저장
+            const incoming = [...(file ? [file] : []), ...(Array.isArray(files) ? files : [])];
+            const byPath = new Map<string, any>(currentFiles.map((f: any) => [f.path, f] as [string, any]));
+            const now = Date.now();
+            for (const f of incoming) {
+                byPath.set(f.path, { ...f, uploadedAt: now });
             }
+            currentFiles = Array.from(byPath.values());
         } else if (action === 'remove') {
             // 파일 제거
             if (file) {
@@ -86,6 +86,53 @@ export async function POST(request: NextRequest) {
                     currentFiles.splice(index, 1);
                 }
             }
+        } else if (action === 'delta') {
+            // 증분 동기화: 추가/갱신/삭제를 한 번에 반영하고 한 번만 저장
+            // baseVersion이 현재 버전과 다르면 그 사이 다른 작업이 목록을 바꾼 것 → 409 (클라이언트가 새 버전으로 재요청)
+            if (typeof body.baseVersion === 'number' && body.baseVersion !== currentVersion) {
+                return NextResponse.json({
+                    success: false,
+                    error: 'version conflict',
+                    version: currentVersion
+                }, { status: 409, headers: corsHeaders });
+            }
+
+            const byPath = new Map<string, any>(currentFiles.map((f: any) => [f.path, f] as [string, any]));
+            // 서버 목록에 없던 항목을 갱신/삭제한 경로 (누락된 이전 변경 → 전체 동기화로 복구)
+            const drift: string[] = [];
+            const now = Date.now();
+
+            for (const f of body.add || []) {
+                byPath.set(f.path, { ...f, uploadedAt: now });
+            }
+            for (const f of body.update || []) {
+                const existing = byPath.get(f.path);
+                if (!existing) {
+                    drift.push(f.path);
+                }
+                const merged = { ...(existing || {}), ...f, uploadedAt: existing?.uploadedAt || now };
+                // hls: null 이면 HLS 경로 제거
+                if (f.hls === null) {
+                    delete merged.hls;
+                }
+                byPath.set(f.path, merged);
+            }
+            for (const path of body.remove || []) {
+                if (!byPath.delete(path)) {
+                    drift.push(path);
+                }
+            }
+
+            const version = currentVersion + 1;
+            await kv.put('files:all', JSON.stringify({ files: Array.from(byPath.values()), version }));
+            await kv.delete('cache:home');
+
+            return NextResponse.json({
+                success: true,
+                count: byPath.size,
+                version,
+                drift
+            }, { headers: corsHeaders });
         } else if (action === 'sync') {
             // 전체 동기화 (R2에서 한 번 가져와서 저장)
             // 이 작업은 관리자가 수동으로 실행
@@ -141,7 +188,8 @@ export async function POST(request: NextRequest) {
             } while (cursor);
 
             // KV에 저장
-            await kv.put('files:all', JSON.stringify({ files: syncedFiles }));
+            const version = currentVersion + 1;
+            await kv.put('files:all', JSON.stringify({ files: syncedFiles, version }));
             
             // 홈 캐시 삭제 (새 데이터 반영)
             await kv.delete('cache:home');
@@ -149,19 +197,22 @@ export async function POST(request: NextRequest) {
             return NextResponse.json({
                 success: true,
                 message: `Synced ${syncedFiles.length} files`,
-                count: syncedFiles.length
+                count: syncedFiles.length,
+                version
             }, { headers: corsHeaders });
         }
 
         // KV에 저장
-        await kv.put('files:all', JSON.stringify({ files: currentFiles }));
+        const version = currentVersion + 1;
+        await kv.put('files:all', JSON.stringify({ files: currentFiles, version }));
         
         // 홈 캐시 삭제 (새 데이터 반영)
         await kv.delete('cache:home');
 
         return NextResponse.json({
             success: true,
-            count: currentFiles.length
+            count: currentFiles.length,
+            version
         }, { headers: corsHeaders });
     } catch (error: any) {
         console.error('Update files error:', error);
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+HLS 다중 화질(ABR) 변환
+- 원본 해상도에 맞춰 화질 단계(1080p/720p/480p/360p + 오디오 전용) 선택 - 업스케일 없음
+- ffmpeg 한 번 실행: 한 번 디코딩 → split 필터로 나눠 화질별로 동시에 인코딩
+- 마스터 플레이리스트는 기존과 같은 hls/<영상명>/index.m3u8 (사이트/KV 경로 변경 없음),
+  화질별 플레이리스트와 세그먼트는 v1080p/, v720p/ ... vaudio/ 하위 폴더
+- 모든 화질의 키프레임을 10초 간격으로 맞춰 hls.js가 세그먼트 경계에서 화질 전환
+"""
+
+import os
+import shutil
+
+from progress import run_ffmpeg
+
+# 화질 단계: (세로 해상도, 영상 비트레이트, 최대 비트레이트)
+RUNGS = {
+    1080: ("5000k", "5500k"),
+    720: ("2800k", "3000k"),
+    480: ("1200k", "1300k"),
+    360: ("700k", "800k"),
+}
+DEFAULT_LADDER = (1080, 720, 480, "audio")
+AUDIO_BITRATE = "128k"
+# 오디오 전용 단계 비트레이트
+AUDIO_ONLY_BITRATE = "64k"
+HLS_SEGMENT_SECONDS = 10
+# hardware=True일 때 쓰는 GPU 인코더 (사용 여부는 encoders.encoder_works로 이 이름을 확인)
+H264_NVENC = "h264_nvenc"
+
+
+def parse_ladder(value):
+    """"1080,720,480,audio" → (1080, 720, 480, "audio")"""
+    rungs = []
+    for part in str(value).split(','):
+        part = part.strip().lower().rstrip('p')
+        if not part:
+            continue
+        if part in ("audio", "a"):
+            rungs.append("audio")
+        else:
+            height = int(part)
+            if height not in RUNGS:
+                raise ValueError(f"지원하지 않는 화질: {part} (가능: {', '.join(map(str, RUNGS))}, audio)")
+            rungs.append(height)
+    return tuple(rungs)
+
+
+def choose_rungs(ladder, source_height):
+    """원본보다 높은 화질은 제외 (원본이 가장 낮은 단계보다 작으면 원본 해상도 하나)"""
+    heights = sorted((r for r in ladder if r != "audio"), reverse=True)
+    if source_height:
+        usable = [h for h in heights if h <= source_height]
+        if not usable and heights:
+            usable = [source_height]
+        heights = usable
+    return heights, "audio" in ladder
+
+
+def video_encoder_args(index, height, hardware):
+    """화질 하나의 H.264 인코딩 옵션 (기기 호환성을 위해 ABR은 H.264 + TS)"""
+    bitrate, maxrate = RUNGS.get(height, RUNGS[min(RUNGS, key=lambda h: abs(h - height))])
+    codec = H264_NVENC if hardware else "libx264"
+    preset = "p4" if hardware else "veryfast"
+    return [
+        f"-c:v:{index}", codec,
+        f"-preset:v:{index}", preset,
+        f"-b:v:{index}", bitrate,
+        f"-maxrate:v:{index}", maxrate,
+        f"-bufsize:v:{index}", maxrate,
+    ]
+
+
+def build_abr_command(input_path, ladder, source_height, hardware=False, has_audio=True):
+    """ffmpeg ABR 명령어. 작업 폴더(HLS 출력 폴더)에서 실행하도록 출력은 상대 경로"""
+    heights, audio_only = choose_rungs(ladder, source_height)
+    if not has_audio:
+        audio_only = False
+
+    cmd = ["ffmpeg", "-y", "-i", input_path]
+
+    # 한 번 디코딩 → 화질 수만큼 split → 각각 축소
+    if heights:
+        labels = [f"[s{i}]" for i in range(len(heights))]
+        graph = f"[0:v]split={len(heights)}{''.join(labels)}"
+        for i, height in enumerate(heights):
+            graph += f";[s{i}]scale=-2:{height}[v{i}]"
+        cmd += ["-filter_complex", graph]
+
+    stream_map = []
+    audio_index = 0
+    for i, height in enumerate(heights):
+        cmd += ["-map", f"[v{i}]"]
+        entry = f"v:{i}"
+        if has_audio:
+            cmd += ["-map", "0:a:0"]
+            entry += f",a:{audio_index}"
+            audio_index += 1
+        stream_map.append(entry + f",name:{height}p")
+    if audio_only:
+        cmd += ["-map", "0:a:0"]
+        stream_map.append(f"a:{audio_index},name:audio")
+
+    for i, height in enumerate(heights):
+        cmd += video_encoder_args(i, height, hardware)
+    if heights:
+        cmd += [
+            # 모든 화질 키프레임 10초 간격 정렬 (화질 전환 지점)
+            "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+            "-sc_threshold", "0",
+        ]
+    if has_audio:
+        cmd += ["-c:a", "aac", "-b:a", AUDIO_BITRATE, "-ac", "2"]
+        if audio_only:
+            cmd += [f"-b:a:{audio_index}", AUDIO_ONLY_BITRATE]
+
+    cmd += [
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_list_size", "0",
+        "-hls_playlist_type", "vod",
+        "-master_pl_name", "index.m3u8",
+        "-var_stream_map", " ".join(stream_map),
+        "-hls_segment_filename", "v%v/seg_%03d.ts",
+        "v%v/index.m3u8",
+    ]
+    return cmd, heights, audio_only
+
+
+def convert_to_abr_hls(input_path, output_dir, ladder=DEFAULT_LADDER, source_height=None,
+                       hardware=False, has_audio=True, log=None, duration=None, progress=None):
+    """다중 화질 HLS 생성 (output_dir/index.m3u8 = 마스터 플레이리스트). 성공 여부 반환
+
+    hardware면 h264_nvenc로 인코딩하고, 실패하면 (GPU 세션 부족 등) libx264로 한 번 더.
+    progress: ffmpeg 진행률 콜백 (duration을 주면 percent/eta 포함)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cmd, heights, audio_only = build_abr_command(
+        os.path.abspath(input_path), ladder, source_height, hardware, has_audio)
+    if not heights and not audio_only:
+        return False
+    if log:
+        names = [f"{h}p" for h in heights] + (["오디오"] if audio_only else [])
+        log(f"  🎚️ 다중 화질 HLS: {', '.join(names)}")
+
+    # 화질별 폴더 (var_stream_map의 name이 %v 자리에 들어감) 미리 생성
+    variant_dirs = [os.path.join(output_dir, f"v{name}")
+                    for name in [f"{h}p" for h in heights] + (["audio"] if audio_only else [])]
+    for variant_dir in variant_dirs:
+        os.makedirs(variant_dir, exist_ok=True)
+
+    result = run_ffmpeg(cmd, on_progress=progress, duration=duration, cwd=output_dir)
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', errors='replace') if result.stderr else ''
+        if log:
+            log(f"  ⚠️ ffmpeg 다중 화질 HLS 오류: {stderr[-500:]}")
+        if hardware:
+            if log:
+                log(f"  ↩️ {H264_NVENC} 대신 libx264로 다시 변환")
+            # 중간에 멈춘 세그먼트가 섞이지 않도록 비우고 다시
+            for variant_dir in variant_dirs:
+                shutil.rmtree(variant_dir, ignore_errors=True)
+            return convert_to_abr_hls(input_path, output_dir, ladder, source_height, False, has_audio,
+                                      log, duration, progress)
+        return False
+    return os.path.exists(os.path.join(output_dir, "index.m3u8"))
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+R2 버킷 목록 색인 (로컬 SQLite)
+- 버킷 전체 키 트리를 크기/ETag와 함께 저장 → 카테고리/하위 폴더/파일 선택 목록을 바로 응답
+- 갱신은 백그라운드 스레드에서 목록 한 번 조회 후 바뀐 키만 반영
+- 업로드/변환/삭제 후에는 해당 폴더만 다시 조회 (refresh_async(prefix))
+- prefix 조회는 키 범위 검색 (key >= "폴더/" AND key < "폴더0")이라 버킷이 커도 빠름
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from jbch_common import STATE_DIR
+from storage import ObjectInfo, get_storage
+
+DEFAULT_BUCKET_INDEX_PATH = os.path.join(STATE_DIR, "bucket_index.sqlite")
+# 이보다 오래된 폴더 목록은 refresh_async(max_age=...)에서 다시 조회 (초)
+REFRESH_MAX_AGE = 10 * 60
+
+
+def key_range(prefix):
+    """prefix(폴더) 아래 키 범위 [시작, 끝) - '/' 다음 문자가 '0'"""
+    prefix = prefix.strip('/')
+    if not prefix:
+        return "", None
+    return prefix + "/", prefix + "0"
+
+
+class BucketIndex:
+    """R2 키 → (크기, ETag) 색인
+
+    objects: 키별 크기/ETag/부모 폴더, refreshed: 폴더(prefix)별 마지막 전체 조회 시각.
+    조회 메서드는 R2에 요청하지 않고 색인만 읽음 (목록이 비어 있으면 아직 갱신 전).
+    """
+
+    def __init__(self, path=DEFAULT_BUCKET_INDEX_PATH, storage=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                " key TEXT PRIMARY KEY,"
+                " parent TEXT NOT NULL,"
+                " size INTEGER NOT NULL DEFAULT 0,"
+                " etag TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS objects_parent ON objects (parent)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS refreshed ("
+                " prefix TEXT PRIMARY KEY,"
+                " refreshed_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    # ---------- 조회 ----------
+
+    def _rows(self, prefix, columns="key, size, etag"):
+        start, end = key_range(prefix)
+        with self._lock:
+            if end is None:
+                return self._conn.execute(f"SELECT {columns} FROM objects ORDER BY key").fetchall()
+            return self._conn.execute(
+                f"SELECT {columns} FROM objects WHERE key >= ? AND key < ? ORDER BY key", (start, end)
+            ).fetchall()
+
+    def objects(self, prefix=""):
+        """prefix 아래 모든 객체 ObjectInfo 목록 (key는 전체 경로)"""
+        return [ObjectInfo(key, size, etag) for key, size, etag in self._rows(prefix)]
+
+    def files(self, prefix="", recursive=False):
+        """prefix 아래 파일 ObjectInfo 목록 (key는 prefix 기준 상대 경로 - list_r2_files와 같은 형식)"""
+        base = prefix.strip('/')
+        if not recursive:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, size, etag FROM objects WHERE parent = ? ORDER BY key", (base,)
+                ).fetchall()
+        else:
+            rows = self._rows(base)
+        cut = len(base) + 1 if base else 0
+        return [ObjectInfo(key[cut:], size, etag) for key, size, etag in rows]
+
+    def dirs(self, prefix="", recursive=False):
+        """prefix 아래 폴더 이름 목록 (prefix 기준 상대 경로 - list_r2_dirs와 같은 형식)"""
+        base = prefix.strip('/')
+        start, end = key_range(base)
+        with self._lock:
+            if end is None:
+                parents = self._conn.execute("SELECT DISTINCT parent FROM objects").fetchall()
+            else:
+                parents = self._conn.execute(
+                    "SELECT DISTINCT parent FROM objects WHERE parent >= ? AND parent < ?", (start, end)
+                ).fetchall()
+        cut = len(base) + 1 if base else 0
+        found = set()
+        for (parent,) in parents:
+            if not parent or (base and not parent.startswith(start)):
+                continue
+            parts = parent[cut:].split('/')
+            if not recursive:
+                found.add(parts[0])
+                continue
+            # 중간 폴더도 포함 (a/b/c → a, a/b, a/b/c)
+            for depth in range(1, len(parts) + 1):
+                found.add('/'.join(parts[:depth]))
+        return sorted(found)
+
+    def sizes(self, prefix):
+        """폴더 바로 아래 파일별 크기 {파일명: bytes} (list_r2_sizes와 같은 형식)"""
+        return {f.key: f.size for f in self.files(prefix)}
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT size, etag FROM objects WHERE key = ?", (key,)).fetchone()
+        return ObjectInfo(key, row[0], row[1]) if row else None
+
+    def refreshed_at(self, prefix=""):
+        """prefix 목록을 마지막으로 조회한 시각 (버킷 전체 조회 포함, 없으면 None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(refreshed_at) FROM refreshed WHERE prefix IN (?, '')",
+                                     (prefix.strip('/'),)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM objects LIMIT 1").fetchone() is None
+
+    # ---------- 갱신 ----------
+
+    def apply_listing(self, prefix, objects):
+        """prefix 아래 목록을 새 조회 결과로 교체 (바뀐 키만 쓰기). (추가/변경 수, 삭제 수) 반환"""
+        current = {obj.key: (obj.size, obj.etag) for obj in self.objects(prefix)}
+        changed = [(obj.key, os.path.dirname(obj.key), obj.size, obj.etag) for obj in objects
+                   if current.get(obj.key) != (obj.size, obj.etag)]
+        listed = {obj.key for obj in objects}
+        removed = [(key,) for key in current if key not in listed]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO objects (key, parent, size, etag) VALUES (?, ?, ?, ?)", changed
+            )
+            self._conn.executemany("DELETE FROM objects WHERE key = ?", removed)
+            self._conn.execute("INSERT OR REPLACE INTO refreshed (prefix, refreshed_at) VALUES (?, ?)",
+                               (prefix.strip('/'), time.time()))
+            self._conn.commit()
+        return len(changed), len(removed)
+
+    def refresh(self, prefix=""):
+        """R2에서 prefix 아래(없으면 버킷 전체)를 다시 조회해 반영 → 성공 여부"""
+        storage = self.storage or get_storage()
+        prefix = prefix.strip('/')
+        objects = storage.list_objects(prefix + "/" if prefix else "")
+        if objects is None:
+            return False
+        self.apply_listing(prefix, objects)
+        return True
+
+    def refresh_async(self, prefix="", max_age=0, on_done=None):
+        """백그라운드 스레드에서 refresh. 같은 prefix 갱신이 이미 진행 중이거나 max_age초 안에
+        갱신했으면 건너뜀. 끝나면 on_done(성공 여부) 호출 (작업 스레드에서 - UI는 after로 넘길 것)"""
+        prefix = prefix.strip('/')
+        refreshed = self.refreshed_at(prefix)
+        if max_age and refreshed and time.time() - refreshed < max_age:
+            return None
+        with self._lock:
+            if prefix in self._refreshing:
+                return None
+            self._refreshing.add(prefix)
+
+        def run():
+            ok = False
+            try:
+                ok = self.refresh(prefix)
+            except Exception:
+                ok = False
+            finally:
+                with self._lock:
+                    self._refreshing.discard(prefix)
+            if on_done:
+                on_done(ok)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def record_put(self, key, size, etag=None):
+        """업로드한 객체 바로 반영 (다시 조회하지 않음)"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO objects (key, parent, size, etag) VALUES (?, ?, ?, ?)",
+                               (key, os.path.dirname(key), size, etag))
+            self._conn.commit()
+
+    def record_delete(self, keys):
+        """삭제한 객체 바로 반영"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM objects WHERE key = ?", [(key,) for key in keys])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_bucket_index():
+    """프로세스에서 함께 쓰는 버킷 색인"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BucketIndex()
+        return _index
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+R2 영상 일괄 삭제
+- 삭제할 키 전체(MP4, HLS 폴더의 세그먼트/init.mp4/플레이리스트, 썸네일/스프라이트/VTT)를 목록 조회로 먼저 모음
+  (폴더마다 한 번 조회 - 영상마다 조회하지 않음)
+- 모은 키를 DeleteObjects 묶음(최대 1000개)으로 나눠 여러 스레드에서 동시에 삭제
+- 객체별 결과를 모아 영상별로 보고하고, 삭제된 영상은 KVDelta(remove)로 넘김
+"""
+
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from jbch_core import hls_folder
+from kv_client import KVDelta
+from storage import DELETE_BATCH, get_storage
+from posters import sprite_key, thumbnail_key, vtt_key
+
+# 동시에 보낼 삭제 요청 수
+DELETE_WORKERS = 4
+
+
+class VideoDeletion:
+    """영상 하나의 삭제 결과 (keys: 이 영상에 속한 키, errors: 실패한 키 → 오류)"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.keys = [file_path]
+        self.errors = {}
+
+    @property
+    def deleted(self):
+        """MP4가 지워졌으면 사이트 목록에서도 제거 (HLS/썸네일 일부가 남아도)"""
+        return self.file_path not in self.errors
+
+    @property
+    def complete(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {
+            "file": self.file_path,
+            "keys": len(self.keys),
+            "deleted": self.deleted,
+            "errors": dict(self.errors),
+        }
+
+
+class BulkDeleteResult:
+    def __init__(self, videos):
+        self.videos = videos
+
+    @property
+    def deleted(self):
+        return [v for v in self.videos if v.deleted]
+
+    @property
+    def failed(self):
+        return [v for v in self.videos if not v.deleted]
+
+    @property
+    def incomplete(self):
+        """MP4는 지웠지만 HLS/썸네일 일부가 남은 영상"""
+        return [v for v in self.videos if v.deleted and not v.complete]
+
+    def deleted_keys(self):
+        return [key for v in self.videos for key in v.keys if key not in v.errors]
+
+    def kv_delta(self):
+        """삭제된 영상을 KV에서 제거하는 변경분"""
+        delta = KVDelta()
+        for v in self.deleted:
+            delta.remove(v.file_path)
+        return delta
+
+
+class BulkDeleter:
+    """여러 영상과 딸린 객체를 한 번에 삭제
+
+    index(BucketIndex)와 dedupe(ContentIndex)를 주면 삭제한 키/위치를 바로 반영.
+    목록 조회에 실패한 폴더의 영상은 지우지 않고 실패로 보고 (HLS만 남는 일이 없도록).
+    """
+
+    def __init__(self, storage=None, batch_size=DELETE_BATCH, workers=DELETE_WORKERS,
+                 index=None, dedupe=None, log=None):
+        self.storage = storage or get_storage()
+        self.batch_size = batch_size
+        self.workers = workers
+        self.index = index
+        self.dedupe = dedupe
+        self.log = log or (lambda message: None)
+
+    def list_keys(self, prefix, cache):
+        """prefix 아래 키 집합 (같은 prefix는 한 번만 조회, 실패 시 None)"""
+        if prefix not in cache:
+            objects = self.storage.list_objects(prefix)
+            cache[prefix] = None if objects is None else {obj.key for obj in objects}
+        return cache[prefix]
+
+    def gather(self, file_paths):
+        """영상별 VideoDeletion (keys 채움). 목록 조회에 실패한 영상은 errors에 기록"""
+        cache = {}
+        videos = []
+        for file_path in dict.fromkeys(file_paths):
+            video = VideoDeletion(file_path)
+            videos.append(video)
+            folder = posixpath.dirname(file_path)
+            hls_keys = self.list_keys(f"{folder}/hls/" if folder else "hls/", cache)
+            thumb_keys = self.list_keys(posixpath.dirname(thumbnail_key(file_path)) + "/", cache)
+            if hls_keys is None or thumb_keys is None:
+                video.errors[file_path] = "목록 조회 실패"
+                continue
+            hls_prefix = hls_folder(file_path) + "/"
+            video.keys += sorted(key for key in hls_keys if key.startswith(hls_prefix))
+            video.keys += [key for key in (thumbnail_key(file_path), sprite_key(file_path), vtt_key(file_path))
+                           if key in thumb_keys]
+        return videos
+
+    def run(self, file_paths):
+        """삭제 실행 → BulkDeleteResult"""
+        videos = self.gather(file_paths)
+        owner = {}
+        for video in videos:
+            if video.errors:
+                continue
+            for key in video.keys:
+                owner[key] = video
+        keys = list(owner)
+        batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        self.log(f"🗑️ 영상 {len(videos)}개, 객체 {len(keys)}개 삭제 중 ({len(batches)}개 요청)")
+
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                for batch, errors in zip(batches, executor.map(self.delete_batch, batches)):
+                    for key, error in errors.items():
+                        if key in owner:
+                            owner[key].errors[key] = error
+
+        result = BulkDeleteResult(videos)
+        if self.index is not None:
+            self.index.record_delete(result.deleted_keys())
+        if self.dedupe is not None:
+            for video in result.deleted:
+                self.dedupe.forget_remote(video.file_path)
+
+        for video in result.failed:
+            self.log(f"  ❌ {os.path.basename(video.file_path)}: {video.errors.get(video.file_path)}")
+        for video in result.incomplete:
+            key, error = next(iter(video.errors.items()))
+            self.log(f"  ⚠️ {os.path.basename(video.file_path)}: {len(video.errors)}개 객체 남음 (예: {key} - {error})")
+        return result
+
+    def delete_batch(self, keys):
+        try:
+            return self.storage.delete_keys(keys)
+        except Exception as e:
+            return {key: str(e) for key in keys}
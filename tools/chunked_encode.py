@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+긴 영상 구간 분할 병렬 인코딩
+- 원본을 HLS 세그먼트 길이(10초)의 배수 시각에서 구간(기본 60초)으로 나눔 → 구간마다 영상만 동시에 인코딩
+  (재인코딩이라 입력 쪽 -ss도 프레임 단위로 정확 - 원본 키프레임 위치와 무관하게 나눌 수 있음)
+- 오디오는 한 번만 인코딩 (구간 경계에서 AAC 프레임이 끊기지 않도록)
+- concat demuxer(-c copy)로 무손실 이어 붙인 뒤 오디오 합치기
+- 구간 안에서 10초마다 키프레임 강제 + 구간 시작도 10초 배수 → 전체 영상 기준 0, 10, 20...초마다 키프레임
+  → convert_to_hls(-c:v copy, -hls_time 10)가 이 키프레임에서 세그먼트를 나눔 (프레임 하나 이내 오차)
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from progress import run_ffmpeg
+
+# 구간 길이 목표 (초, HLS 세그먼트 10초의 배수)
+CHUNK_SECONDS = 60
+# HLS 세그먼트 길이 (convert_to_hls의 -hls_time과 같게)
+HLS_SEGMENT_SECONDS = 10
+# 이보다 짧은 영상은 분할하지 않음 (초)
+MIN_CHUNKED_DURATION = 10 * 60
+
+
+def plan_chunks(duration, chunk_seconds=CHUNK_SECONDS):
+    """(시작, 길이) 구간 목록. 경계는 chunk_seconds(HLS_SEGMENT_SECONDS 배수로 맞춤)마다,
+    마지막 구간이 chunk_seconds/4보다 짧으면 앞 구간에 합침"""
+    step = max(HLS_SEGMENT_SECONDS, round(chunk_seconds / HLS_SEGMENT_SECONDS) * HLS_SEGMENT_SECONDS)
+    boundaries = [0.0]
+    t = step
+    while duration - t > step / 4:
+        boundaries.append(float(t))
+        t += step
+    boundaries.append(duration)
+    return [(start, end - start) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def concat_list_line(path):
+    """concat demuxer 목록 한 줄 (작은따옴표 이스케이프)"""
+    return "file '" + path.replace("'", "'\\''") + "'\n"
+
+
+def chunked_compress(input_path, output_path, encoder, crf, maxrate, duration, has_audio=True,
+                     log=None, chunk_seconds=CHUNK_SECONDS, work_dir=None):
+    """구간 분할 병렬 인코딩. 성공 여부 반환 (길이를 모르거나 구간이 하나면 False → 일반 인코딩으로)
+
+    encoder.workers개 구간을 동시에 인코딩. 구간 파일은 work_dir(없으면 임시 폴더)에 만들고 끝나면 삭제.
+    """
+    log = log or (lambda message: None)
+    if not duration:
+        return False
+    chunks = plan_chunks(duration, chunk_seconds)
+    if len(chunks) < 2:
+        return False
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix="chunks_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        log(f"  🧩 {len(chunks)}개 구간으로 나눠 {encoder.workers}개씩 동시 인코딩")
+        # 구간 출력 시각(t)은 0부터 - 구간 시작이 10초 배수이므로 전체 영상 기준으로도 10초 배수마다 키프레임
+        keyframe_args = ["-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})"]
+
+        def encode_chunk(index):
+            start, length = chunks[index]
+            chunk_path = os.path.join(work_dir, f"chunk_{index:04d}.mp4")
+            cmd = encoder.build_command(input_path, chunk_path, crf, maxrate, start=start, duration=length,
+                                        audio=False, extra_args=keyframe_args)
+            result = run_ffmpeg(cmd)
+            return chunk_path if result.returncode == 0 and os.path.exists(chunk_path) else None
+
+        def encode_audio():
+            if not has_audio:
+                return None
+            audio_path = os.path.join(work_dir, "audio.m4a")
+            result = run_ffmpeg(["ffmpeg", "-y", "-i", input_path, "-vn", "-c:a", "aac", "-b:a", "128k", audio_path])
+            if result.returncode != 0:
+                return None
+            return audio_path
+
+        # 오디오는 별도 스레드에서 구간 인코딩과 동시에
+        with ThreadPoolExecutor(max_workers=1) as audio_pool, \
+                ThreadPoolExecutor(max_workers=encoder.workers) as executor:
+            audio_future = audio_pool.submit(encode_audio)
+            chunk_paths = list(executor.map(encode_chunk, range(len(chunks))))
+            audio_path = audio_future.result()
+
+        if not all(chunk_paths):
+            log(f"  ⚠️ 구간 인코딩 실패 ({sum(1 for p in chunk_paths if not p)}/{len(chunks)}개)")
+            return False
+        if has_audio and not audio_path:
+            log(f"  ⚠️ 오디오 인코딩 실패")
+            return False
+
+        list_path = os.path.join(work_dir, "chunks.txt")
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in chunk_paths:
+                f.write(concat_list_line(path))
+
+        # 이어 붙이기 (재인코딩 없음) + 오디오 합치기
+        cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+        cmd += ["-c", "copy", "-movflags", "+faststart", output_path]
+        result = run_ffmpeg(cmd)
+        return result.returncode == 0 and os.path.exists(output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+압축 여부 판단
+- probe 결과로 원본의 픽셀당 비트(bits per pixel)를 계산하고, 선택한 CQ로 인코딩했을 때
+  예상 크기를 추정해 건너뛰기 / 스트림 복사(컨테이너만 MP4로) / 재인코딩 중 하나를 선택
+- 선택 옵션: 영상 가운데 짧은 구간만 실제로 인코딩해 예상 크기를 보정 (샘플 인코딩)
+- 전체 NVENC 인코딩 후에야 결과가 더 크다는 걸 알게 되는 낭비를 줄임
+"""
+
+import os
+
+# CQ별 H.265 인코딩 결과의 대략적인 픽셀당 비트 (설교 영상 기준 - 정적인 화면 위주)
+TARGET_BPP = {"18": 0.10, "23": 0.06, "28": 0.035}
+# H.264 인코더(libx264)는 같은 화질에 H.265보다 비트가 더 필요
+H264_BPP_FACTOR = 1.5
+# 오디오 (AAC 128k)
+AUDIO_BITRATE = 128 * 1000
+# 예상 절감률이 이보다 작으면 압축하지 않음
+MIN_SAVINGS = 0.15
+# 샘플 인코딩 길이 (초) - 이보다 짧은 영상은 샘플 없이 추정
+SAMPLE_SECONDS = 20
+# 브라우저에서 바로 재생 가능한 코덱 (스트림 복사 대상)
+STREAMABLE_CODECS = ("h264", "hevc")
+
+
+def parse_bitrate(value):
+    """"4M" → 4000000"""
+    value = str(value).strip().upper()
+    units = {"K": 1000, "M": 1000 ** 2, "G": 1000 ** 3}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+class CompressionPlan:
+    """압축 판단 결과
+
+    action: "skip"(원본 그대로), "copy"(스트림 복사로 MP4 재포장), "encode"(재인코딩)
+    """
+
+    def __init__(self, action, reason, source_bytes=0, predicted_bytes=None, source_bpp=None):
+        self.action = action
+        self.reason = reason
+        self.source_bytes = source_bytes
+        self.predicted_bytes = predicted_bytes
+        self.source_bpp = source_bpp
+
+    @property
+    def savings(self):
+        """예상 절감률 (0~1, 알 수 없으면 None)"""
+        if not self.predicted_bytes or not self.source_bytes:
+            return None
+        return 1 - self.predicted_bytes / self.source_bytes
+
+    def to_dict(self):
+        return {
+            "action": self.action,
+            "reason": self.reason,
+            "source_bytes": self.source_bytes,
+            "predicted_bytes": self.predicted_bytes,
+            "source_bpp": self.source_bpp,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def predict_encoded_bytes(info, crf, maxrate, codec="hevc"):
+    """CQ와 최대 비트레이트로 인코딩 결과 크기 추정 (bytes, 정보 부족 시 None)"""
+    if not (info.width and info.height and info.duration):
+        return None
+    fps = info.fps or 30
+    bpp = TARGET_BPP.get(crf, TARGET_BPP["23"])
+    if codec == "h264":
+        bpp *= H264_BPP_FACTOR
+    video_bitrate = bpp * info.width * info.height * fps
+    # VBR 최대 비트레이트 제한
+    video_bitrate = min(video_bitrate, parse_bitrate(maxrate))
+    return int((video_bitrate + AUDIO_BITRATE) * info.duration / 8)
+
+
+def source_bits_per_pixel(info):
+    """원본 영상의 픽셀당 비트 (bits / (가로 × 세로 × fps))"""
+    bitrate = info.video_bit_rate or info.bit_rate
+    if not (bitrate and info.width and info.height):
+        return None
+    return round(bitrate / (info.width * info.height * (info.fps or 30)), 4)
+
+
+def plan_compression(file_path, info, crf="23", maxrate="4M", sample_encode=None, codec="hevc"):
+    """압축 방법 결정
+
+    info: probe.MediaInfo (None이면 크기만으로 판단할 수 없으므로 재인코딩)
+    codec: 인코딩 결과 코덱 ("hevc" 또는 "h264")
+    sample_encode(start, seconds) → 샘플 인코딩 결과 크기(bytes) 또는 None. 주면 예상 크기를 보정.
+    """
+    source_bytes = os.path.getsize(file_path)
+    is_mp4 = os.path.splitext(file_path)[1].lower() in (".mp4", ".m4v")
+
+    if info is None or not info.duration:
+        return CompressionPlan("encode", "영상 정보 없음", source_bytes)
+
+    bpp = source_bits_per_pixel(info)
+    predicted = predict_encoded_bytes(info, crf, maxrate, codec)
+
+    # 샘플 인코딩으로 보정: 가운데 구간 결과 크기를 전체 길이로 환산
+    if sample_encode and predicted and info.duration > SAMPLE_SECONDS * 3:
+        start = info.duration / 2 - SAMPLE_SECONDS / 2
+        sample_bytes = sample_encode(start, SAMPLE_SECONDS)
+        if sample_bytes:
+            predicted = int(sample_bytes * info.duration / SAMPLE_SECONDS)
+
+    plan = CompressionPlan("encode", "", source_bytes, predicted, bpp)
+    savings = plan.savings
+
+    if info.codec not in STREAMABLE_CODECS:
+        plan.reason = f"{info.codec} 코덱은 브라우저 재생 불가 - 재인코딩"
+        return plan
+
+    if savings is not None and savings < MIN_SAVINGS:
+        # 다시 인코딩해도 거의 줄지 않음 → 원본 화질 그대로
+        if not is_mp4 and info.codec in STREAMABLE_CODECS:
+            plan.action = "copy"
+            plan.reason = f"예상 절감 {max(savings, 0) * 100:.0f}% - 재인코딩 없이 MP4로 재포장"
+        else:
+            plan.action = "skip"
+            plan.reason = f"예상 절감 {max(savings, 0) * 100:.0f}% (압축 불필요)"
+        return plan
+
+    if savings is None:
+        plan.reason = "예상 크기 계산 불가"
+    else:
+        plan.reason = f"예상 {source_bytes / 1024 ** 2:.0f}MB → {predicted / 1024 ** 2:.0f}MB ({savings * 100:.0f}% 감소)"
+    return plan
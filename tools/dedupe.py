@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+내용 기반 중복 제거 색인
+- 원본의 샘플 해시(jbch_common.sampled_hash) → 압축본, HLS 세그먼트, R2에 이미 올라간 경로
+- 같은 설교가 다른 파일명으로 다시 들어오면 인코딩/업로드 대신 R2 서버 측 복사로 처리
+- 로컬 캐시(압축본, HLS 폴더)는 용량 상한을 넘으면 오래 안 쓴 것부터 삭제 (LRU)
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import threading
+
+from jbch_common import STATE_DIR
+
+DEFAULT_INDEX_PATH = os.path.join(STATE_DIR, "content_index.sqlite")
+DEFAULT_CACHE_DIR = os.path.join(STATE_DIR, "cache")
+# 로컬 캐시 용량 상한 (기본 30GB)
+DEFAULT_CACHE_BYTES = 30 * 1024 ** 3
+
+
+def dir_size(path):
+    """폴더 전체 크기 (bytes)"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ContentIndex:
+    """내용 해시 → 로컬 캐시 결과물 + R2 원격 경로 색인
+
+    sources: 해시별 로컬 캐시 (만든 설정, 압축본 경로, HLS 폴더, 캐시 크기, 마지막 사용 시각)
+    remotes: 해시별로 R2에 올라간 위치 (MP4, HLS 폴더, 썸네일). 한 해시에 여러 위치 가능.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " hash TEXT PRIMARY KEY,"
+                " variant TEXT,"
+                " codec TEXT,"
+                " compressed_path TEXT,"
+                " hls_dir TEXT,"
+                " cached_bytes INTEGER NOT NULL DEFAULT 0,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS remotes ("
+                " hash TEXT NOT NULL,"
+                " mp4_key TEXT NOT NULL,"
+                " hls_prefix TEXT,"
+                " thumb_key TEXT,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (hash, mp4_key))"
+            )
+            self._conn.commit()
+
+    def lookup(self, content_hash):
+        """해시에 해당하는 {"local": {...} 또는 None, "remotes": [...]} 반환 (사용 시각 갱신)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT variant, codec, compressed_path, hls_dir FROM sources WHERE hash = ?",
+                (content_hash,)
+            ).fetchone()
+            remotes = self._conn.execute(
+                "SELECT mp4_key, hls_prefix, thumb_key FROM remotes WHERE hash = ? ORDER BY created_at DESC",
+                (content_hash,)
+            ).fetchall()
+            if row:
+                self._conn.execute("UPDATE sources SET last_used = ? WHERE hash = ?", (time.time(), content_hash))
+                self._conn.commit()
+
+        local = None
+        if row:
+            variant, codec, compressed_path, hls_dir = row
+            local = {
+                "variant": variant,
+                "codec": codec,
+                # 캐시에서 지워졌으면 None
+                "compressed_path": compressed_path if compressed_path and os.path.exists(compressed_path) else None,
+                "hls_dir": hls_dir if hls_dir and os.path.exists(os.path.join(hls_dir, "index.m3u8")) else None,
+            }
+        return {
+            "local": local,
+            "remotes": [{"mp4_key": m, "hls_prefix": h, "thumb_key": t} for m, h, t in remotes],
+        }
+
+    def store_local(self, content_hash, variant=None, codec=None, compressed_path=None, hls_dir=None):
+        """압축본/HLS 폴더를 캐시로 옮기고 색인. 캐시 안의 새 경로 (압축본, HLS 폴더) 반환"""
+        target = os.path.join(self.cache_dir, content_hash)
+        os.makedirs(target, exist_ok=True)
+
+        cached_compressed = None
+        if compressed_path and os.path.exists(compressed_path):
+            cached_compressed = os.path.join(target, "compressed.mp4")
+            if os.path.abspath(compressed_path) != os.path.abspath(cached_compressed):
+                shutil.move(compressed_path, cached_compressed)
+
+        cached_hls = None
+        if hls_dir and os.path.exists(hls_dir):
+            cached_hls = os.path.join(target, "hls")
+            if os.path.abspath(hls_dir) != os.path.abspath(cached_hls):
+                shutil.rmtree(cached_hls, ignore_errors=True)
+                shutil.move(hls_dir, cached_hls)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (hash, variant, codec, compressed_path, hls_dir, cached_bytes, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, variant, codec, cached_compressed, cached_hls, dir_size(target), time.time())
+            )
+            self._conn.commit()
+
+        self.evict()
+        return cached_compressed, cached_hls
+
+    def add_remote(self, content_hash, mp4_key, hls_prefix=None, thumb_key=None):
+        """R2에 올라간 위치 기록"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO remotes (hash, mp4_key, hls_prefix, thumb_key, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (content_hash, mp4_key, hls_prefix, thumb_key, time.time())
+            )
+            self._conn.commit()
+
+    def forget_remote(self, mp4_key):
+        """R2에서 삭제된 위치를 색인에서 제거"""
+        with self._lock:
+            self._conn.execute("DELETE FROM remotes WHERE mp4_key = ?", (mp4_key,))
+            self._conn.commit()
+
+    def evict(self, max_bytes=None):
+        """캐시 총량이 상한을 넘으면 마지막 사용이 오래된 것부터 로컬 결과물 삭제"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash, cached_bytes FROM sources WHERE cached_bytes > 0 ORDER BY last_used"
+            ).fetchall()
+            total = sum(size for _, size in rows)
+            for content_hash, size in rows:
+                if total <= limit:
+                    break
+                shutil.rmtree(os.path.join(self.cache_dir, content_hash), ignore_errors=True)
+                # 원격 위치 기록은 남겨 둠 (서버 측 복사에는 로컬 파일이 필요 없음)
+                self._conn.execute(
+                    "UPDATE sources SET compressed_path = NULL, hls_dir = NULL, cached_bytes = 0 WHERE hash = ?",
+                    (content_hash,)
+                )
+                total -= size
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+영상 인코더 선택 (NVENC GPU → libx265 → libx264 CPU 순)
+- 시작 시 ffmpeg -encoders 목록 + 짧은 테스트 인코딩으로 실제 사용 가능한 인코더 확인
+  (NVIDIA GPU가 없는 PC/리눅스 서버에서는 NVENC가 목록에 있어도 테스트에서 실패)
+- CRF 프리셋(18/23/28)과 BITRATE_MAP을 인코더별 설정으로 변환
+- 처리량 모드: CPU 인코더는 코어 수에 맞춰 여러 파일을 동시에 인코딩
+"""
+
+import os
+import threading
+
+from jbch_common import run_command
+
+# NVENC CQ 값 → 비슷한 화질의 x265 / x264 CRF
+X265_CRF_MAP = {"18": "20", "23": "24", "28": "28"}
+X264_CRF_MAP = {"18": "19", "23": "22", "28": "26"}
+# CPU 인코딩 1개당 사용할 코어 수 (처리량 모드)
+CORES_PER_CPU_ENCODE = 4
+# NVENC 동시 세션 수 (일반 그래픽카드 드라이버 제한 이내)
+NVENC_MAX_SESSIONS = 3
+
+
+def section_args(start=None, duration=None):
+    """구간 지정 인자 (입력 앞 -ss: 키프레임 탐색이라 빠름)"""
+    args = []
+    if start is not None:
+        args += ["-ss", f"{start:.3f}"]
+    if duration is not None:
+        args += ["-t", f"{duration:.3f}"]
+    return args
+
+
+class Encoder:
+    """인코더 공통 인터페이스
+
+    name: ffmpeg 인코더 이름, codec: 결과 영상 코덱 (HLS 세그먼트 형식 결정용)
+    hardware: GPU 인코더 여부, workers: 동시에 실행할 인코딩 수
+    """
+
+    name = None
+    codec = None
+    label = None
+    hardware = False
+
+    def __init__(self, workers=1):
+        self.workers = workers
+
+    def video_args(self, crf, maxrate, threads=None):
+        raise NotImplementedError
+
+    def build_command(self, input_path, output_path, crf="23", maxrate="4M", start=None, duration=None,
+                      audio=True, extra_args=()):
+        """압축 ffmpeg 명령어 (VBR + 최대 비트레이트 제한, 오디오 AAC 128k)
+
+        audio=False면 영상만 (구간 분할 인코딩용), extra_args는 출력 옵션 앞에 추가.
+        """
+        threads = None
+        if not self.hardware and self.workers > 1:
+            # 동시 인코딩끼리 코어를 나눠 씀
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+        audio_args = ["-c:a", "aac", "-b:a", "128k"] if audio else ["-an"]
+        return [
+            "ffmpeg", "-y",
+            *self.input_args(),
+            *section_args(start, duration),
+            "-i", input_path,
+            *self.video_args(crf, maxrate, threads),
+            *extra_args,
+            *audio_args,
+            output_path
+        ]
+
+    def input_args(self):
+        return []
+
+
+class NvencEncoder(Encoder):
+    """NVIDIA GPU H.265 (동시 세션 수 제한으로 1개씩)"""
+
+    name = "hevc_nvenc"
+    codec = "hevc"
+    label = "H.265 NVENC"
+    hardware = True
+
+    def input_args(self):
+        return ["-hwaccel", "cuda"]
+
+    def video_args(self, crf, maxrate, threads=None):
+        return [
+            "-c:v", "hevc_nvenc",
+            "-preset", "p4",
+            "-rc", "vbr",
+            "-cq", crf,
+            "-maxrate", maxrate,
+            "-bufsize", maxrate,  # bufsize = maxrate와 동일
+        ]
+
+
+class X265Encoder(Encoder):
+    """CPU H.265 (libx265)"""
+
+    name = "libx265"
+    codec = "hevc"
+    label = "H.265 libx265 CPU"
+
+    def video_args(self, crf, maxrate, threads=None):
+        args = [
+            "-c:v", "libx265",
+            "-preset", "medium",
+            "-crf", X265_CRF_MAP.get(crf, crf),
+            "-maxrate", maxrate,
+            "-bufsize", maxrate,
+        ]
+        if threads:
+            args += ["-x265-params", f"pools={threads}:log-level=error"]
+        return args
+
+
+class X264Encoder(Encoder):
+    """CPU H.264 (libx264) - libx265가 없는 ffmpeg 빌드용"""
+
+    name = "libx264"
+    codec = "h264"
+    label = "H.264 libx264 CPU"
+
+    def video_args(self, crf, maxrate, threads=None):
+        args = [
+            "-c:v", "libx264",
+            "-preset", "medium",
+            "-crf", X264_CRF_MAP.get(crf, crf),
+            "-maxrate", maxrate,
+            "-bufsize", maxrate,
+        ]
+        if threads:
+            args += ["-threads", str(threads)]
+        return args
+
+
+# 선호 순서
+ENCODER_CLASSES = {
+    "nvenc": NvencEncoder,
+    "x265": X265Encoder,
+    "x264": X264Encoder,
+}
+
+_detected = None
+# 인코더 이름별 동작 여부 (encoder_works)
+_working = {}
+_detect_lock = threading.Lock()
+
+
+def listed_encoders():
+    """ffmpeg 빌드에 포함된 인코더 이름 집합"""
+    try:
+        result = run_command(["ffmpeg", "-hide_banner", "-encoders"], text=True)
+    except Exception:
+        return set()
+    if result.returncode != 0:
+        return set()
+    names = set()
+    for line in result.stdout.split('\n'):
+        parts = line.split()
+        # " V....D libx265   libx265 H.265 / HEVC" 형식
+        if len(parts) >= 2 and parts[0].startswith('V'):
+            names.add(parts[1])
+    return names
+
+
+def test_encode(name):
+    """작은 테스트 영상을 실제로 인코딩해 보고 성공 여부 반환 (GPU/드라이버 확인)"""
+    try:
+        result = run_command([
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", "color=black:size=256x256:rate=30:duration=0.2",
+            "-c:v", name, "-f", "null", "-"
+        ])
+    except Exception:
+        return False
+    return result.returncode == 0
+
+
+def detect_encoders():
+    """실제로 동작하는 인코더 키 목록 (선호 순, 한 번만 확인)"""
+    global _detected
+    with _detect_lock:
+        if _detected is None:
+            listed = listed_encoders()
+            _detected = [key for key, cls in ENCODER_CLASSES.items()
+                         if cls.name in listed and test_encode(cls.name)]
+        return list(_detected)
+
+
+def encoder_works(name):
+    """ffmpeg 인코더 이름 하나(예: h264_nvenc)가 실제로 동작하는지 (한 번만 확인)
+
+    NVENC는 GPU 세대에 따라 h264_nvenc만 되고 hevc_nvenc는 안 되는 경우가 있어
+    ENCODER_CLASSES와 다른 코덱을 쓰는 곳(abr_ladder.py)은 그 인코더를 따로 확인.
+    """
+    with _detect_lock:
+        if name not in _working:
+            _working[name] = name in listed_encoders() and test_encode(name)
+        return _working[name]
+
+
+def select_encoder(preferred="auto", parallel=False, sessions=False):
+    """사용할 인코더 반환 (없으면 None)
+
+    preferred: "auto" 또는 ENCODER_CLASSES 키. 지정한 인코더가 없으면 auto 순서로 대체.
+    parallel: 처리량 모드 - CPU 인코더면 코어 수에 맞춰 동시 인코딩 수를 늘림
+    (NVENC는 구간 분할 인코딩에서만 NVENC_MAX_SESSIONS개까지 - sessions=True).
+    """
+    available = detect_encoders()
+    if preferred in available:
+        key = preferred
+    elif available:
+        key = available[0]
+    else:
+        return None
+
+    cls = ENCODER_CLASSES[key]
+    workers = 1
+    if parallel and not cls.hardware:
+        workers = max(1, (os.cpu_count() or 1) // CORES_PER_CPU_ENCODE)
+    elif parallel and sessions:
+        workers = NVENC_MAX_SESSIONS
+    return cls(workers=workers)
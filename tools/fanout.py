@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+한 번 디코딩으로 압축 MP4 + HLS + 썸네일 동시 생성
+- 원본을 한 번만 읽어 인코딩한 영상 스트림을 tee 먹서로 MP4(다운로드용)와 HLS에 동시 기록
+- 같은 디코딩 결과를 split 필터로 나눠 1초 지점 프레임을 썸네일 JPEG로 저장
+- 압축 → HLS 변환 → 썸네일 순서로 파일을 세 번 읽던 것을 한 번으로 줄임
+
+출력 파일은 작업 폴더 기준 상대 경로로 지정 (tee 옵션 구분자 ':' '|'와 경로가 섞이지 않도록,
+HLS 플레이리스트의 init.mp4도 상대 경로로 기록됨).
+"""
+
+import os
+
+from progress import run_ffmpeg
+
+# convert_to_hls와 같은 세그먼트 길이
+HLS_SEGMENT_SECONDS = 10
+# 썸네일 시각 (초)
+POSTER_SECONDS = 1.0
+
+
+class FanoutResult:
+    """fanout_encode 결과 경로 (실패한 출력은 None)"""
+
+    def __init__(self, mp4_path=None, hls_dir=None, poster_path=None, error=None):
+        self.mp4_path = mp4_path
+        self.hls_dir = hls_dir
+        self.poster_path = poster_path
+        self.error = error
+
+    @property
+    def ok(self):
+        return bool(self.mp4_path and self.hls_dir)
+
+
+def hls_tee_options(codec):
+    """tee 먹서의 HLS 출력 옵션 (H.265는 fMP4 세그먼트, H.264는 TS)"""
+    options = [
+        "f=hls",
+        f"hls_time={HLS_SEGMENT_SECONDS}",
+        "hls_list_size=0",
+    ]
+    if codec == "hevc":
+        options += ["hls_segment_type=fmp4", "hls_fmp4_init_filename=init.mp4", "hls_segment_filename=seg_%03d.m4s"]
+    else:
+        options += ["hls_segment_filename=seg_%03d.ts"]
+    return ":".join(options)
+
+
+def fanout_encode(input_path, work_dir, encoder, crf, maxrate, poster=True, duration=None, progress=None):
+    """압축 MP4(work_dir/compressed.mp4), HLS(work_dir/hls/), 썸네일(work_dir/poster.jpg)을 한 번에 생성
+
+    ffmpeg는 work_dir/hls에서 실행하고 모든 출력은 상대 경로로 지정.
+    """
+    hls_dir = os.path.join(work_dir, "hls")
+    os.makedirs(hls_dir, exist_ok=True)
+
+    poster_at = POSTER_SECONDS
+    if duration and duration < POSTER_SECONDS * 2:
+        poster_at = duration / 2
+
+    # 디코딩 한 번 → [venc] 인코딩용, [vposter] 썸네일용
+    if poster:
+        filter_graph = (
+            "[0:v]split=2[venc][vposter];"
+            f"[vposter]select='gte(t\\,{poster_at:.3f})',scale=480:-1[poster]"
+        )
+    else:
+        filter_graph = "[0:v]null[venc]"
+
+    tee_outputs = "|".join([
+        "[f=mp4:movflags=+faststart]../compressed.mp4",
+        f"[{hls_tee_options(encoder.codec)}]index.m3u8",
+    ])
+
+    cmd = [
+        "ffmpeg", "-y",
+        *encoder.input_args(),
+        "-i", os.path.abspath(input_path),
+        "-filter_complex", filter_graph,
+        # 1) 인코딩 영상 + 오디오 → tee (MP4 + HLS)
+        "-map", "[venc]", "-map", "0:a?",
+        *encoder.video_args(crf, maxrate),
+        "-c:a", "aac",
+        "-b:a", "128k",
+        # tee로 여러 먹서에 쓸 때 코덱 헤더를 스트림 밖(extradata)에 두어야 MP4가 정상
+        "-flags", "+global_header",
+        "-f", "tee", tee_outputs,
+    ]
+    if poster:
+        # 2) 썸네일 한 장
+        cmd += ["-map", "[poster]", "-frames:v", "1", "-q:v", "3", "../poster.jpg"]
+
+    result = run_ffmpeg(cmd, on_progress=progress, duration=duration, cwd=hls_dir)
+
+    mp4_path = os.path.join(work_dir, "compressed.mp4")
+    poster_path = os.path.join(work_dir, "poster.jpg")
+    if result.returncode != 0 or not os.path.exists(mp4_path) or not os.path.exists(os.path.join(hls_dir, "index.m3u8")):
+        stderr = result.stderr.decode('utf-8', errors='replace') if result.stderr else ''
+        return FanoutResult(error=stderr[-500:])
+    return FanoutResult(
+        mp4_path=mp4_path,
+        hls_dir=hls_dir,
+        poster_path=poster_path if poster and os.path.exists(poster_path) else None,
+    )
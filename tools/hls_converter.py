@@ -9,28 +9,15 @@
 """
 
 import os
-import sys
-import subprocess
-import shutil
-import glob
-import tempfile
-import json
-import urllib.request
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 
-# Windows에서 subprocess 콘솔 창 숨기기
-if sys.platform == 'win32':
-    SUBPROCESS_FLAGS = subprocess.CREATE_NO_WINDOW
-else:
-    SUBPROCESS_FLAGS = 0
-
-# 설정
-R2_BUCKET = "r2:jbch-word-bank-videos"
-R2_PUBLIC_URL = "https://videos.haebomsoft.com"
-API_BASE_URL = "https://jbch.haebomsoft.com"
-VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+from jbch_core import HLSConverter, list_convertible_files
+from journal import Journal
+from ui_events import UIEventQueue
+from progress import STAGE_LABELS, format_progress
+from bucket_index import get_bucket_index
 
 
 class HLSConverterApp:
@@ -42,8 +29,15 @@ class HLSConverterApp:
         
         self.is_converting = False
         self.file_paths = []
+        # 카테고리/폴더/파일 목록은 로컬 색인에서 바로 (R2 조회는 백그라운드 갱신만)
+        self.index = get_bucket_index()
+        
+        # 작업 스레드의 로그/진행률은 큐를 거쳐 메인 루프에서 반영
+        self.ui = UIEventQueue(root)
         
         self.setup_ui()
+        self.ui.attach_log(self.log_text)
+        self.ui.start()
     
     def setup_ui(self):
         main_frame = ttk.Frame(self.root, padding="10")
@@ -103,6 +97,18 @@ class HLSConverterApp:
         self.sync_kv_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(option_frame, text="변환 완료 후 KV 자동 동기화", variable=self.sync_kv_var).pack(anchor=tk.W)
         
+        self.streaming_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="스트리밍 변환 (전체 다운로드 없이 변환하며 바로 업로드)", variable=self.streaming_var).pack(anchor=tk.W)
+        
+        self.resume_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text="중단된 작업 이어하기 (업로드까지 끝난 파일 건너뜀)", variable=self.resume_var).pack(anchor=tk.W)
+        
+        workers_frame = ttk.Frame(option_frame)
+        workers_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(workers_frame, text="동시 변환 수:").pack(side=tk.LEFT)
+        self.workers_var = tk.IntVar(value=2)
+        ttk.Spinbox(workers_frame, from_=1, to=16, textvariable=self.workers_var, width=5).pack(side=tk.LEFT, padx=(5, 0))
+        
         # 진행 상황
         progress_frame = ttk.LabelFrame(main_frame, text="4. 진행 상황", padding="10")
         progress_frame.pack(fill=tk.X, pady=(0, 10))
@@ -124,45 +130,46 @@ class HLSConverterApp:
         self.convert_btn = ttk.Button(btn_frame, text="🚀 HLS 변환 시작", command=self.start_convert)
         self.convert_btn.pack(side=tk.RIGHT, ipadx=20, ipady=5)
         
-        # 카테고리 로드
+        # 카테고리 로드 (색인 → 바로, R2 → 백그라운드 갱신 후 다시)
         self.load_categories()
+        self.refresh_index()
     
     def log(self, message):
-        self.log_text.configure(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.log_text.configure(state=tk.DISABLED)
-        self.root.update()
+        """로그 한 줄 (어느 스레드에서나 - 화면에는 다음 프레임에 반영)"""
+        self.ui.log(message)
+    
+    def set_progress(self, percent, status):
+        self.progress_var.set(percent)
+        self.status_label.configure(text=status)
+    
+    def set_status(self, status):
+        self.status_label.configure(text=status)
+    
+    def refresh_index(self, prefix=""):
+        """버킷 색인을 백그라운드에서 갱신 → 끝나면 UI 스레드에서 목록 다시 채움"""
+        def done(ok):
+            self.ui.call(self.on_index_refreshed, ok)
+        self.index.refresh_async(prefix, on_done=done)
+    
+    def on_index_refreshed(self, ok):
+        if not ok:
+            self.log("⚠️ R2 목록 갱신 실패 (저장된 목록 사용)")
+            return
+        self.load_categories()
+        category = self.category_var.get()
+        if category:
+            self.subfolder_combo['values'] = [""] + self.index.dirs(category, recursive=True)
     
     def load_categories(self):
-        try:
-            result = subprocess.run(
-                ["rclone", "lsf", R2_BUCKET, "--dirs-only"],
-                capture_output=True, text=True, encoding='utf-8',
-                creationflags=SUBPROCESS_FLAGS
-            )
-            if result.returncode == 0:
-                folders = [f.rstrip('/') for f in result.stdout.strip().split('\n') if f and not f.startswith('thumbnails')]
-                self.category_combo['values'] = folders
-        except Exception as e:
-            self.log(f"카테고리 로드 실패: {e}")
+        folders = [f for f in self.index.dirs() if not f.startswith('thumbnails')]
+        self.category_combo['values'] = folders
     
     def on_category_change(self, event=None):
         category = self.category_var.get()
         if not category:
             return
-        try:
-            result = subprocess.run(
-                ["rclone", "lsf", f"{R2_BUCKET}/{category}", "--dirs-only", "-R"],
-                capture_output=True, text=True, encoding='utf-8',
-                creationflags=SUBPROCESS_FLAGS
-            )
-            if result.returncode == 0:
-                subfolders = [f.rstrip('/') for f in result.stdout.strip().split('\n') if f]
-                self.subfolder_combo['values'] = [""] + subfolders
-                self.subfolder_var.set("")
-        except:
-            pass
+        self.subfolder_combo['values'] = [""] + self.index.dirs(category, recursive=True)
+        self.subfolder_var.set("")
     
     def load_files(self):
         category = self.category_var.get()
@@ -177,17 +184,11 @@ class HLSConverterApp:
         path = f"{category}/{subfolder}" if subfolder else category
         
         try:
-            result = subprocess.run(
-                ["rclone", "lsf", f"{R2_BUCKET}/{path}", "--files-only", "-R"],
-                capture_output=True, text=True, encoding='utf-8',
-                creationflags=SUBPROCESS_FLAGS
-            )
-            if result.returncode == 0:
-                files = [f for f in result.stdout.strip().split('\n') 
-                         if f and f.lower().endswith(VIDEO_EXTENSIONS) and '/seg_' not in f and '.m3u8' not in f]
+            files = list_convertible_files(path, index=self.index)
+            if files is not None:
                 for f in files:
-                    self.file_listbox.insert(tk.END, f)
-                    self.file_paths.append(f"{path}/{f}")
+                    self.file_listbox.insert(tk.END, f[len(path) + 1:])
+                    self.file_paths.append(f)
                 
                 self.file_count_label.configure(text=f"파일: {len(files)}개")
                 
@@ -224,156 +225,46 @@ class HLSConverterApp:
         thread.start()
     
     def convert_files(self, files):
-        total = len(files)
-        success = 0
-        failed = 0
-        
-        self.log(f"HLS 변환 시작: {total}개 파일")
-        
-        for i, remote_path in enumerate(files):
-            filename = os.path.basename(remote_path)
-            name_without_ext = os.path.splitext(filename)[0]
-            remote_dir = os.path.dirname(remote_path)
-            
-            self.status_label.configure(text=f"[{i+1}/{total}] {filename}")
-            self.progress_var.set((i / total) * 100)
-            
-            try:
-                # 1. R2에서 MP4 다운로드
-                self.log(f"[{i+1}/{total}] {filename} 다운로드 중...")
-                temp_dir = tempfile.mkdtemp(prefix="hls_conv_")
-                local_mp4 = os.path.join(temp_dir, filename)
-                
-                result = subprocess.run(
-                    ["rclone", "copy", f"{R2_BUCKET}/{remote_path}", temp_dir],
-                    capture_output=True, text=False,
-                    creationflags=SUBPROCESS_FLAGS
-                )
-                
-                if result.returncode != 0 or not os.path.exists(local_mp4):
-                    self.log(f"  ❌ 다운로드 실패")
-                    failed += 1
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    continue
-                
-                file_size_mb = os.path.getsize(local_mp4) / (1024 * 1024)
-                self.log(f"  📥 다운로드 완료 ({file_size_mb:.0f}MB)")
-                
-                # 2. HLS 변환
-                self.log(f"  🔄 HLS 변환 중...")
-                self.status_label.configure(text=f"[{i+1}/{total}] {filename} HLS 변환 중...")
-                
-                hls_dir = os.path.join(temp_dir, "hls")
-                os.makedirs(hls_dir, exist_ok=True)
-                m3u8_path = os.path.join(hls_dir, "index.m3u8")
-                
-                cmd = [
-                    "ffmpeg", "-y",
-                    "-i", local_mp4,
-                    "-c:v", "copy",
-                    "-c:a", "aac",
-                    "-b:a", "128k",
-                    "-hls_time", "10",
-                    "-hls_list_size", "0",
-                    "-hls_segment_filename", os.path.join(hls_dir, "seg_%03d.ts"),
-                    "-f", "hls",
-                    m3u8_path
-                ]
-                
-                conv_result = subprocess.run(
-                    cmd, capture_output=True, text=False,
-                    creationflags=SUBPROCESS_FLAGS
-                )
-                
-                if conv_result.returncode != 0 or not os.path.exists(m3u8_path):
-                    self.log(f"  ❌ HLS 변환 실패")
-                    failed += 1
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    continue
-                
-                ts_files = glob.glob(os.path.join(hls_dir, "*.ts"))
-                self.log(f"  ✅ HLS 변환 완료 (m3u8 + {len(ts_files)}개 세그먼트)")
-                
-                # 3. HLS 파일 업로드
-                self.log(f"  📤 HLS 업로드 중...")
-                self.status_label.configure(text=f"[{i+1}/{total}] {filename} HLS 업로드 중...")
-                
-                hls_remote_path = f"{remote_dir}/hls/{name_without_ext}"
-                upload_result = subprocess.run(
-                    ["rclone", "copy", hls_dir, f"{R2_BUCKET}/{hls_remote_path}/",
-                     "--transfers", "8", "--checkers", "16"],
-                    capture_output=True, text=False,
-                    creationflags=SUBPROCESS_FLAGS
-                )
-                
-                if upload_result.returncode != 0:
-                    self.log(f"  ❌ HLS 업로드 실패")
-                    failed += 1
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    continue
-                
-                self.log(f"  ✅ HLS 업로드 완료")
-                
-                # 4. 원본 MP4 삭제
-                if self.delete_original_var.get():
-                    self.log(f"  🗑️ 원본 MP4 삭제 중...")
-                    del_result = subprocess.run(
-                        ["rclone", "deletefile", f"{R2_BUCKET}/{remote_path}"],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    if del_result.returncode == 0:
-                        self.log(f"  ✅ 원본 삭제 완료")
-                    else:
-                        self.log(f"  ⚠️ 원본 삭제 실패 (수동 삭제 필요)")
-                
-                # 임시 파일 정리
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                
-                success += 1
-                self.log(f"  ✅ 완료!")
-                
-            except Exception as e:
-                self.log(f"  ❌ 오류: {e}")
-                failed += 1
-        
-        self.progress_var.set(100)
-        
-        # 5. KV 동기화
-        if self.sync_kv_var.get() and success > 0:
-            self.log("🔄 KV 동기화 중...")
-            self.status_label.configure(text="KV 동기화 중...")
-            try:
-                data = json.dumps({"action": "sync"}).encode('utf-8')
-                req = urllib.request.Request(
-                    f"{API_BASE_URL}/api/videos/files",
-                    data=data,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'JBCH-HLS-Converter/1.0'
-                    },
-                    method='POST'
-                )
-                with urllib.request.urlopen(req, timeout=60) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    if result.get('success'):
-                        count = result.get('count', 0)
-                        self.log(f"✅ KV 동기화 완료! ({count}개 파일)")
-                    else:
-                        self.log(f"⚠️ KV 동기화 실패")
-            except Exception as e:
-                self.log(f"⚠️ KV 동기화 오류: {e}")
-        
-        self.status_label.configure(text=f"완료! 성공: {success}개, 실패: {failed}개")
+        converter = HLSConverter(
+            delete_original=self.delete_original_var.get(),
+            sync_kv=self.sync_kv_var.get(),
+            workers=self.workers_var.get(),
+            streaming="http" if self.streaming_var.get() else None,
+            journal=Journal() if self.resume_var.get() else None,
+            emit=self.on_job_event,
+        )
+        success, failed = converter.run(files)
+        # 변환한 폴더 목록만 다시 조회 (HLS 추가/원본 삭제 반영)
+        for prefix in sorted({os.path.dirname(f) for f in files}):
+            self.refresh_index(prefix)
+        
+        self.ui.update("progress", self.set_progress, 100, f"완료! 성공: {success}개, 실패: {failed}개")
         self.log(f"\n========================================")
         self.log(f"HLS 변환 완료! 성공: {success}개, 실패: {failed}개")
         self.log(f"========================================")
         
+        self.ui.call(self.finish_converting)
+        self.ui.call(messagebox.showinfo, "완료", f"HLS 변환 완료!\n성공: {success}개\n실패: {failed}개")
+    
+    def finish_converting(self):
+        """변환 종료: 메인 스레드에서 버튼과 작업 중 표시를 함께 되돌림"""
         self.is_converting = False
         self.convert_btn.configure(state=tk.NORMAL)
-        
-        messagebox.showinfo("완료", f"HLS 변환 완료!\n성공: {success}개\n실패: {failed}개")
-
+    
+    def on_job_event(self, event):
+        """코어 작업 이벤트를 로그/진행률 위젯에 반영"""
+        kind = event["event"]
+        if kind == "log":
+            self.log(event["message"])
+        elif kind == "file":
+            filename = os.path.basename(event["file"])
+            self.ui.update("progress", self.set_progress, (event["done"] / event["total"]) * 100,
+                           f"[{event['done']}/{event['total']}] {filename} 처리 완료")
+        elif kind == "stage_progress":
+            # ffmpeg/다운로드 진행률 (파일 하나 안에서의 진행 - 프레임마다 마지막 값만 표시)
+            filename = os.path.basename(event["file"])
+            self.ui.update("stage", self.set_status,
+                           f"{STAGE_LABELS.get(event['stage'], event['stage'])} {filename} {format_progress(event)}")
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+R2 영상 스트리밍 HLS 변환 (전체 다운로드 없음)
+- 원본을 HTTP(R2_PUBLIC_URL, Range 요청) 또는 rclone cat 파이프로 ffmpeg에 바로 입력
+- 완성된 세그먼트는 변환이 끝나기 전에 바로 업로드 후 로컬에서 삭제
+- 로컬 디스크에는 세그먼트 몇 개만 남음
+- ffmpeg는 progress.run_ffmpeg로 실행 (진행률 이벤트, 특수문자 로컬 경로 처리 - safe_path.py)
+
+source_url 기준 주소를 바꾸면 로컬 파일 서버(python -m http.server 등)로도 동작.
+source="local"이면 로컬 폴더(base_url 자리에 폴더 경로)의 파일을 바로 입력 (R2 없이 흐름 확인용).
+"""
+
+import os
+import time
+import subprocess
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from jbch_common import R2_BUCKET, R2_PUBLIC_URL, SUBPROCESS_FLAGS
+from progress import run_ffmpeg
+
+# 세그먼트 업로드 동시 실행 수
+SEGMENT_UPLOAD_WORKERS = 4
+# 출력 폴더 확인 주기 (초)
+POLL_INTERVAL = 0.5
+
+
+def source_url(remote_path, base_url=None):
+    """R2 경로 → 공개 URL (한글/공백 등은 퍼센트 인코딩)"""
+    base = (base_url or R2_PUBLIC_URL).rstrip('/')
+    return f"{base}/{urllib.parse.quote(remote_path)}"
+
+
+def local_source_path(remote_path, base_dir=None):
+    """R2 경로 → 로컬 폴더 안 파일 경로 (base_dir가 없으면 remote_path를 로컬 경로로 봄)"""
+    if not base_dir:
+        return remote_path
+    return os.path.join(base_dir, *remote_path.strip('/').split('/'))
+
+
+def read_playlist_segments(m3u8_path):
+    """플레이리스트에 등록된(= 완성된) 세그먼트 파일명 목록"""
+    try:
+        with open(m3u8_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    return [line.strip() for line in lines if line.strip() and not line.startswith('#')]
+
+
+class StreamingRemux:
+    """원본을 스트리밍으로 읽으며 HLS 변환, 완성된 세그먼트는 즉시 업로드
+
+    upload(local_path, name)은 성공 여부(bool)를 반환하는 콜백.
+    source는 "http"(Range 요청으로 moov가 뒤에 있는 파일도 처리) 또는
+    "rclone"(rclone cat 파이프, faststart MP4만 가능) 또는 "local"(base_url = 로컬 폴더).
+    """
+
+    def __init__(self, upload, source="http", base_url=None, log=None):
+        self.upload = upload
+        self.source = source
+        self.base_url = base_url
+        self.log = log or (lambda message: None)
+
+    def build_input(self, remote_path):
+        """ffmpeg 입력 인자와 stdin으로 연결할 프로세스(rclone cat) 반환"""
+        if self.source == "rclone":
+            feeder = subprocess.Popen(
+                ["rclone", "cat", f"{R2_BUCKET}/{remote_path}"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                creationflags=SUBPROCESS_FLAGS
+            )
+            return ["-i", "pipe:0"], feeder
+        if self.source == "local":
+            return ["-i", local_source_path(remote_path, self.base_url)], None
+        url = source_url(remote_path, self.base_url)
+        # 일시적인 네트워크 오류 시 같은 위치부터 다시 읽기
+        return ["-reconnect", "1", "-reconnect_on_network_error", "1", "-i", url], None
+
+    def run(self, remote_path, hls_dir, progress=None, duration=None):
+        """변환 + 업로드. (성공 여부, 세그먼트 수, 첫 세그먼트 업로드까지 걸린 초) 반환
+
+        progress: ffmpeg 진행률 콜백 (progress.run_ffmpeg와 같음), duration(초)을 주면 percent/eta 계산.
+        """
+        os.makedirs(hls_dir, exist_ok=True)
+        m3u8_path = os.path.join(hls_dir, "index.m3u8")
+        input_args, feeder = self.build_input(remote_path)
+
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            *input_args,
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-hls_time", "10",
+            "-hls_list_size", "0",
+            # 세그먼트를 .tmp로 쓰고 완성되면 이름 변경 → 플레이리스트에 있으면 완성본
+            "-hls_flags", "temp_file",
+            "-hls_segment_filename", os.path.join(hls_dir, "seg_%03d.ts"),
+            "-f", "hls",
+            m3u8_path
+        ]
+
+        started = time.time()
+        # run_ffmpeg(진행률 + 특수문자 경로 처리)는 끝날 때까지 막히므로 별도 스레드에서,
+        # 이 스레드는 완성된 세그먼트를 찾아 업로드
+        outcome = []
+        runner = threading.Thread(target=lambda: outcome.append(run_ffmpeg(
+            cmd, on_progress=progress, duration=duration, stdin=feeder.stdout if feeder else subprocess.DEVNULL)),
+            daemon=True)
+        runner.start()
+
+        submitted = set()
+        futures = []
+        first_upload = []
+        lock = threading.Lock()
+
+        def upload_segment(name):
+            local_path = os.path.join(hls_dir, name)
+            ok = self.upload(local_path, name)
+            if ok:
+                with lock:
+                    if not first_upload:
+                        first_upload.append(time.time() - started)
+                try:
+                    os.remove(local_path)
+                except OSError:
+                    pass
+            return ok
+
+        with ThreadPoolExecutor(max_workers=SEGMENT_UPLOAD_WORKERS) as executor:
+            while True:
+                finished = not runner.is_alive()
+                for name in read_playlist_segments(m3u8_path):
+                    if name not in submitted:
+                        submitted.add(name)
+                        futures.append(executor.submit(upload_segment, name))
+                if finished:
+                    break
+                time.sleep(POLL_INTERVAL)
+            segments_ok = all(f.result() for f in futures)
+
+        runner.join()
+        if feeder:
+            # ffmpeg가 먼저 끝난 경우 rclone이 쓰기에서 멈추지 않도록 부모 쪽 파이프도 닫음
+            feeder.stdout.close()
+            feeder.wait()
+
+        result = outcome[0] if outcome else None
+        if result is None or result.returncode != 0 or not os.path.exists(m3u8_path):
+            message = result.stderr.decode('utf-8', errors='replace') if result and result.stderr else ""
+            self.log(f"  ⚠️ ffmpeg 스트리밍 변환 오류: {message[-500:]}")
+            return False, len(submitted), None
+
+        if not segments_ok:
+            self.log(f"  ⚠️ 세그먼트 업로드 실패")
+            return False, len(submitted), None
+
+        # 모든 세그먼트가 올라간 뒤 플레이리스트를 마지막에 업로드 (재생 가능 시점 = 완성 시점)
+        if not self.upload(m3u8_path, "index.m3u8"):
+            self.log(f"  ⚠️ 플레이리스트 업로드 실패")
+            return False, len(submitted), None
+
+        return True, len(submitted), first_upload[0] if first_upload else None
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+HLS 결과물 검증 (원본 삭제 전)
+- 플레이리스트를 파싱해 끝 표시(EXT-X-ENDLIST), 세그먼트 수, EXTINF 합계를 원본 길이(ffprobe)와 비교
+- 플레이리스트가 참조하는 파일(세그먼트, init.mp4, 하위 플레이리스트)마다 로컬 크기와
+  업로드 응답(ObjectInfo)의 크기/ETag를 비교 - 다시 내려받지 않음
+  (단일 요청 업로드의 ETag = 내용 MD5, 멀티파트 ETag("-N")는 크기만 비교)
+- "m3u8가 있다" 대신 이 검증을 통과해야 원본 삭제
+"""
+
+import os
+import math
+import hashlib
+import posixpath
+import threading
+
+from storage import ObjectInfo
+
+# EXTINF 합계와 원본 길이 허용 오차 (초, 원본 길이 비율 중 큰 값)
+DURATION_TOLERANCE = 1.0
+DURATION_TOLERANCE_RATIO = 0.01
+PLAYLIST_NAME = "index.m3u8"
+HASH_CHUNK = 1024 * 1024
+
+
+class MediaPlaylist:
+    """m3u8 파싱 결과 (마스터 플레이리스트면 variants에 하위 플레이리스트 경로)"""
+
+    def __init__(self):
+        self.segments = []
+        self.init = None
+        self.target_duration = None
+        self.ended = False
+        self.variants = []
+
+    @property
+    def duration(self):
+        return sum(seconds for _, seconds in self.segments)
+
+    @classmethod
+    def parse(cls, text):
+        playlist = cls()
+        pending = None
+        stream_inf = False
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            if line.startswith("#EXTINF:"):
+                try:
+                    pending = float(line[len("#EXTINF:"):].split(',', 1)[0])
+                except ValueError:
+                    pending = 0.0
+            elif line.startswith("#EXT-X-TARGETDURATION:"):
+                try:
+                    playlist.target_duration = float(line.split(':', 1)[1])
+                except ValueError:
+                    pass
+            elif line.startswith("#EXT-X-MAP:"):
+                for attr in line[len("#EXT-X-MAP:"):].split(','):
+                    if attr.startswith("URI="):
+                        playlist.init = attr[4:].strip('"')
+            elif line.startswith("#EXT-X-STREAM-INF"):
+                stream_inf = True
+            elif line == "#EXT-X-ENDLIST":
+                playlist.ended = True
+            elif not line.startswith('#'):
+                if stream_inf:
+                    playlist.variants.append(line)
+                    stream_inf = False
+                else:
+                    playlist.segments.append((line, pending if pending is not None else 0.0))
+                pending = None
+        return playlist
+
+
+def file_md5(path):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def etag_matches(etag, md5):
+    """ETag와 로컬 MD5 비교 (비교할 수 없는 ETag - 없음/멀티파트 - 는 None)"""
+    etag = (etag or "").strip().strip('"').lower()
+    if not etag or '-' in etag or md5 is None:
+        return None
+    return etag == md5
+
+
+class UploadedFile:
+    """업로드한 파일 하나 (local_size/md5가 None이면 로컬 파일 없이 원격 정보만 있음 - 이어하기)"""
+
+    def __init__(self, local_size=None, md5=None, remote=None):
+        self.local_size = local_size
+        self.md5 = md5
+        self.remote = remote
+
+
+class UploadLedger:
+    """HLS 폴더 기준 상대 경로 → UploadedFile. 여러 스레드에서 기록해도 안전"""
+
+    def __init__(self):
+        self.files = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, local_path, info):
+        """업로드 직후 기록 (로컬 파일을 지우기 전에 호출)"""
+        entry = UploadedFile(os.path.getsize(local_path), file_md5(local_path), info)
+        with self._lock:
+            self.files[name] = entry
+
+    def record_remote(self, name, info):
+        with self._lock:
+            self.files[name] = UploadedFile(remote=info)
+
+    def add_dir(self, local_dir, prefix, objects):
+        """폴더를 통째로 올린 경우: 로컬 파일마다 objects({전체 키: ObjectInfo})에서 업로드 응답을 찾아 기록"""
+        for root, dirs, names in os.walk(local_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, local_dir).replace(os.sep, '/')
+                self.record(rel, path, objects.get(f"{prefix}/{rel}"))
+
+    def get(self, name):
+        with self._lock:
+            return self.files.get(name)
+
+
+class VerifyResult:
+    def __init__(self):
+        self.errors = []
+        self.segments = 0
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {"ok": self.ok, "segments": self.segments, "seconds": round(self.seconds, 3),
+                "errors": list(self.errors)}
+
+
+def duration_tolerance(duration):
+    return max(DURATION_TOLERANCE, duration * DURATION_TOLERANCE_RATIO)
+
+
+class HLSVerifier:
+    """read_playlist(상대 경로) → 텍스트(없으면 None), ledger(UploadLedger)로 HLS 폴더 하나 검증
+
+    duration(원본 길이, 초)을 모르면 길이 비교는 건너뜀.
+    """
+
+    def __init__(self, read_playlist, ledger, duration=None):
+        self.read_playlist = read_playlist
+        self.ledger = ledger
+        self.duration = duration
+
+    def run(self, name=PLAYLIST_NAME):
+        result = VerifyResult()
+        self.check_file(name, result)
+        text = self.read_playlist(name)
+        if text is None:
+            result.errors.append(f"{name}: 플레이리스트를 읽을 수 없음")
+            return result
+        playlist = MediaPlaylist.parse(text)
+        if playlist.variants:
+            # 마스터 플레이리스트: 화질별로 각각 원본 길이와 맞아야 함
+            for variant in playlist.variants:
+                sub = self.check_media(posixpath.join(posixpath.dirname(name), variant))
+                result.errors += sub.errors
+                result.segments += sub.segments
+                result.seconds = max(result.seconds, sub.seconds)
+            return result
+        sub = self.check_media(name, playlist)
+        result.errors += sub.errors
+        result.segments, result.seconds = sub.segments, sub.seconds
+        return result
+
+    def check_media(self, name, playlist=None):
+        result = VerifyResult()
+        if playlist is None:
+            self.check_file(name, result)
+            text = self.read_playlist(name)
+            if text is None:
+                result.errors.append(f"{name}: 플레이리스트를 읽을 수 없음")
+                return result
+            playlist = MediaPlaylist.parse(text)
+
+        base = posixpath.dirname(name)
+        result.segments = len(playlist.segments)
+        result.seconds = playlist.duration
+        if not playlist.ended:
+            result.errors.append(f"{name}: EXT-X-ENDLIST 없음 (변환이 끝나지 않음)")
+        if not playlist.segments:
+            result.errors.append(f"{name}: 세그먼트 없음")
+        if playlist.init:
+            self.check_file(posixpath.join(base, playlist.init), result)
+        for uri, _ in playlist.segments:
+            self.check_file(posixpath.join(base, uri), result)
+
+        if self.duration:
+            tolerance = duration_tolerance(self.duration)
+            if abs(playlist.duration - self.duration) > tolerance:
+                result.errors.append(
+                    f"{name}: 세그먼트 길이 합계 {playlist.duration:.1f}초 ≠ 원본 {self.duration:.1f}초")
+            if playlist.target_duration and playlist.segments:
+                expected = math.ceil(max(0.0, self.duration - tolerance) / playlist.target_duration)
+                if len(playlist.segments) < expected:
+                    result.errors.append(
+                        f"{name}: 세그먼트 {len(playlist.segments)}개 (최소 {expected}개 필요)")
+        return result
+
+    def check_file(self, name, result):
+        """업로드 응답의 크기/ETag가 로컬 파일과 같은지"""
+        entry = self.ledger.get(name)
+        if entry is None or entry.remote is None:
+            result.errors.append(f"{name}: 업로드 기록 없음")
+            return
+        remote = entry.remote
+        if entry.local_size is None:
+            if not remote.size:
+                result.errors.append(f"{name}: 원격 파일 크기 0")
+            return
+        if entry.local_size == 0:
+            result.errors.append(f"{name}: 빈 파일")
+        if remote.size != entry.local_size:
+            result.errors.append(f"{name}: 원격 크기 {remote.size} ≠ 로컬 {entry.local_size}")
+        elif etag_matches(remote.etag, entry.md5) is False:
+            result.errors.append(f"{name}: ETag 불일치 (내용이 다르게 업로드됨)")
+
+
+def local_reader(hls_dir):
+    """로컬 HLS 폴더에서 플레이리스트 읽기"""
+    def read(name):
+        try:
+            with open(os.path.join(hls_dir, *name.split('/')), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+    return read
+
+
+def check_local_hls(hls_dir, duration=None):
+    """업로드 전 로컬 HLS 폴더 검증 → VerifyResult (로컬 파일 크기를 업로드 응답 대신 사용)"""
+    ledger = UploadLedger()
+    for root, dirs, names in os.walk(hls_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, hls_dir).replace(os.sep, '/')
+            size = os.path.getsize(path)
+            ledger.files[rel] = UploadedFile(size, None, ObjectInfo(rel, size))
+    return HLSVerifier(local_reader(hls_dir), ledger, duration).run()
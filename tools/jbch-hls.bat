@@ -0,0 +1,4 @@
+@echo off
+rem jbch-hls: same as "python jbch_cli.py hls ..."
+python "%~dp0jbch_cli.py" hls %*
+exit /b %ERRORLEVEL%
@@ -0,0 +1,4 @@
+@echo off
+rem jbch-upload: same as "python jbch_cli.py upload ..."
+python "%~dp0jbch_cli.py" upload %*
+exit /b %ERRORLEVEL%
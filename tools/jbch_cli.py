@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+JBCH Word Bank 업로더 / HLS 변환 명령줄 도구 (GUI 없음)
+- jbch-upload: 로컬 파일/폴더/매니페스트 → R2 업로드
+- jbch-hls: R2의 기존 MP4 → HLS 변환
+- thumbnails: 썸네일 없는 기존 영상의 썸네일 일괄 생성
+- 진행 상황은 stdout에 JSON Lines로 출력
+
+사용 예:
+    python jbch_cli.py upload --dest 성인/2024 --compress D:/sermons
+    python jbch_cli.py hls --prefix 성인/2024
+    python jbch_cli.py thumbnails --prefix 성인
+    tools/jbch-upload, tools/jbch-hls (Windows는 .bat) 래퍼 = upload / hls 하위 명령
+    (jbch-upload / jbch-hls 이름으로 링크해도 하위 명령 없이 실행 가능)
+
+종료 코드: 0 = 전체 성공, 1 = 일부/전체 실패, 2 = 잘못된 인자 또는 대상 없음
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+
+from jbch_core import HLSConverter, Uploader, collect_video_files, list_convertible_files
+from journal import Journal
+from dedupe import ContentIndex
+from abr_ladder import DEFAULT_LADDER, parse_ladder
+from thumbnails import THUMBNAIL_WORKERS, ThumbnailBackfill
+from workspace import Workspace
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+_print_lock = threading.Lock()
+
+
+def print_event(event):
+    """이벤트 하나를 JSON 한 줄로 출력"""
+    line = json.dumps(event, ensure_ascii=False)
+    with _print_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def load_manifest(path):
+    """매니페스트 읽기. (경로, 대상 폴더 또는 None) 목록 반환
+
+    - .json: ["경로", ...] 또는 [{"path": ..., "dest": ...}, ...]
+             또는 {"dest": ..., "files": [...]}
+    - 그 외: 한 줄에 경로 하나 (빈 줄, # 주석 무시)
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+        else:
+            return [(line.strip(), None) for line in f
+                    if line.strip() and not line.strip().startswith('#')]
+
+    default_dest = None
+    if isinstance(data, dict):
+        default_dest = data.get("dest")
+        data = data.get("files", [])
+
+    entries = []
+    for entry in data:
+        if isinstance(entry, str):
+            entries.append((entry, default_dest))
+        else:
+            entries.append((entry["path"], entry.get("dest", default_dest)))
+    return entries
+
+
+def run_upload(args):
+    entries = [(path, args.dest) for path in args.paths]
+    if args.manifest:
+        entries += [(path, dest or args.dest) for path, dest in load_manifest(args.manifest)]
+
+    jobs = []
+    for path, dest in entries:
+        if not dest:
+            print_event({"event": "error", "message": f"업로드 경로(--dest)가 없습니다: {path}"})
+            return EXIT_USAGE
+        for file_path in collect_video_files([path]):
+            jobs.append((file_path, dest.strip('/')))
+
+    if not jobs:
+        print_event({"event": "error", "message": "업로드할 영상 파일이 없습니다."})
+        return EXIT_USAGE
+
+    uploader = Uploader(
+        compress=args.compress,
+        crf=args.quality,
+        thumbnail=not args.no_thumbnail,
+        journal=None if args.no_resume else Journal(),
+        dedupe=None if args.no_dedupe else ContentIndex(max_bytes=int(args.cache_gb * 1024 ** 3)),
+        sample_encode=args.sample_encode,
+        encoder=args.encoder,
+        parallel_encodes=args.parallel_encodes,
+        chunked=args.chunked,
+        fanout=args.fanout,
+        abr=args.abr,
+        sprites=args.sprites,
+        workspace=Workspace(max_bytes=int(args.max_temp_gb * 1024 ** 3)),
+        emit=print_event,
+    )
+    completed, failed = uploader.run(jobs)
+    return EXIT_OK if not failed else EXIT_FAILED
+
+
+def run_hls(args):
+    files = list(args.paths)
+    if args.manifest:
+        files += [path for path, _ in load_manifest(args.manifest)]
+    for prefix in args.prefix:
+        listed = list_convertible_files(prefix.strip('/'))
+        if listed is None:
+            print_event({"event": "error", "message": f"R2 목록 조회 실패: {prefix}"})
+            return EXIT_FAILED
+        files += listed
+    files = list(dict.fromkeys(files))
+
+    if not files:
+        print_event({"event": "error", "message": "변환할 파일이 없습니다."})
+        return EXIT_USAGE
+
+    converter = HLSConverter(
+        delete_original=not args.keep_original,
+        sync_kv=not args.no_sync,
+        workers=args.workers,
+        max_temp_bytes=int(args.max_temp_gb * 1024 ** 3),
+        streaming=args.stream,
+        source_url=args.source_url,
+        journal=None if args.no_resume else Journal(),
+        emit=print_event,
+    )
+    success, failed = converter.run(files)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({"success": success, "failed": failed, "files": converter.results},
+                      f, ensure_ascii=False, indent=2)
+    return EXIT_OK if not failed else EXIT_FAILED
+
+
+def run_thumbnails(args):
+    backfill = ThumbnailBackfill(workers=args.workers, base_url=args.source_url, sprites=args.sprites,
+                                 emit=print_event)
+    keys = backfill.find_missing(args.prefix)
+    if keys is None:
+        print_event({"event": "error", "message": "R2 목록 조회 실패"})
+        return EXIT_FAILED
+    if args.dry_run:
+        print_event({"event": "missing", "total": len(keys), "files": keys})
+        return EXIT_OK
+    success, failed = backfill.run(keys)
+    return EXIT_OK if not failed else EXIT_FAILED
+
+
+def add_upload_arguments(parser):
+    parser.add_argument("paths", nargs="*", help="업로드할 영상 파일 또는 폴더")
+    parser.add_argument("--dest", help="R2 업로드 경로 (예: 성인/2024)")
+    parser.add_argument("--manifest", help="업로드 목록 파일 (.json 또는 줄 단위 텍스트)")
+    parser.add_argument("--compress", action="store_true", help="자동 압축 (NVENC, 없으면 CPU 인코더)")
+    parser.add_argument("--quality", choices=["18", "23", "28"], default="23", help="압축 CRF (기본 23)")
+    parser.add_argument("--sample-encode", action="store_true", help="영상 일부를 먼저 인코딩해 압축 여부 판단")
+    parser.add_argument("--encoder", choices=["auto", "nvenc", "x265", "x264"], default="auto",
+                        help="압축 인코더 (기본 auto: NVENC → libx265 → libx264 중 사용 가능한 것)")
+    parser.add_argument("--parallel-encodes", action="store_true",
+                        help="CPU 인코더일 때 코어 수에 맞춰 여러 파일 동시 압축")
+    parser.add_argument("--chunked", action="store_true",
+                        help="10분 이상 영상은 키프레임 구간으로 나눠 동시에 인코딩 후 이어 붙이기")
+    parser.add_argument("--fanout", action="store_true",
+                        help="재인코딩할 영상은 한 번 디코딩으로 압축 MP4 + HLS + 썸네일 동시 생성")
+    parser.add_argument("--abr", nargs="?", type=parse_ladder, const=DEFAULT_LADDER, metavar="LADDER",
+                        help="다중 화질 HLS (예: 1080,720,480,audio - 원본보다 높은 화질은 제외, 값 생략 시 이 구성)")
+    parser.add_argument("--no-thumbnail", action="store_true", help="썸네일 생성 안 함")
+    parser.add_argument("--sprites", action="store_true", help="탐색용 스프라이트 시트 + WebVTT 썸네일 트랙도 생성")
+    parser.add_argument("--no-resume", action="store_true", help="작업 기록을 쓰지 않고 처음부터 처리")
+    parser.add_argument("--no-dedupe", action="store_true", help="같은 내용의 영상도 다시 압축/업로드")
+    parser.add_argument("--cache-gb", type=float, default=30, help="압축본/HLS 캐시 용량 상한 GB (기본 30)")
+    parser.add_argument("--max-temp-gb", type=float, default=20, help="임시 작업 폴더 사용 상한 GB (기본 20)")
+    parser.set_defaults(func=run_upload)
+
+
+def add_hls_arguments(parser):
+    parser.add_argument("paths", nargs="*", help="변환할 R2 영상 경로")
+    parser.add_argument("--prefix", action="append", default=[], help="이 R2 폴더 아래 영상 전체 변환 (여러 번 지정 가능)")
+    parser.add_argument("--manifest", help="변환 목록 파일 (.json 또는 줄 단위 텍스트)")
+    parser.add_argument("--keep-original", action="store_true", help="변환 후 원본 MP4 유지")
+    parser.add_argument("--no-sync", action="store_true", help="변환 후 KV 동기화 안 함")
+    parser.add_argument("--workers", type=int, default=4, help="동시 변환 파일 수 (기본 4)")
+    parser.add_argument("--no-resume", action="store_true", help="작업 기록을 쓰지 않고 처음부터 처리")
+    parser.add_argument("--max-temp-gb", type=float, default=20, help="임시 디스크 사용 상한 GB (기본 20)")
+    parser.add_argument("--report", help="파일별 결과를 저장할 JSON 경로")
+    parser.add_argument("--stream", choices=["http", "rclone", "local"],
+                        help="다운로드 없이 스트리밍 변환 (http: 공개 URL Range 읽기, rclone: rclone cat 파이프, "
+                             "local: 로컬 폴더의 파일 - 확인용)")
+    parser.add_argument("--source-url",
+                        help="스트리밍 원본 기준 URL (기본 R2_PUBLIC_URL, 로컬 파일 서버로 대체 가능). "
+                             "--stream local이면 폴더 (기본 JBCH_STORAGE=local: 폴더)")
+    parser.set_defaults(func=run_hls)
+
+
+def add_thumbnail_arguments(parser):
+    parser.add_argument("--prefix", action="append", default=[], help="이 R2 폴더 아래 영상만 (여러 번 지정 가능, 기본 전체)")
+    parser.add_argument("--workers", type=int, default=THUMBNAIL_WORKERS,
+                        help=f"동시 처리 영상 수 (기본 {THUMBNAIL_WORKERS})")
+    parser.add_argument("--source-url", help="영상 원본 기준 URL (기본 R2_PUBLIC_URL)")
+    parser.add_argument("--sprites", action="store_true",
+                        help="탐색용 스프라이트 시트 + WebVTT도 생성 (영상 전체를 읽음)")
+    parser.add_argument("--dry-run", action="store_true", help="썸네일 없는 영상 목록만 출력")
+    parser.set_defaults(func=run_thumbnails)
+
+
+def build_parser(prog=None):
+    # jbch-upload / jbch-hls 이름으로 실행되면 하위 명령 없이 바로 해당 기능
+    if prog and prog.startswith("jbch-upload"):
+        parser = argparse.ArgumentParser(prog="jbch-upload", description="로컬 영상을 R2에 업로드")
+        add_upload_arguments(parser)
+        return parser
+    if prog and prog.startswith("jbch-hls"):
+        parser = argparse.ArgumentParser(prog="jbch-hls", description="R2의 기존 영상을 HLS로 변환")
+        add_hls_arguments(parser)
+        return parser
+
+    parser = argparse.ArgumentParser(prog="jbch", description="JBCH Word Bank 업로드/변환 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    add_upload_arguments(subparsers.add_parser("upload", help="로컬 영상을 R2에 업로드"))
+    add_hls_arguments(subparsers.add_parser("hls", help="R2의 기존 영상을 HLS로 변환"))
+    add_thumbnail_arguments(subparsers.add_parser("thumbnails", help="썸네일 없는 기존 영상의 썸네일 생성"))
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser(os.path.basename(sys.argv[0]))
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print_event({"event": "error", "message": "중단됨"})
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
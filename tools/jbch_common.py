@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+JBCH 도구 공통 설정 및 유틸리티
+- 모든 도구 모듈이 함께 쓰는 R2/API 설정값과 외부 명령 실행 함수
+"""
+
+import os
+import sys
+import hashlib
+import subprocess
+
+# Windows에서 subprocess 콘솔 창 숨기기
+if sys.platform == 'win32':
+    SUBPROCESS_FLAGS = subprocess.CREATE_NO_WINDOW
+else:
+    SUBPROCESS_FLAGS = 0
+
+# 설정
+R2_BUCKET = "r2:jbch-word-bank-videos"
+R2_PUBLIC_URL = "https://videos.haebomsoft.com"
+API_BASE_URL = "https://jbch.haebomsoft.com"  # 배포된 사이트 URL
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+
+
+def run_command(cmd, text=False, cwd=None):
+    """콘솔 창 없이 외부 명령 실행 (cwd: 작업 폴더 - 출력 파일을 상대 경로로 지정할 때)"""
+    if text:
+        return subprocess.run(
+            cmd, capture_output=True, text=True, encoding='utf-8',
+            creationflags=SUBPROCESS_FLAGS, cwd=cwd
+        )
+    return subprocess.run(
+        cmd, capture_output=True, text=False,
+        creationflags=SUBPROCESS_FLAGS, cwd=cwd
+    )
+
+
+# 작업 기록/캐시 저장 위치 (환경 변수 JBCH_STATE_DIR로 변경 가능)
+STATE_DIR = os.environ.get("JBCH_STATE_DIR") or os.path.join(os.path.expanduser("~"), ".jbch")
+
+# 샘플 해시: 파일 앞/중간/끝에서 읽는 크기
+HASH_SAMPLE_BYTES = 1024 * 1024
+
+
+def sampled_hash(path):
+    """파일 크기 + 앞/중간/끝 1MB로 계산한 빠른 내용 해시 (수 GB 파일도 3MB만 읽음)"""
+    size = os.path.getsize(path)
+    h = hashlib.sha256()
+    h.update(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= HASH_SAMPLE_BYTES * 3:
+            h.update(f.read())
+        else:
+            for offset in (0, size // 2, size - HASH_SAMPLE_BYTES):
+                f.seek(offset)
+                h.update(f.read(HASH_SAMPLE_BYTES))
+    return h.hexdigest()[:32]
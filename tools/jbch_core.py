@@ -0,0 +1,1336 @@
+# -*- coding: utf-8 -*-
+"""
+JBCH Word Bank 업로드/HLS 변환 공용 코어 (GUI 없음)
+- ffprobe 코덱 확인, 압축 (NVENC 또는 CPU 인코더), HLS 변환
+- R2 업로드/삭제/목록 조회 (storage.py)
+- KV 등록 및 동기화
+- Tk 앱(uploader.py, hls_converter.py)과 CLI(jbch_cli.py)가 함께 사용
+"""
+
+import os
+import threading
+import shutil
+import glob
+import hashlib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from jbch_common import VIDEO_EXTENSIONS, sampled_hash
+from pipeline import Pipeline, Stage
+from hls_stream import StreamingRemux, local_source_path, source_url
+from probe import probe, probe_url
+from compression import CompressionPlan, plan_compression
+from chunked_encode import MIN_CHUNKED_DURATION, chunked_compress
+from fanout import fanout_encode
+from abr_ladder import H264_NVENC, convert_to_abr_hls
+from encoders import encoder_works, select_encoder
+from storage import StorageError, get_storage, join_key
+from upload_scheduler import UploadScheduler
+from kv_client import KVBatch, KVDelta, file_record, sync_kv_changes
+from progress import StageStats, run_ffmpeg
+from hls_verify import HLSVerifier, UploadLedger, check_local_hls, local_reader
+from posters import make_poster, make_sprite, sprite_key, thumbnail_key, vtt_key
+from workspace import DEFAULT_WORKSPACE_BYTES, Workspace
+
+# 파이프라인 단계별 워커 수 (압축은 인코더에 따라 정해짐 - NVENC 1개, CPU 처리량 모드는 코어 수 기준)
+STAGE_WORKERS = {
+    "compress": 1,
+    "hls": 2,
+    "upload": 2,
+    "thumbnail": 2,
+    "register": 1,
+}
+
+# CRF별 비트레이트 제한
+# CRF 18: 고화질 - 8Mbps / CRF 23: 균형 - 4Mbps / CRF 28: 용량우선 - 2Mbps
+BITRATE_MAP = {"18": "8M", "23": "4M", "28": "2M"}
+
+# 스트리밍 변환 시 파일당 예약량 (세그먼트 몇 개 분량)
+STREAMING_RESERVE_BYTES = 64 * 1024 ** 2
+# 썸네일/스프라이트 등 작은 결과물만 만드는 작업의 예약량
+SMALL_RESERVE_BYTES = 16 * 1024 ** 2
+
+
+def collect_video_files(paths):
+    """파일/폴더 경로 목록에서 영상 파일 목록 수집 (폴더는 재귀 탐색)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                        files.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            files.append(path)
+    # 중복 제거 (순서 유지)
+    return list(dict.fromkeys(files))
+
+
+# ============================================================
+# ffprobe / ffmpeg
+# ============================================================
+
+def get_video_codec(file_path):
+    """영상 코덱 확인 (probe 캐시 사용)"""
+    info = probe(file_path)
+    return info.codec if info else "unknown"
+
+
+def media_duration(path):
+    """진행률 계산용 영상 길이 (초, 모르면 None)"""
+    info = probe(path)
+    return info.duration if info else None
+
+
+def compress_video(input_path, output_path, crf="23", start=None, duration=None, encoder=None, progress=None):
+    """영상 압축 (encoder 미지정 시 사용 가능한 인코더 자동 선택 - encoders.py)
+
+    start/duration을 주면 해당 구간만 인코딩 (샘플 인코딩용)
+    progress: ffmpeg 진행률 콜백 (progress.py의 FfmpegProgress를 받음)
+    """
+    encoder = encoder or select_encoder()
+    if encoder is None:
+        return False
+    maxrate = BITRATE_MAP.get(crf, "4M")
+    cmd = encoder.build_command(input_path, output_path, crf, maxrate, start=start, duration=duration)
+    if progress and duration is None:
+        duration = media_duration(input_path)
+    result = run_ffmpeg(cmd, on_progress=progress, duration=duration)
+    return result.returncode == 0
+
+
+def remux_to_mp4(input_path, output_path, progress=None):
+    """재인코딩 없이 MP4로 재포장 (영상 스트림 복사, moov 앞으로)"""
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-c:v", "copy",
+        "-c:a", "aac",
+        "-b:a", "128k",
+        "-movflags", "+faststart",
+        output_path
+    ]
+    duration = media_duration(input_path)
+    result = run_ffmpeg(cmd, on_progress=progress, duration=duration)
+    return result.returncode == 0
+
+
+def sample_compressed_size(input_path, sample_path, crf, start, seconds, encoder=None):
+    """영상 일부 구간만 sample_path로 압축해 결과 크기(bytes) 반환 (실패 시 None, 결과 파일은 삭제)"""
+    try:
+        if compress_video(input_path, sample_path, crf, start=start, duration=seconds, encoder=encoder) and os.path.exists(sample_path):
+            return os.path.getsize(sample_path)
+    finally:
+        try:
+            os.remove(sample_path)
+        except OSError:
+            pass
+    return None
+
+
+def convert_to_hls(input_path, output_dir, codec="h264", log=None, progress=None, area=None):
+    """MP4를 HLS(m3u8 + ts/fmp4)로 변환. H.265는 fMP4 세그먼트 사용 (TS는 HEVC 미지원)
+
+    area(workspace.Area)를 주면 특수문자가 있는 입력은 그 폴더에 연결해 사용 (safe_path.py - 복사 안 함).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    m3u8_path = os.path.join(output_dir, "index.m3u8")
+
+    is_hevc = codec.lower() in ("hevc", "h265", "h.265")
+
+    if is_hevc:
+        # fMP4 세그먼트: H.265 호환 (iOS Safari 지원)
+        # init_filename을 output_dir 전체 경로로 지정
+        init_path = os.path.join(output_dir, "init.mp4")
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", input_path,
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-hls_time", "10",
+            "-hls_list_size", "0",
+            "-hls_segment_type", "fmp4",
+            "-hls_fmp4_init_filename", init_path,
+            "-hls_segment_filename", os.path.join(output_dir, "seg_%03d.m4s"),
+            "-f", "hls",
+            m3u8_path
+        ]
+    else:
+        # TS 세그먼트: H.264 (기존 방식)
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", input_path,
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-hls_time", "10",
+            "-hls_list_size", "0",
+            "-hls_segment_filename", os.path.join(output_dir, "seg_%03d.ts"),
+            "-f", "hls",
+            m3u8_path
+        ]
+
+    duration = media_duration(input_path)
+    # ffmpeg는 경로 내 쉼표(,) 등 특수문자를 옵션 구분자로 해석하므로 run_ffmpeg가 입력을 안전한 경로로 연결
+    result = run_ffmpeg(cmd, on_progress=progress, duration=duration, link_dir=area.path if area else None)
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', errors='replace') if result.stderr else ''
+        if log:
+            log(f"  ⚠️ ffmpeg HLS 오류: {stderr[-500:]}")
+        return False
+
+    # fMP4: m3u8 내의 init.mp4 전체 경로를 상대 경로로 수정
+    if is_hevc and os.path.exists(m3u8_path):
+        with open(m3u8_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        # 전체 경로를 상대 경로 "init.mp4"로 치환
+        init_abs = os.path.join(output_dir, "init.mp4").replace('\\', '/')
+        content = content.replace(init_abs, "init.mp4")
+        init_abs_win = os.path.join(output_dir, "init.mp4")
+        content = content.replace(init_abs_win, "init.mp4")
+        with open(m3u8_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    # 플레이리스트 끝 표시, 세그먼트 파일, 길이 합계 확인 (m3u8만 있고 세그먼트가 잘린 경우 실패)
+    check = check_local_hls(output_dir, duration)
+    if not check.ok:
+        if log:
+            log(f"  ⚠️ HLS 결과물 검증 실패: {'; '.join(check.errors[:3])}")
+        return False
+    return True
+
+
+# ============================================================
+# R2 저장소 (storage.py - S3 API 직접 호출, 인증 정보가 없으면 rclone)
+# ============================================================
+
+def upload_hls_files(hls_dir, remote_path, log=None):
+    """HLS 파일들을 R2에 업로드 (하위 폴더 포함, 파일별 재시도, 플레이리스트는 마지막)"""
+    scheduler = UploadScheduler(log=log)
+    scheduler.add_dir(hls_dir, remote_path)
+    return scheduler.run()
+
+
+def upload_file(local_path, remote_path):
+    """단일 파일을 R2의 지정 경로로 업로드"""
+    return get_storage().put_file(local_path, remote_path) is not None
+
+
+def upload_to_dir(local_path, remote_dir):
+    """단일 파일을 R2 폴더에 원래 파일명으로 업로드"""
+    return upload_file(local_path, join_key(remote_dir, os.path.basename(local_path)))
+
+
+def copy_remote_file(src_path, dst_path):
+    """R2 안에서 파일 복사 (서버 측 복사 - 로컬로 내려받지 않음)"""
+    return get_storage().copy(src_path, dst_path)
+
+
+def copy_remote_dir(src_dir, dst_dir):
+    """R2 안에서 폴더 복사 (서버 측 복사 - 로컬로 내려받지 않음)"""
+    return get_storage().copy_prefix(src_dir, dst_dir)
+
+
+def list_r2_dirs(path="", recursive=False):
+    """R2 폴더 목록 조회 (실패 시 None)"""
+    listing = get_storage().list_dir(path, recursive=recursive)
+    if listing is None:
+        return None
+    return listing[0]
+
+
+def list_r2_files(path, recursive=False):
+    """R2 파일 목록 조회 (path 기준 상대 경로, 실패 시 None)"""
+    listing = get_storage().list_dir(path, recursive=recursive)
+    if listing is None:
+        return None
+    return [f.key for f in listing[1]]
+
+
+def list_convertible_files(path, index=None):
+    """HLS 변환 대상 영상 목록 (이미 HLS로 변환된 세그먼트/플레이리스트 제외)
+
+    index(BucketIndex)를 주면 R2 대신 로컬 색인에서 조회.
+    """
+    if index is not None:
+        files = [f.key for f in index.files(path, recursive=True)]
+    else:
+        files = list_r2_files(path, recursive=True)
+    if files is None:
+        return None
+    return [f"{path}/{f}" for f in files
+            if f.lower().endswith(VIDEO_EXTENSIONS) and '/seg_' not in f and '.m3u8' not in f]
+
+
+def download_file(remote_path, local_dir, progress=None):
+    """R2 파일을 로컬 폴더로 다운로드 (progress: 전송 진행률 콜백 - TransferProgress를 받음)"""
+    return get_storage().get_file(remote_path, os.path.join(local_dir, os.path.basename(remote_path)),
+                                  progress=progress)
+
+
+def delete_file(remote_path):
+    """R2 파일 삭제"""
+    return get_storage().delete(remote_path)
+
+
+def hls_folder(file_path):
+    """영상 경로 → HLS 폴더 경로 (같은 폴더의 hls/영상명)"""
+    name_without_ext = os.path.splitext(os.path.basename(file_path))[0]
+    dir_path = os.path.dirname(file_path)
+    return f"{dir_path}/hls/{name_without_ext}" if dir_path else f"hls/{name_without_ext}"
+
+
+# ============================================================
+# KV (사이트 API)
+# ============================================================
+
+def media_fields(path):
+    """KV 항목에 넣을 영상 정보 {size, duration, codec} (probe 실패 시 크기만)"""
+    fields = {"size": os.path.getsize(path)}
+    info = probe(path)
+    if info:
+        if info.duration:
+            fields["duration"] = round(info.duration, 1)
+        if info.codec:
+            fields["codec"] = info.codec
+    return fields
+
+
+# ============================================================
+# 작업 (GUI/CLI 공용)
+# ============================================================
+
+class Job:
+    """이벤트 콜백으로 진행 상황을 알리는 작업 베이스
+
+    emit에는 {"event": 종류, ...} 형태의 dict가 전달됨.
+    - log: message
+    - start: total
+    - file: file, ok, stage, error, done, total
+    - stage_progress: file, stage, percent, fps, speed, bytes_per_sec, eta, done 등 (progress.py)
+    - summary: success, failed, stages (단계별 처리량)
+    """
+
+    def __init__(self, emit=None):
+        self._emit = emit
+        self._lock = threading.Lock()
+        self.done = 0
+        self.stage_stats = StageStats()
+
+    def emit(self, event, **fields):
+        if self._emit:
+            self._emit(dict(event=event, **fields))
+
+    def log(self, message):
+        self.emit("log", message=message)
+
+    def stage_progress(self, file, stage):
+        """ffmpeg/전송 진행률 콜백 → stage_progress 이벤트 (끝나면 단계별 통계에 반영)"""
+        def report(progress):
+            if progress.done:
+                self.stage_stats.record(stage, progress)
+            self.emit("stage_progress", file=file, stage=stage, **progress.to_dict())
+        return report
+
+    def log_stage_stats(self):
+        """단계별 처리량 요약 로그 (어느 단계에서 시간이 쓰였는지)"""
+        lines = self.stage_stats.summary_lines()
+        if lines:
+            self.log("단계별 처리량:")
+            for line in lines:
+                self.log(line)
+
+    def report_file(self, file, total, ok, stage=None, error=None):
+        """파일 하나의 처리 결과(성공/실패) 보고"""
+        with self._lock:
+            self.done += 1
+            done = self.done
+        self.emit("file", file=file, ok=ok, stage=stage,
+                  error=str(error) if error is not None else None,
+                  done=done, total=total)
+
+
+class UploadItem:
+    """파이프라인 단계 사이를 이동하는 파일 단위 작업 상태"""
+
+    def __init__(self, index, total, file_path, upload_path):
+        self.index = index
+        self.total = total
+        self.file_path = file_path
+        self.upload_path = upload_path
+        self.filename = os.path.basename(file_path)
+        self.name_without_ext = os.path.splitext(self.filename)[0]
+        # 임시 파일명: 전체 경로 기준 해시 (다른 폴더의 같은 파일명과 충돌 방지)
+        self.safe_name = hashlib.md5(file_path.encode('utf-8')).hexdigest()[:12]
+        self.hls_remote_path = f"{upload_path}/hls/{self.name_without_ext}"
+
+        self.actual_file = file_path
+        self.compressed_path = None
+        self.video_codec = None
+        self.hls_temp_dir = None
+        self.hls_success = False
+
+        # 작업 기록 (이어하기): 키, 원본 내용 해시, 완료된 단계 {단계: data}
+        self.journal_key = f"{os.path.abspath(file_path)}|{upload_path}"
+        self.content_hash = None
+        self.done = {}
+
+        # 중복 제거 캐시에서 가져온 HLS 폴더 (이 경우 hls_temp_dir 대신 사용)
+        self.cached_hls_dir = None
+
+        # 한 번 디코딩 처리(fanout.py)의 작업 폴더와 그때 만든 썸네일
+        self.fanout_dir = None
+        self.poster_path = None
+
+        # 중간 결과물 작업 폴더 (workspace.Area - 압축 단계에서 예약, 끝나면 반환)
+        self.area = None
+
+    @property
+    def tag(self):
+        return f"[{self.index + 1}/{self.total}] {self.filename}"
+
+    @property
+    def media_uploaded(self):
+        """MP4(+HLS) 업로드까지 이미 끝났는지 (이어하기 시 압축/변환 생략)"""
+        mp4 = self.done.get("mp4-uploaded")
+        if mp4 is None:
+            return False
+        return "hls-uploaded" in self.done or not mp4.get("hls", True)
+
+
+class Uploader(Job):
+    """로컬 영상 → (압축) → HLS 변환 → R2 업로드 → 썸네일 → KV 등록
+
+    journal(journal.Journal)을 주면 단계별 완료 기록을 남기고, 같은 파일을 다시
+    실행하면 멈춘 단계부터 이어서 처리. 이때 실패한 파일의 임시 결과물은 재사용을 위해 남겨 둠.
+    dedupe(dedupe.ContentIndex)를 주면 내용이 같은 영상은 R2 서버 측 복사로 처리하고,
+    압축본/HLS 결과물은 삭제하는 대신 캐시에 보관해 다음에 재사용.
+    압축 여부는 compression.plan_compression이 예상 크기로 판단 (sample_encode면 샘플 인코딩으로 보정).
+    encoder: "auto"(NVENC → libx265 → libx264) 또는 encoders.ENCODER_CLASSES 키.
+    parallel_encodes면 CPU 인코더일 때 코어 수에 맞춰 여러 파일을 동시에 압축.
+    chunked면 긴 영상(10분 이상)을 구간으로 나눠 동시에 인코딩 (chunked_encode.py, 파일은 하나씩).
+    fanout이면 재인코딩하는 파일은 한 번 디코딩으로 압축 MP4 + HLS + 썸네일을 함께 만듦 (fanout.py).
+    abr(화질 단계 목록, 예: (1080, 720, 480, "audio"))을 주면 HLS를 다중 화질로 생성 (abr_ladder.py).
+    썸네일은 여러 지점 키프레임 중 가장 좋은 프레임 (posters.py). sprites면 탐색용 스프라이트 시트 + WebVTT도 업로드.
+    중간 결과물(압축본, HLS, 썸네일)은 파일별 작업 폴더(workspace.py)에 - 용량 상한을 넘으면 압축 단계에서 대기.
+    """
+
+    def __init__(self, compress=False, crf="23", thumbnail=True, journal=None, dedupe=None,
+                 sample_encode=False, encoder="auto", parallel_encodes=False, chunked=False, fanout=False, abr=None,
+                 sprites=False, workspace=None, emit=None):
+        super().__init__(emit)
+        self.compress = compress
+        self.crf = crf
+        self.sample_encode = sample_encode
+        self.encoder_name = encoder
+        self.parallel_encodes = parallel_encodes
+        self.chunked = chunked
+        self.fanout = fanout
+        self.abr = tuple(abr) if abr else None
+        self.encoder = None
+        self.thumbnail = thumbnail
+        self.sprites = sprites
+        self.workspace = workspace or Workspace(log=self.log)
+        self.journal = journal
+        self.dedupe = dedupe
+        # KV 등록 묶음 (run마다 새로)
+        self.kv_batch = None
+
+    def run(self, jobs):
+        """jobs: (로컬 파일 경로, 업로드 경로) 목록. (완료 목록, 실패 목록) 반환"""
+        total = len(jobs)
+        self.done = 0
+        self.stage_stats = StageStats()
+        self.emit("start", total=total)
+
+        # 압축 인코더 확인 (GPU가 없으면 CPU 인코더로 대체)
+        if self.compress:
+            self.encoder = select_encoder(self.encoder_name, parallel=self.parallel_encodes or self.chunked,
+                                          sessions=self.chunked)
+            if self.encoder is None:
+                self.log("⚠️ 사용 가능한 인코더가 없어 압축 없이 업로드합니다.")
+            else:
+                self.log(f"압축 인코더: {self.encoder.label} (동시 {self.encoder.workers}개)")
+
+        items = [UploadItem(i, total, file_path, upload_path) for i, (file_path, upload_path) in enumerate(jobs)]
+        self.kv_batch = KVBatch(log=self.log)
+
+        # 압축 단계 워커 수: 구간 분할 모드는 파일 하나 안에서 병렬이므로 1개
+        compress_workers = STAGE_WORKERS["compress"]
+        if self.encoder and not self.chunked:
+            compress_workers = self.encoder.workers
+
+        # 단계별 파이프라인: 파일 N+1 변환 중에 파일 N 업로드, 파일 N-1 KV 등록
+        pipeline = Pipeline(
+            [
+                Stage("compress", self.stage_compress, compress_workers),
+                Stage("hls", self.stage_hls, STAGE_WORKERS["hls"]),
+                Stage("upload", self.stage_upload, STAGE_WORKERS["upload"]),
+                Stage("thumbnail", self.stage_thumbnail, STAGE_WORKERS["thumbnail"]),
+                Stage("register", self.stage_register, STAGE_WORKERS["register"]),
+            ],
+            on_error=self.on_item_failed,
+            on_done=self.on_item_done,
+        )
+        completed, failed = pipeline.run(items)
+        if not self.kv_batch.flush():
+            self.log("⚠️ 일부 파일 KV 등록 실패 - 다시 실행하거나(작업 기록 사용 시) KV 동기화 필요")
+        self.log_stage_stats()
+        self.emit("summary", success=len(completed), failed=len(failed), stages=self.stage_stats.to_dict())
+        return completed, failed
+
+    def mark(self, item, stage, **data):
+        """단계 완료 기록"""
+        item.done[stage] = data
+        if self.journal:
+            self.journal.mark("upload", item.journal_key, stage, item.content_hash, **data)
+
+    def load_journal(self, item):
+        """작업 기록에서 이 파일의 완료 단계 불러오기"""
+        if self.journal or self.dedupe:
+            item.content_hash = sampled_hash(item.file_path)
+        if not self.journal:
+            return
+        item.done = self.journal.completed("upload", item.journal_key, item.content_hash)
+        if "kv-registered" in item.done and (not self.thumbnail or "thumbnailed" in item.done):
+            self.log(f"{item.tag} - 이미 완료된 파일 (건너뜀)")
+        elif item.done:
+            self.log(f"{item.tag} - 이전 작업 이어하기 (완료: {', '.join(item.done)})")
+
+    def on_item_done(self, item):
+        if item.area:
+            item.area.release()
+        self.report_file(item.file_path, item.total, True)
+
+    def on_item_failed(self, item, stage, error):
+        if error is not None:
+            self.log(f"  ❌ {item.tag} 오류 ({stage}): {error}")
+        # 작업 기록을 쓰는 경우 다음 실행에서 재사용하도록 임시 결과물 유지 (작업 공간 용량/기간 정책으로 정리)
+        if not self.journal:
+            self.remove_poster(item)
+            self.cleanup_item(item)
+        if item.area:
+            item.area.release(keep=bool(self.journal))
+        self.report_file(item.file_path, item.total, False, stage=stage, error=error)
+
+    def acquire_area(self, item):
+        """파일별 작업 폴더 예약 (이름은 내용 해시 → 다시 실행하면 같은 폴더의 결과물 재사용)"""
+        if item.area is not None:
+            return
+        reserve = SMALL_RESERVE_BYTES
+        if not item.media_uploaded:
+            # 압축본 + HLS ≈ 원본 크기의 2배
+            reserve += os.path.getsize(item.file_path) * 2
+        item.area = self.workspace.area(f"upload_{(item.content_hash or item.safe_name)[:16]}", reserve)
+
+    @property
+    def cache_variant(self):
+        """캐시 결과물을 만든 설정 (압축 CRF 또는 원본 그대로 + 다중 화질 단계)"""
+        variant = "original"
+        if self.compress and self.encoder is not None:
+            variant = f"{self.encoder.name}-crf{self.crf}"
+        if self.abr:
+            variant += "-abr" + "_".join(map(str, self.abr))
+        return variant
+
+    def reuse_duplicate(self, item):
+        """같은 내용의 영상이 이미 R2에 있으면 서버 측 복사로 MP4/HLS/썸네일 처리. 처리했으면 True"""
+        entry = self.dedupe.lookup(item.content_hash)
+        mp4_key = f"{item.upload_path}/{item.filename}"
+
+        for remote in entry["remotes"]:
+            # 같은 위치에 다시 올리는 경우는 일반 처리 (작업 기록이 이어하기 담당)
+            if remote["mp4_key"] == mp4_key:
+                continue
+            if not copy_remote_file(remote["mp4_key"], mp4_key):
+                try:
+                    missing = get_storage().head(remote["mp4_key"]) is None
+                except StorageError as e:
+                    missing = False
+                    self.log(f"  ⚠️ {item.filename} 원본 확인 실패: {e}")
+                if not missing:
+                    # 원본은 있거나 알 수 없음(일시적 오류) → 색인은 그대로 두고 일반 처리
+                    self.log(f"  ⚠️ {item.filename} 서버 측 복사 실패, 일반 처리")
+                    break
+                # 원본 위치가 삭제됨 → 색인에서 지우고 다음 후보 확인
+                self.dedupe.forget_remote(remote["mp4_key"])
+                continue
+            self.log(f"  ♻️ {item.filename} 동일한 영상이 R2에 있음 → 서버 측 복사 ({remote['mp4_key']})")
+            # KV 등록용 정보: 크기는 복사된 객체, 길이는 같은 내용인 원본에서
+            try:
+                copied = get_storage().head(mp4_key)
+            except StorageError:
+                copied = None
+            info = probe(item.file_path)
+            self.mark(item, "mp4-uploaded", hls=bool(remote["hls_prefix"]), copied_from=remote["mp4_key"],
+                      size=copied.size if copied else None,
+                      duration=round(info.duration, 1) if info and info.duration else None)
+            if remote["hls_prefix"]:
+                if not copy_remote_dir(remote["hls_prefix"], item.hls_remote_path):
+                    # MP4만 복사됨 → HLS는 일반 처리(변환 + 업로드)로 만듦
+                    self.log(f"  ⚠️ {item.filename} HLS 복사 실패, 다시 변환")
+                    return False
+                self.mark(item, "hls-uploaded", copied_from=remote["hls_prefix"])
+            if self.thumbnail and remote["thumb_key"] and "thumbnailed" not in item.done:
+                if copy_remote_file(remote["thumb_key"], thumbnail_key(mp4_key)):
+                    self.mark(item, "thumbnailed", copied_from=remote["thumb_key"])
+            return True
+
+        # R2에는 없지만 로컬 캐시에 같은 설정으로 만든 결과물이 있으면 재사용
+        local = entry["local"]
+        if local and local["variant"] == self.cache_variant:
+            if local["compressed_path"]:
+                self.log(f"  ♻️ {item.filename} 캐시된 압축본 재사용")
+                item.compressed_path = local["compressed_path"]
+                item.actual_file = local["compressed_path"]
+                item.video_codec = local["codec"]
+            if local["hls_dir"]:
+                item.cached_hls_dir = local["hls_dir"]
+                item.video_codec = local["codec"]
+        return False
+
+    def in_cache(self, path):
+        return bool(self.dedupe and path
+                    and os.path.abspath(path).startswith(os.path.abspath(self.dedupe.cache_dir) + os.sep))
+
+    def cache_item(self, item):
+        """업로드가 끝난 압축본/HLS 폴더를 중복 제거 캐시로 옮김 (캐시가 없으면 삭제)"""
+        if not self.dedupe or not item.content_hash:
+            self.cleanup_item(item)
+            return
+        compressed, hls_dir = self.dedupe.store_local(
+            item.content_hash,
+            variant=self.cache_variant,
+            codec=item.video_codec,
+            compressed_path=item.compressed_path,
+            hls_dir=item.hls_temp_dir if item.hls_success else None,
+        )
+        item.compressed_path = compressed
+        item.actual_file = compressed or item.file_path
+        item.hls_temp_dir = hls_dir
+        self.cleanup_item(item)
+
+    def cleanup_item(self, item):
+        """파일별 임시 파일(압축본, HLS 디렉토리) 정리 (중복 제거 캐시 안의 결과물은 유지)"""
+        if self.in_cache(item.compressed_path):
+            item.compressed_path = None
+        if self.in_cache(item.hls_temp_dir):
+            item.hls_temp_dir = None
+        if item.compressed_path and os.path.exists(item.compressed_path):
+            try:
+                os.remove(item.compressed_path)
+            except Exception:
+                pass
+        if item.hls_temp_dir:
+            shutil.rmtree(item.hls_temp_dir, ignore_errors=True)
+        # 한 번 디코딩 작업 폴더는 썸네일 단계가 끝난 뒤 삭제
+        if item.fanout_dir and not item.poster_path:
+            shutil.rmtree(item.fanout_dir, ignore_errors=True)
+
+    def remove_poster(self, item):
+        """한 번 디코딩 처리에서 만든 썸네일 삭제"""
+        if item.poster_path:
+            try:
+                os.remove(item.poster_path)
+            except OSError:
+                pass
+            item.poster_path = None
+
+    def stage_compress(self, item):
+        """1단계: 압축 옵션이 켜져 있으면 먼저 압축"""
+        self.load_journal(item)
+        self.acquire_area(item)
+        if self.dedupe and not item.media_uploaded and self.reuse_duplicate(item):
+            return
+        if not self.compress or self.encoder is None or item.media_uploaded or item.compressed_path:
+            return
+
+        # 압축된 파일 경로 (작업 폴더 안 고정 이름 - ffmpeg 호환)
+        compressed_path = item.area.file("compressed.mp4")
+
+        # 이어하기: 이전 압축 결과가 그대로 남아 있으면 재사용
+        previous = item.done.get("compressed")
+        if previous is not None:
+            if not previous.get("path"):
+                return
+            if os.path.exists(previous["path"]) and sampled_hash(previous["path"]) == previous.get("hash"):
+                self.log(f"  ♻️ {item.filename} 이전 압축 결과 재사용")
+                item.compressed_path = previous["path"]
+                item.actual_file = previous["path"]
+                item.video_codec = previous.get("codec")
+                return
+
+        # 압축 방법 결정: 예상 크기 기준 건너뛰기 / 스트림 복사 / 재인코딩
+        info = probe(item.file_path)
+        codec = info.codec if info else "unknown"
+        probed = item.done.get("probed")
+        if probed is None or "plan" not in probed:
+            sample = None
+            if self.sample_encode:
+                sample = lambda start, seconds: sample_compressed_size(
+                    item.file_path, item.area.file("sample.mp4"), self.crf, start, seconds, encoder=self.encoder)
+            plan = plan_compression(item.file_path, info, self.crf, BITRATE_MAP.get(self.crf, "4M"), sample,
+                                    codec=self.encoder.codec)
+            self.mark(item, "probed", plan=plan.to_dict(), info=info.to_dict() if info else None)
+        else:
+            plan = CompressionPlan.from_dict(probed["plan"])
+
+        if plan.action == "skip":
+            self.log(f"{item.tag} - {codec} {plan.source_bytes / 1024 ** 2:.0f}MB, {plan.reason}")
+            self.mark(item, "compressed", path=None)
+            return
+
+        if plan.action == "copy":
+            self.log(f"{item.tag} - {codec} {plan.reason}")
+            if not remux_to_mp4(item.file_path, compressed_path, progress=self.stage_progress(item.file_path, "repack")) \
+                    or not os.path.exists(compressed_path):
+                self.log(f"  ⚠️ {item.filename} MP4 재포장 실패, 원본으로 업로드")
+                return
+            item.compressed_path = compressed_path
+            item.actual_file = compressed_path
+            item.video_codec = codec
+            self.mark(item, "compressed", path=compressed_path, codec=codec,
+                      hash=sampled_hash(compressed_path) if self.journal else None)
+            return
+
+        self.log(f"{item.tag} 압축 중... ({codec} → {self.encoder.label}, {plan.reason})")
+
+        # 원본 크기
+        original_size = os.path.getsize(item.file_path) / (1024 * 1024)  # MB
+        maxrate = BITRATE_MAP.get(self.crf, "4M")
+
+        ok = False
+        fanout = None
+        use_chunked = self.chunked and info and info.duration and info.duration >= MIN_CHUNKED_DURATION
+        # 다중 화질 HLS는 원본에서 따로 만들므로 한 번 디코딩 처리는 쓰지 않음
+        if self.fanout and not use_chunked and not self.abr:
+            # 한 번 디코딩으로 압축 MP4 + HLS + 썸네일
+            item.fanout_dir = item.area.dir("fanout", clean=True)
+            fanout = fanout_encode(item.file_path, item.fanout_dir, self.encoder, self.crf, maxrate,
+                                   poster=self.thumbnail and "thumbnailed" not in item.done,
+                                   duration=info.duration if info else None,
+                                   progress=self.stage_progress(item.file_path, "fanout"))
+            if fanout.ok:
+                compressed_path = fanout.mp4_path
+                item.poster_path = fanout.poster_path
+                ok = True
+            else:
+                self.log(f"  ⚠️ {item.filename} 한 번 디코딩 처리 실패, 일반 압축으로 진행: {fanout.error}")
+                shutil.rmtree(item.fanout_dir, ignore_errors=True)
+                item.fanout_dir = None
+                fanout = None
+        if not ok and use_chunked:
+            ok = chunked_compress(item.file_path, compressed_path, self.encoder, self.crf,
+                                  maxrate, info.duration, has_audio=bool(info.audio_codec), log=self.log,
+                                  work_dir=item.area.dir("chunks", clean=True))
+        if not ok:
+            ok = compress_video(item.file_path, compressed_path, self.crf, encoder=self.encoder,
+                                progress=self.stage_progress(item.file_path, "compress"))
+        if not ok or not os.path.exists(compressed_path):
+            self.log(f"  ⚠️ {item.filename} 압축 실패, 원본으로 업로드")
+            return
+
+        compressed_size = os.path.getsize(compressed_path) / (1024 * 1024)  # MB
+
+        # 압축 결과가 원본보다 크면 원본 사용
+        if compressed_size >= original_size:
+            self.log(f"  ⚠️ {item.filename} 이미 최적화된 파일 (압축 스킵): {original_size:.1f}MB")
+            try:
+                os.remove(compressed_path)
+            except Exception:
+                pass
+            if fanout:
+                # HLS는 원본으로 다시 변환 (썸네일은 원본 디코딩 결과라 그대로 사용)
+                shutil.rmtree(fanout.hls_dir, ignore_errors=True)
+            self.mark(item, "compressed", path=None)
+            return
+
+        reduction = (1 - compressed_size / original_size) * 100
+        self.log(f"  ✅ {item.filename} 압축 완료: {original_size:.1f}MB → {compressed_size:.1f}MB ({reduction:.0f}% 감소)")
+        item.compressed_path = compressed_path
+        item.actual_file = compressed_path
+        item.video_codec = self.encoder.codec
+        self.mark(item, "compressed", path=compressed_path, codec=self.encoder.codec,
+                  hash=sampled_hash(compressed_path) if self.journal else None)
+        if fanout:
+            item.hls_temp_dir = fanout.hls_dir
+            item.hls_success = True
+            self.mark(item, "remuxed", codec=item.video_codec, dir=fanout.hls_dir)
+
+    def stage_hls(self, item):
+        """2단계: HLS 변환"""
+        if item.media_uploaded:
+            item.hls_success = "hls-uploaded" in item.done
+            return
+        if item.hls_success:
+            # 압축 단계에서 한 번 디코딩으로 이미 만듦
+            return
+
+        # HLS 변환용 임시 디렉토리 (작업 폴더 안 고정 이름 - ffmpeg가 쉼표 등을 구분자로 해석)
+        item.hls_temp_dir = item.area.file("hls")
+
+        # 중복 제거 캐시에 같은 영상의 HLS 결과가 있으면 그대로 업로드
+        if item.cached_hls_dir:
+            self.log(f"  ♻️ {item.filename} 캐시된 HLS 변환 결과 재사용")
+            item.hls_temp_dir = item.cached_hls_dir
+            item.hls_success = True
+            self.mark(item, "remuxed", codec=item.video_codec)
+            return
+
+        # 이어하기: 이전 변환 결과가 남아 있으면 재사용
+        remuxed = item.done.get("remuxed")
+        if remuxed is not None and remuxed.get("dir"):
+            item.hls_temp_dir = remuxed["dir"]
+        if remuxed is not None and os.path.exists(os.path.join(item.hls_temp_dir, "index.m3u8")):
+            self.log(f"  ♻️ {item.filename} 이전 HLS 변환 결과 재사용")
+            item.video_codec = remuxed.get("codec")
+            item.hls_success = True
+            return
+
+        if self.abr:
+            # 다중 화질: 화질 손실이 겹치지 않도록 압축본이 아닌 원본에서 인코딩
+            self.log(f"{item.tag} 다중 화질 HLS 변환 중...")
+            if os.path.exists(item.hls_temp_dir):
+                shutil.rmtree(item.hls_temp_dir, ignore_errors=True)
+            info = probe(item.file_path)
+            item.hls_success = convert_to_abr_hls(
+                item.file_path, item.hls_temp_dir, self.abr,
+                source_height=info.height if info else None,
+                hardware=encoder_works(H264_NVENC),
+                has_audio=bool(info.audio_codec) if info else True,
+                log=self.log,
+                duration=info.duration if info else None,
+                progress=self.stage_progress(item.file_path, "hls"),
+            )
+            if item.hls_success:
+                self.mark(item, "remuxed", codec=item.video_codec, abr=list(self.abr))
+            return
+
+        # 코덱 확인: 압축/재포장 단계에서 정해졌으면 그대로, 아니면 원본 코덱 확인
+        if not item.video_codec:
+            item.video_codec = get_video_codec(item.actual_file)
+
+        self.log(f"{item.tag} HLS 변환 중... (코덱: {item.video_codec})")
+
+        # 기존 임시 디렉토리 정리
+        if os.path.exists(item.hls_temp_dir):
+            shutil.rmtree(item.hls_temp_dir, ignore_errors=True)
+
+        item.hls_success = convert_to_hls(item.actual_file, item.hls_temp_dir, codec=item.video_codec, log=self.log,
+                                          progress=self.stage_progress(item.file_path, "hls"), area=item.area)
+        if item.hls_success:
+            self.mark(item, "remuxed", codec=item.video_codec)
+
+    def stage_upload(self, item):
+        """3단계: 원본 MP4 + HLS 업로드"""
+        if item.media_uploaded:
+            return
+
+        # KV 등록용 정보 (업로드 후에는 압축본이 캐시로 옮겨지거나 삭제되므로 미리)
+        meta = media_fields(item.actual_file)
+
+        if not item.hls_success:
+            self.log(f"  ⚠️ {item.filename} HLS 변환 실패, 원본 MP4로 업로드")
+            # 폴백: 원본 MP4 업로드
+            if not upload_to_dir(item.actual_file, item.upload_path):
+                self.log(f"  ❌ {item.filename} 업로드 실패")
+                return False
+            self.mark(item, "mp4-uploaded", hls=False, **meta)
+            self.cache_item(item)
+            return
+
+        # 원본 MP4(다운로드용, 원본 파일명) + HLS 파일을 한 스케줄러로 함께 업로드
+        # - MP4 조각 사이에 세그먼트가 섞여 올라감, 실패한 파일만 재시도
+        scheduler = UploadScheduler(log=self.log)
+        mp4_task = None
+        if "mp4-uploaded" not in item.done:
+            self.log(f"  📤 {item.filename} 원본 MP4 업로드 중...")
+            mp4_task = scheduler.add_file(item.actual_file, f"{item.upload_path}/{item.filename}")
+
+        # 다중 화질은 화질별 하위 폴더에 세그먼트
+        ts_files = glob.glob(os.path.join(item.hls_temp_dir, "**", "*.ts"), recursive=True)
+        m4s_files = glob.glob(os.path.join(item.hls_temp_dir, "**", "*.m4s"), recursive=True)
+        seg_count = len(ts_files) + len(m4s_files)
+        self.log(f"  📤 {item.filename} HLS 업로드 중... (m3u8 + {seg_count}개 세그먼트)")
+        hls_task = scheduler.add_dir(item.hls_temp_dir, item.hls_remote_path)
+        scheduler.run()
+
+        if mp4_task:
+            if mp4_task.ok:
+                self.log(f"  ✅ {item.filename} 원본 MP4 업로드 완료")
+                self.mark(item, "mp4-uploaded", hls=True, **meta)
+            else:
+                self.log(f"  ⚠️ {item.filename} 원본 MP4 업로드 실패")
+
+        if not hls_task.ok:
+            self.log(f"  ❌ {item.filename} HLS 업로드 실패 ({len(hls_task.failed)}개 파일)")
+            return False
+
+        self.log(f"  ✅ {item.filename} HLS 업로드 완료")
+        self.mark(item, "hls-uploaded", segments=seg_count)
+
+        # 압축 파일 / HLS 임시 디렉토리 정리 (업로드 완료 후, 중복 제거 캐시가 있으면 보관)
+        self.cache_item(item)
+
+    def stage_thumbnail(self, item):
+        """4단계: 썸네일(+ 스프라이트 시트) 생성 및 업로드 (썸네일을 끄더라도 스프라이트와 정리는 실행)"""
+        mp4_key = f"{item.upload_path}/{item.filename}"
+        duration = None
+        if self.thumbnail or self.sprites:
+            info = probe(item.file_path)
+            duration = info.duration if info else None
+
+        if self.thumbnail and "thumbnailed" not in item.done:
+            self.log(f"  📷 {item.filename} 썸네일 생성 중...")
+            thumb_path = item.area.file("thumb.jpg")
+            if make_poster(item.file_path, thumb_path, duration) is None:
+                if item.poster_path and os.path.exists(item.poster_path):
+                    # 후보 프레임을 못 얻으면 압축 단계에서 한 번 디코딩으로 만든 썸네일 사용
+                    shutil.copyfile(item.poster_path, thumb_path)
+                else:
+                    self.log(f"  ⚠️ {item.filename} 썸네일 생성 실패")
+                    thumb_path = None
+
+            # 썸네일 업로드
+            if thumb_path and upload_file(thumb_path, thumbnail_key(mp4_key)):
+                self.log(f"  ✅ {item.filename} 썸네일 업로드 완료")
+                self.mark(item, "thumbnailed")
+            elif thumb_path:
+                self.log(f"  ⚠️ {item.filename} 썸네일 업로드 실패")
+
+            # 임시 파일 삭제
+            if thumb_path:
+                try:
+                    os.remove(thumb_path)
+                except Exception:
+                    pass
+
+        if self.sprites and "sprited" not in item.done:
+            self.upload_sprite(item, mp4_key, duration)
+
+        self.remove_poster(item)
+        if item.fanout_dir:
+            shutil.rmtree(item.fanout_dir, ignore_errors=True)
+
+    def upload_sprite(self, item, mp4_key, duration):
+        """탐색용 스프라이트 시트 + WebVTT 썸네일 트랙 (VTT 안에서는 같은 폴더의 스프라이트를 상대 경로로 참조)"""
+        sprite_path = item.area.file("sprite.jpg")
+        vtt_path = item.area.file("sprite.vtt")
+        try:
+            if not make_sprite(item.file_path, sprite_path, vtt_path, duration,
+                               sprite_name=os.path.basename(sprite_key(mp4_key)),
+                               progress=self.stage_progress(item.file_path, "sprite")):
+                self.log(f"  ⚠️ {item.filename} 스프라이트 생성 실패")
+                return
+            # VTT는 스프라이트가 올라간 뒤에 업로드
+            if upload_file(sprite_path, sprite_key(mp4_key)) and upload_file(vtt_path, vtt_key(mp4_key)):
+                self.log(f"  ✅ {item.filename} 스프라이트 업로드 완료")
+                self.mark(item, "sprited")
+            else:
+                self.log(f"  ⚠️ {item.filename} 스프라이트 업로드 실패")
+        finally:
+            for path in (sprite_path, vtt_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stage_register(self, item):
+        """5단계: KV에 파일 정보 등록"""
+        if "kv-registered" in item.done:
+            return
+        self.log(f"  ✅ {item.tag} 완료")
+        item.hls_success = item.hls_success or "hls-uploaded" in item.done
+
+        # 다음에 같은 영상이 들어오면 서버 측 복사하도록 R2 위치 기록
+        if self.dedupe and item.content_hash:
+            self.dedupe.add_remote(
+                item.content_hash,
+                f"{item.upload_path}/{item.filename}",
+                hls_prefix=item.hls_remote_path if item.hls_success else None,
+                thumb_key=thumbnail_key(f"{item.upload_path}/{item.filename}") if "thumbnailed" in item.done else None,
+            )
+        # 모아서 한 번에 등록 (등록되면 작업 기록에 kv-registered)
+        meta = item.done.get("mp4-uploaded") or {}
+        record = file_record(
+            f"{item.upload_path}/{item.filename}",
+            meta.get("size", 0),
+            hls=f"{item.hls_remote_path}/index.m3u8" if item.hls_success else None,
+            duration=meta.get("duration"),
+            codec=meta.get("codec"),
+        )
+        self.kv_batch.add(record, on_registered=lambda: self.mark(item, "kv-registered"))
+
+
+def list_r2_sizes(path):
+    """R2 폴더의 파일별 크기 {파일명: bytes} (실패 시 빈 dict)"""
+    listing = get_storage().list_dir(path)
+    if listing is None:
+        return {}
+    return {f.key: f.size for f in listing[1]}
+
+
+class HLSCheck:
+    """업로드가 끝나 원본 삭제 전 검증을 기다리는 HLS 폴더
+
+    prepare()는 검증 스레드에서 실행 (세그먼트 MD5 계산 등), area(작업 폴더)는 검증이 끝난 뒤 반환
+    (검증 실패 시 내용은 남김).
+    """
+
+    def __init__(self, read_playlist, ledger, duration, area=None, prepare=None):
+        self.read_playlist = read_playlist
+        self.ledger = ledger
+        self.duration = duration
+        self.area = area
+        self.prepare = prepare
+
+    def run(self):
+        if self.area is None:
+            return self.verify()
+        verified = None
+        try:
+            verified = self.verify()
+            return verified
+        finally:
+            # 검증에 실패하면 작업 폴더(내려받은 원본)를 다음 실행에서 재사용하도록 남김
+            self.area.release(keep=verified is None or not verified.ok)
+
+    def verify(self):
+        if self.prepare:
+            self.prepare()
+        return HLSVerifier(self.read_playlist, self.ledger, self.duration).run()
+
+
+def finished_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class HLSConverter(Job):
+    """R2의 기존 MP4 → 다운로드 → HLS 변환 → 업로드 → 검증 → (원본 삭제) → KV 동기화
+
+    workers개의 파일을 동시에 변환. 변환 작업 대부분이 ffmpeg/rclone 자식 프로세스에서
+    일어나므로 스레드 풀로 충분함. 임시 파일은 workspace(workspace.Workspace)의 파일별 작업 폴더에 만들고
+    동시 작업들의 사용량은 max_temp_bytes로 제한 (다른 프로세스의 작업 폴더도 함께 계산).
+    실패한 파일의 작업 폴더는 남겨 두고, 다시 실행하면 다운로드한 원본을 재사용.
+    streaming("http", "rclone" 또는 "local")을 지정하면 다운로드 없이 스트리밍 변환 (hls_stream.py).
+    "local"은 source_url(없으면 JBCH_STORAGE=local: 폴더)의 파일을 바로 읽음.
+    journal을 주면 HLS 업로드까지 끝난 파일은 다시 실행할 때 변환을 건너뜀.
+    원본은 HLS 검증(hls_verify.py - 플레이리스트/세그먼트 길이, 업로드 응답 크기/ETag)을 통과해야 삭제.
+    검증은 별도 스레드에서 실행되어 다음 파일 변환과 겹침.
+    """
+
+    def __init__(self, delete_original=True, sync_kv=True, workers=1,
+                 max_temp_bytes=DEFAULT_WORKSPACE_BYTES, streaming=None,
+                 source_url=None, journal=None, workspace=None, emit=None):
+        super().__init__(emit)
+        self.delete_original = delete_original
+        self.sync_kv = sync_kv
+        self.workers = max(1, int(workers))
+        self.streaming = streaming
+        self.source_url = source_url
+        self.journal = journal
+        self.workspace = workspace or Workspace(max_bytes=max_temp_bytes, log=self.log)
+        self.verifier = None
+        self.results = []
+
+    def run(self, files):
+        """files: R2 경로 목록. (성공 수, 실패 수) 반환. 파일별 결과는 self.results"""
+        total = len(files)
+        self.done = 0
+        self.results = []
+        self.stage_stats = StageStats()
+        started = time.time()
+
+        self.emit("start", total=total, workers=self.workers)
+        self.log(f"HLS 변환 시작: {total}개 파일 (동시 {self.workers}개)")
+
+        # 임시 디스크 예약용 원본 크기 (폴더별 한 번씩 조회)
+        sizes = {}
+        for remote_dir in dict.fromkeys(os.path.dirname(f) for f in files):
+            for name, size in list_r2_sizes(remote_dir).items():
+                sizes[f"{remote_dir}/{name}" if remote_dir else name] = size
+
+        # 변환 워커는 업로드까지 하고 다음 파일로, 검증/원본 삭제는 검증 스레드에서
+        self.verifier = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(self.convert_safely, remote_path, i, total, sizes.get(remote_path, 0))
+                           for i, remote_path in enumerate(files)]
+                pending = [future.result() for future in futures]
+            for future in pending:
+                self.results.append(future.result())
+        finally:
+            self.verifier.shutdown(wait=True)
+            self.verifier = None
+
+        success = sum(1 for r in self.results if r["ok"])
+        failed = total - success
+
+        # KV 반영 (변환한 파일의 HLS 경로만 증분 갱신)
+        if self.sync_kv and success > 0:
+            delta = KVDelta()
+            for r in self.results:
+                if r["ok"]:
+                    delta.update(file_record(r["file"], r["source_size"], hls=f"{hls_folder(r['file'])}/index.m3u8"))
+            self.log(f"🔄 KV 반영 중... ({len(delta)}개 파일)")
+            sync_kv_changes(delta, log=self.log, user_agent='JBCH-HLS-Converter/1.0')
+
+        for r in self.results:
+            if not r["ok"]:
+                self.log(f"  ❌ 실패: {r['file']} ({r['stage']}{': ' + r['error'] if r['error'] else ''})")
+
+        self.log_stage_stats()
+        self.emit("summary", success=success, failed=failed,
+                  seconds=round(time.time() - started, 1), stages=self.stage_stats.to_dict(),
+                  bytes=sum(r["size"] for r in self.results if r["ok"]))
+        return success, failed
+
+    def convert_safely(self, remote_path, index, total, size):
+        """convert_one 실행 → 파일별 결과 dict의 Future (예외도 실패 결과로 변환)
+
+        업로드까지 끝나면 검증과 원본 삭제는 검증 스레드로 넘기고 바로 반환
+        (작업 폴더는 검증이 끝난 뒤 반환).
+        """
+        started = time.time()
+        result = {"file": remote_path, "ok": False, "stage": None, "error": None,
+                  "size": size, "source_size": size, "segments": 0, "seconds": 0}
+
+        # 다운로드한 원본 + HLS 출력 ≈ 원본 크기의 2배 (스트리밍은 세그먼트 몇 개)
+        reserve = STREAMING_RESERVE_BYTES if self.streaming else size * 2
+        area_name = "convert_" + hashlib.md5(f"{remote_path}|{size}".encode('utf-8')).hexdigest()[:16]
+        area = self.workspace.area(area_name, reserve)
+        check = None
+        try:
+            done = self.journal.completed("convert", remote_path, str(size)) if self.journal else {}
+            if "hls-uploaded" in done:
+                # 이어하기: 변환/업로드는 끝났고 검증/원본 삭제만 남았을 수 있음
+                self.log(f"[{index+1}/{total}] {os.path.basename(remote_path)} - 이미 HLS 업로드됨 (건너뜀)")
+                if self.delete_original and "original-deleted" not in done:
+                    result["stage"] = "verify"
+                    check = self.remote_check(remote_path, done["hls-uploaded"].get("duration"), area)
+                else:
+                    result["stage"] = None
+            else:
+                outcome = self.convert_one(remote_path, index, total, result, area)
+                if isinstance(outcome, HLSCheck):
+                    result["stage"] = "verify"
+                    check = outcome
+                else:
+                    result["stage"] = outcome
+        except Exception as e:
+            self.log(f"  ❌ {os.path.basename(remote_path)} 오류: {e}")
+            result["error"] = str(e)
+
+        if check is not None:
+            return self.verifier.submit(self.verify_and_delete, check, result, total, started)
+        result["ok"] = result["error"] is None and result["stage"] is None
+        # 실패하면 다운로드한 원본 등을 다음 실행에서 재사용하도록 남김
+        area.release(keep=not result["ok"])
+        return finished_future(self.finish_result(result, total, started))
+
+    def finish_result(self, result, total, started):
+        result["seconds"] = round(time.time() - started, 1)
+        self.report_file(result["file"], total, result["ok"], stage=result["stage"], error=result["error"])
+        return result
+
+    def verify_and_delete(self, check, result, total, started):
+        """검증 스레드: HLS 검증 통과 시에만 원본 삭제"""
+        remote_path = result["file"]
+        filename = os.path.basename(remote_path)
+        try:
+            verified = check.run()
+            result["verify"] = verified.to_dict()
+            if not verified.ok:
+                self.log(f"  ❌ {filename} HLS 검증 실패 - 원본 유지")
+                for error in verified.errors[:5]:
+                    self.log(f"     - {error}")
+                result["error"] = verified.errors[0]
+                # 다음 실행에서는 업로드된 결과를 믿지 않고 처음부터 다시 변환
+                if self.journal:
+                    self.journal.reset("convert", remote_path)
+            else:
+                self.log(f"  🔍 {filename} HLS 검증 완료 ({verified.segments}개 세그먼트, {verified.seconds:.0f}초)")
+                self.mark(result, "verified", segments=verified.segments)
+                result["stage"] = "delete"
+                self.delete_source(remote_path, result)
+                result["stage"] = None
+                self.log(f"  ✅ {filename} 완료!")
+        except Exception as e:
+            self.log(f"  ❌ {filename} 검증 오류: {e}")
+            result["error"] = str(e)
+        result["ok"] = result["error"] is None and result["stage"] is None
+        return self.finish_result(result, total, started)
+
+    def source_duration(self, remote_path):
+        """스트리밍 변환 원본 길이 (공개 URL의 moov만 읽음, 모르면 None)"""
+        if self.streaming == "local":
+            return media_duration(local_source_path(remote_path, self.stream_base()))
+        info = probe_url(source_url(remote_path, self.source_url))
+        return info.duration if info else None
+
+    def stream_base(self):
+        """스트리밍 원본 기준 (URL 또는 local이면 폴더)"""
+        if self.streaming == "local" and not self.source_url:
+            storage = get_storage()
+            if storage.name == "local":
+                return storage.root
+        return self.source_url
+
+    def remote_check(self, remote_path, duration, area):
+        """이어하기용 검증: 로컬 결과물이 없으므로 목록 조회 크기 + 원격 플레이리스트로 확인"""
+        storage = get_storage()
+        prefix = hls_folder(remote_path)
+        temp_dir = area.dir("verify", clean=True)
+        ledger = UploadLedger()
+
+        def prepare():
+            for obj in storage.list_objects(prefix + "/") or []:
+                ledger.record_remote(obj.key[len(prefix) + 1:], obj)
+
+        def read_playlist(name):
+            local_path = os.path.join(temp_dir, *name.split('/'))
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            if not storage.get_file(f"{prefix}/{name}", local_path):
+                return None
+            return local_reader(temp_dir)(name)
+
+        return HLSCheck(read_playlist, ledger, duration, area=area, prepare=prepare)
+
+    def convert_one(self, remote_path, index, total, result, area):
+        """파일 하나 변환 + 업로드. 실패 시 실패한 단계 이름, 성공 시 원본 삭제 전 검증할 HLSCheck 반환
+
+        area(작업 폴더)는 호출한 쪽에서 반환 (HLSCheck를 돌려주면 검증 후 반환).
+        """
+        if self.streaming:
+            return self.convert_streaming(remote_path, index, total, result, area)
+
+        filename = os.path.basename(remote_path)
+        name_without_ext = os.path.splitext(filename)[0]
+        remote_dir = os.path.dirname(remote_path)
+
+        # 1. R2에서 MP4 다운로드 (예외 발생 시 result["stage"]로 실패 단계 보고)
+        result["stage"] = "download"
+        temp_dir = area.path
+        local_mp4 = os.path.join(temp_dir, filename)
+        if result["source_size"] and os.path.exists(local_mp4) \
+                and os.path.getsize(local_mp4) == result["source_size"]:
+            # 이전 실행에서 내려받은 원본 재사용
+            self.log(f"[{index+1}/{total}] {filename} 이전에 내려받은 원본 사용")
+        else:
+            self.log(f"[{index+1}/{total}] {filename} 다운로드 중...")
+            if not download_file(remote_path, temp_dir, progress=self.stage_progress(remote_path, "download")) \
+                    or not os.path.exists(local_mp4):
+                self.log(f"  ❌ {filename} 다운로드 실패")
+                return "download"
+            self.log(f"  📥 {filename} 다운로드 완료 ({os.path.getsize(local_mp4) / (1024 * 1024):.0f}MB)")
+
+        result["size"] = os.path.getsize(local_mp4)
+
+        # 2. HLS 변환
+        result["stage"] = "remux"
+        self.log(f"  🔄 {filename} HLS 변환 중...")
+
+        hls_dir = area.dir("hls", clean=True)
+        info = probe(local_mp4)
+        duration = info.duration if info else None
+        # 업로드 도구와 같은 변환 (H.265는 fMP4, 특수문자 입력은 작업 폴더에 연결)
+        if not convert_to_hls(local_mp4, hls_dir, codec=info.codec if info else "h264", log=self.log,
+                              progress=self.stage_progress(remote_path, "remux"), area=area):
+            self.log(f"  ❌ {filename} HLS 변환 실패")
+            return "remux"
+        self.mark(result, "remuxed")
+        # 내려받은 원본은 업로드/검증이 끝날 때까지 작업 폴더에 유지 (실패하면 다음 실행에서 재사용,
+        # 공간은 작업 공간 예약량(원본 크기의 2배)과 용량 정책으로 관리)
+
+        segments = glob.glob(os.path.join(hls_dir, "*.ts")) + glob.glob(os.path.join(hls_dir, "*.m4s"))
+        result["segments"] = len(segments)
+        self.log(f"  ✅ {filename} HLS 변환 완료 (m3u8 + {len(segments)}개 세그먼트)")
+
+        # 3. HLS 파일 업로드
+        result["stage"] = "upload"
+        self.log(f"  📤 {filename} HLS 업로드 중...")
+
+        hls_remote_path = f"{remote_dir}/hls/{name_without_ext}"
+        scheduler = UploadScheduler(log=self.log)
+        task = scheduler.add_dir(hls_dir, hls_remote_path)
+        if not scheduler.run():
+            self.log(f"  ❌ {filename} HLS 업로드 실패")
+            return "upload"
+
+        self.log(f"  ✅ {filename} HLS 업로드 완료")
+        self.mark(result, "hls-uploaded", segments=result["segments"], duration=duration)
+
+        # 4. 검증 (업로드 응답과 로컬 파일 비교) 후 원본 삭제 - 검증 스레드에서
+        ledger = UploadLedger()
+
+        def prepare():
+            objects = task.objects
+            if not objects and scheduler.storage.batch_dirs:
+                # 폴더 단위 업로드(rclone)는 파일별 응답이 없으므로 목록 조회 크기로
+                objects = {obj.key: obj for obj in scheduler.storage.list_objects(hls_remote_path + "/") or []}
+            ledger.add_dir(hls_dir, hls_remote_path, objects)
+
+        return HLSCheck(local_reader(hls_dir), ledger, duration, area=area, prepare=prepare)
+
+    def convert_streaming(self, remote_path, index, total, result, area):
+        """다운로드 없이 스트리밍 변환. 세그먼트는 완성되는 대로 업로드"""
+        filename = os.path.basename(remote_path)
+        name_without_ext = os.path.splitext(filename)[0]
+        hls_remote_path = f"{os.path.dirname(remote_path)}/hls/{name_without_ext}"
+
+        result["stage"] = "remux"
+        self.log(f"[{index+1}/{total}] {filename} 스트리밍 변환 중... ({self.streaming})")
+        temp_dir = area.dir("stream", clean=True)
+        # 세그먼트마다 요청 단위 재시도 (일시적인 5xx 하나로 변환 전체가 실패하지 않도록)
+        scheduler = UploadScheduler(log=self.log)
+        ledger = UploadLedger()
+
+        def upload(local_path, name):
+            # 세그먼트는 업로드 후 바로 지워지므로 크기/MD5를 지금 기록
+            info = scheduler.upload_now(local_path, f"{hls_remote_path}/{name}")
+            if info is None:
+                return False
+            ledger.record(name, local_path, info)
+            return True
+
+        remux = StreamingRemux(
+            upload=upload,
+            source=self.streaming,
+            base_url=self.stream_base(),
+            log=self.log,
+        )
+        # 원본 길이는 진행률(percent/eta)과 검증에 함께 사용
+        duration = self.source_duration(remote_path)
+        ok, segments, first_upload = remux.run(remote_path, temp_dir, duration=duration,
+                                               progress=self.stage_progress(remote_path, "remux"))
+        result["segments"] = segments
+        if not ok:
+            self.log(f"  ❌ {filename} 스트리밍 변환 실패")
+            return "remux"
+
+        first = f", 첫 세그먼트 업로드 {first_upload:.1f}초" if first_upload is not None else ""
+        self.log(f"  ✅ {filename} HLS 변환/업로드 완료 ({segments}개 세그먼트{first})")
+        self.mark(result, "hls-uploaded", segments=segments, duration=duration)
+
+        return HLSCheck(local_reader(temp_dir), ledger, duration, area=area)
+
+    def mark(self, result, stage, **data):
+        """변환 단계 완료 기록 (원본 크기를 내용 해시 대신 사용)"""
+        if self.journal:
+            self.journal.mark("convert", result["file"], stage, str(result["source_size"]), **data)
+
+    def delete_source(self, remote_path, result):
+        """옵션이 켜져 있으면 검증이 끝난 원본 MP4 삭제"""
+        if not self.delete_original:
+            return
+        filename = os.path.basename(remote_path)
+        self.log(f"  🗑️ {filename} 원본 MP4 삭제 중...")
+        if delete_file(remote_path):
+            self.log(f"  ✅ {filename} 원본 삭제 완료")
+            self.mark(result, "original-deleted")
+        else:
+            self.log(f"  ⚠️ {filename} 원본 삭제 실패 (수동 삭제 필요)")
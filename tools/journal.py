@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+업로드/변환 작업 기록 (재시작 시 이어하기)
+- 파일별로 완료된 단계(probed, compressed, remuxed, mp4-uploaded, hls-uploaded,
+  thumbnailed, kv-registered)를 SQLite에 기록
+- 원본 내용 해시가 바뀌면 이전 기록은 무시하고 처음부터 다시 처리
+- 프로그램이 죽거나 노트북이 잠들어도 다음 실행에서 멈춘 단계부터 계속
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from jbch_common import STATE_DIR
+
+# 업로드 단계 (순서대로)
+UPLOAD_STAGES = (
+    "probed",
+    "compressed",
+    "remuxed",
+    "mp4-uploaded",
+    "hls-uploaded",
+    "thumbnailed",
+    "kv-registered",
+)
+
+# 기존 R2 영상 HLS 변환 단계
+CONVERT_STAGES = (
+    "remuxed",
+    "hls-uploaded",
+    "original-deleted",
+)
+
+DEFAULT_JOURNAL_PATH = os.path.join(STATE_DIR, "journal.sqlite")
+
+
+class Journal:
+    """(종류, 키) 단위 작업의 단계별 완료 기록
+
+    여러 워커 스레드에서 동시에 호출해도 안전함 (단일 연결 + 잠금).
+    단계마다 즉시 커밋하므로 비정상 종료 시에도 마지막 완료 단계까지 남음.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stages ("
+                " kind TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " content_hash TEXT,"
+                " data TEXT,"
+                " done_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, key, stage))"
+            )
+            self._conn.commit()
+
+    def completed(self, kind, key, content_hash=None):
+        """완료된 단계 {단계: data} 반환. 내용 해시가 다른 기록은 지우고 빈 dict 반환"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, content_hash, data FROM stages WHERE kind = ? AND key = ?",
+                (kind, key)
+            ).fetchall()
+            if any(row[1] != content_hash for row in rows):
+                # 원본이 바뀜 → 이전 진행 상황은 더 이상 유효하지 않음
+                self._conn.execute("DELETE FROM stages WHERE kind = ? AND key = ?", (kind, key))
+                self._conn.commit()
+                return {}
+        return {stage: json.loads(data) if data else {} for stage, _, data in rows}
+
+    def mark(self, kind, key, stage, content_hash=None, **data):
+        """단계 완료 기록 (같은 단계는 덮어씀)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (kind, key, stage, content_hash, data, done_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, stage, content_hash, json.dumps(data, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def reset(self, kind, key=None):
+        """기록 삭제 (key가 없으면 해당 종류 전체)"""
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM stages WHERE kind = ?", (kind,))
+            else:
+                self._conn.execute("DELETE FROM stages WHERE kind = ? AND key = ?", (kind, key))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+사이트 KV 파일 목록 API (/api/videos/files)
+- 증분 동기화(delta): 도구가 실제로 한 변경(추가/삭제/HLS 경로 갱신)만 보내 서버가 한 번에 반영
+- 서버 목록 버전(version)으로 다른 작업의 동시 변경을 확인하고, 서버에 없던 항목(drift)을 알려줌
+- 전체 동기화(sync)는 R2 버킷 전체를 다시 읽으므로 불일치 복구용 (증분 동기화 실패 시 대신 사용)
+- 업로드 등록은 KVBatch로 모아 여러 개씩 한 번에 (연결은 keep-alive로 재사용)
+"""
+
+import io
+import json
+import time
+import threading
+import http.client
+import urllib.error
+import urllib.parse
+
+from jbch_common import API_BASE_URL
+
+# 한 번에 등록할 파일 수
+REGISTER_BATCH_SIZE = 50
+# 첫 항목을 모은 뒤 이 시간(초)이 지나면 묶음이 덜 차도 등록 (긴 작업 중에도 사이트에 반영)
+REGISTER_MAX_WAIT = 60
+
+# 마지막으로 확인한 서버 목록 버전 (다음 delta 요청의 기준)
+_last_version = None
+_version_lock = threading.Lock()
+
+
+class FilesApiConnection:
+    """/api/videos/files keep-alive 연결 (요청마다 TLS 연결을 새로 하지 않음, 스레드 안전)"""
+
+    def __init__(self):
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def connect(self, timeout):
+        url = urllib.parse.urlsplit(API_BASE_URL)
+        cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        return cls(url.hostname, url.port, timeout=timeout)
+
+    def post(self, payload, timeout=10, user_agent="JBCH-Uploader/1.0"):
+        """JSON POST → 응답 JSON (HTTP 오류는 urllib.error.HTTPError로 전달)"""
+        url = f"{API_BASE_URL.rstrip('/')}/api/videos/files"
+        path = urllib.parse.urlsplit(url).path
+        data = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'User-Agent': user_agent}
+        with self._lock:
+            for attempt in range(2):
+                reused = self._conn is not None
+                if not reused:
+                    self._conn = self.connect(timeout)
+                self._conn.timeout = timeout
+                if self._conn.sock is not None:
+                    self._conn.sock.settimeout(timeout)
+                try:
+                    self._conn.request("POST", path, body=data, headers=headers)
+                    response = self._conn.getresponse()
+                    body = response.read()
+                except (OSError, http.client.HTTPException):
+                    self._conn.close()
+                    self._conn = None
+                    # 서버가 닫은 유휴 연결이면 새 연결로 한 번 더
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                if response.will_close:
+                    self._conn.close()
+                    self._conn = None
+                if response.status >= 400:
+                    raise urllib.error.HTTPError(url, response.status, response.reason,
+                                                 response.msg, io.BytesIO(body))
+                return json.loads(body.decode('utf-8'))
+
+    def close(self):
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+
+_connection = FilesApiConnection()
+
+
+def post_files_api(payload, timeout=10, user_agent="JBCH-Uploader/1.0"):
+    """/api/videos/files 에 JSON POST 후 응답 JSON 반환 (HTTP 오류는 예외로 전달)"""
+    return _connection.post(payload, timeout=timeout, user_agent=user_agent)
+
+
+def request_kv_sync(timeout=120, user_agent="JBCH-Uploader/1.0"):
+    """R2 → KV 전체 동기화 요청 (복구용). 응답 JSON 반환 (HTTP 오류는 예외로 전달)"""
+    result = post_files_api({"action": "sync"}, timeout=timeout, user_agent=user_agent)
+    remember_version(result.get('version'))
+    return result
+
+
+def remember_version(version):
+    global _last_version
+    if isinstance(version, int):
+        with _version_lock:
+            _last_version = version
+
+
+def file_record(path, size=0, hls=None, **fields):
+    """KV 파일 항목 (path는 항상 MP4 경로, HLS는 별도 필드, fields: duration/codec 등 - None은 제외)"""
+    record = {
+        "path": path,
+        "name": path.rsplit('/', 1)[-1],
+        "size": size or 0,
+        "category": path.split('/')[0],
+    }
+    if hls:
+        record["hls"] = hls
+    record.update({k: v for k, v in fields.items() if v is not None})
+    return record
+
+
+class KVBatch:
+    """업로드한 파일의 KV 등록을 모아서 한 번에 (파일마다 요청 + KV 쓰기 대신 묶음마다 한 번)
+
+    add(record, on_registered)로 추가 → REGISTER_BATCH_SIZE개가 모이거나 REGISTER_MAX_WAIT초가
+    지나면 등록. 작업이 끝나면 flush()로 남은 것 등록. 등록에 성공한 항목만 on_registered 호출,
+    실패한 항목은 버퍼에 남아 다음 flush에서 다시 시도.
+    """
+
+    def __init__(self, size=REGISTER_BATCH_SIZE, max_wait=REGISTER_MAX_WAIT, log=None,
+                 user_agent="JBCH-Uploader/1.0"):
+        self.size = size
+        self.max_wait = max_wait
+        self.log = log or (lambda message: None)
+        self.user_agent = user_agent
+        self._pending = []
+        self._first_added = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, record, on_registered=None):
+        with self._lock:
+            self._pending.append((record, on_registered))
+            if self._first_added is None:
+                self._first_added = time.time()
+            due = len(self._pending) >= self.size or time.time() - self._first_added >= self.max_wait
+        if due:
+            self.flush()
+
+    def flush(self):
+        """모인 항목 등록 → 모두 성공했으면 True"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._first_added = None
+            ok = True
+            for i in range(0, len(pending), self.size):
+                chunk = pending[i:i + self.size]
+                if self.send(chunk):
+                    for record, on_registered in chunk:
+                        if on_registered:
+                            on_registered()
+                else:
+                    ok = False
+                    with self._lock:
+                        self._pending[:0] = chunk
+                        self._first_added = self._first_added or time.time()
+            return ok
+
+    def send(self, chunk):
+        try:
+            result = post_files_api({"action": "add", "files": [record for record, _ in chunk]},
+                                    timeout=30, user_agent=self.user_agent)
+        except Exception as e:
+            self.log(f"  ⚠️ KV 등록 오류 ({len(chunk)}개): {e}")
+            return False
+        if not result.get('success'):
+            self.log(f"  ⚠️ KV 등록 실패 ({len(chunk)}개): {result}")
+            return False
+        remember_version(result.get('version'))
+        self.log(f"  📝 KV 등록 완료 ({len(chunk)}개)")
+        return True
+
+
+class KVDelta:
+    """KV 파일 목록 변경 모음 (같은 경로는 마지막 변경만 남음)"""
+
+    def __init__(self):
+        self.adds = {}
+        self.updates = {}
+        self.removes = {}
+
+    def __len__(self):
+        return len(self.adds) + len(self.updates) + len(self.removes)
+
+    def add(self, record):
+        """새 항목 추가 (같은 경로가 있으면 교체)"""
+        self.removes.pop(record["path"], None)
+        self.updates.pop(record["path"], None)
+        self.adds[record["path"]] = record
+
+    def update(self, record):
+        """기존 항목의 필드 갱신 (없으면 서버가 추가하고 drift로 알려줌)"""
+        self.removes.pop(record["path"], None)
+        if record["path"] in self.adds:
+            self.adds[record["path"]].update(record)
+        else:
+            self.updates.setdefault(record["path"], {}).update(record)
+
+    def remove(self, path):
+        self.adds.pop(path, None)
+        self.updates.pop(path, None)
+        self.removes[path] = True
+
+    def to_payload(self, base_version=None):
+        payload = {
+            "action": "delta",
+            "add": list(self.adds.values()),
+            "update": list(self.updates.values()),
+            "remove": list(self.removes),
+        }
+        if base_version is not None:
+            payload["baseVersion"] = base_version
+        return payload
+
+
+def send_kv_delta(delta, timeout=30, user_agent="JBCH-Uploader/1.0"):
+    """증분 동기화 요청. 응답 JSON 반환 (HTTP 오류는 예외로 전달)
+
+    마지막으로 본 버전을 함께 보내고, 그 사이 다른 작업이 목록을 바꿨으면(409)
+    서버가 알려준 버전으로 한 번 더 요청 (변경은 같은 결과를 내는 추가/갱신/삭제라 다시 보내도 안전).
+    """
+    with _version_lock:
+        version = _last_version
+    for attempt in range(2):
+        try:
+            result = post_files_api(delta.to_payload(version), timeout=timeout, user_agent=user_agent)
+        except urllib.error.HTTPError as e:
+            if e.code != 409 or attempt > 0:
+                raise
+            body = json.loads(e.read().decode('utf-8') or "{}")
+            version = body.get('version')
+            continue
+        remember_version(result.get('version'))
+        return result
+    return {"success": False, "error": "version conflict"}
+
+
+def sync_kv_changes(delta, log=None, user_agent="JBCH-Uploader/1.0"):
+    """변경분을 KV에 반영. 증분 동기화가 실패하면 전체 동기화로 대신함. 성공 여부 반환"""
+    log = log or (lambda message: None)
+    if not len(delta):
+        return True
+    try:
+        result = send_kv_delta(delta, user_agent=user_agent)
+        if result.get('success'):
+            drift = result.get('drift') or []
+            log(f"✅ KV 반영 완료 ({len(delta)}개 변경, 전체 {result.get('count', 0)}개 파일)")
+            if drift:
+                # 서버 목록에 없던 항목을 갱신/삭제함 → 이전에 누락된 변경이 있었음
+                log(f"⚠️ KV 목록과 다른 항목 {len(drift)}개 (예: {drift[0]}) - 필요하면 전체 동기화로 복구")
+            return True
+        log(f"⚠️ KV 증분 반영 실패: {result.get('error', result)} - 전체 동기화로 대신함")
+    except Exception as e:
+        log(f"⚠️ KV 증분 반영 오류: {e} - 전체 동기화로 대신함")
+
+    try:
+        result = request_kv_sync(user_agent=user_agent)
+        if result.get('success'):
+            log(f"✅ KV 동기화 완료! ({result.get('count', 0)}개 파일)")
+            return True
+        log(f"⚠️ KV 동기화 실패: {result.get('error', result)}")
+    except Exception as e:
+        log(f"⚠️ KV 동기화 오류: {e}")
+    return False
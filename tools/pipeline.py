@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+단계별(staged) 파이프라인 실행기
+- 각 단계는 자체 워커 수와 크기가 제한된 입력 큐를 가짐
+- 파일 N+1이 변환되는 동안 파일 N은 업로드, 파일 N-1은 KV 등록
+- 전체 시간이 단계 합계가 아니라 가장 느린 단계에 수렴
+"""
+
+import queue
+import threading
+
+# 단계 종료 신호
+_STOP = object()
+
+
+class Stage:
+    """파이프라인 단계 정의
+
+    func(item)이 False를 반환하면 해당 항목은 실패로 처리되어 다음 단계로 넘어가지 않음.
+    예외가 발생해도 실패로 처리됨. 그 외 반환값은 모두 성공.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        # 기본 큐 크기: 워커당 대기 1개 (임시 파일이 무한정 쌓이지 않도록)
+        self.queue_size = queue_size if queue_size is not None else self.workers
+
+
+class Pipeline:
+    """여러 Stage를 bounded queue로 연결하여 동시에 실행"""
+
+    def __init__(self, stages, on_error=None, on_done=None):
+        if not stages:
+            raise ValueError("파이프라인 단계가 없습니다.")
+        self.stages = list(stages)
+        self.on_error = on_error
+        self.on_done = on_done
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """items를 모든 단계에 통과시키고 (완료 목록, 실패 목록) 반환
+
+        실패 목록은 (item, 단계 이름, 예외 또는 None) 튜플의 리스트.
+        """
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self._alive = [stage.workers for stage in self.stages]
+        self._completed = []
+        self._failed = []
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index,),
+                    name=f"pipeline-{stage.name}-{n}"
+                )
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+        # 첫 단계 큐가 가득 차면 여기서 대기 (backpressure)
+        for item in items:
+            self._queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            self._queues[0].put(_STOP)
+
+        for thread in threads:
+            thread.join()
+
+        return self._completed, self._failed
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        in_queue = self._queues[index]
+        out_queue = self._queues[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            item = in_queue.get()
+            if item is _STOP:
+                break
+
+            error = None
+            try:
+                ok = stage.func(item) is not False
+            except Exception as e:
+                ok = False
+                error = e
+
+            if not ok:
+                self._fail(item, stage, error)
+            elif out_queue is not None:
+                out_queue.put(item)
+            else:
+                self._done(item)
+
+        # 마지막으로 끝나는 워커가 다음 단계에 종료 신호 전달
+        with self._lock:
+            self._alive[index] -= 1
+            last = self._alive[index] == 0
+        if last and out_queue is not None:
+            for _ in range(self.stages[index + 1].workers):
+                out_queue.put(_STOP)
+
+    def _fail(self, item, stage, error):
+        with self._lock:
+            self._failed.append((item, stage.name, error))
+        if self.on_error:
+            try:
+                self.on_error(item, stage.name, error)
+            except Exception:
+                pass
+
+    def _done(self, item):
+        with self._lock:
+            self._completed.append(item)
+        if self.on_done:
+            try:
+                self.on_done(item)
+            except Exception:
+                pass
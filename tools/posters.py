@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+대표 썸네일(포스터) 선택 + 탐색용 스프라이트 시트/WebVTT
+- 포스터: 영상 여러 지점에서 키프레임 하나씩만 디코딩 (입력 쪽 -ss + -skip_frame nokey, ffmpeg 한 번 실행)
+  후보마다 작은 흑백 이미지의 밝기/엔트로피로 점수를 매겨 검은 화면/페이드/단색 화면이 아닌 프레임을 고름
+- 스프라이트: 키프레임만 디코딩하며 SPRITE_INTERVAL초마다 한 장씩 골라 타일 이미지 한 장으로 합침 (ffmpeg 한 번 실행)
+  각 타일의 실제 시각은 showinfo 출력에서 읽어 WebVTT 썸네일 트랙(sprite.jpg#xywh=x,y,w,h) 생성
+"""
+
+import os
+import re
+import math
+
+from progress import run_ffmpeg
+
+THUMBNAIL_PREFIX = "thumbnails/"
+# 포스터 크기 (가로 px)
+POSTER_WIDTH = 480
+# 후보 지점 (영상 길이 대비 비율) - 맨 앞 로고/맨 뒤 크레딧은 피함
+POSTER_FRACTIONS = (0.05, 0.15, 0.3, 0.5, 0.7)
+# 후보 점수용 흑백 이미지 크기
+SCORE_WIDTH = 64
+SCORE_HEIGHT = 36
+# 이보다 어둡거나 밝으면 (평균 밝기 0~255) 검은 화면/흰 화면으로 보고 감점
+DARK_LEVEL = 24
+BRIGHT_LEVEL = 232
+# 스프라이트 타일 크기, 열 수, 최대 타일 수
+SPRITE_TILE_WIDTH = 160
+SPRITE_TILE_HEIGHT = 90
+SPRITE_COLUMNS = 10
+SPRITE_MAX_TILES = 100
+# 타일 최소 간격 (초) - 긴 영상은 SPRITE_MAX_TILES에 맞춰 늘림
+SPRITE_INTERVAL = 10.0
+
+PTS_TIME_RE = re.compile(rb"pts_time:\s*([0-9.]+)")
+
+
+def thumbnail_key(file_path):
+    """영상 키 → 썸네일 키 (thumbnails/영상 경로.jpg)"""
+    return f"{THUMBNAIL_PREFIX}{file_path}.jpg"
+
+
+def sprite_key(file_path):
+    """영상 키 → 스프라이트 시트 키 (thumbnails/영상 경로.sprite.jpg)"""
+    return f"{THUMBNAIL_PREFIX}{file_path}.sprite.jpg"
+
+
+def vtt_key(file_path):
+    """영상 키 → WebVTT 썸네일 트랙 키 (thumbnails/영상 경로.vtt)"""
+    return f"{THUMBNAIL_PREFIX}{file_path}.vtt"
+
+
+def candidate_times(duration):
+    """포스터 후보 시각 목록 (길이를 모르면 1초 지점, 2초보다 짧으면 가운데)"""
+    if not duration:
+        return [1.0]
+    if duration < 2:
+        return [duration / 2]
+    times = []
+    for fraction in POSTER_FRACTIONS:
+        seek = round(max(1.0, duration * fraction), 3)
+        if seek < duration and seek not in times:
+            times.append(seek)
+    return times
+
+
+def frame_score(pixels):
+    """흑백 픽셀(bytes)의 점수: 밝기 히스토그램 엔트로피(0~8), 너무 어둡거나 밝으면 감점"""
+    if not pixels:
+        return None
+    histogram = [0] * 256
+    for value in pixels:
+        histogram[value] += 1
+    total = len(pixels)
+    entropy = -sum(count / total * math.log2(count / total) for count in histogram if count)
+    mean = sum(i * count for i, count in enumerate(histogram)) / total
+    if mean < DARK_LEVEL or mean > BRIGHT_LEVEL:
+        entropy *= 0.25
+    return entropy
+
+
+def input_args(input_url, remote):
+    if remote:
+        # 일시적인 네트워크 오류 시 같은 위치부터 다시 읽기
+        return ["-reconnect", "1", "-reconnect_on_network_error", "1"]
+    return []
+
+
+def make_poster(input_url, poster_path, duration=None, remote=False, times=None):
+    """후보 지점들 중 가장 좋은 프레임을 poster_path(JPEG)로 저장 → 고른 시각 (실패 시 None)
+
+    후보마다 입력을 따로 열어 입력 쪽 탐색 → 그 지점 앞 키프레임 하나만 디코딩
+    (원격 URL이면 후보당 HTTP Range 읽기 몇 번). times를 주면 candidate_times 대신 그 시각들.
+    """
+    times = times or candidate_times(duration)
+    work_dir = os.path.dirname(os.path.abspath(poster_path))
+    base = os.path.splitext(os.path.basename(poster_path))[0]
+    cmd = ["ffmpeg", "-y", "-loglevel", "error"]
+    for seek in times:
+        cmd += input_args(input_url, remote)
+        cmd += ["-skip_frame", "nokey", "-noaccurate_seek", "-ss", f"{seek:.3f}", "-i", input_url]
+    candidates = []
+    for i, seek in enumerate(times):
+        jpg = os.path.join(work_dir, f"{base}.cand{i}.jpg")
+        gray = os.path.join(work_dir, f"{base}.cand{i}.gray")
+        candidates.append((seek, jpg, gray))
+        cmd += [
+            "-map", f"{i}:v:0", "-frames:v", "1",
+            "-vf", f"scale={POSTER_WIDTH}:-2", "-q:v", "3", jpg,
+            "-map", f"{i}:v:0", "-frames:v", "1",
+            "-vf", f"scale={SCORE_WIDTH}:{SCORE_HEIGHT},format=gray",
+            "-f", "rawvideo", gray,
+        ]
+
+    try:
+        # 끝 부분 후보가 실패해도 나머지는 쓸 수 있으므로 종료 코드 대신 파일로 판단
+        run_ffmpeg(cmd)
+        best = None
+        for seek, jpg, gray in candidates:
+            if not os.path.exists(jpg) or os.path.getsize(jpg) == 0 or not os.path.exists(gray):
+                continue
+            with open(gray, 'rb') as f:
+                score = frame_score(f.read())
+            if score is not None and (best is None or score > best[0]):
+                best = (score, seek, jpg)
+        if best is None:
+            return None
+        os.replace(best[2], poster_path)
+        return best[1]
+    finally:
+        for _, jpg, gray in candidates:
+            for path in (jpg, gray):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def sprite_layout(duration):
+    """(타일 간격 초, 열 수, 행 수) - 타일 수는 SPRITE_MAX_TILES 이하"""
+    interval = max(SPRITE_INTERVAL, duration / SPRITE_MAX_TILES)
+    tiles = min(SPRITE_MAX_TILES, int(duration // interval) + 1)
+    columns = min(SPRITE_COLUMNS, tiles)
+    rows = math.ceil(tiles / columns)
+    return interval, columns, rows
+
+
+def vtt_timestamp(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def write_vtt(vtt_path, sprite_name, times, duration, columns):
+    """타일 시각 목록 → WebVTT (각 큐는 다음 타일 시각까지, 마지막은 영상 끝까지)"""
+    lines = ["WEBVTT", ""]
+    for i, start in enumerate(times):
+        end = times[i + 1] if i + 1 < len(times) else duration
+        if end <= start:
+            continue
+        x = (i % columns) * SPRITE_TILE_WIDTH
+        y = (i // columns) * SPRITE_TILE_HEIGHT
+        lines.append(f"{vtt_timestamp(start)} --> {vtt_timestamp(end)}")
+        lines.append(f"{sprite_name}#xywh={x},{y},{SPRITE_TILE_WIDTH},{SPRITE_TILE_HEIGHT}")
+        lines.append("")
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def make_sprite(input_url, sprite_path, vtt_path, duration, sprite_name=None, remote=False, progress=None):
+    """스프라이트 시트(sprite_path) + WebVTT(vtt_path) 생성 → 성공 여부
+
+    VTT 안의 이미지 경로는 sprite_name (기본: sprite_path 파일 이름 - VTT와 같은 폴더에 올린다고 보고 상대 경로).
+    """
+    if not duration or duration <= 0:
+        return False
+    interval, columns, rows = sprite_layout(duration)
+    times = []
+
+    def on_stderr(line):
+        match = PTS_TIME_RE.search(line)
+        if match and b"showinfo" in line:
+            times.append(float(match.group(1)))
+            return True
+        return False
+
+    video_filter = (
+        f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{interval:.3f})',"
+        f"scale={SPRITE_TILE_WIDTH}:{SPRITE_TILE_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={SPRITE_TILE_WIDTH}:{SPRITE_TILE_HEIGHT}:(ow-iw)/2:(oh-ih)/2,"
+        f"showinfo,tile={columns}x{rows}"
+    )
+    cmd = ["ffmpeg", "-y", "-loglevel", "info"]
+    cmd += input_args(input_url, remote)
+    cmd += [
+        "-skip_frame", "nokey", "-i", input_url,
+        "-an", "-sn", "-vf", video_filter,
+        "-frames:v", "1", "-q:v", "5",
+        sprite_path
+    ]
+    result = run_ffmpeg(cmd, on_progress=progress, duration=duration, on_stderr=on_stderr)
+    if result.returncode != 0 or not os.path.exists(sprite_path) or not times:
+        return False
+    write_vtt(vtt_path, sprite_name or os.path.basename(sprite_path),
+              times[:columns * rows], duration, columns)
+    return True
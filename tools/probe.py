@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+영상 정보 조회 (ffprobe 한 번 + 영구 캐시)
+- 코덱, 길이, 해상도, 비트레이트, 오디오 코덱, 키프레임 간격을 ffprobe JSON 한 번으로 조회
+- (경로, 크기, 수정 시각) 기준으로 SQLite에 저장 → 같은 파일은 다시 실행해도 ffprobe 생략
+- 압축 판단, HLS 변환, 썸네일 등 모든 단계가 같은 결과를 공유
+"""
+
+import os
+import json
+import sqlite3
+import threading
+
+from jbch_common import STATE_DIR, run_command
+from safe_path import safe_command
+
+DEFAULT_PROBE_CACHE_PATH = os.path.join(STATE_DIR, "probe_cache.sqlite")
+# 키프레임 간격 측정에 읽는 앞부분 길이 (초)
+KEYFRAME_SCAN_SECONDS = 30
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _frame_rate(value):
+    """"30000/1001" → 29.97"""
+    try:
+        num, den = value.split('/')
+        return float(num) / float(den) if float(den) else None
+    except (AttributeError, ValueError):
+        return None
+
+
+class MediaInfo:
+    """ffprobe 결과 요약 (값을 알 수 없으면 None)"""
+
+    FIELDS = (
+        "codec", "width", "height", "duration", "bit_rate", "video_bit_rate",
+        "fps", "pix_fmt", "audio_codec", "keyframe_interval", "size",
+    )
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, name, fields.get(name))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_ffprobe(cls, data, size=None):
+        """ffprobe -print_format json 출력 → MediaInfo"""
+        streams = data.get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), {})
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+        fmt = data.get("format", {})
+
+        # 키프레임 간격: 앞부분 패킷 중 키프레임(K) 시각 차이의 평균
+        keyframes = []
+        for packet in data.get("packets", []):
+            if packet.get("stream_index") == video.get("index") and 'K' in packet.get("flags", ""):
+                pts = _float(packet.get("pts_time"))
+                if pts is not None:
+                    keyframes.append(pts)
+        keyframe_interval = None
+        if len(keyframes) >= 2:
+            keyframe_interval = round((keyframes[-1] - keyframes[0]) / (len(keyframes) - 1), 3)
+
+        return cls(
+            codec=(video.get("codec_name") or "unknown").lower(),
+            width=_int(video.get("width")),
+            height=_int(video.get("height")),
+            duration=_float(fmt.get("duration")) or _float(video.get("duration")),
+            bit_rate=_int(fmt.get("bit_rate")),
+            video_bit_rate=_int(video.get("bit_rate")),
+            fps=_frame_rate(video.get("avg_frame_rate")),
+            pix_fmt=video.get("pix_fmt"),
+            audio_codec=audio.get("codec_name"),
+            keyframe_interval=keyframe_interval,
+            size=size if size is not None else _int(fmt.get("size")),
+        )
+
+
+def run_ffprobe(path):
+    """ffprobe 한 번으로 format + 스트림 + 앞부분 패킷 정보 조회 (실패 시 None)"""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-print_format", "json",
+        "-read_intervals", f"%+{KEYFRAME_SCAN_SECONDS}",
+        "-show_entries",
+        "format=duration,bit_rate,size"
+        ":stream=index,codec_type,codec_name,width,height,bit_rate,avg_frame_rate,pix_fmt,duration"
+        ":packet=stream_index,pts_time,flags",
+        path
+    ]
+    try:
+        with safe_command(cmd) as cmd:
+            result = run_command(cmd, text=True)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except ValueError:
+        return None
+
+
+class ProbeCache:
+    """(경로, 크기, 수정 시각) → MediaInfo 영구 캐시 + 메모리 캐시
+
+    파일이 바뀌면(크기나 수정 시각이 다르면) 다시 조회. 여러 스레드에서 호출해도 안전.
+    """
+
+    def __init__(self, path=DEFAULT_PROBE_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " info TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def probe(self, path):
+        """영상 정보 반환 (ffprobe 실패 시 None, 실패는 캐시하지 않음)"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (path, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            info = self._memory.get(key)
+            if info is not None:
+                return info
+            row = self._conn.execute(
+                "SELECT info FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?", key
+            ).fetchone()
+        if row:
+            info = MediaInfo(**json.loads(row[0]))
+        else:
+            data = run_ffprobe(path)
+            if data is None:
+                return None
+            info = MediaInfo.from_ffprobe(data, size=stat.st_size)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO probes (path, size, mtime_ns, info) VALUES (?, ?, ?, ?)",
+                    (*key, json.dumps(info.to_dict()))
+                )
+                self._conn.commit()
+
+        with self._lock:
+            self._memory[key] = info
+        return info
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def probe(path):
+    """기본 캐시(STATE_DIR/probe_cache.sqlite)로 영상 정보 조회"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ProbeCache()
+    return _default_cache.probe(path)
+
+
+def probe_url(url):
+    """원격 URL 영상 정보 (캐시 없음 - ffprobe가 moov 색인과 앞부분만 Range로 읽음, 실패 시 None)"""
+    data = run_ffprobe(url)
+    return MediaInfo.from_ffprobe(data) if data else None
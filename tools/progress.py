@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+외부 명령(ffmpeg/rclone) 실시간 진행률
+- ffmpeg: -progress pipe:1 출력(key=value 블록)을 읽으며 fps, 속도 배수(1.0x = 실시간), 출력 bytes/sec, ETA 계산
+- rclone: --use-json-log --stats 출력의 stats 객체로 전송 bytes/sec, ETA
+- stderr는 전부 모으지 않고 마지막 STDERR_TAIL_BYTES만 보관 (오류 메시지용)
+- StageStats: 단계별(압축/HLS/다운로드 등) 누적 처리량 → 작업 끝에 어디서 시간이 쓰였는지 요약
+"""
+
+import json
+import time
+import threading
+import subprocess
+from collections import deque
+
+from jbch_common import SUBPROCESS_FLAGS
+from safe_path import safe_command
+
+# 오류 메시지용으로 보관할 stderr 끝부분 (bytes)
+STDERR_TAIL_BYTES = 16 * 1024
+# rclone 통계 출력 간격
+RCLONE_STATS_INTERVAL = "1s"
+# 다운로드 진행률 알림 최소 간격 (초)
+METER_INTERVAL = 0.5
+# stage_progress 이벤트의 단계 이름 → 표시용
+STAGE_LABELS = {
+    "download": "다운로드",
+    "compress": "압축",
+    "repack": "MP4 재포장",
+    "remux": "HLS 변환",
+    "fanout": "압축+HLS",
+    "hls": "HLS 변환",
+    "sprite": "스프라이트",
+}
+
+
+class ProcessResult:
+    """run_command 결과와 같은 모양 (returncode, stderr) + 마지막 진행률"""
+
+    def __init__(self, returncode, stderr=b"", progress=None):
+        self.returncode = returncode
+        self.stderr = stderr
+        self.progress = progress
+
+
+class FfmpegProgress:
+    """ffmpeg 진행 상황 (duration을 알면 percent/eta도 계산)"""
+
+    def __init__(self, frame=0, fps=0.0, out_seconds=0.0, total_size=0, speed=None,
+                 elapsed=0.0, duration=None, done=False):
+        self.frame = frame
+        self.fps = fps
+        self.out_seconds = out_seconds
+        self.total_size = total_size
+        self.speed = speed
+        self.elapsed = elapsed
+        self.duration = duration
+        self.done = done
+
+    @property
+    def percent(self):
+        if self.done:
+            return 100.0
+        if not self.duration:
+            return None
+        return min(100.0, self.out_seconds / self.duration * 100)
+
+    @property
+    def eta(self):
+        """남은 예상 시간 (초) - 속도 배수 기준, 없으면 지금까지 걸린 시간 비율로"""
+        if self.done:
+            return 0.0
+        if not self.duration or self.out_seconds <= 0:
+            return None
+        remaining = max(0.0, self.duration - self.out_seconds)
+        if self.speed:
+            return remaining / self.speed
+        return remaining * self.elapsed / self.out_seconds
+
+    @property
+    def bytes_per_sec(self):
+        return self.total_size / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "percent": round(self.percent, 1) if self.percent is not None else None,
+            "fps": round(self.fps, 1),
+            "speed": round(self.speed, 2) if self.speed is not None else None,
+            "bytes_per_sec": round(self.bytes_per_sec),
+            "eta": round(self.eta) if self.eta is not None else None,
+            "media_seconds": round(self.out_seconds, 1),
+            "elapsed": round(self.elapsed, 1),
+            "done": self.done,
+        }
+
+
+class TransferProgress:
+    """전송(rclone/S3 다운로드) 진행 상황"""
+
+    def __init__(self, transferred=0, total=None, elapsed=0.0, speed=None, done=False):
+        self.transferred = transferred
+        self.total = total
+        self.elapsed = elapsed
+        self.speed = speed
+        self.done = done
+
+    @property
+    def bytes_per_sec(self):
+        if self.speed is not None:
+            return self.speed
+        return self.transferred / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def percent(self):
+        if self.done:
+            return 100.0
+        if not self.total:
+            return None
+        return min(100.0, self.transferred / self.total * 100)
+
+    @property
+    def eta(self):
+        if self.done:
+            return 0.0
+        if not self.total or not self.bytes_per_sec:
+            return None
+        return max(0, self.total - self.transferred) / self.bytes_per_sec
+
+    def to_dict(self):
+        return {
+            "percent": round(self.percent, 1) if self.percent is not None else None,
+            "bytes": self.transferred,
+            "total_bytes": self.total,
+            "bytes_per_sec": round(self.bytes_per_sec),
+            "eta": round(self.eta) if self.eta is not None else None,
+            "elapsed": round(self.elapsed, 1),
+            "done": self.done,
+        }
+
+
+def parse_speed(value):
+    """'1.23x' → 1.23 (N/A 등은 None)"""
+    try:
+        return float(value.strip().rstrip('x'))
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class StderrTail:
+    """stderr를 별도 스레드에서 계속 읽어 끝부분만 보관 (파이프가 가득 차 프로세스가 멈추지 않도록)"""
+
+    def __init__(self, stream, limit=STDERR_TAIL_BYTES, on_line=None):
+        self.stream = stream
+        self.limit = limit
+        self.on_line = on_line
+        self._chunks = deque()
+        self._size = 0
+        self.thread = threading.Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def drain(self):
+        for line in self.stream:
+            if self.on_line and self.on_line(line):
+                # 진행률 줄은 보관하지 않음
+                continue
+            self._chunks.append(line)
+            self._size += len(line)
+            while self._size > self.limit and len(self._chunks) > 1:
+                self._size -= len(self._chunks.popleft())
+
+    def value(self):
+        self.thread.join()
+        return b"".join(self._chunks)[-self.limit:]
+
+
+def run_ffmpeg(cmd, on_progress=None, duration=None, cwd=None, on_stderr=None, link_dir=None,
+               stdin=subprocess.DEVNULL):
+    """ffmpeg 실행 + 진행률 콜백 (cmd[0]은 ffmpeg). run_command처럼 returncode/stderr가 있는 결과 반환
+
+    on_progress(FfmpegProgress)는 ffmpeg가 진행 블록을 낼 때마다(약 0.5초) 호출, 마지막은 done=True.
+    duration(초)을 주면 percent/eta 계산.
+    on_stderr(줄 bytes)는 stderr 줄마다 호출 (True를 반환한 줄은 보관하지 않음 - showinfo 출력 등).
+    link_dir: 특수문자 입력 경로를 연결할 폴더 (기본 시스템 임시 폴더).
+    stdin: ffmpeg 표준 입력 (pipe:0 입력이면 앞 프로세스의 stdout).
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    # 특수문자가 있는 입력 경로는 링크 등으로 바꿔 실행 (safe_path.py)
+    with safe_command(cmd, link_dir) as cmd:
+        started = time.time()
+        process = subprocess.Popen(
+            cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            creationflags=SUBPROCESS_FLAGS, cwd=cwd
+        )
+        stderr = StderrTail(process.stderr, on_line=on_stderr)
+
+        fields = {}
+        last = None
+        for raw in process.stdout:
+            line = raw.decode('utf-8', errors='replace').strip()
+            if '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            if key != "progress":
+                fields[key] = value
+                continue
+            out_us = parse_int(fields.get("out_time_us") or fields.get("out_time_ms"), 0)
+            last = FfmpegProgress(
+                frame=parse_int(fields.get("frame")),
+                fps=parse_float(fields.get("fps")),
+                out_seconds=max(0, out_us) / 1_000_000,
+                total_size=parse_int(fields.get("total_size")),
+                speed=parse_speed(fields.get("speed")),
+                elapsed=time.time() - started,
+                duration=duration,
+                done=value == "end",
+            )
+            fields = {}
+            if on_progress:
+                on_progress(last)
+
+        returncode = process.wait()
+    return ProcessResult(returncode, stderr.value(), last)
+
+
+def run_rclone(cmd, on_progress=None):
+    """rclone 실행 + 전송 진행률 콜백 (cmd[0]은 rclone). --stats를 JSON 로그로 받아 파싱"""
+    cmd = [*cmd, "--use-json-log", "--stats", RCLONE_STATS_INTERVAL,
+           "--stats-log-level", "NOTICE", "--stats-one-line"]
+    started = time.time()
+    process = subprocess.Popen(
+        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        creationflags=SUBPROCESS_FLAGS
+    )
+    state = {"last": None}
+
+    def on_line(line):
+        try:
+            stats = json.loads(line).get("stats")
+        except (ValueError, AttributeError):
+            return False
+        if not isinstance(stats, dict):
+            return False
+        progress = TransferProgress(
+            transferred=parse_int(stats.get("bytes")),
+            total=parse_int(stats.get("totalBytes"), None) or None,
+            elapsed=time.time() - started,
+            speed=parse_float(stats.get("speed"), None),
+        )
+        state["last"] = progress
+        if on_progress:
+            on_progress(progress)
+        return True
+
+    stderr = StderrTail(process.stderr, on_line=on_line)
+    returncode = process.wait()
+    tail = stderr.value()
+    last = state["last"] or TransferProgress(elapsed=time.time() - started)
+    if returncode == 0:
+        size = last.total or last.transferred
+        last = TransferProgress(size, size, time.time() - started, done=True)
+        if on_progress:
+            on_progress(last)
+    return ProcessResult(returncode, tail, last)
+
+
+class TransferMeter:
+    """다운로드 sink 감싸기 - 쓴 bytes를 세어 METER_INTERVAL마다 TransferProgress 알림
+
+    total은 응답의 content-length를 알게 되면 채움 (S3Storage.request).
+    """
+
+    def __init__(self, fileobj, on_progress, total=None):
+        self.fileobj = fileobj
+        self.on_progress = on_progress
+        self.total = total
+        self.transferred = 0
+        self.started = time.time()
+        self._reported = 0.0
+
+    def write(self, data):
+        self.fileobj.write(data)
+        self.transferred += len(data)
+        now = time.time()
+        if now - self._reported >= METER_INTERVAL:
+            self._reported = now
+            self.on_progress(TransferProgress(self.transferred, self.total, now - self.started))
+
+    def finish(self):
+        self.on_progress(TransferProgress(self.transferred, self.transferred,
+                                          time.time() - self.started, done=True))
+
+
+class StageStats:
+    """단계별 누적 처리량 (여러 스레드에서 record 가능)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage, progress):
+        """끝난(done) 진행률 하나 반영"""
+        with self._lock:
+            s = self._stages.setdefault(stage, {"count": 0, "seconds": 0.0, "media_seconds": 0.0,
+                                                "frames": 0, "bytes": 0})
+            s["count"] += 1
+            s["seconds"] += progress.elapsed
+            if isinstance(progress, FfmpegProgress):
+                s["media_seconds"] += progress.out_seconds
+                s["frames"] += progress.frame
+                s["bytes"] += progress.total_size
+            else:
+                s["bytes"] += progress.transferred
+
+    def to_dict(self):
+        """{단계: {count, seconds, speed(배수), fps, bytes_per_sec}}"""
+        with self._lock:
+            stages = {name: dict(s) for name, s in self._stages.items()}
+        result = {}
+        for name, s in stages.items():
+            seconds = s["seconds"] or 0.0
+            result[name] = {
+                "count": s["count"],
+                "seconds": round(seconds, 1),
+                "speed": round(s["media_seconds"] / seconds, 2) if seconds and s["media_seconds"] else None,
+                "fps": round(s["frames"] / seconds, 1) if seconds and s["frames"] else None,
+                "bytes_per_sec": round(s["bytes"] / seconds) if seconds else 0,
+            }
+        return result
+
+    def summary_lines(self):
+        lines = []
+        for name, s in self.to_dict().items():
+            parts = [f"{s['count']}건", f"{s['seconds']:.0f}초"]
+            if s["speed"]:
+                parts.append(f"{s['speed']:.2f}x")
+            if s["fps"]:
+                parts.append(f"{s['fps']:.0f}fps")
+            if s["bytes_per_sec"]:
+                parts.append(f"{s['bytes_per_sec'] / 1024 ** 2:.1f}MB/s")
+            lines.append(f"  ⏱️ {name}: {', '.join(parts)}")
+        return lines
+
+
+def format_progress(data):
+    """상태 표시줄용 짧은 문자열 (stage_progress 이벤트 또는 to_dict 결과, 예: '42% · 2.1x · 58fps · 남은 1:23')"""
+    parts = []
+    if data.get("percent") is not None:
+        parts.append(f"{data['percent']:.0f}%")
+    if data.get("speed"):
+        parts.append(f"{data['speed']:.1f}x")
+    if data.get("fps"):
+        parts.append(f"{data['fps']:.0f}fps")
+    if not data.get("fps") and data.get("bytes_per_sec"):
+        parts.append(f"{data['bytes_per_sec'] / 1024 ** 2:.1f}MB/s")
+    if data.get("eta") is not None and not data.get("done"):
+        parts.append(f"남은 {data['eta'] // 60}:{data['eta'] % 60:02d}")
+    return " · ".join(parts)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+ffmpeg/ffprobe 입력 경로 안전 처리 (복사 없음)
+- 파일 이름에 쉼표/세미콜론/따옴표가 있으면 ffmpeg가 구분자로 해석할 수 있으므로 안전한 경로로 바꿔 실행
+  (설교 제목에 쉼표가 흔함 - 예전에는 원본 전체를 임시 폴더로 복사)
+- 바꾸는 순서: 작업 폴더에 하드 링크 → 심볼릭 링크 → 열어 둔 파일의 /proc/<pid>/fd 경로(Linux)
+  → 8.3 짧은 이름(Windows) → 그대로. 어느 경우에도 입력 내용을 다시 쓰지 않음
+- MP4는 moov 색인 때문에 앞뒤로 탐색해야 하므로 pipe: 입력은 쓰지 않음 (스트리밍 변환만 pipe:0 - hls_stream.py)
+- run_ffmpeg/run_ffprobe가 명령 전체를 safe_command로 감싸므로 압축/재포장/HLS/썸네일/조회 모두 적용
+"""
+
+import os
+import sys
+import itertools
+import tempfile
+import threading
+
+# ffmpeg가 옵션/목록 구분자로 해석할 수 있는 문자
+UNSAFE_CHARS = (',', ';', "'", '"')
+
+_counter = itertools.count(1)
+_counter_lock = threading.Lock()
+
+
+def needs_safe_path(path):
+    """로컬 파일이고 이름에 UNSAFE_CHARS가 있는지 (URL/pipe: 등은 False)"""
+    if not isinstance(path, str) or not any(c in os.path.basename(path) for c in UNSAFE_CHARS):
+        return False
+    return os.path.isfile(path)
+
+
+def safe_extension(path):
+    """입력 파일 확장자 (영문/숫자만, ffmpeg 형식 판별용)"""
+    ext = os.path.splitext(path)[1]
+    return ext if ext[1:].isalnum() else ""
+
+
+def link_file(src, dest):
+    """src를 dest로 연결 (하드 링크, 안 되면 심볼릭 링크) → 성공 여부. 이미 같은 파일이면 그대로"""
+    if os.path.lexists(dest):
+        try:
+            if os.path.samefile(dest, src):
+                return True
+        except OSError:
+            pass
+        try:
+            os.remove(dest)
+        except OSError:
+            return False
+    try:
+        os.link(src, dest)
+        return True
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dest)
+        return True
+    except (OSError, NotImplementedError):
+        return False
+
+
+def short_path(path):
+    """Windows 8.3 짧은 경로 (쉼표 등이 _로 바뀜, 짧은 이름이 꺼진 볼륨이면 None)"""
+    if sys.platform != 'win32':
+        return None
+    import ctypes
+    size = ctypes.windll.kernel32.GetShortPathNameW(path, None, 0)
+    if not size:
+        return None
+    buffer = ctypes.create_unicode_buffer(size)
+    if not ctypes.windll.kernel32.GetShortPathNameW(path, buffer, size):
+        return None
+    return buffer.value
+
+
+class SafeInput:
+    """입력 경로 하나를 안전한 경로로 (with 블록 동안 유효, 끝나면 링크 삭제/파일 닫기)
+
+    link_dir: 링크를 만들 폴더 (기본 시스템 임시 폴더 - 원본과 같은 디스크면 하드 링크).
+    """
+
+    def __init__(self, path, link_dir=None):
+        self.path = path
+        self.link_dir = link_dir
+        self.link = None
+        self.fd = None
+
+    def open(self):
+        """안전한 경로 반환 (바꿀 필요가 없으면 원래 경로)"""
+        if not needs_safe_path(self.path):
+            return self.path
+        link_dir = self.link_dir or tempfile.gettempdir()
+        with _counter_lock:
+            n = next(_counter)
+        link = os.path.join(link_dir, f"ffinput_{os.getpid()}_{n}{safe_extension(self.path)}")
+        if link_file(self.path, link):
+            self.link = link
+            return link
+        # 링크를 만들 수 없는 파일 시스템: 파일을 열어 두고 fd 경로로 (ffmpeg가 같은 파일을 다시 엶)
+        fd_dir = f"/proc/{os.getpid()}/fd"
+        if os.path.isdir(fd_dir):
+            self.fd = os.open(self.path, os.O_RDONLY)
+            return f"{fd_dir}/{self.fd}"
+        short = short_path(self.path)
+        if short and not needs_safe_path(short):
+            return short
+        return self.path
+
+    def close(self):
+        if self.link:
+            try:
+                os.remove(self.link)
+            except OSError:
+                pass
+            self.link = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class SafeCommand:
+    """ffmpeg/ffprobe 명령의 입력 경로를 모두 안전한 경로로 바꾼 명령 (with 블록 동안 유효)
+
+    ffmpeg는 -i 다음 인자, ffprobe는 마지막 인자를 입력으로 봄. 출력 경로는 바꾸지 않음
+    (출력은 작업 폴더 안 고정 이름).
+    """
+
+    def __init__(self, cmd, link_dir=None):
+        self.cmd = list(cmd)
+        self.link_dir = link_dir
+        self.inputs = []
+
+    def input_indexes(self):
+        program = os.path.splitext(os.path.basename(self.cmd[0]))[0].lower()
+        if program == "ffprobe":
+            return [len(self.cmd) - 1]
+        return [i + 1 for i, arg in enumerate(self.cmd[:-1]) if arg == "-i"]
+
+    def __enter__(self):
+        cmd = list(self.cmd)
+        try:
+            for i in self.input_indexes():
+                if needs_safe_path(cmd[i]):
+                    safe = SafeInput(cmd[i], self.link_dir)
+                    self.inputs.append(safe)
+                    cmd[i] = safe.open()
+        except Exception:
+            self.close()
+            raise
+        return cmd
+
+    def close(self):
+        for safe in self.inputs:
+            safe.close()
+        self.inputs = []
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def safe_command(cmd, link_dir=None):
+    """with safe_command(명령) as 실행할 명령: ..."""
+    return SafeCommand(cmd, link_dir)
@@ -0,0 +1,809 @@
+# -*- coding: utf-8 -*-
+"""
+R2 저장소 접근 (업로드/복사/삭제/목록/다운로드)
+- S3Storage: R2 S3 API에 직접 요청 (프로세스 생성 없음, 연결 재사용, 대용량은 멀티파트 병렬 업로드)
+- RcloneStorage: 기존 rclone 명령 (S3 인증 정보가 없을 때)
+- LocalStorage: 로컬 폴더를 버킷처럼 사용 (테스트용)
+
+S3 인증 정보는 사이트와 같은 환경 변수 R2_ACCOUNT_ID, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY
+(R2_BUCKET_NAME, R2_ENDPOINT로 버킷/주소 변경 - MinIO 등).
+JBCH_STORAGE 환경 변수로 강제 선택: "s3", "rclone", "local:<폴더>".
+"""
+
+import os
+import hmac
+import base64
+import shutil
+import hashlib
+import tempfile
+import datetime
+import mimetypes
+import threading
+import http.client
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from jbch_common import R2_BUCKET, run_command
+from progress import TransferMeter, TransferProgress, run_rclone
+
+DEFAULT_BUCKET_NAME = "jbch-word-bank-videos"
+# 이보다 큰 파일은 멀티파트 업로드 (bytes)
+MULTIPART_THRESHOLD = 64 * 1024 ** 2
+# 멀티파트 조각 크기 (R2: 마지막 조각 외에는 모두 같은 크기, 최소 5MB, 최대 10000개)
+PART_SIZE = 32 * 1024 ** 2
+MAX_PARTS = 10000
+# CopyObject 한 번으로 복사 가능한 최대 크기 (넘으면 조각 복사)
+COPY_LIMIT = 5 * 1024 ** 3
+# 동시 전송 수 (폴더 업로드/복사, 멀티파트 조각)
+TRANSFER_WORKERS = 8
+PART_WORKERS = 4
+# 연결 풀 크기 (유휴 연결 보관 수)
+POOL_SIZE = 16
+# 요청 본문/응답 읽기 단위
+IO_BLOCK_SIZE = 1024 * 1024
+REQUEST_TIMEOUT = 60
+# DeleteObjects 한 번에 지울 수 있는 최대 개수
+DELETE_BATCH = 1000
+# rclone 종료 코드: 3 폴더 없음, 4 파일 없음
+RCLONE_NOT_FOUND = (3, 4)
+
+# 사이트 재생에 필요한 Content-Type (mimetypes에 없거나 OS마다 다른 것)
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+    ".jpg": "image/jpeg",
+    ".vtt": "text/vtt",
+}
+
+
+def content_type(path):
+    ext = os.path.splitext(path)[1].lower()
+    return CONTENT_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def join_key(prefix, name):
+    """"성인/2024" + "a.mp4" → "성인/2024/a.mp4" (빈 prefix 허용)"""
+    prefix = prefix.strip('/')
+    return f"{prefix}/{name}" if prefix else name
+
+
+class StorageError(Exception):
+    """저장소 요청 실패 (status: HTTP 상태 코드, 연결 오류면 None)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ObjectInfo:
+    """저장된 객체 정보 (key: 버킷 기준 경로 또는 목록 조회 시 prefix 기준 상대 경로)"""
+
+    def __init__(self, key, size=0, etag=None):
+        self.key = key
+        self.size = size
+        self.etag = etag
+
+    def to_dict(self):
+        return {"key": self.key, "size": self.size, "etag": self.etag}
+
+
+class Storage:
+    """저장소 공통 인터페이스
+
+    하위 클래스는 put_file, get_file, copy, delete_many, list_objects, head만 구현하면
+    폴더 단위 작업(put_dir, copy_prefix, delete_prefix, list_dir)은 공통 구현 사용.
+    실패는 예외 대신 None/False로 반환 (기존 rclone 헬퍼와 같은 방식).
+    """
+
+    name = None
+    # 멀티파트 업로드 지원 (create_multipart/upload_part/complete_multipart/put_object)
+    multipart = False
+    # 폴더 업로드를 자체 병렬 처리로 한 번에 (파일마다 요청하면 오히려 느린 경우 - rclone)
+    batch_dirs = False
+
+    def put_file(self, local_path, key):
+        """파일 업로드 → ObjectInfo (실패 시 None)"""
+        raise NotImplementedError
+
+    def get_file(self, key, local_path, progress=None):
+        """파일 다운로드 → 성공 여부 (progress: 전송 진행률 콜백 - progress.py의 TransferProgress를 받음)"""
+        raise NotImplementedError
+
+    def copy(self, src_key, dst_key):
+        """서버 측 복사 → 성공 여부"""
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        """여러 객체 삭제 → 성공 여부 (없는 객체는 성공으로 봄)"""
+        raise NotImplementedError
+
+    def list_objects(self, prefix):
+        """prefix 아래 모든 객체 ObjectInfo 목록 (key는 전체 경로, 실패 시 None)"""
+        raise NotImplementedError
+
+    def head(self, key):
+        """객체 정보 (없으면 None, 조회 자체가 실패하면 StorageError - 없는 것으로 판단하지 않도록)"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        return self.delete_many([key])
+
+    def delete_keys(self, keys):
+        """여러 객체 삭제 → {실패한 키: 오류 메시지} (비어 있으면 모두 성공, 없는 객체는 성공으로 봄)"""
+        return {key: "삭제 실패" for key in keys if not self.delete_many([key])}
+
+    def put_dir(self, local_dir, prefix, workers=TRANSFER_WORKERS):
+        """로컬 폴더(하위 폴더 포함)를 prefix 아래로 업로드 → 성공 여부"""
+        jobs = []
+        for root, dirs, names in os.walk(local_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, local_dir).replace(os.sep, '/')
+                jobs.append((path, join_key(prefix, rel)))
+        if not jobs:
+            return True
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            results = list(executor.map(lambda job: self.put_file(*job), jobs))
+        return all(results)
+
+    def copy_prefix(self, src_prefix, dst_prefix, workers=TRANSFER_WORKERS):
+        """src_prefix 아래 모든 객체를 dst_prefix 아래로 서버 측 복사 → 성공 여부"""
+        src_prefix = src_prefix.strip('/') + '/'
+        objects = self.list_objects(src_prefix)
+        if not objects:
+            return False
+        jobs = [(obj.key, join_key(dst_prefix, obj.key[len(src_prefix):])) for obj in objects]
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            results = list(executor.map(lambda job: self.copy(*job), jobs))
+        return all(results)
+
+    def delete_prefix(self, prefix):
+        """prefix(폴더) 아래 모든 객체 삭제 → 성공 여부"""
+        objects = self.list_objects(prefix.strip('/') + '/')
+        if objects is None:
+            return False
+        return self.delete_many([obj.key for obj in objects]) if objects else True
+
+    def list_dir(self, prefix="", recursive=False):
+        """(하위 폴더 이름 목록, 파일 ObjectInfo 목록) - prefix 기준 상대 경로 (실패 시 None)
+
+        rclone lsf와 같은 결과: recursive=False면 바로 아래만, True면 모든 깊이.
+        """
+        base = prefix.strip('/') + '/' if prefix.strip('/') else ""
+        objects = self.list_objects(base)
+        if objects is None:
+            return None
+        dirs = {}
+        files = []
+        for obj in objects:
+            rel = obj.key[len(base):]
+            parts = rel.split('/')
+            if not recursive and len(parts) > 1:
+                dirs[parts[0]] = True
+                continue
+            for depth in range(1, len(parts)):
+                dirs['/'.join(parts[:depth])] = True
+            files.append(ObjectInfo(rel, obj.size, obj.etag))
+        return list(dirs), files
+
+
+# ============================================================
+# S3 API (R2)
+# ============================================================
+
+class ConnectionPool:
+    """호스트 하나에 대한 keep-alive 연결 풀 (스레드 안전)
+
+    요청마다 TLS 연결/핸드셰이크를 새로 하지 않도록 사용한 연결을 돌려받아 재사용.
+    """
+
+    def __init__(self, host, port=None, secure=True, size=POOL_SIZE, timeout=REQUEST_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        cls = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout, blocksize=IO_BLOCK_SIZE), False
+
+    def release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class FileSlice:
+    """파일의 일부 구간을 읽는 스트림 (멀티파트 조각 본문 - 메모리에 올리지 않음)"""
+
+    def __init__(self, path, offset=0, length=None):
+        self.path = path
+        self.offset = offset
+        self.length = os.path.getsize(path) - offset if length is None else length
+        self._file = None
+        self._remaining = 0
+
+    def __len__(self):
+        return self.length
+
+    def rewind(self):
+        """처음부터 다시 읽기 (재시도 시)"""
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        self._file.seek(self.offset)
+        self._remaining = self.length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def xml_children(element, name):
+    """네임스페이스와 무관하게 이름이 name인 하위 요소"""
+    return [child for child in element if child.tag == name or child.tag.endswith('}' + name)]
+
+
+def xml_text(element, name, default=None):
+    children = xml_children(element, name)
+    return children[0].text if children and children[0].text is not None else default
+
+
+class S3Storage(Storage):
+    """R2 S3 API 직접 호출 (AWS Signature V4, http.client)"""
+
+    name = "s3"
+    multipart = True
+
+    def __init__(self, account_id=None, access_key=None, secret_key=None, bucket=None, endpoint=None,
+                 region="auto", part_size=PART_SIZE, part_workers=PART_WORKERS):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.bucket = bucket or DEFAULT_BUCKET_NAME
+        self.region = region
+        self.part_size = part_size
+        self.part_workers = part_workers
+        endpoint = endpoint or f"https://{account_id}.r2.cloudflarestorage.com"
+        parsed = urllib.parse.urlsplit(endpoint)
+        self.host = parsed.netloc
+        self.pool = ConnectionPool(parsed.hostname, parsed.port, secure=parsed.scheme == "https")
+
+    @classmethod
+    def from_env(cls):
+        """환경 변수로 생성 (인증 정보가 없으면 None)"""
+        access_key = os.environ.get("R2_ACCESS_KEY_ID")
+        secret_key = os.environ.get("R2_SECRET_ACCESS_KEY")
+        account_id = os.environ.get("R2_ACCOUNT_ID")
+        endpoint = os.environ.get("R2_ENDPOINT")
+        if not (access_key and secret_key and (account_id or endpoint)):
+            return None
+        return cls(account_id, access_key, secret_key,
+                   bucket=os.environ.get("R2_BUCKET_NAME"), endpoint=endpoint)
+
+    # ---------- 요청 ----------
+
+    def object_path(self, key=""):
+        return "/" + urllib.parse.quote(f"{self.bucket}/{key}" if key else self.bucket, safe="/-_.~")
+
+    def sign(self, method, path, query, headers, payload_hash):
+        """AWS Signature V4 헤더 추가 (headers는 소문자 키 dict)"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = amz_date[:8]
+        headers["host"] = self.host
+        headers["x-amz-date"] = amz_date
+        headers["x-amz-content-sha256"] = payload_hash
+
+        signed_names = sorted(headers)
+        canonical_headers = "".join(f"{name}:{' '.join(str(headers[name]).split())}\n" for name in signed_names)
+        signed_headers = ";".join(signed_names)
+        canonical_request = "\n".join([
+            method, path, query, canonical_headers, signed_headers, payload_hash
+        ])
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ])
+
+        key = ("AWS4" + self.secret_key).encode('utf-8')
+        for part in (datestamp, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+
+    def request(self, method, key="", params=None, headers=None, body=None, sink=None, ok=(200,)):
+        """서명된 요청 → (상태, 응답 헤더 dict, 응답 본문 bytes)
+
+        body: bytes 또는 FileSlice (파일 스트림은 서명하지 않은 본문 UNSIGNED-PAYLOAD)
+        sink: 응답 본문을 기록할 파일 객체 (다운로드 - 메모리에 올리지 않음)
+        유휴 연결이 서버에서 끊겼을 수 있으므로 연결 오류는 새 연결로 한 번 더 시도.
+        """
+        path = self.object_path(key)
+        query = "&".join(
+            f"{urllib.parse.quote(str(k), safe='-_.~')}={urllib.parse.quote(str(v), safe='-_.~')}"
+            for k, v in sorted((params or {}).items())
+        )
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        if isinstance(body, FileSlice):
+            payload_hash = "UNSIGNED-PAYLOAD"
+            headers["content-length"] = str(len(body))
+        else:
+            body = body or b""
+            payload_hash = hashlib.sha256(body).hexdigest()
+            if body or method in ("PUT", "POST"):
+                headers["content-length"] = str(len(body))
+
+        for attempt in range(2):
+            conn, reused = self.pool.acquire()
+            request_headers = dict(headers)
+            self.sign(method, path, query, request_headers, payload_hash)
+            del request_headers["host"]
+            if isinstance(body, FileSlice):
+                body.rewind()
+            try:
+                conn.request(method, f"{path}?{query}" if query else path, body=body, headers=request_headers)
+                response = conn.getresponse()
+                if sink is not None and response.status in ok:
+                    if getattr(sink, "total", False) is None:
+                        # 진행률 표시용 전체 크기 (TransferMeter)
+                        sink.total = int(response.getheader("content-length") or 0) or None
+                    while True:
+                        chunk = response.read(IO_BLOCK_SIZE)
+                        if not chunk:
+                            break
+                        sink.write(chunk)
+                    data = b""
+                else:
+                    data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                # 재사용한 연결이 끊긴 경우만 재시도 (새 연결 실패는 그대로 실패)
+                if reused and attempt == 0 and sink is None:
+                    continue
+                raise StorageError(f"{method} {key}: {e}")
+            if response.will_close:
+                conn.close()
+            else:
+                self.pool.release(conn)
+            if response.status not in ok:
+                raise StorageError(f"{method} {key}: HTTP {response.status} {data[:300]!r}", response.status)
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, data
+        raise StorageError(f"{method} {key}: 연결 실패")
+
+    # ---------- 업로드 ----------
+    # put_object / create_multipart / upload_part / complete_multipart는 실패 시 StorageError
+    # (upload_scheduler.py가 요청 단위로 재시도하며 직접 사용)
+
+    def put_file(self, local_path, key):
+        try:
+            size = os.path.getsize(local_path)
+            if size > MULTIPART_THRESHOLD:
+                return ObjectInfo(key, size, self.put_multipart(local_path, key, size))
+            return self.put_object(local_path, key)
+        except (OSError, StorageError, ET.ParseError):
+            return None
+
+    def put_object(self, local_path, key):
+        """단일 요청 업로드 (파일에서 바로 스트리밍) → ObjectInfo"""
+        body = FileSlice(local_path)
+        try:
+            _, headers, _ = self.request("PUT", key, headers={"content-type": content_type(key)}, body=body)
+        finally:
+            body.close()
+        return ObjectInfo(key, len(body), headers.get("etag"))
+
+    def part_layout(self, size, part_size=None):
+        """(조각 크기, 조각 수) - 조각 수가 MAX_PARTS를 넘지 않도록 크기 조정"""
+        part_size = max(part_size or self.part_size, -(-size // MAX_PARTS))
+        return part_size, -(-size // part_size)
+
+    def create_multipart(self, key):
+        """멀티파트 업로드 시작 → upload_id"""
+        _, _, data = self.request("POST", key, params={"uploads": ""},
+                                  headers={"content-type": content_type(key)})
+        return xml_text(ET.fromstring(data), "UploadId")
+
+    def upload_part(self, key, upload_id, number, local_path, offset, length):
+        """파일의 offset부터 length만큼을 조각 number로 업로드 → ETag"""
+        body = FileSlice(local_path, offset, length)
+        try:
+            _, headers, _ = self.request("PUT", key, params={"partNumber": number, "uploadId": upload_id}, body=body)
+        finally:
+            body.close()
+        return headers.get("etag")
+
+    def complete_multipart(self, key, upload_id, parts):
+        """조각 목록 [(번호, ETag)]로 업로드 완료 → ETag"""
+        body = "<CompleteMultipartUpload>" + "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in sorted(parts)
+        ) + "</CompleteMultipartUpload>"
+        _, _, data = self.request("POST", key, params={"uploadId": upload_id}, body=body.encode('utf-8'))
+        # 완료 요청은 200이어도 본문에 오류가 올 수 있음
+        root = ET.fromstring(data)
+        if root.tag.endswith("Error"):
+            raise StorageError(f"멀티파트 완료 실패: {xml_text(root, 'Message')}", 500)
+        return xml_text(root, "ETag")
+
+    def abort_multipart(self, key, upload_id):
+        """멀티파트 업로드 취소 (올라간 조각 삭제, 실패는 무시)"""
+        try:
+            self.request("DELETE", key, params={"uploadId": upload_id}, ok=(200, 204))
+        except StorageError:
+            pass
+
+    def put_multipart(self, local_path, key, size):
+        """멀티파트 업로드: 조각을 part_workers개씩 동시에 파일에서 바로 읽어 전송 → ETag"""
+        upload_id = self.create_multipart(key)
+        part_size, count = self.part_layout(size)
+
+        def upload_part(number):
+            offset = (number - 1) * part_size
+            return number, self.upload_part(key, upload_id, number, local_path, offset, min(part_size, size - offset))
+
+        return self.run_multipart(key, upload_id, upload_part, count)
+
+    def run_multipart(self, key, upload_id, upload_part, count):
+        """조각 업로드(upload_part(번호) → (번호, ETag))를 병렬 실행 후 완료 요청. 실패하면 업로드 취소"""
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.part_workers, count)) as executor:
+                parts = list(executor.map(upload_part, range(1, count + 1)))
+            return self.complete_multipart(key, upload_id, parts)
+        except Exception:
+            self.abort_multipart(key, upload_id)
+            raise
+
+    # ---------- 복사/다운로드/삭제/조회 ----------
+
+    def copy_source(self, key):
+        return urllib.parse.quote(f"/{self.bucket}/{key}", safe="/-_.~")
+
+    def copy(self, src_key, dst_key):
+        try:
+            info = self.head(src_key)
+            if info is None:
+                return False
+            if info.size > COPY_LIMIT:
+                self.copy_multipart(src_key, dst_key, info.size)
+            else:
+                self.request("PUT", dst_key, headers={"x-amz-copy-source": self.copy_source(src_key)})
+            return True
+        except (StorageError, ET.ParseError):
+            return False
+
+    def copy_multipart(self, src_key, dst_key, size):
+        """5GB 넘는 객체 서버 측 조각 복사 (UploadPartCopy)"""
+        upload_id = self.create_multipart(dst_key)
+        part_size, count = self.part_layout(size)
+
+        def copy_part(number):
+            start = (number - 1) * part_size
+            end = min(start + part_size, size) - 1
+            _, _, data = self.request("PUT", dst_key, params={"partNumber": number, "uploadId": upload_id},
+                                      headers={"x-amz-copy-source": self.copy_source(src_key),
+                                               "x-amz-copy-source-range": f"bytes={start}-{end}"})
+            return number, xml_text(ET.fromstring(data), "ETag")
+
+        return self.run_multipart(dst_key, upload_id, copy_part, count)
+
+    def head(self, key):
+        try:
+            _, headers, _ = self.request("HEAD", key)
+        except StorageError as e:
+            # 404만 "없음" - 인증/5xx/연결 오류는 호출한 쪽에서 판단
+            if e.status == 404:
+                return None
+            raise
+        return ObjectInfo(key, int(headers.get("content-length", 0)), headers.get("etag"))
+
+    def get_file(self, key, local_path, progress=None):
+        try:
+            with open(local_path, 'wb') as f:
+                sink = TransferMeter(f, progress) if progress else f
+                self.request("GET", key, sink=sink)
+            if progress:
+                sink.finish()
+            return True
+        except (OSError, StorageError):
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+            return False
+
+    def delete(self, key):
+        try:
+            self.request("DELETE", key, ok=(200, 204))
+            return True
+        except StorageError:
+            return False
+
+    def delete_many(self, keys):
+        return not self.delete_keys(keys)
+
+    def delete_keys(self, keys):
+        """DeleteObjects로 최대 1000개씩 삭제 (응답의 객체별 Error로 실패한 키 확인)"""
+        keys = list(keys)
+        errors = {}
+        for i in range(0, len(keys), DELETE_BATCH):
+            batch = keys[i:i + DELETE_BATCH]
+            objects = "".join(
+                "<Object><Key>" + key.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;') + "</Key></Object>"
+                for key in batch
+            )
+            body = f"<Delete><Quiet>true</Quiet>{objects}</Delete>".encode('utf-8')
+            md5 = base64.b64encode(hashlib.md5(body).digest()).decode('ascii')
+            try:
+                _, _, data = self.request("POST", params={"delete": ""}, headers={"content-md5": md5}, body=body)
+                for error in xml_children(ET.fromstring(data), "Error"):
+                    errors[xml_text(error, "Key")] = f"{xml_text(error, 'Code')}: {xml_text(error, 'Message')}"
+            except (StorageError, ET.ParseError) as e:
+                errors.update({key: str(e) for key in batch})
+        return errors
+
+    def list_objects(self, prefix):
+        objects = []
+        params = {"list-type": "2", "prefix": prefix}
+        try:
+            while True:
+                _, _, data = self.request("GET", params=params)
+                root = ET.fromstring(data)
+                for item in xml_children(root, "Contents"):
+                    objects.append(ObjectInfo(xml_text(item, "Key"), int(xml_text(item, "Size", "0")),
+                                              xml_text(item, "ETag")))
+                token = xml_text(root, "NextContinuationToken")
+                if xml_text(root, "IsTruncated") != "true" or not token:
+                    return objects
+                params["continuation-token"] = token
+        except (StorageError, ET.ParseError):
+            return None
+
+
+# ============================================================
+# rclone (S3 인증 정보가 없을 때)
+# ============================================================
+
+class RcloneStorage(Storage):
+    """rclone 명령 실행 (리모트 이름 r2:)
+
+    폴더 단위 작업은 rclone 자체 병렬 처리를 사용하도록 재정의.
+    """
+
+    name = "rclone"
+    batch_dirs = True
+
+    def __init__(self, remote=R2_BUCKET):
+        self.remote = remote
+
+    def target(self, key=""):
+        return f"{self.remote}/{key}" if key else self.remote
+
+    def put_file(self, local_path, key):
+        result = run_command(["rclone", "copyto", local_path, self.target(key)])
+        if result.returncode != 0:
+            return None
+        return ObjectInfo(key, os.path.getsize(local_path))
+
+    def put_dir(self, local_dir, prefix, workers=TRANSFER_WORKERS):
+        result = run_command(
+            ["rclone", "copy", local_dir, self.target(prefix) + "/",
+             "--transfers", str(workers), "--checkers", str(workers * 2)]
+        )
+        return result.returncode == 0
+
+    def get_file(self, key, local_path, progress=None):
+        result = run_rclone(["rclone", "copyto", self.target(key), local_path], on_progress=progress)
+        return result.returncode == 0
+
+    def copy(self, src_key, dst_key):
+        result = run_command(["rclone", "copyto", self.target(src_key), self.target(dst_key)])
+        return result.returncode == 0
+
+    def copy_prefix(self, src_prefix, dst_prefix, workers=TRANSFER_WORKERS):
+        result = run_command(
+            ["rclone", "copy", self.target(src_prefix) + "/", self.target(dst_prefix) + "/",
+             "--transfers", str(workers), "--checkers", str(workers * 2)]
+        )
+        return result.returncode == 0
+
+    def delete(self, key):
+        result = run_command(["rclone", "deletefile", self.target(key)])
+        return result.returncode == 0
+
+    def delete_many(self, keys):
+        return not self.delete_keys(keys)
+
+    def delete_keys(self, keys):
+        """rclone delete --files-from-raw 한 번으로 삭제 (실패하면 객체별로 다시 시도해 실패한 키 확인)"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="jbch_delete_")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write("\n".join(keys) + "\n")
+            result = run_command(["rclone", "delete", self.target(), "--files-from-raw", list_path])
+        finally:
+            os.remove(list_path)
+        if result.returncode == 0:
+            return {}
+        return {key: "rclone deletefile 실패" for key in keys if not self.delete(key)}
+
+    def delete_prefix(self, prefix):
+        result = run_command(["rclone", "purge", self.target(prefix.strip('/'))])
+        return result.returncode == 0
+
+    def head(self, key):
+        result = run_command(["rclone", "lsf", self.target(key.strip('/')),
+                              "--files-only", "--format", "sp", "--separator", "\t"], text=True)
+        # 종료 코드 3/4: 폴더/파일 없음 - 그 밖의 실패는 없는 것으로 판단하지 않음
+        if result.returncode in RCLONE_NOT_FOUND:
+            return None
+        if result.returncode != 0:
+            raise StorageError(f"{key} 조회 실패: {result.stderr.strip()[-200:]}")
+        files = [line for line in result.stdout.split('\n') if line]
+        if not files:
+            return None
+        size = files[0].split('\t', 1)[0]
+        return ObjectInfo(key, int(size) if size.isdigit() else 0)
+
+    def lsf(self, path, args):
+        result = run_command(["rclone", "lsf", self.target(path.strip('/')), *args], text=True)
+        if result.returncode != 0:
+            return None
+        return [line for line in result.stdout.split('\n') if line]
+
+    def list_objects(self, prefix):
+        lines = self.lsf(prefix, ["-R", "--files-only", "--format", "sp", "--separator", "\t"])
+        if lines is None:
+            return None
+        objects = []
+        for line in lines:
+            if '\t' not in line:
+                continue
+            size, name = line.split('\t', 1)
+            objects.append(ObjectInfo(join_key(prefix, name), int(size) if size.isdigit() else 0))
+        return objects
+
+    def list_dir(self, prefix="", recursive=False):
+        extra = ["-R"] if recursive else []
+        dirs = self.lsf(prefix, ["--dirs-only", *extra])
+        lines = self.lsf(prefix, ["--files-only", "--format", "sp", "--separator", "\t", *extra])
+        if dirs is None or lines is None:
+            return None
+        files = []
+        for line in lines:
+            if '\t' in line:
+                size, name = line.split('\t', 1)
+                files.append(ObjectInfo(name, int(size) if size.isdigit() else 0))
+        return [d.rstrip('/') for d in dirs], files
+
+
+# ============================================================
+# 로컬 폴더 (테스트용)
+# ============================================================
+
+class LocalStorage(Storage):
+    """로컬 폴더를 버킷으로 사용 (R2 없이 업로드/변환 흐름 확인용)"""
+
+    name = "local"
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.strip('/').split('/'))
+
+    def put_file(self, local_path, key):
+        target = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(local_path, target)
+        except OSError:
+            return None
+        return ObjectInfo(key, os.path.getsize(target))
+
+    def get_file(self, key, local_path, progress=None):
+        try:
+            shutil.copyfile(self.path(key), local_path)
+            if progress:
+                size = os.path.getsize(local_path)
+                progress(TransferProgress(size, size, done=True))
+            return True
+        except OSError:
+            return False
+
+    def copy(self, src_key, dst_key):
+        return self.put_file(self.path(src_key), dst_key) is not None
+
+    def delete_many(self, keys):
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                return False
+        return True
+
+    def delete_prefix(self, prefix):
+        shutil.rmtree(self.path(prefix), ignore_errors=True)
+        return True
+
+    def head(self, key):
+        try:
+            return ObjectInfo(key, os.path.getsize(self.path(key)))
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise StorageError(f"{key} 조회 실패: {e}")
+
+    def list_objects(self, prefix):
+        # prefix는 "폴더/" 또는 파일명 앞부분
+        base_dir = self.path(prefix.rsplit('/', 1)[0]) if '/' in prefix else self.root
+        if not os.path.isdir(base_dir):
+            return []
+        objects = []
+        for root, dirs, names in os.walk(base_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    objects.append(ObjectInfo(key, os.path.getsize(path)))
+        return sorted(objects, key=lambda obj: obj.key)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """사용할 저장소 (한 번 만들어 공유 - S3 연결 풀 재사용)
+
+    JBCH_STORAGE: "s3" / "rclone" / "local:<폴더>", 없으면 S3 인증 정보가 있을 때 S3, 아니면 rclone.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            choice = os.environ.get("JBCH_STORAGE", "").strip()
+            if choice.startswith("local:"):
+                _storage = LocalStorage(choice[len("local:"):])
+            elif choice == "rclone":
+                _storage = RcloneStorage()
+            else:
+                _storage = S3Storage.from_env()
+                if _storage is None:
+                    if choice == "s3":
+                        raise StorageError("R2_ACCOUNT_ID / R2_ACCESS_KEY_ID / R2_SECRET_ACCESS_KEY 환경 변수 필요")
+                    _storage = RcloneStorage()
+        return _storage
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+tools/ 테스트 공통 설정
+- 도구 모듈은 tools/ 폴더에서 바로 import하는 스크립트이므로 경로에 추가
+- 작업 기록/캐시(STATE_DIR)는 사용자 폴더 대신 임시 폴더에 (모듈 import 전에 설정)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JBCH_STATE_DIR", tempfile.mkdtemp(prefix="jbch_test_state_"))
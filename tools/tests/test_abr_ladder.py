@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""abr_ladder: 화질 단계 선택(업스케일 없음), ffmpeg 명령, 다중 화질 HLS 생성"""
+
+import os
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+import abr_ladder
+from abr_ladder import build_abr_command, choose_rungs, convert_to_abr_hls, parse_ladder, video_encoder_args
+
+
+def test_parse_ladder():
+    assert parse_ladder("1080p, 720,480,audio") == (1080, 720, 480, "audio")
+    assert parse_ladder("360,a,") == (360, "audio")
+    with pytest.raises(ValueError):
+        parse_ladder("1440")
+
+
+def test_choose_rungs_never_upscales():
+    ladder = (1080, 720, 480, "audio")
+    assert choose_rungs(ladder, 1080) == ([1080, 720, 480], True)
+    assert choose_rungs(ladder, 720) == ([720, 480], True)
+    # 가장 낮은 단계보다 작은 원본은 원본 해상도 하나
+    assert choose_rungs((720, 480), 240) == ([240], False)
+    # 해상도를 모르면 요청한 단계 그대로
+    assert choose_rungs((480, 1080), None) == ([1080, 480], False)
+
+
+def test_encoder_args_software_and_hardware():
+    assert video_encoder_args(0, 720, False)[:4] == ["-c:v:0", "libx264", "-preset:v:0", "veryfast"]
+    hardware = video_encoder_args(1, 1080, True)
+    assert hardware[:4] == ["-c:v:1", "h264_nvenc", "-preset:v:1", "p4"]
+    assert hardware[hardware.index("-b:v:1") + 1] == "5000k"
+    # 사다리에 없는 높이는 가장 가까운 단계 비트레이트
+    args = video_encoder_args(0, 240, False)
+    assert args[args.index("-b:v:0") + 1] == "700k"
+
+
+def test_build_command_stream_map():
+    cmd, heights, audio_only = build_abr_command("/in.mp4", (1080, 720, "audio"), 1080)
+    assert (heights, audio_only) == ([1080, 720], True)
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph == "[0:v]split=2[s0][s1];[s0]scale=-2:1080[v0];[s1]scale=-2:720[v1]"
+    assert cmd[cmd.index("-var_stream_map") + 1] == "v:0,a:0,name:1080p v:1,a:1,name:720p a:2,name:audio"
+    assert cmd[cmd.index("-b:a:2") + 1] == "64k"
+    assert cmd[cmd.index("-master_pl_name") + 1] == "index.m3u8"
+    assert cmd[-1] == "v%v/index.m3u8"
+
+    # 오디오가 없는 원본은 오디오 단계도 없음
+    cmd, heights, audio_only = build_abr_command("/in.mp4", (720, "audio"), 720, has_audio=False)
+    assert audio_only is False
+    assert cmd[cmd.index("-var_stream_map") + 1] == "v:0,name:720p"
+    assert "-c:a" not in cmd
+
+
+def test_hardware_failure_falls_back_to_libx264(tmp_path, monkeypatch):
+    runs = []
+
+    def run_ffmpeg(cmd, on_progress=None, duration=None, cwd=None):
+        codec = cmd[cmd.index("-c:v:0") + 1]
+        runs.append(codec)
+        if codec == "h264_nvenc":
+            # 세그먼트 하나를 쓰다가 실패
+            with open(os.path.join(cwd, "v720p", "seg_000.ts"), "wb") as f:
+                f.write(b"partial")
+            return SimpleNamespace(returncode=1, stderr=b"No capable devices found")
+        with open(os.path.join(cwd, "index.m3u8"), "w") as f:
+            f.write("#EXTM3U\n")
+        return SimpleNamespace(returncode=0, stderr=b"")
+
+    monkeypatch.setattr(abr_ladder, "run_ffmpeg", run_ffmpeg)
+    logs = []
+    out = tmp_path / "hls"
+    assert convert_to_abr_hls("/in.mp4", str(out), (720, "audio"), 720, hardware=True, log=logs.append)
+    assert runs == ["h264_nvenc", "libx264"]
+    # 실패한 시도의 세그먼트는 지우고 다시
+    assert os.listdir(out / "v720p") == []
+    assert any("libx264" in line for line in logs)
+
+
+def test_software_failure_not_retried(tmp_path, monkeypatch):
+    runs = []
+
+    def run_ffmpeg(cmd, on_progress=None, duration=None, cwd=None):
+        runs.append(cmd[cmd.index("-c:v:0") + 1])
+        return SimpleNamespace(returncode=1, stderr=b"error")
+
+    monkeypatch.setattr(abr_ladder, "run_ffmpeg", run_ffmpeg)
+    assert not convert_to_abr_hls("/in.mp4", str(tmp_path / "hls"), (720,), 720, hardware=True)
+    assert runs == ["h264_nvenc", "libx264"]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+def test_convert_to_abr_hls(tmp_path):
+    source = tmp_path / "설교, 2부.mp4"
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=854x480:rate=25",
+        "-f", "lavfi", "-i", "sine=sample_rate=22050",
+        "-t", "22", "-c:v", "mpeg4", "-c:a", "aac", str(source),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+    out = tmp_path / "hls"
+    logs = []
+    ok = convert_to_abr_hls(str(source), str(out), (720, 480, 360, "audio"), source_height=480, log=logs.append)
+    assert ok, logs
+    master = (out / "index.m3u8").read_text(encoding="utf-8")
+    variants = [line for line in master.splitlines() if line and not line.startswith("#")]
+    assert sorted(variants) == ["v360p/index.m3u8", "v480p/index.m3u8", "vaudio/index.m3u8"]
+    assert "RESOLUTION=854x480" in master
+    for variant in variants:
+        playlist = (out / variant).read_text(encoding="utf-8")
+        assert "#EXT-X-ENDLIST" in playlist
+        assert playlist.count("#EXTINF:") == 3
+        assert os.path.exists(out / os.path.dirname(variant) / "seg_000.ts")
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""bucket_index: 키 범위, 폴더/파일 목록, 바뀐 키만 반영하는 갱신"""
+
+import pytest
+
+from bucket_index import BucketIndex, key_range
+from storage import LocalStorage, ObjectInfo
+
+KEYS = [
+    ("2025/주일/a.mp4", 100),
+    ("2025/주일/hls/a/playlist.m3u8", 1),
+    ("2025/주일/hls/a/segment_000.ts", 10),
+    ("2025/주일-특별/b.mp4", 200),
+    ("2025/주일0/c.mp4", 300),
+    ("2025/주일.5/d.mp4", 400),
+    ("2025/top.mp4", 5),
+    ("2024/수요/e.mp4", 50),
+]
+
+
+def test_key_range():
+    assert key_range("") == ("", None)
+    assert key_range("/") == ("", None)
+    assert key_range("2025/주일/") == ("2025/주일/", "2025/주일0")
+    start, end = key_range("2025/주일")
+    inside = [key for key, _ in KEYS if start <= key < end]
+    # 이름이 같은 글자로 시작하는 옆 폴더(주일-특별, 주일0, 주일.5)는 범위 밖
+    assert inside == ["2025/주일/a.mp4", "2025/주일/hls/a/playlist.m3u8", "2025/주일/hls/a/segment_000.ts"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BucketIndex(str(tmp_path / "bucket.sqlite"))
+    index.apply_listing("", [ObjectInfo(key, size, f'"{size}"') for key, size in KEYS])
+    yield index
+    index.close()
+
+
+def test_dirs(index):
+    assert index.dirs() == ["2024", "2025"]
+    assert index.dirs("2025") == ["주일", "주일-특별", "주일.5", "주일0"]
+    assert index.dirs("2025/주일/") == ["hls"]
+    assert index.dirs("2025/주일", recursive=True) == ["hls", "hls/a"]
+    assert index.dirs("2025/주일/hls/a") == []
+    assert index.dirs("없음") == []
+
+
+def test_files(index):
+    assert [f.key for f in index.files("2025/주일")] == ["a.mp4"]
+    assert [f.key for f in index.files("2025/주일", recursive=True)] == [
+        "a.mp4", "hls/a/playlist.m3u8", "hls/a/segment_000.ts"]
+    assert [f.key for f in index.files("2025")] == ["top.mp4"]
+    assert index.sizes("2025/주일") == {"a.mp4": 100}
+    assert index.get("2025/주일/a.mp4").etag == '"100"'
+    assert index.get("2025/없음.mp4") is None
+
+
+def test_apply_listing_only_touches_prefix(index):
+    changed, removed = index.apply_listing("2025/주일", [
+        ObjectInfo("2025/주일/a.mp4", 100, '"100"'),
+        ObjectInfo("2025/주일/new.mp4", 7, None),
+    ])
+    # 그대로인 a.mp4는 다시 쓰지 않고, 사라진 HLS 두 개만 삭제
+    assert (changed, removed) == (1, 2)
+    assert [f.key for f in index.files("2025/주일", recursive=True)] == ["a.mp4", "new.mp4"]
+    # 옆 폴더와 다른 연도는 그대로
+    assert index.get("2025/주일-특별/b.mp4") is not None
+    assert index.get("2024/수요/e.mp4") is not None
+    assert index.refreshed_at("2025/주일") is not None
+
+
+def test_record_put_and_delete(index):
+    index.record_put("2025/새폴더/x.mp4", 9)
+    assert "새폴더" in index.dirs("2025")
+    index.record_delete(["2025/새폴더/x.mp4"])
+    assert "새폴더" not in index.dirs("2025")
+
+
+def test_refresh_from_storage(tmp_path):
+    bucket = tmp_path / "bucket"
+    (bucket / "2025" / "주일").mkdir(parents=True)
+    (bucket / "2025" / "주일" / "a.mp4").write_bytes(b"1234")
+    index = BucketIndex(str(tmp_path / "bucket.sqlite"), storage=LocalStorage(str(bucket)))
+    assert index.empty
+    thread = index.refresh_async()
+    thread.join()
+    assert index.files("2025/주일")[0].size == 4
+    # 방금 갱신했으면 max_age 안에서는 건너뜀
+    assert index.refresh_async(max_age=60) is None
+    index.close()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""bulk_delete.BulkDeleter: 폴더별 한 번 조회로 키 모으기, 묶음 삭제, 영상별 결과"""
+
+from bulk_delete import BulkDeleter
+from storage import ObjectInfo
+
+BUCKET = [
+    "2025/주일/a.mp4",
+    "2025/주일/hls/a/playlist.m3u8",
+    "2025/주일/hls/a/segment_000.ts",
+    "2025/주일/hls/a/segment_001.ts",
+    "2025/주일/hls/ab/playlist.m3u8",
+    "2025/주일/b.mp4",
+    "2025/주일/hls/b/playlist.m3u8",
+    "thumbnails/2025/주일/a.mp4.jpg",
+    "thumbnails/2025/주일/a.mp4.sprite.jpg",
+    "thumbnails/2025/주일/a.mp4.vtt",
+    "thumbnails/2025/주일/ab.mp4.jpg",
+    "2025/수요/c.mp4",
+]
+
+
+class FakeStorage:
+    """목록 조회/묶음 삭제만 흉내 (조회한 prefix와 삭제 요청 기록)"""
+
+    def __init__(self, keys, broken_prefixes=(), failing_keys=()):
+        self.keys = set(keys)
+        self.broken_prefixes = set(broken_prefixes)
+        self.failing_keys = set(failing_keys)
+        self.listed = []
+        self.batches = []
+
+    def list_objects(self, prefix):
+        self.listed.append(prefix)
+        if prefix in self.broken_prefixes:
+            return None
+        return [ObjectInfo(key, 1) for key in sorted(self.keys) if key.startswith(prefix)]
+
+    def delete_keys(self, keys):
+        self.batches.append(list(keys))
+        errors = {key: "AccessDenied" for key in keys if key in self.failing_keys}
+        self.keys -= set(keys) - set(errors)
+        return errors
+
+
+class FakeIndex:
+    def __init__(self):
+        self.deleted = []
+
+    def record_delete(self, keys):
+        self.deleted += keys
+
+
+def test_gather_lists_each_folder_once():
+    storage = FakeStorage(BUCKET)
+    videos = BulkDeleter(storage=storage).gather(["2025/주일/a.mp4", "2025/주일/b.mp4", "2025/주일/a.mp4"])
+    assert [v.file_path for v in videos] == ["2025/주일/a.mp4", "2025/주일/b.mp4"]
+    assert sorted(storage.listed) == ["2025/주일/hls/", "thumbnails/2025/주일/"]
+    # 이름이 겹치는 ab의 HLS/썸네일은 포함하지 않음
+    assert videos[0].keys == [
+        "2025/주일/a.mp4",
+        "2025/주일/hls/a/playlist.m3u8",
+        "2025/주일/hls/a/segment_000.ts",
+        "2025/주일/hls/a/segment_001.ts",
+        "thumbnails/2025/주일/a.mp4.jpg",
+        "thumbnails/2025/주일/a.mp4.sprite.jpg",
+        "thumbnails/2025/주일/a.mp4.vtt",
+    ]
+    assert videos[1].keys == ["2025/주일/b.mp4", "2025/주일/hls/b/playlist.m3u8"]
+
+
+def test_gather_listing_failure_keeps_video():
+    storage = FakeStorage(BUCKET, broken_prefixes=["2025/주일/hls/"])
+    deleter = BulkDeleter(storage=storage)
+    a, c = deleter.gather(["2025/주일/a.mp4", "2025/수요/c.mp4"])
+    assert a.errors == {"2025/주일/a.mp4": "목록 조회 실패"}
+    assert c.keys == ["2025/수요/c.mp4"]
+
+    result = deleter.run(["2025/주일/a.mp4", "2025/수요/c.mp4"])
+    # 목록을 못 본 영상은 MP4도 지우지 않음 (HLS만 남는 일이 없도록)
+    assert "2025/주일/a.mp4" in storage.keys
+    assert [v.file_path for v in result.failed] == ["2025/주일/a.mp4"]
+    assert [v.file_path for v in result.deleted] == ["2025/수요/c.mp4"]
+
+
+def test_run_batches_and_reports_per_video():
+    storage = FakeStorage(BUCKET, failing_keys=["thumbnails/2025/주일/a.mp4.vtt", "2025/주일/b.mp4"])
+    index = FakeIndex()
+    result = BulkDeleter(storage=storage, batch_size=3, index=index).run(["2025/주일/a.mp4", "2025/주일/b.mp4"])
+    assert [len(batch) for batch in storage.batches] == [3, 3, 3]
+    assert [v.file_path for v in result.deleted] == ["2025/주일/a.mp4"]
+    assert [v.file_path for v in result.incomplete] == ["2025/주일/a.mp4"]
+    assert [v.file_path for v in result.failed] == ["2025/주일/b.mp4"]
+    assert "thumbnails/2025/주일/a.mp4.vtt" not in index.deleted
+    assert "2025/주일/hls/b/playlist.m3u8" in index.deleted
+    assert result.kv_delta().to_payload()["remove"] == ["2025/주일/a.mp4"]
+
+
+def test_run_batch_exception_marks_keys_failed():
+    storage = FakeStorage(BUCKET)
+
+    def broken(keys):
+        raise RuntimeError("connection reset")
+    storage.delete_keys = broken
+    result = BulkDeleter(storage=storage).run(["2025/수요/c.mp4"])
+    assert result.failed[0].errors == {"2025/수요/c.mp4": "connection reset"}
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""구간 분할 인코딩: 구간 경계와 강제 키프레임이 HLS 세그먼트(10초) 경계에 맞는지"""
+
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from chunked_encode import HLS_SEGMENT_SECONDS, chunked_compress, concat_list_line, plan_chunks
+from encoders import X264Encoder, listed_encoders
+
+
+def test_plan_chunks_boundaries_on_segment_multiples():
+    chunks = plan_chunks(3600.5)
+    assert chunks[0] == (0.0, 60.0)
+    assert all(start % HLS_SEGMENT_SECONDS == 0 for start, _ in chunks)
+    # 구간이 빈틈 없이 이어지고 끝은 영상 길이
+    for (start, length), (next_start, _) in zip(chunks, chunks[1:]):
+        assert start + length == next_start
+    assert chunks[-1][0] + chunks[-1][1] == 3600.5
+
+
+def test_plan_chunks_merges_short_tail():
+    # 마지막 10초(< 60/4)는 앞 구간에 합침
+    assert plan_chunks(130.0) == [(0.0, 60.0), (60.0, 70.0)]
+    assert plan_chunks(140.0) == [(0.0, 60.0), (60.0, 60.0), (120.0, 20.0)]
+
+
+def test_plan_chunks_rounds_chunk_length_to_segment():
+    assert [start for start, _ in plan_chunks(125.0, chunk_seconds=45)] == [0.0, 40.0, 80.0]
+
+
+def test_plan_chunks_short_video_is_single_chunk():
+    assert plan_chunks(50.0) == [(0.0, 50.0)]
+
+
+def test_concat_list_line_escapes_quotes():
+    assert concat_list_line("/tmp/chunk_0001.mp4") == "file '/tmp/chunk_0001.mp4'\n"
+    assert concat_list_line("/tmp/it's.mp4") == "file '/tmp/it'\\''s.mp4'\n"
+
+
+def test_short_video_falls_back(tmp_path):
+    # 구간이 하나뿐이거나 길이를 모르면 일반 인코딩으로
+    assert not chunked_compress("in.mp4", str(tmp_path / "out.mp4"), X264Encoder(), "23", "4M", 50.0)
+    assert not chunked_compress("in.mp4", str(tmp_path / "out.mp4"), X264Encoder(), "23", "4M", None)
+
+
+def media_streams(path):
+    """(길이 초, 스트림 종류 목록) - ffprobe 없이 ffmpeg 출력으로"""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    h, m, s = re.search(r"Duration: (\d+):(\d+):([0-9.]+)", result.stderr).groups()
+    return int(h) * 3600 + int(m) * 60 + float(s), re.findall(r"Stream #0:\d+.*?: (Video|Audio)", result.stderr)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+def test_keyframes_on_global_segment_multiples(tmp_path):
+    if "libx264" not in listed_encoders():
+        pytest.skip("libx264 없음")
+    source = tmp_path / "source.mp4"
+    output = tmp_path / "output.mp4"
+    # 원본 키프레임은 10초(250프레임)마다가 아닌 7초마다 - 구간 경계/강제 키프레임과 무관해야 함
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=160x90:rate=25",
+        "-f", "lavfi", "-i", "sine=sample_rate=22050",
+        "-t", "65", "-c:v", "libx264", "-g", "175", "-c:a", "aac", str(source),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+
+    encoder = X264Encoder()
+    encoder.workers = 2
+    assert chunked_compress(str(source), str(output), encoder, "28", "2M", 65.0,
+                            chunk_seconds=30, work_dir=str(tmp_path / "chunks"))
+
+    result = subprocess.run([
+        "ffmpeg", "-hide_banner", "-i", str(output),
+        "-vf", "select=eq(pict_type\\,I),showinfo", "-f", "null", "-",
+    ], capture_output=True, text=True)
+    times = [float(t) for t in re.findall(r"pts_time:([0-9.]+)", result.stderr)]
+    assert times == pytest.approx([0, 10, 20, 30, 40, 50, 60], abs=0.05)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+def test_chunks_encoded_in_parallel_and_stitched(tmp_path):
+    if "libx264" not in listed_encoders():
+        pytest.skip("libx264 없음")
+    source = tmp_path / "source.mp4"
+    output = tmp_path / "output.mp4"
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=160x90:rate=25",
+        "-f", "lavfi", "-i", "sine=sample_rate=22050",
+        "-t", "45", "-c:v", "libx264", "-g", "125", "-c:a", "aac", str(source),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+
+    encoder = X264Encoder()
+    encoder.workers = 2
+    logs = []
+    work_dir = tmp_path / "chunks"
+    assert chunked_compress(str(source), str(output), encoder, "28", "2M", 45.0,
+                            log=logs.append, chunk_seconds=20, work_dir=str(work_dir))
+    assert "2개 구간" in logs[0]
+    duration, streams = media_streams(output)
+    assert duration == pytest.approx(45, abs=0.2)
+    assert streams == ["Video", "Audio"]
+    # 구간 파일은 남기지 않음
+    assert not work_dir.exists() or os.listdir(work_dir) == []
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""jbch_cli: 매니페스트 읽기, 하위 명령/실행 이름 분기, 종료 코드, JSON Lines 출력"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import jbch_cli
+from jbch_cli import EXIT_FAILED, EXIT_OK, EXIT_USAGE, build_parser, load_manifest, main
+
+
+class FakeJob:
+    """Uploader/HLSConverter 대신 받은 인자와 작업 목록만 기록"""
+
+    instances = []
+    fail = False
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.jobs = None
+        self.results = []
+        FakeJob.instances.append(self)
+
+    def run(self, jobs):
+        self.jobs = list(jobs)
+        self.kwargs["emit"]({"event": "summary", "success": len(self.jobs), "failed": 0})
+        return (self.jobs, [("x", "upload", None)]) if FakeJob.fail else (self.jobs, [])
+
+
+@pytest.fixture
+def fake_jobs(monkeypatch):
+    FakeJob.instances = []
+    FakeJob.fail = False
+    monkeypatch.setattr(jbch_cli, "Uploader", FakeJob)
+    monkeypatch.setattr(jbch_cli, "HLSConverter", FakeJob)
+    return FakeJob
+
+
+def events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_load_manifest_formats(tmp_path):
+    text = tmp_path / "list.txt"
+    text.write_text("# 주석\nD:/a.mp4\n\n  D:/b 1부.mp4  \n", encoding="utf-8")
+    assert load_manifest(str(text)) == [("D:/a.mp4", None), ("D:/b 1부.mp4", None)]
+
+    plain = tmp_path / "plain.json"
+    plain.write_text(json.dumps(["a.mp4", {"path": "b.mp4", "dest": "청년/2024"}]), encoding="utf-8")
+    assert load_manifest(str(plain)) == [("a.mp4", None), ("b.mp4", "청년/2024")]
+
+    grouped = tmp_path / "grouped.json"
+    grouped.write_text(json.dumps({"dest": "성인/2024", "files": ["a.mp4", {"path": "b.mp4", "dest": "x"}]}),
+                       encoding="utf-8-sig")
+    assert load_manifest(str(grouped)) == [("a.mp4", "성인/2024"), ("b.mp4", "x")]
+
+
+def test_program_name_selects_command():
+    assert build_parser("jbch-upload").parse_args(["--dest", "a", "x.mp4"]).func is jbch_cli.run_upload
+    assert build_parser("jbch-hls.exe").parse_args(["--prefix", "a"]).func is jbch_cli.run_hls
+    args = build_parser("jbch_cli.py").parse_args(["hls", "a/b.mp4"])
+    assert (args.command, args.paths) == ("hls", ["a/b.mp4"])
+    with pytest.raises(SystemExit):
+        build_parser("jbch_cli.py").parse_args([])
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX 래퍼")
+@pytest.mark.parametrize("wrapper,command", [("jbch-upload", "upload"), ("jbch-hls", "hls")])
+def test_wrapper_runs_subcommand(wrapper, command):
+    path = os.path.join(os.path.dirname(jbch_cli.__file__), wrapper)
+    assert os.access(path, os.X_OK)
+    result = subprocess.run([path, "--help"], capture_output=True, text=True,
+                            env=dict(os.environ, PYTHON=sys.executable))
+    assert result.returncode == 0
+    assert result.stdout.startswith(f"usage: jbch {command} ")
+
+
+def test_upload_collects_files_and_manifest(tmp_path, fake_jobs, capsys):
+    folder = tmp_path / "설교"
+    (folder / "sub").mkdir(parents=True)
+    for name in ("b.mp4", "a.MOV", "notes.txt", "sub/c.mkv"):
+        (folder / name).write_bytes(b"x")
+    extra = tmp_path / "extra.mp4"
+    extra.write_bytes(b"x")
+    manifest = tmp_path / "list.json"
+    manifest.write_text(json.dumps([{"path": str(extra), "dest": "청년/2024/"}]), encoding="utf-8")
+
+    code = main(["upload", "--dest", "/성인/2024/", "--compress", "--manifest", str(manifest), str(folder)])
+    assert code == EXIT_OK
+    job = fake_jobs.instances[0]
+    assert job.kwargs["compress"] is True
+    assert job.jobs == [
+        (str(folder / "a.MOV"), "성인/2024"),
+        (str(folder / "b.mp4"), "성인/2024"),
+        (str(folder / "sub" / "c.mkv"), "성인/2024"),
+        (str(extra), "청년/2024"),
+    ]
+    assert events(capsys)[-1]["event"] == "summary"
+
+
+def test_upload_usage_errors(tmp_path, fake_jobs, capsys):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x")
+    assert main(["upload", str(video)]) == EXIT_USAGE
+    assert "--dest" in events(capsys)[0]["message"]
+    assert main(["upload", "--dest", "a", str(tmp_path / "없음")]) == EXIT_USAGE
+    assert fake_jobs.instances == []
+
+
+def test_upload_failure_exit_code(tmp_path, fake_jobs):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x")
+    fake_jobs.fail = True
+    assert main(["upload", "--dest", "a", str(video)]) == EXIT_FAILED
+
+
+def test_hls_lists_prefixes(monkeypatch, fake_jobs, capsys):
+    listing = {"성인/2024": ["성인/2024/a.mp4", "성인/2024/b.mp4"]}
+    monkeypatch.setattr(jbch_cli, "list_convertible_files", lambda prefix: listing.get(prefix))
+    assert main(["hls", "--prefix", "/성인/2024/", "성인/2024/a.mp4", "--keep-original"]) == EXIT_OK
+    job = fake_jobs.instances[0]
+    assert job.jobs == ["성인/2024/a.mp4", "성인/2024/b.mp4"]
+    assert job.kwargs["delete_original"] is False
+    capsys.readouterr()
+
+    # 목록 조회 실패는 실패, 대상이 없으면 잘못된 사용
+    assert main(["hls", "--prefix", "없음"]) == EXIT_FAILED
+    assert main(["hls"]) == EXIT_USAGE
+
+
+def test_hls_workers_and_report(tmp_path, fake_jobs, capsys):
+    report = tmp_path / "report.json"
+    code = main(["hls", "성인/2024/a.mp4", "--workers", "3", "--max-temp-gb", "0.5", "--report", str(report)])
+    assert code == EXIT_OK
+    job = fake_jobs.instances[0]
+    assert (job.kwargs["workers"], job.kwargs["max_temp_bytes"]) == (3, 512 * 1024 ** 2)
+    assert json.loads(report.read_text(encoding="utf-8"))["files"] == []
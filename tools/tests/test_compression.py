@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""compression.plan_compression: 예상 크기로 건너뛰기 / 재포장 / 재인코딩 결정"""
+
+import pytest
+
+from compression import (
+    AUDIO_BITRATE, SAMPLE_SECONDS, TARGET_BPP, CompressionPlan, parse_bitrate, plan_compression,
+    predict_encoded_bytes, source_bits_per_pixel,
+)
+from probe import MediaInfo
+
+HOUR = 3600.0
+
+
+def video(tmp_path, name, size):
+    path = tmp_path / name
+    with open(path, 'wb') as f:
+        f.truncate(size)
+    return str(path)
+
+
+def info(codec="h264", bitrate=8_000_000, duration=HOUR, width=1920, height=1080, fps=30.0):
+    return MediaInfo(codec=codec, width=width, height=height, duration=duration,
+                     bit_rate=bitrate, video_bit_rate=bitrate, fps=fps)
+
+
+def test_parse_bitrate():
+    assert parse_bitrate("4M") == 4_000_000
+    assert parse_bitrate("1.5m") == 1_500_000
+    assert parse_bitrate("800K") == 800_000
+    assert parse_bitrate(128000) == 128000
+
+
+def test_predicted_size_uses_cq_and_maxrate():
+    media = info(width=1280, height=720)
+    expected_video = TARGET_BPP["23"] * 1280 * 720 * 30
+    assert predict_encoded_bytes(media, "23", "4M") == int((expected_video + AUDIO_BITRATE) * HOUR / 8)
+    # 1080p CQ18은 최대 비트레이트(2M)에 걸림
+    assert predict_encoded_bytes(info(), "18", "2M") == int((2_000_000 + AUDIO_BITRATE) * HOUR / 8)
+    assert predict_encoded_bytes(info(duration=None), "23", "4M") is None
+    assert source_bits_per_pixel(info(bitrate=6_220_800)) == 0.1
+
+
+def test_high_bitrate_source_is_encoded(tmp_path):
+    # 8Mbps 1시간 ≈ 3.6GB → 예상 ≈ 1.8GB
+    plan = plan_compression(video(tmp_path, "a.mp4", 3_600_000_000), info(), "23", "4M")
+    assert plan.action == "encode"
+    assert 0.4 < plan.savings < 0.6
+    assert "감소" in plan.reason
+
+
+def test_already_small_source_is_skipped_or_copied(tmp_path):
+    small = 1_000_000_000
+    assert plan_compression(video(tmp_path, "a.mp4", small), info(bitrate=2_000_000), "23", "4M").action == "skip"
+    # MP4가 아니면 재인코딩 대신 MP4로 재포장
+    plan = plan_compression(video(tmp_path, "a.mkv", small), info(bitrate=2_000_000), "23", "4M")
+    assert plan.action == "copy"
+
+
+def test_unplayable_codec_always_encoded(tmp_path):
+    plan = plan_compression(video(tmp_path, "a.avi", 100_000_000), info(codec="mpeg4", bitrate=200_000), "23", "4M")
+    assert plan.action == "encode"
+    assert "mpeg4" in plan.reason
+
+
+def test_missing_probe_info_encodes(tmp_path):
+    path = video(tmp_path, "a.mp4", 10)
+    assert plan_compression(path, None).action == "encode"
+    assert plan_compression(path, info(duration=None)).reason == "영상 정보 없음"
+
+
+def test_sample_encode_corrects_prediction(tmp_path):
+    path = video(tmp_path, "a.mp4", 3_600_000_000)
+    samples = []
+
+    def sample(start, seconds):
+        samples.append((start, seconds))
+        # 실제로는 거의 줄지 않는 영상 (초당 0.95MB)
+        return int(950_000 * seconds)
+
+    plan = plan_compression(path, info(), "23", "4M", sample_encode=sample)
+    assert samples == [(HOUR / 2 - SAMPLE_SECONDS / 2, SAMPLE_SECONDS)]
+    assert plan.predicted_bytes == int(950_000 * HOUR)
+    assert plan.action == "skip"
+    # 짧은 영상은 샘플 없이 추정만
+    samples.clear()
+    plan_compression(path, info(duration=SAMPLE_SECONDS * 2), "23", "4M", sample_encode=sample)
+    assert samples == []
+
+
+def test_plan_round_trip():
+    plan = CompressionPlan("copy", "재포장", 100, 90, 0.05)
+    assert CompressionPlan.from_dict(plan.to_dict()).to_dict() == plan.to_dict()
+    assert plan.savings == pytest.approx(0.1)
+    assert CompressionPlan("encode", "", 100).savings is None
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""dedupe.ContentIndex: 원격 위치 색인, 로컬 캐시 보관/재사용, 용량 상한(LRU) 정리"""
+
+import itertools
+import os
+
+import pytest
+
+import dedupe
+from dedupe import ContentIndex
+
+
+class Clock:
+    """호출할 때마다 1초씩 늘어나는 시각 (사용 순서가 항상 구분되도록)"""
+
+    def __init__(self):
+        self.ticks = itertools.count(1000)
+
+    def time(self):
+        return float(next(self.ticks))
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedupe, "time", Clock())
+    index = ContentIndex(str(tmp_path / "index.sqlite"), str(tmp_path / "cache"), max_bytes=100)
+    yield index
+    index.close()
+
+
+def make_outputs(tmp_path, name, size):
+    compressed = tmp_path / f"{name}_compressed.mp4"
+    compressed.write_bytes(b"c" * size)
+    hls = tmp_path / f"hls_{name}"
+    hls.mkdir()
+    (hls / "index.m3u8").write_text("#EXTM3U\n")
+    (hls / "segment_000.ts").write_bytes(b"s" * size)
+    return str(compressed), str(hls)
+
+
+def test_unknown_hash(index):
+    assert index.lookup("없음") == {"local": None, "remotes": []}
+
+
+def test_remotes_newest_first_and_forget(index):
+    index.add_remote("h", "2023/a.mp4", "2023/hls/a", "thumbnails/2023/a.mp4.jpg")
+    index.add_remote("h", "2024/a 복사본.mp4")
+    remotes = index.lookup("h")["remotes"]
+    assert [r["mp4_key"] for r in remotes] == ["2024/a 복사본.mp4", "2023/a.mp4"]
+    assert remotes[1] == {"mp4_key": "2023/a.mp4", "hls_prefix": "2023/hls/a",
+                          "thumb_key": "thumbnails/2023/a.mp4.jpg"}
+    index.forget_remote("2024/a 복사본.mp4")
+    assert [r["mp4_key"] for r in index.lookup("h")["remotes"]] == ["2023/a.mp4"]
+
+
+def test_store_local_moves_outputs_into_cache(index, tmp_path):
+    compressed, hls = make_outputs(tmp_path, "a", 10)
+    cached_compressed, cached_hls = index.store_local("h", variant="hevc-23", codec="hevc",
+                                                      compressed_path=compressed, hls_dir=hls)
+    assert not os.path.exists(compressed) and not os.path.exists(hls)
+    assert cached_compressed.startswith(index.cache_dir)
+    assert os.path.exists(os.path.join(cached_hls, "segment_000.ts"))
+    local = index.lookup("h")["local"]
+    assert local == {"variant": "hevc-23", "codec": "hevc",
+                     "compressed_path": cached_compressed, "hls_dir": cached_hls}
+    # 캐시 파일이 사라지면 없는 것으로
+    os.remove(cached_compressed)
+    assert index.lookup("h")["local"]["compressed_path"] is None
+
+
+def test_evicts_least_recently_used(index, tmp_path):
+    index.store_local("old", compressed_path=make_outputs(tmp_path, "old", 30)[0])
+    index.store_local("mid", compressed_path=make_outputs(tmp_path, "mid", 30)[0])
+    index.add_remote("old", "2024/old.mp4")
+    # old를 다시 사용 → mid가 가장 오래됨
+    index.lookup("old")
+    index.store_local("new", compressed_path=make_outputs(tmp_path, "new", 50)[0])
+    assert index.lookup("mid")["local"]["compressed_path"] is None
+    assert index.lookup("old")["local"]["compressed_path"] is not None
+    assert index.lookup("new")["local"]["compressed_path"] is not None
+    assert not os.path.exists(os.path.join(index.cache_dir, "mid"))
+    # 원격 위치 기록은 로컬 정리와 무관
+    assert index.lookup("old")["remotes"][0]["mp4_key"] == "2024/old.mp4"
+
+    index.evict(max_bytes=0)
+    assert os.listdir(index.cache_dir) == []
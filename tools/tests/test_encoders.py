@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""encoders: 사용 가능한 인코더 확인과 NVENC → libx265 → libx264 대체 순서"""
+
+import shutil
+
+import pytest
+
+import encoders
+from encoders import NvencEncoder, X264Encoder, X265Encoder, detect_encoders, encoder_works, select_encoder
+
+
+@pytest.fixture
+def available(monkeypatch):
+    """listed: ffmpeg 목록에 있는 인코더, working: 테스트 인코딩이 성공하는 인코더"""
+    state = {"listed": set(), "working": set(), "tested": []}
+
+    def test_encode(name):
+        state["tested"].append(name)
+        return name in state["working"]
+
+    monkeypatch.setattr(encoders, "_detected", None)
+    monkeypatch.setattr(encoders, "_working", {})
+    monkeypatch.setattr(encoders, "listed_encoders", lambda: set(state["listed"]))
+    monkeypatch.setattr(encoders, "test_encode", test_encode)
+    return state
+
+
+def test_nvenc_listed_but_no_gpu_falls_back_to_x265(available):
+    available["listed"] = {"hevc_nvenc", "libx265", "libx264"}
+    available["working"] = {"libx265", "libx264"}
+    assert detect_encoders() == ["x265", "x264"]
+    encoder = select_encoder("auto")
+    assert isinstance(encoder, X265Encoder)
+    # 지정한 인코더가 없으면 auto 순서로
+    assert isinstance(select_encoder("nvenc"), X265Encoder)
+    assert isinstance(select_encoder("x264"), X264Encoder)
+    # 확인은 한 번만
+    assert available["tested"] == ["hevc_nvenc", "libx265", "libx264"]
+
+
+def test_encoder_works_checks_that_encoder(available):
+    # GPU가 HEVC 인코딩을 지원하지 않아도 h264_nvenc는 따로 확인
+    available["listed"] = {"hevc_nvenc", "h264_nvenc", "libx264"}
+    available["working"] = {"h264_nvenc", "libx264"}
+    assert "nvenc" not in detect_encoders()
+    assert encoder_works("h264_nvenc")
+    assert encoder_works("h264_nvenc")
+    assert available["tested"].count("h264_nvenc") == 1
+    # 목록에 없으면 테스트 인코딩도 하지 않음
+    assert not encoder_works("h264_qsv")
+    assert "h264_qsv" not in available["tested"]
+
+
+def test_gpu_preferred_and_single_session(available, monkeypatch):
+    available["listed"] = available["working"] = {"hevc_nvenc", "libx264"}
+    monkeypatch.setattr(encoders.os, "cpu_count", lambda: 16)
+    encoder = select_encoder("auto", parallel=True)
+    assert isinstance(encoder, NvencEncoder)
+    assert encoder.workers == 1
+
+
+def test_cpu_encoder_parallel_workers(available, monkeypatch):
+    available["listed"] = available["working"] = {"libx264"}
+    monkeypatch.setattr(encoders.os, "cpu_count", lambda: 16)
+    assert select_encoder("auto").workers == 1
+    encoder = select_encoder("auto", parallel=True)
+    assert encoder.workers == 16 // encoders.CORES_PER_CPU_ENCODE
+    # 동시 인코딩끼리 코어를 나눠 씀
+    cmd = encoder.build_command("in.mp4", "out.mp4", crf="23")
+    assert cmd[cmd.index("-threads") + 1] == "4"
+
+
+def test_no_encoder(available):
+    assert select_encoder("auto") is None
+
+
+def test_commands_map_quality_presets():
+    nvenc = NvencEncoder().build_command("in.mp4", "out.mp4", crf="18", maxrate="8M", start=30, duration=20)
+    assert nvenc[:3] == ["ffmpeg", "-y", "-hwaccel"]
+    assert nvenc[nvenc.index("-ss") + 1] == "30.000"
+    assert nvenc[nvenc.index("-t") + 1] == "20.000"
+    assert nvenc.index("-ss") < nvenc.index("-i")
+    assert nvenc[nvenc.index("-cq") + 1] == "18"
+    x265 = X265Encoder().build_command("in.mp4", "out.mp4", crf="23")
+    assert x265[x265.index("-crf") + 1] == encoders.X265_CRF_MAP["23"]
+    assert "-x265-params" not in x265
+    x264 = X264Encoder().build_command("in.mp4", "out.mp4", crf="28", maxrate="2M")
+    assert x264[x264.index("-crf") + 1] == encoders.X264_CRF_MAP["28"]
+    assert x264[x264.index("-maxrate") + 1] == "2M"
+    assert x264[-1] == "out.mp4"
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg 필요")
+def test_real_detection(monkeypatch):
+    monkeypatch.setattr(encoders, "_detected", None)
+    monkeypatch.setattr(encoders, "_working", {})
+    detected = detect_encoders()
+    listed = encoders.listed_encoders()
+    assert set(detected) <= set(encoders.ENCODER_CLASSES)
+    for key in detected:
+        assert encoders.ENCODER_CLASSES[key].name in listed
+    assert not encoders.test_encode("no_such_encoder")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""fanout.fanout_encode: 한 번 디코딩으로 압축 MP4 + HLS + 썸네일"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from encoders import X264Encoder, X265Encoder, listed_encoders
+from fanout import fanout_encode, hls_tee_options
+
+
+def test_hls_tee_options_by_codec():
+    assert hls_tee_options("h264") == "f=hls:hls_time=10:hls_list_size=0:hls_segment_filename=seg_%03d.ts"
+    hevc = hls_tee_options("hevc").split(":")
+    assert "hls_segment_type=fmp4" in hevc
+    assert "hls_fmp4_init_filename=init.mp4" in hevc
+    assert hevc[-1] == "hls_segment_filename=seg_%03d.m4s"
+
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+
+
+@pytest.fixture
+def source(tmp_path):
+    # 쉼표/공백이 있는 원본 이름 (tee 구분자와 섞이지 않아야 함)
+    path = tmp_path / "설교, 1부 (주일).mp4"
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=160x90:rate=25",
+        "-f", "lavfi", "-i", "sine=sample_rate=22050",
+        "-t", "25", "-c:v", "mpeg4", "-c:a", "aac", str(path),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+    return str(path)
+
+
+def require(name):
+    if name not in listed_encoders():
+        pytest.skip(f"{name} 없음")
+
+
+def segments(playlist):
+    with open(playlist, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return [line for line in lines if line and not line.startswith("#")], lines
+
+
+@needs_ffmpeg
+def test_h264_mp4_hls_and_poster(source, tmp_path):
+    require("libx264")
+    work = tmp_path / "work"
+    result = fanout_encode(source, str(work), X264Encoder(), "28", "2M", duration=25.0)
+    assert result.ok, result.error
+    assert os.path.getsize(result.mp4_path) > 0
+    assert os.path.getsize(result.poster_path) > 0
+    names, lines = segments(os.path.join(result.hls_dir, "index.m3u8"))
+    assert names == ["seg_000.ts", "seg_001.ts", "seg_002.ts"]
+    assert "#EXT-X-ENDLIST" in lines
+    assert all(os.path.exists(os.path.join(result.hls_dir, name)) for name in names)
+
+
+@needs_ffmpeg
+def test_hevc_uses_fmp4_segments_without_poster(source, tmp_path):
+    require("libx265")
+    result = fanout_encode(source, str(tmp_path / "work"), X265Encoder(), "28", "2M", poster=False)
+    assert result.ok, result.error
+    assert result.poster_path is None
+    names, lines = segments(os.path.join(result.hls_dir, "index.m3u8"))
+    assert names[0] == "seg_000.m4s"
+    assert any('URI="init.mp4"' in line for line in lines)
+    assert os.path.exists(os.path.join(result.hls_dir, "init.mp4"))
+
+
+@needs_ffmpeg
+def test_failure_reports_error(tmp_path):
+    broken = tmp_path / "broken.mp4"
+    broken.write_bytes(b"not a video")
+    result = fanout_encode(str(broken), str(tmp_path / "work"), X264Encoder(), "28", "2M")
+    assert not result.ok
+    assert result.error
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""HLSConverter: 여러 파일 동시 변환, 파일별 작업 폴더 예약, 파일별 결과"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+import jbch_core
+import storage
+from jbch_core import HLSCheck, HLSConverter
+from storage import LocalStorage
+from workspace import LEASE_NAME, Workspace
+
+
+@pytest.fixture
+def sizes(monkeypatch):
+    listing = {"성인/2024": {"a.mp4": 10, "b.mp4": 20, "c.mp4": 30, "d.mp4": 40}}
+    monkeypatch.setattr(jbch_core, "list_r2_sizes", lambda path: listing.get(path, {}))
+
+
+def test_run_converts_concurrently_and_reports(sizes, tmp_path):
+    events = []
+    work = Workspace(root=str(tmp_path / "work"), max_bytes=1000)
+    converter = HLSConverter(sync_kv=False, workers=3, workspace=work, emit=events.append)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+    reserved = {}
+
+    def convert_one(remote_path, index, total, result, area):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        with open(os.path.join(area.path, LEASE_NAME), encoding="utf-8") as f:
+            reserved[os.path.basename(remote_path)] = json.load(f)["reserve"]
+        with open(area.file("input.mp4"), "wb") as f:
+            f.write(b"video")
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        if remote_path.endswith("c.mp4"):
+            return "upload"
+        if remote_path.endswith("d.mp4"):
+            raise RuntimeError("디스크 오류")
+        result["segments"] = 3
+        return None
+
+    converter.convert_one = convert_one
+    files = [f"성인/2024/{name}.mp4" for name in "abcd"]
+    success, failed = converter.run(files)
+    assert (success, failed) == (2, 2)
+    assert 1 < state["peak"] <= 3
+    # 원본 크기 × 2 예약 (목록 조회 결과)
+    assert reserved == {"a.mp4": 20, "b.mp4": 40, "c.mp4": 60, "d.mp4": 80}
+    # 실패한 파일의 작업 폴더만 다음 실행에서 재사용하도록 남김 (사용 중 표시는 없음)
+    kept = os.listdir(work.root)
+    assert len(kept) == 2
+    assert all(os.listdir(os.path.join(work.root, name)) == ["input.mp4"] for name in kept)
+
+    results = {r["file"].rsplit("/", 1)[-1]: r for r in converter.results}
+    assert [r["file"] for r in converter.results] == files
+    assert results["a.mp4"]["ok"] and results["a.mp4"]["segments"] == 3
+    assert results["b.mp4"]["size"] == 20
+    assert (results["c.mp4"]["ok"], results["c.mp4"]["stage"]) == (False, "upload")
+    assert results["d.mp4"]["error"] == "디스크 오류"
+
+    file_events = [e for e in events if e["event"] == "file"]
+    assert sorted(e["done"] for e in file_events) == [1, 2, 3, 4]
+    summary = events[-1]
+    assert summary["event"] == "summary"
+    assert (summary["success"], summary["failed"], summary["bytes"]) == (2, 2, 30)
+
+
+def test_convert_one_uses_convert_to_hls_with_area(tmp_path, monkeypatch):
+    bucket = tmp_path / "bucket"
+    (bucket / "성인").mkdir(parents=True)
+    (bucket / "성인" / "설교, 1부.mp4").write_bytes(b"video")
+    monkeypatch.setattr(storage, "_storage", LocalStorage(str(bucket)))
+    calls = []
+
+    def convert(input_path, output_dir, codec="h264", log=None, progress=None, area=None):
+        calls.append((input_path, output_dir, area))
+        return False
+
+    monkeypatch.setattr(jbch_core, "convert_to_hls", convert)
+    work = Workspace(root=str(tmp_path / "work"))
+    converter = HLSConverter(sync_kv=False, workspace=work)
+    area = work.area("convert_test", 10)
+    result = {"source_size": 5}
+    assert converter.convert_one("성인/설교, 1부.mp4", 0, 1, result, area) == "remux"
+    # 특수문자 입력 링크는 작업 폴더 안에 (같은 디스크 → 하드 링크)
+    assert calls == [(os.path.join(area.path, "설교, 1부.mp4"), os.path.join(area.path, "hls"), area)]
+    area.release()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+def test_convert_one_end_to_end(tmp_path, monkeypatch):
+    bucket = tmp_path / "bucket"
+    (bucket / "성인").mkdir(parents=True)
+    source = bucket / "성인" / "설교, 1부.mp4"
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=160x120:rate=25",
+        "-f", "lavfi", "-i", "sine=sample_rate=22050",
+        "-t", "12", "-c:v", "libx264", "-g", "50", "-c:a", "aac", str(source),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+    monkeypatch.setattr(storage, "_storage", LocalStorage(str(bucket)))
+    work = Workspace(root=str(tmp_path / "work"))
+    converter = HLSConverter(sync_kv=False, workspace=work)
+    area = work.area("convert_test", source.stat().st_size * 2)
+    result = {"source_size": source.stat().st_size, "segments": 0}
+    check = converter.convert_one("성인/설교, 1부.mp4", 0, 1, result, area)
+    assert isinstance(check, HLSCheck)
+    assert result["segments"] == 2
+    # 입력 링크는 변환이 끝나면 정리
+    assert not [name for name in os.listdir(area.path) if name.startswith("ffinput_")]
+    assert check.run().ok
+    uploaded = sorted(os.listdir(bucket / "성인" / "hls" / "설교, 1부"))
+    assert uploaded == ["index.m3u8", "seg_000.ts", "seg_001.ts"]
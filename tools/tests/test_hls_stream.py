@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""스트리밍 HLS 변환: 로컬 파일 서버에서 읽으며 세그먼트를 변환 중에 업로드 (ffmpeg 필요)"""
+
+import os
+import glob
+import time
+import shutil
+import functools
+import threading
+import subprocess
+import http.server
+
+import pytest
+
+from hls_stream import StreamingRemux
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+
+# 테스트 영상 길이 (초) - HLS 세그먼트 10초 → 4개
+SAMPLE_SECONDS = 40
+# 서버가 파일 전체를 보내는 데 걸리는 시간 (초) - 변환이 이 정도 이어지도록
+SERVE_SECONDS = 4.0
+
+
+@pytest.fixture(scope="module")
+def sample_mp4(tmp_path_factory):
+    """작은 faststart MP4 (1초마다 키프레임, 이름에 쉼표)"""
+    path = tmp_path_factory.mktemp("source") / "설교, 1부.mp4"
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", "testsrc=size=160x90:rate=10",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=22050",
+        "-t", str(SAMPLE_SECONDS), "-c:v", "mpeg4", "-g", "10",
+        "-c:a", "aac", "-movflags", "+faststart", str(path),
+    ]
+    if subprocess.run(cmd, capture_output=True).returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+    return path
+
+
+class SlowHandler(http.server.SimpleHTTPRequestHandler):
+    """파일을 조금씩 천천히 보내는 정적 파일 서버 (느린 원격 저장소 대신)"""
+
+    chunk_size = 16 * 1024
+    delay = 0.0
+
+    def copyfile(self, source, outputfile):
+        while True:
+            data = source.read(self.chunk_size)
+            if not data:
+                break
+            outputfile.write(data)
+            time.sleep(self.delay)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server(sample_mp4):
+    chunks = max(1, os.path.getsize(sample_mp4) // SlowHandler.chunk_size)
+    handler = type("Handler", (SlowHandler,), {"delay": SERVE_SECONDS / chunks})
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(handler, directory=str(sample_mp4.parent)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class RecordingUpload:
+    """업로드 콜백: 호출마다 (이름, 그때 남아 있던 세그먼트 수, 변환이 끝났는지) 기록"""
+
+    def __init__(self, hls_dir):
+        self.hls_dir = hls_dir
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, local_path, name):
+        pending = len(glob.glob(os.path.join(self.hls_dir, "*.ts")))
+        try:
+            with open(os.path.join(self.hls_dir, "index.m3u8"), encoding="utf-8") as f:
+                ended = "#EXT-X-ENDLIST" in f.read()
+        except OSError:
+            ended = False
+        with self.lock:
+            self.calls.append((name, pending, ended))
+        return os.path.getsize(local_path) > 0
+
+    def names(self):
+        return [name for name, _, _ in self.calls]
+
+
+def test_segments_upload_while_ffmpeg_runs(sample_mp4, slow_server, tmp_path):
+    hls_dir = str(tmp_path / "hls")
+    upload = RecordingUpload(hls_dir)
+    remux = StreamingRemux(upload, source="http", base_url=slow_server)
+
+    ok, segments, first_upload = remux.run(sample_mp4.name, hls_dir)
+
+    assert ok
+    assert segments >= SAMPLE_SECONDS // 10
+    # 플레이리스트는 모든 세그먼트 뒤에 한 번
+    assert upload.names()[-1] == "index.m3u8"
+    assert sorted(upload.names()[:-1]) == [f"seg_{i:03d}.ts" for i in range(segments)]
+    # 첫 세그먼트는 변환이 끝나기(ENDLIST) 전에 업로드됨
+    first_name, _, first_ended = upload.calls[0]
+    assert first_name.endswith(".ts") and not first_ended
+    assert first_upload is not None and first_upload < SERVE_SECONDS
+    # 로컬에는 세그먼트가 몇 개만 남음 (업로드한 세그먼트는 바로 삭제)
+    assert max(pending for _, pending, _ in upload.calls) <= 2
+    assert glob.glob(os.path.join(hls_dir, "*.ts")) == []
+
+
+def test_local_source_with_special_characters(sample_mp4, tmp_path):
+    hls_dir = str(tmp_path / "hls")
+    upload = RecordingUpload(hls_dir)
+    remux = StreamingRemux(upload, source="local", base_url=str(sample_mp4.parent))
+
+    ok, segments, _ = remux.run(sample_mp4.name, hls_dir)
+
+    assert ok
+    assert segments >= SAMPLE_SECONDS // 10
+    assert upload.names()[-1] == "index.m3u8"
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""hls_verify: 플레이리스트 파싱, 길이/세그먼트 수/ENDLIST 확인, 업로드 응답 크기/ETag 비교"""
+
+import hashlib
+
+from hls_verify import (
+    HLSVerifier, MediaPlaylist, UploadLedger, check_local_hls, etag_matches, local_reader,
+)
+from storage import ObjectInfo
+
+
+def media_playlist(durations, ended=True, init=None, target=10):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:7", f"#EXT-X-TARGETDURATION:{target}"]
+    if init:
+        lines.append(f'#EXT-X-MAP:URI="{init}"')
+    for n, seconds in enumerate(durations):
+        lines += [f"#EXTINF:{seconds:.3f},", f"segment_{n:03d}.ts"]
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def write_hls(hls_dir, durations, **kwargs):
+    hls_dir.mkdir(parents=True, exist_ok=True)
+    (hls_dir / "index.m3u8").write_text(media_playlist(durations, **kwargs), encoding="utf-8")
+    for n in range(len(durations)):
+        (hls_dir / f"segment_{n:03d}.ts").write_bytes(b"ts" * (n + 1))
+    if kwargs.get("init"):
+        (hls_dir / kwargs["init"]).write_bytes(b"init")
+    return str(hls_dir)
+
+
+def test_parse_media_playlist():
+    playlist = MediaPlaylist.parse(media_playlist([10, 10, 4.5], init="init.mp4"))
+    assert playlist.ended
+    assert playlist.init == "init.mp4"
+    assert playlist.target_duration == 10
+    assert [uri for uri, _ in playlist.segments] == ["segment_000.ts", "segment_001.ts", "segment_002.ts"]
+    assert playlist.duration == 24.5
+    assert playlist.variants == []
+
+
+def test_parse_master_playlist():
+    playlist = MediaPlaylist.parse(
+        "#EXTM3U\n"
+        "#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080\n"
+        "v0/index.m3u8\n"
+        "#EXT-X-STREAM-INF:BANDWIDTH=128000,CODECS=\"mp4a.40.2\"\n"
+        "v1/index.m3u8\n"
+    )
+    assert playlist.variants == ["v0/index.m3u8", "v1/index.m3u8"]
+    assert playlist.segments == []
+
+
+def test_etag_matches():
+    md5 = hashlib.md5(b"data").hexdigest()
+    assert etag_matches(f'"{md5}"', md5) is True
+    assert etag_matches(md5.upper(), md5) is True
+    assert etag_matches('"0123"', md5) is False
+    # 멀티파트/없는 ETag는 비교할 수 없음
+    assert etag_matches(f'"{md5}-3"', md5) is None
+    assert etag_matches(None, md5) is None
+    assert etag_matches(md5, None) is None
+
+
+def test_check_local_hls_ok(tmp_path):
+    hls_dir = write_hls(tmp_path / "hls", [10, 10, 10, 5], init="init.mp4")
+    result = check_local_hls(hls_dir, duration=35.2)
+    assert result.ok, result.errors
+    assert (result.segments, result.seconds) == (4, 35)
+
+
+def test_check_local_hls_detects_problems(tmp_path):
+    # 끝 표시 없음 (변환 중단)
+    assert any("ENDLIST" in e for e in check_local_hls(write_hls(tmp_path / "a", [10, 10], ended=False)).errors)
+    # 원본보다 짧음
+    errors = check_local_hls(write_hls(tmp_path / "b", [10, 10]), duration=60).errors
+    assert any("원본 60.0초" in e for e in errors)
+    assert any("최소 6개" in e for e in errors)
+    # 플레이리스트가 참조하는 세그먼트가 없음
+    hls_dir = tmp_path / "c"
+    write_hls(hls_dir, [10, 10])
+    (hls_dir / "segment_001.ts").unlink()
+    assert check_local_hls(str(hls_dir)).errors == ["segment_001.ts: 업로드 기록 없음"]
+    # 빈 세그먼트
+    (hls_dir / "segment_001.ts").write_bytes(b"")
+    assert check_local_hls(str(hls_dir)).errors == ["segment_001.ts: 빈 파일"]
+    # 플레이리스트 없음
+    assert not check_local_hls(str(tmp_path / "없음")).ok
+
+
+def uploaded_ledger(hls_dir, tamper=None):
+    """업로드 응답을 흉내 낸 기록 (tamper: {이름: ObjectInfo}로 일부 응답 바꿈)"""
+    ledger = UploadLedger()
+    for path in sorted(hls_dir.iterdir()):
+        data = path.read_bytes()
+        info = ObjectInfo(path.name, len(data), f'"{hashlib.md5(data).hexdigest()}"')
+        ledger.record(path.name, str(path), (tamper or {}).get(path.name, info))
+    return ledger
+
+
+def test_verifier_compares_upload_responses(tmp_path):
+    hls_dir = tmp_path / "hls"
+    write_hls(hls_dir, [10, 10, 3])
+    read = local_reader(str(hls_dir))
+    assert HLSVerifier(read, uploaded_ledger(hls_dir), duration=23).run().ok
+
+    ledger = uploaded_ledger(hls_dir, {
+        "segment_000.ts": ObjectInfo("segment_000.ts", 1, None),
+        "segment_001.ts": ObjectInfo("segment_001.ts", 4, '"00000000000000000000000000000000"'),
+        "segment_002.ts": ObjectInfo("segment_002.ts", 6, '"abc-2"'),
+    })
+    errors = HLSVerifier(read, ledger, duration=23).run().errors
+    assert errors == [
+        "segment_000.ts: 원격 크기 1 ≠ 로컬 2",
+        "segment_001.ts: ETag 불일치 (내용이 다르게 업로드됨)",
+    ]
+
+
+def test_verifier_remote_only_entries(tmp_path):
+    """이어하기: 로컬 파일 없이 업로드 응답만 있는 항목은 크기가 있는지만 확인"""
+    text = media_playlist([10, 10])
+    ledger = UploadLedger()
+    ledger.record_remote("index.m3u8", ObjectInfo("index.m3u8", len(text)))
+    ledger.record_remote("segment_000.ts", ObjectInfo("segment_000.ts", 100))
+    ledger.record_remote("segment_001.ts", ObjectInfo("segment_001.ts", 0))
+    result = HLSVerifier(lambda name: text, ledger, duration=20).run()
+    assert result.errors == ["segment_001.ts: 원격 파일 크기 0"]
+
+
+def test_verifier_master_checks_each_variant(tmp_path):
+    hls_dir = tmp_path / "hls"
+    write_hls(hls_dir / "v0", [10, 10, 10])
+    write_hls(hls_dir / "v1", [10, 10])
+    (hls_dir / "index.m3u8").write_text(
+        "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1\nv0/index.m3u8\n#EXT-X-STREAM-INF:BANDWIDTH=2\nv1/index.m3u8\n",
+        encoding="utf-8")
+    result = check_local_hls(str(hls_dir), duration=30)
+    assert result.segments == 5
+    # 짧은 화질 하나만 실패로
+    assert [e.split(':')[0] for e in result.errors] == ["v1/index.m3u8", "v1/index.m3u8"]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""작업 기록(journal.Journal), 이어하기 판단용 샘플 해시(jbch_common.sampled_hash), 업로드/변환 이어하기"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import jbch_core
+from jbch_common import HASH_SAMPLE_BYTES, sampled_hash
+from journal import Journal
+from workspace import Workspace
+
+
+def write(path, data):
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def test_sampled_hash_small_file_reads_everything(tmp_path):
+    a = write(tmp_path / "a.mp4", b"x" * 1000)
+    b = write(tmp_path / "b.mp4", b"x" * 1000)
+    c = write(tmp_path / "c.mp4", b"x" * 999 + b"y")
+    assert sampled_hash(a) == sampled_hash(b)
+    assert sampled_hash(a) != sampled_hash(c)
+    assert len(sampled_hash(a)) == 32
+
+
+def test_sampled_hash_large_file_reads_head_middle_tail(tmp_path):
+    size = HASH_SAMPLE_BYTES * 5
+    data = bytearray(size)
+    base = sampled_hash(write(tmp_path / "base.mp4", data))
+    for offset in (0, size // 2, size - 1):
+        changed = bytearray(data)
+        changed[offset] = 1
+        assert sampled_hash(write(tmp_path / "changed.mp4", changed)) != base
+    # 표본 밖(1MB~2MB 사이) 변경은 읽지 않음 - 빠른 해시의 의도된 한계
+    outside = bytearray(data)
+    outside[HASH_SAMPLE_BYTES + 10] = 1
+    assert sampled_hash(write(tmp_path / "outside.mp4", outside)) == base
+    # 크기가 바뀌면 다른 해시
+    assert sampled_hash(write(tmp_path / "longer.mp4", data + b"\0")) != base
+
+
+def test_journal_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    journal = Journal(path)
+    journal.mark("upload", "a.mp4|2025", "probed", "h1", duration=12.5)
+    journal.mark("upload", "a.mp4|2025", "mp4-uploaded", "h1", hls=False, 경로="2025/a.mp4")
+    journal.close()
+
+    journal = Journal(path)
+    assert journal.completed("upload", "a.mp4|2025", "h1") == {
+        "probed": {"duration": 12.5},
+        "mp4-uploaded": {"hls": False, "경로": "2025/a.mp4"},
+    }
+    assert journal.completed("convert", "a.mp4|2025", "h1") == {}
+    journal.close()
+
+
+def test_journal_drops_stages_when_source_changes(tmp_path):
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    journal.mark("upload", "a", "probed", "old")
+    assert journal.completed("upload", "a", "new") == {}
+    # 한 번 무효화된 기록은 이전 해시로도 다시 보이지 않음
+    assert journal.completed("upload", "a", "old") == {}
+
+
+def test_journal_mark_overwrites_and_reset(tmp_path):
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    journal.mark("upload", "a", "probed", "h", duration=1)
+    journal.mark("upload", "a", "probed", "h", duration=2)
+    journal.mark("upload", "b", "probed", "h")
+    assert journal.completed("upload", "a", "h") == {"probed": {"duration": 2}}
+    journal.reset("upload", "a")
+    assert journal.completed("upload", "a", "h") == {}
+    assert "probed" in journal.completed("upload", "b", "h")
+    journal.reset("upload")
+    assert journal.completed("upload", "b", "h") == {}
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("이어하기에서 다시 실행하면 안 됨")
+
+
+def test_uploader_resumes_after_media_upload(tmp_path, monkeypatch):
+    video = tmp_path / "설교.mp4"
+    video.write_bytes(b"video")
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    uploader = jbch_core.Uploader(compress=True, thumbnail=False, journal=journal)
+    item = jbch_core.UploadItem(0, 1, str(video), "성인/2024")
+    content_hash = sampled_hash(str(video))
+    journal.mark("upload", item.journal_key, "mp4-uploaded", content_hash, hls=True)
+    journal.mark("upload", item.journal_key, "hls-uploaded", content_hash, segments=3)
+    for name in ("convert_to_hls", "upload_file", "upload_hls_files", "plan_compression"):
+        monkeypatch.setattr(jbch_core, name, fail)
+
+    uploader.stage_compress(item)
+    assert item.content_hash == content_hash
+    assert item.media_uploaded
+    uploader.stage_hls(item)
+    assert item.hls_success
+    assert uploader.stage_upload(item) is None
+
+
+def test_uploader_restarts_when_source_changed(tmp_path):
+    video = tmp_path / "설교.mp4"
+    video.write_bytes(b"video")
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    item = jbch_core.UploadItem(0, 1, str(video), "성인/2024")
+    journal.mark("upload", item.journal_key, "mp4-uploaded", sampled_hash(str(video)), hls=False)
+    video.write_bytes(b"edited video")
+    uploader = jbch_core.Uploader(journal=journal)
+    uploader.load_journal(item)
+    assert item.done == {}
+    assert not item.media_uploaded
+
+
+class FakeCheck:
+    """HLSCheck 대신 정해진 검증 결과"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+
+    def run(self):
+        return self
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    segments = 4
+    seconds = 40.0
+
+    def to_dict(self):
+        return {"ok": self.ok, "errors": self.errors}
+
+
+def test_converter_skips_uploaded_and_finishes_delete(tmp_path, monkeypatch):
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    journal.mark("convert", "성인/2024/a.mp4", "hls-uploaded", "100", segments=4, duration=40.0)
+    deleted = []
+    checks = []
+    monkeypatch.setattr(jbch_core, "delete_file", lambda path: deleted.append(path) or True)
+    converter = jbch_core.HLSConverter(sync_kv=False, journal=journal, workspace=Workspace(str(tmp_path / "work")))
+    converter.convert_one = fail
+    converter.remote_check = lambda path, duration, area: checks.append((path, duration)) or FakeCheck()
+    converter.verifier = ThreadPoolExecutor(max_workers=1)
+    try:
+        result = converter.convert_safely("성인/2024/a.mp4", 0, 1, 100).result()
+    finally:
+        converter.verifier.shutdown()
+    assert result["ok"]
+    # 이어하기에서도 업로드된 HLS를 검증한 뒤에만 원본 삭제
+    assert checks == [("성인/2024/a.mp4", 40.0)]
+    assert deleted == ["성인/2024/a.mp4"]
+    done = journal.completed("convert", "성인/2024/a.mp4", "100")
+    assert "verified" in done and "original-deleted" in done
+    # 원본 크기가 다르면(다른 파일로 바뀜) 처음부터 다시
+    converter.convert_one = lambda *args: "download"
+    assert not converter.convert_safely("성인/2024/a.mp4", 0, 1, 200).result()["ok"]
+
+
+def test_converter_keeps_source_when_verify_fails(tmp_path, monkeypatch):
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    journal.mark("convert", "성인/2024/a.mp4", "hls-uploaded", "100", segments=4)
+    deleted = []
+    monkeypatch.setattr(jbch_core, "delete_file", lambda path: deleted.append(path) or True)
+    converter = jbch_core.HLSConverter(sync_kv=False, journal=journal, workspace=Workspace(str(tmp_path / "work")))
+    converter.remote_check = lambda path, duration, area: FakeCheck(["segment_003.ts: 크기 불일치"])
+    converter.verifier = ThreadPoolExecutor(max_workers=1)
+    try:
+        result = converter.convert_safely("성인/2024/a.mp4", 0, 1, 100).result()
+    finally:
+        converter.verifier.shutdown()
+    assert not result["ok"]
+    assert result["error"] == "segment_003.ts: 크기 불일치"
+    assert deleted == []
+    # 다음 실행에서는 처음부터 다시 변환
+    assert journal.completed("convert", "성인/2024/a.mp4", "100") == {}
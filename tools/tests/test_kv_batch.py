@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""kv_client: KVBatch 묶음 등록(개수/시간 기준, 실패 시 다시 시도), keep-alive 연결 재사용"""
+
+import json
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import kv_client
+from kv_client import FilesApiConnection, KVBatch, file_record
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """post_files_api 대신 요청을 기록하고 응답 목록을 차례로 돌려줌 (비면 성공)"""
+    calls = []
+    responses = []
+
+    def post(payload, timeout=10, user_agent=None):
+        calls.append(payload)
+        response = responses.pop(0) if responses else {"success": True, "version": 9}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(kv_client, "post_files_api", post)
+    monkeypatch.setattr(kv_client, "_last_version", None)
+    return calls, responses
+
+
+def records(n):
+    return [file_record(f"2025/{i}.mp4", i + 1) for i in range(n)]
+
+
+def test_batch_sends_when_full(api):
+    calls, _ = api
+    registered = []
+    batch = KVBatch(size=3, max_wait=60)
+    for record in records(5):
+        batch.add(record, lambda path=record["path"]: registered.append(path))
+    assert len(calls) == 1
+    assert calls[0]["action"] == "add"
+    assert [r["path"] for r in calls[0]["files"]] == ["2025/0.mp4", "2025/1.mp4", "2025/2.mp4"]
+    assert registered == ["2025/0.mp4", "2025/1.mp4", "2025/2.mp4"]
+    assert len(batch) == 2
+    # 작업 끝에 남은 것 등록
+    assert batch.flush()
+    assert len(calls) == 2 and len(calls[1]["files"]) == 2
+    assert len(batch) == 0
+    assert kv_client._last_version == 9
+
+
+def test_batch_sends_after_max_wait(api, monkeypatch):
+    calls, _ = api
+    clock = Clock()
+    monkeypatch.setattr(kv_client, "time", clock)
+    batch = KVBatch(size=50, max_wait=60)
+    first, second = records(2)
+    batch.add(first)
+    clock.now += 30
+    assert calls == []
+    clock.now += 31
+    batch.add(second)
+    assert [len(call["files"]) for call in calls] == [2]
+
+
+def test_failed_batch_kept_for_retry(api):
+    calls, responses = api
+    registered = []
+    responses.extend([OSError("connection reset"), {"success": False, "error": "kv"}])
+    batch = KVBatch(size=50)
+    for record in records(2):
+        batch.add(record, lambda path=record["path"]: registered.append(path))
+    assert not batch.flush()
+    assert not batch.flush()
+    # 실패한 항목은 작업 기록(kv-registered)에 남기지 않고 다음에 다시 보냄
+    assert registered == []
+    assert len(batch) == 2
+    assert batch.flush()
+    assert registered == ["2025/0.mp4", "2025/1.mp4"]
+    assert [len(call["files"]) for call in calls] == [2, 2, 2]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """HTTP/1.1 keep-alive 테스트 서버 (연결 수와 요청 본문 기록)"""
+    state = {"connections": 0, "bodies": [], "status": 200, "close": False}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            state["connections"] += 1
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["bodies"].append(body)
+            data = json.dumps({"success": state["status"] == 200, "version": len(state["bodies"])}).encode()
+            self.send_response(state["status"])
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if state["close"]:
+                self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(kv_client, "API_BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}")
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connection_reused_between_requests(server):
+    connection = FilesApiConnection()
+    try:
+        assert connection.post({"action": "add", "files": []}) == {"success": True, "version": 1}
+        assert connection.post({"action": "sync"})["version"] == 2
+        assert server["connections"] == 1
+        assert server["bodies"][1] == {"action": "sync"}
+        # 서버가 닫겠다고 한 연결은 버리고 다음 요청에서 새로 연결
+        server["close"] = True
+        connection.post({"action": "sync"})
+        server["close"] = False
+        connection.post({"action": "sync"})
+        assert server["connections"] == 2
+    finally:
+        connection.close()
+
+
+def test_connection_http_error_raised(server):
+    server["status"] = 409
+    connection = FilesApiConnection()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            connection.post({"action": "delta"})
+        assert error.value.code == 409
+        assert json.loads(error.value.read())["version"] == 1
+    finally:
+        connection.close()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""kv_client: KVDelta 변경 합치기, 버전 충돌(409) 재시도, 전체 동기화로 대신하기"""
+
+import io
+import json
+import urllib.error
+
+import pytest
+
+import kv_client
+from kv_client import KVDelta, file_record, send_kv_delta, sync_kv_changes
+
+
+def conflict(version):
+    body = io.BytesIO(json.dumps({"version": version}).encode('utf-8'))
+    return urllib.error.HTTPError("http://test/api/videos/files", 409, "Conflict", {}, body)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """post_files_api 대신 응답 목록을 차례로 돌려주고 요청을 기록"""
+    calls = []
+    responses = []
+
+    def post(payload, timeout=10, user_agent=None):
+        calls.append(payload)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(kv_client, "post_files_api", post)
+    monkeypatch.setattr(kv_client, "_last_version", 7)
+    return calls, responses
+
+
+def test_delta_keeps_last_change_per_path():
+    delta = KVDelta()
+    delta.add(file_record("2025/a.mp4", 10))
+    delta.update({"path": "2025/a.mp4", "hls": "2025/hls/a/playlist.m3u8"})
+    delta.update({"path": "2025/b.mp4", "duration": 60})
+    delta.update({"path": "2025/b.mp4", "codec": "hevc"})
+    delta.add(file_record("2025/c.mp4"))
+    delta.remove("2025/c.mp4")
+    assert len(delta) == 3
+    payload = delta.to_payload(base_version=3)
+    assert payload["action"] == "delta"
+    assert payload["baseVersion"] == 3
+    # 추가 후 갱신은 추가 항목에 합침
+    assert payload["add"] == [{"path": "2025/a.mp4", "name": "a.mp4", "size": 10, "category": "2025",
+                               "hls": "2025/hls/a/playlist.m3u8"}]
+    assert payload["update"] == [{"path": "2025/b.mp4", "duration": 60, "codec": "hevc"}]
+    assert payload["remove"] == ["2025/c.mp4"]
+    # 삭제 후 다시 추가하면 삭제는 취소
+    delta.add(file_record("2025/c.mp4"))
+    assert delta.to_payload()["remove"] == []
+    assert "baseVersion" not in delta.to_payload()
+
+
+def test_send_delta_uses_last_version(api):
+    calls, responses = api
+    responses.append({"success": True, "version": 8})
+    delta = KVDelta()
+    delta.remove("2025/a.mp4")
+    assert send_kv_delta(delta)["version"] == 8
+    assert calls[0]["baseVersion"] == 7
+    assert kv_client._last_version == 8
+
+
+def test_send_delta_retries_once_on_conflict(api):
+    calls, responses = api
+    responses += [conflict(12), {"success": True, "version": 13}]
+    delta = KVDelta()
+    delta.add(file_record("2025/a.mp4"))
+    assert send_kv_delta(delta)["success"]
+    assert [call["baseVersion"] for call in calls] == [7, 12]
+    assert calls[0]["add"] == calls[1]["add"]
+    assert kv_client._last_version == 13
+
+
+def test_send_delta_gives_up_after_second_conflict(api):
+    calls, responses = api
+    responses += [conflict(12), conflict(14)]
+    delta = KVDelta()
+    delta.remove("2025/a.mp4")
+    with pytest.raises(urllib.error.HTTPError) as e:
+        send_kv_delta(delta)
+    assert e.value.code == 409
+    assert len(calls) == 2
+
+
+def test_sync_changes_falls_back_to_full_sync(api):
+    calls, responses = api
+    responses += [urllib.error.HTTPError("http://test", 500, "Error", {}, io.BytesIO(b"")),
+                  {"success": True, "count": 42, "version": 20}]
+    logs = []
+    delta = KVDelta()
+    delta.remove("2025/a.mp4")
+    assert sync_kv_changes(delta, log=logs.append)
+    assert [call["action"] for call in calls] == ["delta", "sync"]
+    assert kv_client._last_version == 20
+    assert "42" in logs[-1]
+
+
+def test_sync_changes_skips_empty_delta(api):
+    calls, _ = api
+    assert sync_kv_changes(KVDelta())
+    assert calls == []
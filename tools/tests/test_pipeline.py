@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""pipeline.Pipeline: 단계 통과, 실패 처리, 종료(모든 워커 정리), backpressure"""
+
+import threading
+import time
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+def pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+
+def test_items_pass_all_stages_and_workers_exit():
+    done = []
+    pipeline = Pipeline([
+        Stage("double", lambda item: item.append(item[0] * 2), workers=3),
+        Stage("record", lambda item: None, workers=2),
+    ], on_done=done.append)
+    items = [[n] for n in range(20)]
+    completed, failed = pipeline.run(items)
+    assert failed == []
+    assert sorted(item[0] for item in completed) == list(range(20))
+    assert all(item == [item[0], item[0] * 2] for item in completed)
+    assert len(done) == 20
+    # 종료 신호가 모든 단계 워커에 전달되어 스레드가 남지 않음
+    assert pipeline_threads() == []
+
+
+def test_failures_stop_at_their_stage():
+    seen = []
+    errors = []
+
+    def check(n):
+        if n == 3:
+            return False
+        if n == 5:
+            raise RuntimeError("boom")
+
+    pipeline = Pipeline([
+        Stage("check", check, workers=2),
+        Stage("after", seen.append),
+    ], on_error=lambda item, stage, error: errors.append((item, stage)))
+    completed, failed = pipeline.run(range(8))
+    assert sorted(completed) == [0, 1, 2, 4, 6, 7]
+    assert sorted(seen) == [0, 1, 2, 4, 6, 7]
+    failed = sorted(failed, key=lambda f: f[0])
+    assert [(item, stage) for item, stage, _ in failed] == [(3, "check"), (5, "check")]
+    assert failed[0][2] is None
+    assert isinstance(failed[1][2], RuntimeError)
+    assert sorted(errors) == [(3, "check"), (5, "check")]
+    assert pipeline_threads() == []
+
+
+def test_callback_errors_do_not_stop_pipeline():
+    def broken(*args):
+        raise ValueError("callback")
+
+    pipeline = Pipeline([Stage("fail-odd", lambda n: n % 2 == 0)], on_error=broken, on_done=broken)
+    completed, failed = pipeline.run(range(6))
+    assert sorted(completed) == [0, 2, 4]
+    assert sorted(item for item, _, _ in failed) == [1, 3, 5]
+
+
+def test_bounded_queues_apply_backpressure():
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def produce(n):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+
+    def consume(n):
+        time.sleep(0.01)
+        with lock:
+            state["in_flight"] -= 1
+
+    pipeline = Pipeline([Stage("fast", produce), Stage("slow", consume, queue_size=1)])
+    completed, failed = pipeline.run(range(15))
+    assert len(completed) == 15
+    # 느린 단계 큐(1) + 처리 중(1) + 넣으려고 대기 중인 빠른 단계 항목(1)
+    assert state["peak"] <= 3
+
+
+def test_empty_stages_rejected():
+    with pytest.raises(ValueError):
+        Pipeline([])
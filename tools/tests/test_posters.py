@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""포스터 후보/점수와 스프라이트 배치/WebVTT"""
+
+import os
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+import jbch_core
+from posters import (
+    SPRITE_COLUMNS, SPRITE_INTERVAL, SPRITE_MAX_TILES, SPRITE_TILE_HEIGHT, SPRITE_TILE_WIDTH,
+    candidate_times, frame_score, make_poster, make_sprite, sprite_layout, vtt_timestamp, write_vtt,
+)
+from workspace import Workspace
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+
+
+def test_candidate_times():
+    assert candidate_times(None) == [1.0]
+    assert candidate_times(1.5) == [0.75]
+    times = candidate_times(100.0)
+    assert times == sorted(times)
+    assert all(1.0 <= t < 100.0 for t in times)
+    # 짧은 영상은 같은 지점(1초)이 한 번만
+    assert candidate_times(4.0) == [1.0, 1.2, 2.0, 2.8]
+
+
+def test_frame_score_penalizes_dark_and_flat_frames():
+    flat = bytes([128] * 2304)
+    dark_noise = bytes(i % 20 for i in range(2304))
+    busy = bytes(i % 256 for i in range(2304))
+    assert frame_score(b"") is None
+    assert frame_score(flat) == 0
+    assert frame_score(busy) > frame_score(dark_noise) > 0
+
+
+def test_sprite_layout_short_and_long():
+    # 짧은 영상: SPRITE_INTERVAL초마다, 한 줄
+    assert sprite_layout(35.0) == (SPRITE_INTERVAL, 4, 1)
+    # 긴 영상: 타일 수는 SPRITE_MAX_TILES 이하로 간격을 늘림
+    interval, columns, rows = sprite_layout(3 * 3600.0)
+    assert interval == 3 * 3600.0 / SPRITE_MAX_TILES
+    assert columns == SPRITE_COLUMNS
+    assert columns * rows == SPRITE_MAX_TILES
+
+
+def test_vtt_timestamp():
+    assert vtt_timestamp(0) == "00:00:00.000"
+    assert vtt_timestamp(3723.4567) == "01:02:03.457"
+
+
+def test_write_vtt_cues(tmp_path):
+    vtt = tmp_path / "a.vtt"
+    write_vtt(str(vtt), "a.sprite.jpg", [0.0, 10.0, 20.0], 25.0, columns=2)
+    lines = vtt.read_text(encoding="utf-8").split("\n")
+    assert lines[0] == "WEBVTT"
+    assert "00:00:00.000 --> 00:00:10.000" in lines
+    # 마지막 큐는 영상 끝까지, 타일 위치는 열 수 기준
+    assert "00:00:20.000 --> 00:00:25.000" in lines
+    assert f"a.sprite.jpg#xywh=0,{SPRITE_TILE_HEIGHT},{SPRITE_TILE_WIDTH},{SPRITE_TILE_HEIGHT}" in lines
+    assert f"a.sprite.jpg#xywh={SPRITE_TILE_WIDTH},0,{SPRITE_TILE_WIDTH},{SPRITE_TILE_HEIGHT}" in lines
+
+
+def test_write_vtt_skips_empty_cues(tmp_path):
+    vtt = tmp_path / "a.vtt"
+    write_vtt(str(vtt), "s.jpg", [0.0, 10.0, 10.0], 10.0, columns=10)
+    assert vtt.read_text(encoding="utf-8").count("-->") == 1
+
+
+def make_video(path, filter_graph, seconds):
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", filter_graph,
+        "-t", str(seconds), "-c:v", "mpeg4", "-q:v", "5", "-g", "25", str(path),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+
+
+@needs_ffmpeg
+def test_make_poster_skips_black_frames(tmp_path):
+    source = tmp_path / "설교, 1부.mp4"
+    # 앞 11초는 검은 화면, 그 뒤는 테스트 패턴
+    make_video(source, "color=black:size=320x180:rate=25:duration=11[a];"
+                       "testsrc=size=320x180:rate=25:duration=9[b];[a][b]concat=n=2", 20)
+    poster = tmp_path / "poster.jpg"
+    chosen = make_poster(str(source), str(poster), duration=20.0)
+    assert chosen in candidate_times(20.0)
+    assert chosen > 11
+    assert poster.read_bytes()[:2] == b"\xff\xd8"
+    # 후보 임시 파일은 남기지 않음
+    assert sorted(os.listdir(tmp_path)) == ["poster.jpg", "설교, 1부.mp4"]
+
+
+@needs_ffmpeg
+def test_make_poster_missing_input(tmp_path):
+    assert make_poster(str(tmp_path / "없음.mp4"), str(tmp_path / "poster.jpg"), duration=10.0) is None
+    assert os.listdir(tmp_path) == []
+
+
+@needs_ffmpeg
+def test_make_sprite_and_vtt(tmp_path):
+    source = tmp_path / "a.mp4"
+    make_video(source, "testsrc=size=320x240:rate=25", 35)
+    sprite = tmp_path / "a.sprite.jpg"
+    vtt = tmp_path / "a.vtt"
+    assert make_sprite(str(source), str(sprite), str(vtt), 35.0, sprite_name="a.mp4.sprite.jpg")
+    assert sprite.read_bytes()[:2] == b"\xff\xd8"
+    text = vtt.read_text(encoding="utf-8")
+    assert text.count("-->") == 4
+    assert text.splitlines()[2] == "00:00:00.000 --> 00:00:10.000"
+    assert f"a.mp4.sprite.jpg#xywh={3 * SPRITE_TILE_WIDTH},0,{SPRITE_TILE_WIDTH},{SPRITE_TILE_HEIGHT}" in text
+    assert "--> 00:00:35.000" in text
+    # 길이를 모르면 만들지 않음
+    assert not make_sprite(str(source), str(sprite), str(vtt), None)
+
+
+def test_sprites_and_cleanup_run_without_thumbnail(tmp_path, monkeypatch):
+    """--no-thumbnail --sprites: 포스터는 건너뛰고 스프라이트 업로드와 한 번 디코딩 결과물 정리는 실행"""
+    poster = tmp_path / "poster.jpg"
+    poster.write_bytes(b"jpeg")
+    fanout_dir = tmp_path / "fanout"
+    fanout_dir.mkdir()
+    item = SimpleNamespace(upload_path="2025/주일", filename="a.mp4", file_path=str(tmp_path / "a.mp4"),
+                           done={}, poster_path=str(poster), fanout_dir=str(fanout_dir))
+    monkeypatch.setattr(jbch_core, "probe", lambda path: SimpleNamespace(duration=35.0))
+    monkeypatch.setattr(jbch_core, "make_poster", lambda *args, **kwargs: pytest.fail("썸네일 생성"))
+    uploader = jbch_core.Uploader(thumbnail=False, sprites=True, workspace=Workspace(str(tmp_path / "work")))
+    sprites = []
+    uploader.upload_sprite = lambda item, mp4_key, duration: sprites.append((mp4_key, duration))
+    uploader.stage_thumbnail(item)
+    assert sprites == [("2025/주일/a.mp4", 35.0)]
+    assert not poster.exists() and item.poster_path is None
+    assert not fanout_dir.exists()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""probe: ffprobe JSON 요약, (경로, 크기, 수정 시각) 캐시"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import probe
+from probe import MediaInfo, ProbeCache
+
+FFPROBE_JSON = {
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "H264", "width": 1920, "height": 1080,
+         "bit_rate": "4000000", "avg_frame_rate": "30000/1001", "pix_fmt": "yuv420p"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "3600.5", "bit_rate": "4128000", "size": "1857600000"},
+    "packets": [
+        {"stream_index": 0, "pts_time": "0.000", "flags": "K__"},
+        {"stream_index": 1, "pts_time": "0.010", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "1.001", "flags": "___"},
+        {"stream_index": 0, "pts_time": "2.002", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "4.004", "flags": "K_"},
+    ],
+}
+
+
+def test_from_ffprobe():
+    info = MediaInfo.from_ffprobe(FFPROBE_JSON)
+    assert info.codec == "h264"
+    assert (info.width, info.height) == (1920, 1080)
+    assert info.duration == 3600.5
+    assert (info.bit_rate, info.video_bit_rate) == (4128000, 4000000)
+    assert info.fps == pytest.approx(29.97, abs=0.01)
+    assert info.audio_codec == "aac"
+    # 비디오 스트림 키프레임만 (0, 2.002, 4.004)
+    assert info.keyframe_interval == 2.002
+    assert info.size == 1857600000
+    assert MediaInfo.from_ffprobe(FFPROBE_JSON, size=5).size == 5
+
+
+def test_from_ffprobe_missing_fields():
+    info = MediaInfo.from_ffprobe({"streams": [{"codec_type": "video", "avg_frame_rate": "0/0"}]})
+    assert info.codec == "unknown"
+    assert info.duration is None and info.fps is None and info.keyframe_interval is None
+    assert MediaInfo(**info.to_dict()).to_dict() == info.to_dict()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def run_ffprobe(path):
+        calls.append(path)
+        return None if "broken" in os.path.basename(path) else FFPROBE_JSON
+
+    monkeypatch.setattr(probe, "run_ffprobe", run_ffprobe)
+    return calls
+
+
+def test_cache_runs_ffprobe_once_per_file_version(tmp_path, calls):
+    video = tmp_path / "설교, 1부.mp4"
+    video.write_bytes(b"video")
+    db = str(tmp_path / "probe.sqlite")
+    cache = ProbeCache(db)
+    assert cache.probe(str(video)).codec == "h264"
+    assert cache.probe(str(video)) is cache.probe(str(video))
+    cache.close()
+    # 다시 실행해도 (새 캐시 객체) SQLite에 남은 결과 사용
+    cache = ProbeCache(db)
+    assert cache.probe(str(video)).duration == 3600.5
+    assert len(calls) == 1
+    # 크기/수정 시각이 바뀌면 다시 조회
+    video.write_bytes(b"edited video")
+    assert cache.probe(str(video)).size == len(b"edited video")
+    assert len(calls) == 2
+    cache.close()
+
+
+def test_cache_does_not_store_failures(tmp_path, calls):
+    broken = tmp_path / "broken.mp4"
+    broken.write_bytes(b"x")
+    cache = ProbeCache(str(tmp_path / "probe.sqlite"))
+    assert cache.probe(str(broken)) is None
+    assert cache.probe(str(broken)) is None
+    assert len(calls) == 2
+    assert cache.probe(str(tmp_path / "없음.mp4")) is None
+    assert len(calls) == 2
+    cache.close()
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="ffmpeg/ffprobe 필요")
+def test_real_ffprobe(tmp_path):
+    video = tmp_path / "sample.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=size=320x240:rate=25:duration=3",
+                    "-c:v", "libx264", "-g", "25", "-pix_fmt", "yuv420p", str(video)], check=True)
+    info = ProbeCache(str(tmp_path / "probe.sqlite")).probe(str(video))
+    assert info.codec == "h264"
+    assert (info.width, info.height) == (320, 240)
+    assert info.duration == pytest.approx(3, abs=0.1)
+    assert info.keyframe_interval == pytest.approx(1, abs=0.01)
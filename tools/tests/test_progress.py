@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""progress: ffmpeg -progress / rclone 통계 파싱, stderr 끝부분만 보관, 단계별 처리량"""
+
+import os
+import shutil
+import sys
+import textwrap
+
+import pytest
+
+import progress
+from progress import (FfmpegProgress, StageStats, TransferProgress, format_progress, parse_speed,
+                      run_ffmpeg, run_rclone)
+
+needs_posix = pytest.mark.skipif(sys.platform == "win32", reason="가짜 실행 파일은 POSIX 전용")
+
+
+def fake_tool(tmp_path, name, body):
+    """인자를 args.txt에 기록하고 body를 실행하는 가짜 명령"""
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\n" + textwrap.dedent(f"""
+        import sys
+        open({str(tmp_path / 'args.txt')!r}, 'w').write('\\n'.join(sys.argv[1:]))
+    """) + textwrap.dedent(body))
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_parse_speed():
+    assert parse_speed("1.23x") == 1.23
+    assert parse_speed(" 0.5x") == 0.5
+    assert parse_speed("N/A") is None
+    assert parse_speed(None) is None
+
+
+def test_ffmpeg_progress_eta():
+    half = FfmpegProgress(frame=750, fps=50, out_seconds=30, total_size=3_000_000, speed=2.0,
+                          elapsed=15, duration=60)
+    assert half.percent == 50
+    assert half.eta == 15
+    assert half.bytes_per_sec == 200_000
+    # 속도 배수가 없으면 지금까지 걸린 시간 비율로
+    assert FfmpegProgress(out_seconds=20, elapsed=10, duration=60).eta == 20
+    assert FfmpegProgress(out_seconds=20, elapsed=10).percent is None
+    done = FfmpegProgress(out_seconds=59.9, duration=60, done=True)
+    assert (done.percent, done.eta) == (100.0, 0.0)
+    assert format_progress(half.to_dict()) == "50% · 2.0x · 50fps · 남은 0:15"
+
+
+def test_transfer_progress():
+    p = TransferProgress(transferred=25, total=100, elapsed=5)
+    assert (p.percent, p.bytes_per_sec, p.eta) == (25, 5, 15)
+    assert TransferProgress(transferred=25, elapsed=5, speed=10).eta is None
+    assert format_progress({"percent": 25.0, "bytes_per_sec": 2 * 1024 ** 2, "eta": 75}) == "25% · 2.0MB/s · 남은 1:15"
+
+
+def test_stage_stats_summary():
+    stats = StageStats()
+    stats.record("compress", FfmpegProgress(frame=3000, out_seconds=120, total_size=0, elapsed=60, done=True))
+    stats.record("compress", FfmpegProgress(frame=1000, out_seconds=40, total_size=0, elapsed=20, done=True))
+    stats.record("download", TransferProgress(transferred=80 * 1024 ** 2, elapsed=10, done=True))
+    data = stats.to_dict()
+    assert data["compress"] == {"count": 2, "seconds": 80.0, "speed": 2.0, "fps": 50.0, "bytes_per_sec": 0}
+    assert data["download"]["bytes_per_sec"] == 8 * 1024 ** 2
+    assert stats.summary_lines() == ["  ⏱️ compress: 2건, 80초, 2.00x, 50fps", "  ⏱️ download: 1건, 10초, 8.0MB/s"]
+
+
+@needs_posix
+def test_run_ffmpeg_parses_blocks_and_keeps_stderr_tail(tmp_path):
+    ffmpeg = fake_tool(tmp_path, "ffmpeg", """
+        for n in range(3000):
+            sys.stderr.write(f"frame noise {n}\\n")
+        sys.stderr.write("마지막 오류\\n")
+        print("frame=100\\nfps=25.0\\nout_time_us=4000000\\ntotal_size=1000\\nspeed=2.00x\\nprogress=continue")
+        print("frame=250\\nfps=25.0\\nout_time_us=10000000\\ntotal_size=5000\\nspeed=N/A\\nprogress=end")
+        sys.exit(3)
+    """)
+    seen = []
+    result = run_ffmpeg([ffmpeg, "-i", "in.mp4", "out.mp4"], on_progress=seen.append, duration=10)
+    args = (tmp_path / "args.txt").read_text().split("\n")
+    assert args == ["-progress", "pipe:1", "-nostats", "-i", "in.mp4", "out.mp4"]
+    assert [p.done for p in seen] == [False, True]
+    assert (seen[0].frame, seen[0].out_seconds, seen[0].speed, seen[0].percent) == (100, 4.0, 2.0, 40.0)
+    assert (seen[1].total_size, seen[1].speed) == (5000, None)
+    assert result.progress is seen[-1]
+    assert result.returncode == 3
+    # stderr는 끝부분만
+    assert len(result.stderr) <= progress.STDERR_TAIL_BYTES
+    assert b"frame noise 0\n" not in result.stderr
+    assert result.stderr.decode("utf-8").endswith("마지막 오류\n")
+
+
+@needs_posix
+def test_run_rclone_reads_json_stats(tmp_path):
+    rclone = fake_tool(tmp_path, "rclone", """
+        import json
+        for done in (10, 60):
+            stats = {"bytes": done, "totalBytes": 100, "speed": 50.0}
+            sys.stderr.write(json.dumps({"level": "notice", "msg": "", "stats": stats}) + "\\n")
+        sys.stderr.write("일반 로그\\n")
+    """)
+    seen = []
+    result = run_rclone([rclone, "copyto", "a", "b"], on_progress=seen.append)
+    args = (tmp_path / "args.txt").read_text().split("\n")
+    assert args[:3] == ["copyto", "a", "b"] and "--use-json-log" in args
+    assert [(p.transferred, p.total, p.done) for p in seen] == [(10, 100, False), (60, 100, False), (100, 100, True)]
+    assert seen[1].eta == 0.8
+    assert result.returncode == 0
+    # 통계 줄은 stderr에 남기지 않음
+    assert result.stderr == "일반 로그\n".encode("utf-8")
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+def test_run_ffmpeg_real(tmp_path):
+    out = tmp_path / "out.mp4"
+    seen = []
+    result = run_ffmpeg(["ffmpeg", "-y", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=25",
+                         "-t", "3", "-c:v", "mpeg4", str(out)], on_progress=seen.append, duration=3)
+    assert result.returncode == 0
+    assert os.path.getsize(out) > 0
+    assert seen and seen[-1].done
+    assert seen[-1].frame == 75
+    assert abs(seen[-1].out_seconds - 3) < 0.2
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Uploader.reuse_duplicate: 원본이 확실히 없을 때만 색인에서 지움"""
+
+import pytest
+
+import jbch_core
+from dedupe import ContentIndex
+from jbch_core import UploadItem, Uploader
+from storage import ObjectInfo, StorageError
+from workspace import Workspace
+
+HASH = "abc123"
+OLD_KEY = "2024/주일/old.mp4"
+
+
+class FailingCopyStorage:
+    """서버 측 복사는 항상 실패, head는 주어진 결과(ObjectInfo/None/예외)"""
+
+    def __init__(self, head_result):
+        self.head_result = head_result
+
+    def copy(self, src, dst):
+        return False
+
+    def head(self, key):
+        if isinstance(self.head_result, Exception):
+            raise self.head_result
+        return self.head_result
+
+
+def reuse(tmp_path, monkeypatch, head_result):
+    monkeypatch.setattr(jbch_core, "get_storage", lambda: FailingCopyStorage(head_result))
+    index = ContentIndex(str(tmp_path / "index.sqlite"), str(tmp_path / "cache"))
+    index.add_remote(HASH, OLD_KEY)
+    uploader = Uploader(dedupe=index, workspace=Workspace(str(tmp_path / "work")), emit=lambda *a, **k: None)
+    item = UploadItem(0, 1, str(tmp_path / "new.mp4"), "2025/주일")
+    item.content_hash = HASH
+    reused = uploader.reuse_duplicate(item)
+    return reused, [remote["mp4_key"] for remote in index.lookup(HASH)["remotes"]]
+
+
+def test_forgets_remote_only_when_missing(tmp_path, monkeypatch):
+    assert reuse(tmp_path, monkeypatch, None) == (False, [])
+
+
+@pytest.mark.parametrize("head_result", [
+    StorageError("HEAD: HTTP 503", 503),
+    StorageError("HEAD: 연결 실패"),
+    ObjectInfo(OLD_KEY, 100),
+])
+def test_keeps_remote_when_not_definitely_missing(tmp_path, monkeypatch, head_result):
+    assert reuse(tmp_path, monkeypatch, head_result) == (False, [OLD_KEY])
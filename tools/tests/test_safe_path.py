@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""safe_path: 특수문자 입력 경로를 링크로 바꿔 ffmpeg/ffprobe 실행 (복사 없음, 끝나면 정리)"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import safe_path
+from progress import run_ffmpeg
+from safe_path import SafeInput, link_file, needs_safe_path, safe_command, safe_extension
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "설교, 1부 (주일).mp4"
+    path.write_bytes(b"video")
+    return str(path)
+
+
+def test_needs_safe_path(tmp_path, video):
+    assert needs_safe_path(video)
+    plain = tmp_path / "설교 1부.mp4"
+    plain.write_bytes(b"video")
+    assert not needs_safe_path(str(plain))
+    # 없는 파일, URL, pipe: 는 그대로
+    assert not needs_safe_path(str(tmp_path / "a,b.mp4"))
+    assert not needs_safe_path("https://example.com/a,b.mp4")
+    assert not needs_safe_path("pipe:0")
+    # 폴더 이름의 쉼표는 상관없음
+    folder = tmp_path / "2024,주일"
+    folder.mkdir()
+    (folder / "a.mp4").write_bytes(b"video")
+    assert not needs_safe_path(str(folder / "a.mp4"))
+
+
+def test_safe_extension():
+    assert safe_extension("a, b.mp4") == ".mp4"
+    assert safe_extension("a.m,p4") == ""
+    assert safe_extension("a") == ""
+
+
+def test_link_file_hard_link_replaces_stale(tmp_path, video):
+    dest = tmp_path / "link.mp4"
+    dest.write_bytes(b"old")
+    assert link_file(video, str(dest))
+    assert os.path.samefile(video, dest)
+    # 이미 같은 파일이면 그대로
+    assert link_file(video, str(dest))
+
+
+def test_link_file_symlink_fallback(tmp_path, video, monkeypatch):
+    def no_hard_link(src, dest):
+        raise OSError("다른 디스크")
+    monkeypatch.setattr(os, "link", no_hard_link)
+    dest = tmp_path / "link.mp4"
+    assert link_file(video, str(dest))
+    assert os.path.islink(dest)
+    assert dest.read_bytes() == b"video"
+
+
+def test_safe_input_links_in_dir_and_cleans_up(tmp_path, video):
+    link_dir = tmp_path / "area"
+    link_dir.mkdir()
+    with SafeInput(video, str(link_dir)) as path:
+        assert os.path.dirname(path) == str(link_dir)
+        assert path.endswith(".mp4") and not needs_safe_path(path)
+        assert open(path, "rb").read() == b"video"
+    assert os.listdir(link_dir) == []
+    assert os.path.exists(video)
+
+
+@pytest.mark.skipif(not os.path.isdir(f"/proc/{os.getpid()}/fd"), reason="/proc 없음")
+def test_safe_input_fd_fallback(tmp_path, video, monkeypatch):
+    monkeypatch.setattr(safe_path, "link_file", lambda src, dest: False)
+    safe = SafeInput(video, str(tmp_path))
+    path = safe.open()
+    assert path.startswith(f"/proc/{os.getpid()}/fd/")
+    assert open(path, "rb").read() == b"video"
+    safe.close()
+    assert safe.fd is None
+
+
+def test_safe_command_rewrites_inputs_only(tmp_path, video):
+    link_dir = tmp_path / "area"
+    link_dir.mkdir()
+    output = str(tmp_path / "out, 2.mp4")
+    cmd = ["ffmpeg", "-y", "-i", video, "-i", "plain.wav", "-c", "copy", output]
+    with safe_command(cmd, str(link_dir)) as safe:
+        assert safe[3] != video and os.path.dirname(safe[3]) == str(link_dir)
+        assert safe[5] == "plain.wav"
+        # 출력 경로는 바꾸지 않음
+        assert safe[-1] == output
+        assert len(os.listdir(link_dir)) == 1
+    assert os.listdir(link_dir) == []
+
+    probe_cmd = ["ffprobe.exe", "-v", "error", "-show_format", video]
+    with safe_command(probe_cmd, str(link_dir)) as safe:
+        assert safe[:-1] == probe_cmd[:-1]
+        assert os.path.samefile(safe[-1], video) and safe[-1] != video
+    assert os.listdir(link_dir) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="가짜 실행 파일은 POSIX 전용")
+def test_run_ffmpeg_passes_linked_input(tmp_path, video):
+    args_file = tmp_path / "args.txt"
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text(f"#!{sys.executable}\n"
+                      "import os, sys\n"
+                      "path = sys.argv[sys.argv.index('-i') + 1]\n"
+                      f"open({str(args_file)!r}, 'w', encoding='utf-8').write(path + '\\n' + open(path).read())\n")
+    ffmpeg.chmod(0o755)
+    link_dir = tmp_path / "area"
+    link_dir.mkdir()
+    result = run_ffmpeg([str(ffmpeg), "-i", video, "out.mp4"], link_dir=str(link_dir))
+    assert result.returncode == 0
+    used, content = args_file.read_text(encoding="utf-8").split("\n")
+    assert os.path.dirname(used) == str(link_dir)
+    assert content == "video"
+    assert os.listdir(link_dir) == []
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+def test_real_ffmpeg_reads_comma_name(tmp_path):
+    source = tmp_path / "설교, 1부; '주일'.mp4"
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=25",
+        "-t", "2", "-c:v", "mpeg4", str(source),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+    output = tmp_path / "out.mp4"
+    result = run_ffmpeg(["ffmpeg", "-y", "-loglevel", "error", "-i", str(source), "-c", "copy", str(output)],
+                        link_dir=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert output.stat().st_size > 0
+    assert sorted(os.listdir(tmp_path)) == sorted(["out.mp4", source.name])
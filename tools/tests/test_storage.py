@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""storage.head: 404/없는 파일만 None, 그 밖의 조회 실패는 StorageError"""
+
+import pytest
+
+from storage import LocalStorage, S3Storage, StorageError
+
+
+def s3_failing(status):
+    storage = S3Storage(account_id="test", access_key="a", secret_key="b", bucket="bucket")
+
+    def request(method, key="", **kwargs):
+        raise StorageError(f"{method} {key}: HTTP {status}", status)
+    storage.request = request
+    return storage
+
+
+def test_s3_head_missing_is_none():
+    assert s3_failing(404).head("a.mp4") is None
+
+
+@pytest.mark.parametrize("status", [403, 500, None])
+def test_s3_head_other_errors_raise(status):
+    with pytest.raises(StorageError):
+        s3_failing(status).head("a.mp4")
+
+
+def test_local_head(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    assert storage.head("없는/파일.mp4") is None
+    (tmp_path / "폴더").mkdir()
+    (tmp_path / "폴더" / "a.mp4").write_bytes(b"1234")
+    assert storage.head("폴더/a.mp4").size == 4
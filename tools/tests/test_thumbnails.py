@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""thumbnails: 썸네일 없는 영상 찾기(목록 한 번), ThumbnailBackfill 생성/업로드, 공개 URL 직접 읽기"""
+
+import functools
+import os
+import shutil
+import subprocess
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import thumbnails
+from storage import LocalStorage, ObjectInfo
+from thumbnails import ThumbnailBackfill, find_missing_thumbnails, is_source_video, thumbnail_key
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg 없음")
+
+
+def test_find_missing_thumbnails():
+    objects = [ObjectInfo(key) for key in [
+        "2025/주일/a.mp4",
+        "thumbnails/2025/주일/a.mp4.jpg",
+        "2025/주일/b.MOV",
+        "2025/주일/hls/b/init.mp4",
+        "2025/주일/hls/b/playlist.m3u8",
+        "thumbnails/old.mp4",
+        "2024/c.mp4",
+        "2024/notes.txt",
+    ]]
+    assert find_missing_thumbnails(objects) == ["2024/c.mp4", "2025/주일/b.MOV"]
+    assert find_missing_thumbnails(objects, ["2025/"]) == ["2025/주일/b.MOV"]
+    assert find_missing_thumbnails(objects, ["2023"]) == []
+    assert thumbnail_key("2024/c.mp4") == "thumbnails/2024/c.mp4.jpg"
+    assert not is_source_video("hls/x/init.mp4")
+
+
+class FakeIndex:
+    def __init__(self, objects):
+        self._objects = objects
+        self.puts = []
+
+    def objects(self):
+        return self._objects
+
+    def record_put(self, key, size, etag=None):
+        self.puts.append(key)
+
+
+def test_backfill_retries_first_frame_and_reports(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path / "bucket"))
+    for name in ("short.mp4", "broken.mp4", "ok.mp4"):
+        (tmp_path / "bucket" / name).write_bytes(b"video")
+    posters = []
+
+    def poster(input_url, poster_path, duration=None, remote=False, times=None):
+        name = os.path.basename(input_url)
+        posters.append((name, duration, times, remote))
+        if name == "broken.mp4" or (name == "short.mp4" and not times):
+            return None
+        with open(poster_path, "wb") as f:
+            f.write(b"jpeg")
+        return (times or [1.0])[0]
+
+    def sprite(input_url, sprite_path, vtt_path, duration, sprite_name=None, remote=False, progress=None):
+        for path in (sprite_path, vtt_path):
+            with open(path, "w") as f:
+                f.write(sprite_name)
+        return True
+
+    monkeypatch.setattr(thumbnails, "make_poster", poster)
+    monkeypatch.setattr(thumbnails, "make_sprite", sprite)
+    monkeypatch.setattr(thumbnails, "source_duration", lambda input_url, remote: 30.0)
+    index = FakeIndex([ObjectInfo(key) for key in ("short.mp4", "broken.mp4", "ok.mp4")])
+    events = []
+    backfill = ThumbnailBackfill(workers=2, storage=storage, index=index, sprites=True, emit=events.append)
+    keys = backfill.find_missing()
+    assert keys == ["broken.mp4", "ok.mp4", "short.mp4"]
+    assert backfill.run(keys) == (2, 1)
+    # 로컬 저장소는 파일 경로를 바로 입력, 후보가 모두 실패하면 처음 프레임으로 다시
+    assert ("short.mp4", 30.0, None, False) in posters
+    assert ("short.mp4", None, [0.0], False) in posters
+    assert sorted(index.puts) == [
+        "thumbnails/ok.mp4.jpg", "thumbnails/ok.mp4.sprite.jpg", "thumbnails/ok.mp4.vtt",
+        "thumbnails/short.mp4.jpg", "thumbnails/short.mp4.sprite.jpg", "thumbnails/short.mp4.vtt",
+    ]
+    assert (tmp_path / "bucket" / "thumbnails" / "ok.mp4.jpg").read_bytes() == b"jpeg"
+    assert (tmp_path / "bucket" / "thumbnails" / "ok.mp4.vtt").read_text() == "ok.mp4.sprite.jpg"
+    failed = [e for e in events if e["event"] == "file" and not e["ok"]]
+    assert [(e["file"], e["stage"]) for e in failed] == [("broken.mp4", "thumbnail")]
+    assert events[-1] == {"event": "summary", "success": 2, "failed": 1}
+
+
+def make_video(path, seconds=3):
+    made = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=25:duration={seconds}",
+        "-c:v", "mpeg4", "-g", "25", "-movflags", "+faststart", str(path),
+    ], capture_output=True)
+    if made.returncode != 0:
+        pytest.skip("테스트 영상 생성 실패")
+
+
+@needs_ffmpeg
+def test_backfill_from_public_url(tmp_path):
+    """공개 URL(한글/공백 이름)을 ffmpeg가 바로 읽어 썸네일 생성"""
+    public = tmp_path / "public" / "2025" / "주일"
+    public.mkdir(parents=True)
+    make_video(public / "설교 1부.mp4")
+    make_video(public / "짧은 영상.mp4", seconds=0.5)
+    requested = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            requested.append(self.path)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(tmp_path / "public")))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        storage = LocalStorage(str(tmp_path / "bucket"))
+        backfill = ThumbnailBackfill(base_url=f"http://127.0.0.1:{httpd.server_address[1]}", storage=storage)
+        assert backfill.run(["2025/주일/설교 1부.mp4", "2025/주일/짧은 영상.mp4"]) == (2, 0)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    for name in ("설교 1부.mp4", "짧은 영상.mp4"):
+        thumb = tmp_path / "bucket" / "thumbnails" / "2025" / "주일" / f"{name}.jpg"
+        assert thumb.read_bytes()[:2] == b"\xff\xd8"
+    assert any("%EC%84%A4%EA%B5%90%201%EB%B6%80.mp4" in path for path in requested)
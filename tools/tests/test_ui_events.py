@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""ui_events.UIEventQueue: 작업 스레드 이벤트를 모아 반영 (갱신 합치기, 호출 순서, 로그 줄 수 제한)"""
+
+import threading
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from ui_events import UIEventQueue  # noqa: E402
+
+
+class FakeRoot:
+    """after()로 예약된 함수만 기록 (Tk 없이 테스트)"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append((ms, func))
+
+
+class FakeText:
+    """Text 위젯 흉내 (insert/delete/index('end-1c')/상태)"""
+
+    def __init__(self):
+        self.content = ""
+        self.state = "disabled"
+        self.states = []
+
+    def configure(self, state):
+        self.state = state
+        self.states.append(state)
+
+    def insert(self, index, text):
+        assert self.state == "normal"
+        self.content += text
+
+    def index(self, index):
+        lines = self.content.split("\n")
+        return f"{len(lines)}.{len(lines[-1])}"
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        self.content = "\n".join(self.content.split("\n")[int(end.split('.')[0]) - 1:])
+
+    def see(self, index):
+        pass
+
+    def lines(self):
+        return self.content.split("\n")[:-1]
+
+
+def test_updates_coalesced_and_calls_ordered():
+    events = UIEventQueue(FakeRoot())
+    applied = []
+    for percent in (10, 20, 30):
+        events.update("progress", applied.append, ("progress", percent))
+    events.update("status", applied.append, ("status", "변환 중"))
+    events.call(applied.append, ("call", 1))
+    events.call(applied.append, ("call", 2))
+    # 메인 루프가 반영하기 전에는 아무것도 실행하지 않음
+    assert applied == []
+    events.drain()
+    assert applied == [("progress", 30), ("status", "변환 중"), ("call", 1), ("call", 2)]
+    events.drain()
+    assert len(applied) == 4
+
+
+def test_log_written_in_one_batch():
+    events = UIEventQueue(FakeRoot())
+    text = FakeText()
+    events.attach_log(text)
+    events.log("첫 줄")
+    events.log("둘째 줄")
+    events.drain()
+    assert text.lines() == ["첫 줄", "둘째 줄"]
+    assert text.states == ["normal", "disabled"]
+
+
+def test_log_keeps_last_lines():
+    events = UIEventQueue(FakeRoot(), max_log_lines=5)
+    text = FakeText()
+    events.attach_log(text)
+    for n in range(3):
+        events.log(f"a{n}")
+    events.drain()
+    for n in range(8):
+        events.log(f"b{n}")
+    events.drain()
+    # 대기열에서 넘친 줄은 생략 표시, 화면은 마지막 5줄만
+    assert text.lines() == ["b3", "b4", "b5", "b6", "b7"]
+
+    events.log("c0")
+    events.drain()
+    assert text.lines() == ["b4", "b5", "b6", "b7", "c0"]
+
+
+def test_log_from_many_lines_before_drain():
+    events = UIEventQueue(FakeRoot(), max_log_lines=3)
+    text = FakeText()
+    events.attach_log(text)
+    for n in range(1000):
+        events.log(f"line {n}")
+    # 반영 전에도 대기열은 최근 줄만 보관
+    assert len(events._lines) == 3
+    events.drain()
+    assert text.lines() == ["line 997", "line 998", "line 999"]
+
+
+def test_tick_reschedules_until_stopped():
+    root = FakeRoot()
+    events = UIEventQueue(root, interval_ms=50)
+    events.start()
+    events.start()
+    assert len(root.scheduled) == 1
+    applied = []
+    events.call(applied.append, "done")
+    ms, tick = root.scheduled.pop()
+    assert ms == 50
+    tick()
+    assert applied == ["done"]
+    assert len(root.scheduled) == 1
+    events.stop()
+    root.scheduled.pop()[1]()
+    assert root.scheduled == []
+
+
+def test_events_from_worker_threads():
+    events = UIEventQueue(FakeRoot())
+    applied = []
+
+    def worker(n):
+        for i in range(100):
+            events.call(applied.append, (n, i))
+            events.update(("progress", n), lambda: None)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    events.drain()
+    assert len(applied) == 400
+    # 스레드별 순서는 유지
+    for n in range(4):
+        assert [i for m, i in applied if m == n] == list(range(100))
+
+
+def test_busy_flag_cleared_with_button_on_main_thread():
+    from types import SimpleNamespace
+
+    from hls_converter import HLSConverterApp
+    from uploader import UploaderApp
+
+    for app_class, finish, flag, button in (
+            (UploaderApp, "finish_uploading", "is_uploading", "upload_btn"),
+            (HLSConverterApp, "finish_converting", "is_converting", "convert_btn")):
+        app = SimpleNamespace(**{flag: True, button: FakeText()})
+        events = UIEventQueue(FakeRoot())
+        events.call(getattr(app_class, finish), app)
+        # 버튼이 다시 켜지기 전에는 작업 중 표시도 그대로 (새 작업 시작 차단)
+        assert getattr(app, flag)
+        events.drain()
+        assert not getattr(app, flag)
+        assert getattr(app, button).state == "normal"
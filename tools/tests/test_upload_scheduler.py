@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""upload_scheduler: AdaptiveLimit(AIMD), 요청 단위 재시도, 플레이리스트는 마지막"""
+
+import threading
+
+import pytest
+
+import upload_scheduler
+from storage import ObjectInfo, Storage, StorageError
+from upload_scheduler import THROUGHPUT_WINDOW, AdaptiveLimit, UploadScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(upload_scheduler, "time", fake)
+    return fake
+
+
+def window(limit, clock, seconds, nbytes=1024 ** 2):
+    """THROUGHPUT_WINDOW개 요청을 seconds초 동안 완료"""
+    for _ in range(THROUGHPUT_WINDOW):
+        clock.now += seconds / THROUGHPUT_WINDOW
+        limit.record(nbytes)
+
+
+def test_adaptive_limit_additive_increase(clock):
+    limit = AdaptiveLimit(initial=4, minimum=1, maximum=6)
+    window(limit, clock, 1.0)
+    assert limit.limit == 5
+    assert limit.throughput == pytest.approx(THROUGHPUT_WINDOW * 1024 ** 2)
+    # 처리량이 유지되면 계속 늘리되 최대값에서 멈춤
+    for _ in range(5):
+        window(limit, clock, 1.0)
+    assert limit.limit == 6
+
+
+def test_adaptive_limit_decrease_on_throughput_drop(clock):
+    limit = AdaptiveLimit(initial=4, minimum=1, maximum=16)
+    window(limit, clock, 1.0)
+    assert limit.limit == 5
+    # 0.9배: 유지도 하락도 아님 → 그대로
+    window(limit, clock, 1.0 / 0.9)
+    assert limit.limit == 5
+    # 절반 → 1 줄이고 기준도 낮춤
+    best = limit.best
+    window(limit, clock, 2.0)
+    assert limit.limit == 4
+    assert limit.best == pytest.approx(best * 0.9)
+
+
+def test_adaptive_limit_multiplicative_decrease_on_error(clock):
+    limit = AdaptiveLimit(initial=9, minimum=2, maximum=16)
+    limit.record(0, ok=False)
+    assert limit.limit == 4
+    limit.record(0, ok=False)
+    limit.record(0, ok=False)
+    assert limit.limit == 2
+    # 오류는 측정 구간도 초기화 (구간이 다시 차야 증가)
+    for _ in range(THROUGHPUT_WINDOW - 1):
+        limit.record(1024)
+    assert limit.limit == 2
+
+
+def test_adaptive_limit_blocks_at_limit():
+    limit = AdaptiveLimit(initial=1, minimum=1, maximum=1)
+    limit.acquire()
+    entered = threading.Event()
+
+    def second():
+        limit.acquire()
+        entered.set()
+        limit.release()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not entered.wait(0.1)
+    limit.release()
+    assert entered.wait(2)
+    thread.join()
+
+
+def test_part_size_follows_measured_throughput(clock):
+    limit = AdaptiveLimit(initial=4, minimum=1, maximum=4)
+    assert limit.part_size() == upload_scheduler.MIN_PART_SIZE
+    # 초당 64MB 합계, 연결 4개 → 연결당 16MB × 10초
+    window(limit, clock, 1.0, nbytes=64 * 1024 ** 2 // THROUGHPUT_WINDOW)
+    assert limit.part_size() == 16 * 1024 ** 2 * upload_scheduler.PART_TARGET_SECONDS
+
+
+class FlakyStorage(Storage):
+    """키별로 정해진 횟수만큼 실패한 뒤 성공 (업로드 순서 기록)"""
+
+    def __init__(self, failures=None, status=503):
+        self.failures = dict(failures or {})
+        self.status = status
+        self.calls = []
+        self.uploaded = []
+        self._lock = threading.Lock()
+
+    def put_file(self, local_path, key):
+        with self._lock:
+            self.calls.append(key)
+            if self.failures.get(key, 0) > 0:
+                self.failures[key] -= 1
+                raise StorageError(f"PUT {key}: HTTP {self.status}", self.status)
+            self.uploaded.append(key)
+        return ObjectInfo(key, 1, '"etag"')
+
+
+def make_hls(tmp_path, segments=5):
+    hls = tmp_path / "hls"
+    hls.mkdir()
+    (hls / "playlist.m3u8").write_text("#EXTM3U\n")
+    for n in range(segments):
+        (hls / f"segment_{n:03d}.ts").write_bytes(b"ts")
+    return str(hls)
+
+
+def test_playlist_uploaded_after_all_segments(tmp_path, clock):
+    storage = FlakyStorage({"v/hls/segment_002.ts": 2})
+    scheduler = UploadScheduler(storage=storage, limit=AdaptiveLimit(initial=4))
+    task = scheduler.add_dir(make_hls(tmp_path), "v/hls")
+    assert scheduler.run()
+    assert task.ok
+    assert len(storage.uploaded) == 6
+    assert storage.uploaded[-1] == "v/hls/playlist.m3u8"
+    # 실패한 세그먼트만 다시 시도 (폴더 전체를 다시 올리지 않음)
+    assert storage.calls.count("v/hls/segment_002.ts") == 3
+    assert storage.calls.count("v/hls/segment_000.ts") == 1
+
+
+def test_failed_segment_keeps_playlist_back(tmp_path, clock):
+    storage = FlakyStorage({"v/hls/segment_001.ts": 100})
+    scheduler = UploadScheduler(storage=storage, limit=AdaptiveLimit(initial=4))
+    task = scheduler.add_dir(make_hls(tmp_path), "v/hls")
+    assert not scheduler.run()
+    # 세그먼트가 빠진 플레이리스트는 올리지 않고 실패로 남김
+    assert sorted(task.failed) == ["v/hls/playlist.m3u8", "v/hls/segment_001.ts"]
+    assert "v/hls/playlist.m3u8" not in storage.calls
+    assert storage.calls.count("v/hls/segment_001.ts") == upload_scheduler.RETRIES
+
+
+def test_upload_now_retries_then_succeeds(tmp_path, clock):
+    path = tmp_path / "segment_000.ts"
+    path.write_bytes(b"ts")
+    storage = FlakyStorage({"k/segment_000.ts": 2})
+    info = UploadScheduler(storage=storage, limit=AdaptiveLimit()).upload_now(str(path), "k/segment_000.ts")
+    assert info.key == "k/segment_000.ts"
+    assert len(storage.calls) == 3
+
+
+def test_upload_now_permanent_error_not_retried(tmp_path, clock):
+    path = tmp_path / "segment_000.ts"
+    path.write_bytes(b"ts")
+    storage = FlakyStorage({"k/segment_000.ts": 100}, status=403)
+    assert UploadScheduler(storage=storage, limit=AdaptiveLimit()).upload_now(str(path), "k/segment_000.ts") is None
+    assert len(storage.calls) == 1
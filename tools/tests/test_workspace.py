@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""workspace.Workspace: 용량 상한, 오래된 폴더 정리, 공간 대기, 재사용, 이름 충돌"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import workspace
+from workspace import LEASE_NAME, Workspace, tree_size
+
+
+@pytest.fixture
+def ws(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace, "WAIT_INTERVAL", 0.05)
+    return Workspace(str(tmp_path / "work"), max_bytes=100)
+
+
+def fill(area, name, size):
+    with open(area.file(name), 'wb') as f:
+        f.write(b"x" * size)
+
+
+def age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_kept_area_is_reused(ws):
+    area = ws.area("hash1", reserve=10)
+    fill(area, "compressed.mp4", 10)
+    area.release(keep=True)
+    again = ws.area("hash1", reserve=10)
+    assert again.path == area.path
+    assert os.path.exists(again.file("compressed.mp4"))
+    again.release()
+    assert not os.path.exists(again.path)
+
+
+def test_failed_with_block_keeps_results(ws):
+    with pytest.raises(RuntimeError):
+        with ws.area("hash1") as area:
+            fill(area, "partial.ts", 5)
+            raise RuntimeError("encode failed")
+    assert os.path.exists(area.file("partial.ts"))
+    assert not os.path.exists(area.file(LEASE_NAME))
+
+
+def test_busy_name_gets_suffix(ws):
+    first = ws.area("hash1")
+    second = ws.area("hash1")
+    assert (first.name, second.name) == ("hash1", "hash1.2")
+    first.release()
+    second.release()
+
+
+def test_over_quota_evicts_oldest_idle(ws):
+    for name, seconds in (("old", 300), ("new", 100)):
+        area = ws.area(name)
+        fill(area, "data", 40)
+        area.release(keep=True)
+        age(area.path, seconds)
+    logs = []
+    ws.log = logs.append
+    area = ws.area("next", reserve=50)
+    # 40 + 40 + 50 > 100 → 가장 오래된 old만 삭제
+    assert sorted(ws.entries()) == ["new", "next"]
+    assert "old" in logs[0]
+    area.release()
+
+
+def test_waits_for_active_area(ws):
+    busy = ws.area("busy", reserve=80)
+    got = threading.Event()
+    result = []
+
+    def second():
+        result.append(ws.area("second", reserve=50))
+        got.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not got.wait(0.3)
+    busy.release()
+    assert got.wait(5)
+    thread.join()
+    result[0].release()
+
+
+def test_reserve_larger_than_quota_proceeds_when_alone(ws):
+    area = ws.area("huge", reserve=1000)
+    assert area.reserve == 1000
+    area.release()
+
+
+def test_active_usage_counts_actual_size(ws):
+    area = ws.area("a", reserve=10)
+    fill(area, "data", 30)
+    # 예약량(10)보다 실제로 쓴 크기(.lease 포함)가 크면 실제 크기로
+    assert ws.usage() == (tree_size(area.path), 0)
+    assert tree_size(area.path) > 30
+    area.release(keep=True)
+    assert ws.usage() == (0, 30)
+
+
+def test_dead_process_lease_is_idle(ws):
+    stale = os.path.join(ws.root, "stale")
+    os.makedirs(stale)
+    with open(os.path.join(stale, LEASE_NAME), 'w', encoding='utf-8') as f:
+        json.dump({"pid": 2 ** 22 + 12345, "reserve": 90}, f)
+    assert ws.read_lease(stale) is None
+    assert ws.free_name("stale") == "stale"
+
+
+def test_gc_removes_long_idle_areas(tmp_path):
+    root = tmp_path / "work"
+    for name in ("old", "recent"):
+        (root / name).mkdir(parents=True)
+        (root / name / "data").write_bytes(b"x")
+    age(str(root / "old"), 10 * 24 * 3600)
+    ws = Workspace(str(root), max_bytes=100)
+    assert ws.entries() == ["recent"]
+
+
+def test_tree_size_skips_links(tmp_path):
+    source = tmp_path / "설교, 1부.mp4"
+    source.write_bytes(b"x" * 50)
+    area = tmp_path / "area"
+    area.mkdir()
+    (area / "out.ts").write_bytes(b"x" * 7)
+    os.link(source, area / "ffinput_1.mp4")
+    os.symlink(source, area / "ffinput_2.mp4")
+    assert tree_size(str(area)) == 7
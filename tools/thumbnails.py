@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+기존 영상 썸네일 일괄 생성 (scripts/generate-thumbnails.ps1 대체)
+- 버킷 목록을 한 번만 조회해 thumbnails/ 아래 썸네일이 없는 영상만 골라냄 (영상마다 존재 확인 안 함)
+- 영상 전체를 내려받지 않고 ffmpeg에 공개 URL을 바로 입력 - 입력 쪽 -ss로 moov 색인을 보고
+  후보 지점(posters.candidate_times)의 키프레임 근처만 HTTP Range로 읽어 가장 좋은 프레임을 고름
+- sprites면 탐색용 스프라이트 시트 + WebVTT도 생성 (이때는 영상 전체를 읽음 - 디코딩은 키프레임만)
+- 여러 영상을 동시에 처리, 만든 썸네일은 바로 업로드
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from jbch_common import VIDEO_EXTENSIONS
+from jbch_core import Job
+from hls_stream import source_url
+from posters import THUMBNAIL_PREFIX, make_poster, make_sprite, sprite_key, thumbnail_key, vtt_key
+from probe import probe, probe_url
+from storage import get_storage
+from workspace import Workspace
+
+# 동시에 처리할 영상 수 (대부분 네트워크 대기라 CPU 코어 수보다 많아도 됨)
+THUMBNAIL_WORKERS = 8
+# 작업 공간 예약량 (동시 처리 영상 수 × 썸네일/스프라이트 몇 MB)
+THUMBS_RESERVE_BYTES = THUMBNAIL_WORKERS * 4 * 1024 ** 2
+
+
+def is_source_video(key):
+    """썸네일 대상 영상인지 (HLS 폴더의 init.mp4 등과 thumbnails/ 제외)"""
+    return (key.lower().endswith(VIDEO_EXTENSIONS)
+            and not key.startswith(THUMBNAIL_PREFIX)
+            and '/hls/' not in f"/{key}")
+
+
+def find_missing_thumbnails(objects, prefixes=None):
+    """버킷 전체 목록(ObjectInfo) 한 번으로 썸네일 없는 영상 키 목록"""
+    keys = {obj.key for obj in objects}
+    prefixes = [p.strip('/') + '/' for p in prefixes or []]
+    return sorted(
+        key for key in keys
+        if is_source_video(key)
+        and thumbnail_key(key) not in keys
+        and (not prefixes or any(key.startswith(p) for p in prefixes))
+    )
+
+
+def source_duration(input_url, remote):
+    """영상 길이 (초, 모르면 None) - 원격 URL은 ffprobe가 moov 색인만 읽음"""
+    info = probe_url(input_url) if remote else probe(input_url)
+    return info.duration if info else None
+
+
+class ThumbnailBackfill(Job):
+    """썸네일 없는 영상들의 썸네일 생성 + 업로드
+
+    입력은 공개 URL(base_url, 기본 R2_PUBLIC_URL). 로컬 폴더 저장소(JBCH_STORAGE=local:)면 파일 경로.
+    index(BucketIndex)를 주면 목록을 색인에서 읽고 업로드한 썸네일을 바로 반영.
+    sprites면 스프라이트 시트(thumbnails/영상 경로.sprite.jpg)와 WebVTT(thumbnails/영상 경로.vtt)도 업로드.
+    임시 파일은 workspace(workspace.Workspace, 기본 STATE_DIR/work) 안에 만듦.
+    """
+
+    def __init__(self, workers=THUMBNAIL_WORKERS, base_url=None, storage=None, index=None, sprites=False,
+                 workspace=None, emit=None):
+        super().__init__(emit)
+        self.workspace = workspace
+        self.workers = workers
+        self.sprites = sprites
+        self.base_url = base_url
+        self.storage = storage or get_storage()
+        self.index = index
+
+    def find_missing(self, prefixes=None):
+        """썸네일 없는 영상 키 목록 (목록 조회 실패 시 None)"""
+        if self.index is not None:
+            objects = self.index.objects()
+        else:
+            objects = self.storage.list_objects("")
+        if objects is None:
+            return None
+        return find_missing_thumbnails(objects, prefixes)
+
+    def input_for(self, key):
+        if self.storage.name == "local" and not self.base_url:
+            return self.storage.path(key), False
+        return source_url(key, self.base_url), True
+
+    def run(self, keys):
+        """(성공 수, 실패 수) 반환"""
+        total = len(keys)
+        self.done = 0
+        self.emit("start", total=total, workers=self.workers)
+        if not keys:
+            self.emit("summary", success=0, failed=0)
+            return 0, 0
+
+        # 썸네일/스프라이트는 만들자마자 올리고 지우므로 작은 예약으로 충분
+        with (self.workspace or Workspace(log=self.log)).area("thumbs", THUMBS_RESERVE_BYTES) as area:
+            with ThreadPoolExecutor(max_workers=min(self.workers, total)) as executor:
+                results = list(executor.map(lambda job: self.generate_one(job[1], job[0], total, area.path),
+                                            enumerate(keys)))
+
+        success = sum(1 for ok in results if ok)
+        self.emit("summary", success=success, failed=total - success)
+        return success, total - success
+
+    def generate_one(self, key, index, total, work_dir):
+        filename = os.path.basename(key)
+        thumb_path = os.path.join(work_dir, f"{index:06d}.jpg")
+        sprite_path = os.path.join(work_dir, f"{index:06d}.sprite.jpg")
+        vtt_path = os.path.join(work_dir, f"{index:06d}.vtt")
+        input_url, remote = self.input_for(key)
+        try:
+            duration = source_duration(input_url, remote)
+            # 후보 지점이 모두 실패하면 (길이 정보가 틀린 경우 등) 처음 프레임으로 다시
+            if make_poster(input_url, thumb_path, duration, remote=remote) is None \
+                    and make_poster(input_url, thumb_path, remote=remote, times=[0.0]) is None:
+                self.log(f"[{index+1}/{total}] ❌ {filename} 썸네일 생성 실패")
+                self.report_file(key, total, False, stage="thumbnail")
+                return False
+            if not self.upload(thumb_path, thumbnail_key(key)):
+                self.log(f"[{index+1}/{total}] ❌ {filename} 썸네일 업로드 실패")
+                self.report_file(key, total, False, stage="upload")
+                return False
+            if self.sprites:
+                if not make_sprite(input_url, sprite_path, vtt_path, duration,
+                                   sprite_name=os.path.basename(sprite_key(key)), remote=remote):
+                    self.log(f"[{index+1}/{total}] ⚠️ {filename} 스프라이트 생성 실패")
+                elif not (self.upload(sprite_path, sprite_key(key)) and self.upload(vtt_path, vtt_key(key))):
+                    self.log(f"[{index+1}/{total}] ⚠️ {filename} 스프라이트 업로드 실패")
+            self.log(f"[{index+1}/{total}] ✅ {filename}")
+            self.report_file(key, total, True)
+            return True
+        except Exception as e:
+            self.log(f"[{index+1}/{total}] ❌ {filename} 오류: {e}")
+            self.report_file(key, total, False, error=e)
+            return False
+        finally:
+            for path in (thumb_path, sprite_path, vtt_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def upload(self, local_path, key):
+        info = self.storage.put_file(local_path, key)
+        if info is None:
+            return False
+        if self.index is not None:
+            self.index.record_put(info.key, info.size, info.etag)
+        return True
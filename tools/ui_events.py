@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Tk UI 이벤트 큐
+- 작업 스레드는 위젯을 직접 건드리지 않고 큐에 넣기만 함 (잠금 대기/화면 갱신 없이 바로 반환)
+- Tk 메인 루프가 after()로 일정 간격(FRAME_INTERVAL_MS)마다 모아서 반영
+- 진행률/상태처럼 마지막 값만 의미 있는 갱신은 키별로 합침 (중간 값은 버림)
+- 로그는 한 번에 삽입하고, 화면/대기열 모두 최근 MAX_LOG_LINES줄만 유지
+"""
+
+import threading
+from collections import deque, OrderedDict
+
+import tkinter as tk
+
+# 화면 반영 간격 (ms) - 초당 약 20번
+FRAME_INTERVAL_MS = 50
+# 로그 창과 대기열에 남길 최대 줄 수
+MAX_LOG_LINES = 2000
+
+
+class UIEventQueue:
+    """작업 스레드 → Tk 메인 스레드 전달 (log/update/call은 어느 스레드에서나 호출 가능)"""
+
+    def __init__(self, root, interval_ms=FRAME_INTERVAL_MS, max_log_lines=MAX_LOG_LINES):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_log_lines = max_log_lines
+        self.log_widget = None
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=max_log_lines)
+        self._dropped = 0
+        self._updates = OrderedDict()
+        self._calls = deque()
+        self._running = False
+
+    def attach_log(self, text_widget):
+        """로그를 쓸 Text 위젯 (평소에는 DISABLED 상태로 둠)"""
+        self.log_widget = text_widget
+
+    def log(self, message):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(message)
+
+    def update(self, key, func, *args):
+        """같은 key의 갱신은 마지막 것만 실행 (진행률, 상태 라벨 등)"""
+        with self._lock:
+            self._updates.pop(key, None)
+            self._updates[key] = (func, args)
+
+    def call(self, func, *args):
+        """메인 스레드에서 순서대로 한 번씩 실행 (버튼 상태, 메시지 창 등)"""
+        with self._lock:
+            self._calls.append((func, args))
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        try:
+            self.drain()
+        finally:
+            self.root.after(self.interval_ms, self._tick)
+
+    def drain(self):
+        """쌓인 이벤트 반영 (메인 스레드 전용): 로그 → 합쳐진 갱신 → 호출 순서"""
+        with self._lock:
+            lines = list(self._lines)
+            dropped = self._dropped
+            self._lines.clear()
+            self._dropped = 0
+            updates = list(self._updates.values())
+            self._updates.clear()
+            calls = list(self._calls)
+            self._calls.clear()
+
+        if lines and self.log_widget is not None:
+            if dropped:
+                lines.insert(0, f"... (로그 {dropped}줄 생략)")
+            self.write_log(lines)
+        for func, args in updates:
+            func(*args)
+        for func, args in calls:
+            func(*args)
+
+    def write_log(self, lines):
+        widget = self.log_widget
+        widget.configure(state=tk.NORMAL)
+        widget.insert(tk.END, "\n".join(lines) + "\n")
+        # 마지막 빈 줄 포함 - 넘친 앞부분 삭제
+        excess = int(widget.index("end-1c").split('.')[0]) - 1 - self.max_log_lines
+        if excess > 0:
+            widget.delete("1.0", f"{excess + 1}.0")
+        widget.see(tk.END)
+        widget.configure(state=tk.DISABLED)
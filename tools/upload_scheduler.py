@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+업로드 스케줄러 (조각/세그먼트 단위 병렬 업로드)
+- 큰 파일(원본 MP4)은 멀티파트 조각으로, HLS 폴더는 파일 단위로 나눠 하나의 작업 큐에 섞어 넣음
+  → 작은 세그먼트와 큰 조각이 번갈아 올라가 업로드 대역폭을 계속 채움
+- 동시 요청 수는 AIMD로 조정: 처리량이 늘면 1씩 증가, 오류/제한 응답이면 절반으로
+- 조각 크기는 측정한 연결당 처리량으로 결정 (조각 하나가 약 PART_TARGET_SECONDS초)
+- 요청 단위 재시도 (지수 백오프) - 세그먼트 하나가 실패해도 폴더 전체를 다시 올리지 않음
+- 플레이리스트(.m3u8)는 같은 폴더의 세그먼트가 모두 올라간 뒤 마지막에 업로드
+  (플레이리스트가 보이면 재생 가능 = 완성)
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import MULTIPART_THRESHOLD, ObjectInfo, StorageError, get_storage, join_key
+
+# 동시 요청 수 (시작, 최소, 최대)
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+# 처리량 측정 단위 (완료된 요청 수)
+THROUGHPUT_WINDOW = 8
+# 조각 하나가 걸리는 목표 시간 (초)과 조각 크기 범위
+PART_TARGET_SECONDS = 10
+MIN_PART_SIZE = 8 * 1024 ** 2
+MAX_PART_SIZE = 256 * 1024 ** 2
+# 요청 재시도 횟수와 백오프 (초)
+RETRIES = 5
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+# 재시도해도 소용없는 응답 (인증/권한/잘못된 요청)
+PERMANENT_STATUS = (400, 401, 403, 404, 405, 411)
+
+
+def is_playlist(path):
+    return path.lower().endswith(".m3u8")
+
+
+def backoff(attempt):
+    """attempt번째 재시도 대기 시간 (지수 증가 + 무작위 분산)"""
+    return min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class AdaptiveLimit:
+    """동시 요청 수 제한 (AIMD) + 처리량 측정
+
+    acquire/release로 슬롯을 잡고 record로 결과를 알림.
+    THROUGHPUT_WINDOW개 요청마다 처리량(bytes/초)을 비교해 늘었으면 +1, 크게 줄었으면 -1,
+    재시도할 오류가 나면 바로 절반.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self.best = None
+        # 최근 측정 처리량 (bytes/초, 전체 연결 합계)
+        self.throughput = None
+        self._window_bytes = 0
+        self._window_count = 0
+        self._window_start = time.time()
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit:
+                self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def record(self, nbytes, ok=True):
+        with self._cond:
+            if not ok:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._reset_window()
+                return
+            self._window_bytes += nbytes
+            self._window_count += 1
+            if self._window_count < THROUGHPUT_WINDOW:
+                return
+            elapsed = max(time.time() - self._window_start, 0.001)
+            self.throughput = self._window_bytes / elapsed
+            if self.best is None or self.throughput >= self.best * 0.95:
+                # 동시 요청을 늘려도 처리량이 유지/증가 → 더 늘려 봄
+                self.limit = min(self.maximum, self.limit + 1)
+                self.best = max(self.best or 0, self.throughput)
+            elif self.throughput < self.best * 0.8:
+                self.limit = max(self.minimum, self.limit - 1)
+                # 회선 상태가 바뀌었을 수 있으므로 기준도 천천히 낮춤
+                self.best *= 0.9
+            self._reset_window()
+            self._cond.notify_all()
+
+    def _reset_window(self):
+        self._window_bytes = 0
+        self._window_count = 0
+        self._window_start = time.time()
+
+    def part_size(self):
+        """측정한 연결당 처리량 기준 조각 크기 (측정 전에는 최소 크기)"""
+        with self._cond:
+            if not self.throughput:
+                return MIN_PART_SIZE
+            per_stream = self.throughput / max(1, self.limit)
+        size = int(per_stream * PART_TARGET_SECONDS)
+        # 1MB 단위로 맞춤
+        size = size // (1024 ** 2) * (1024 ** 2)
+        return max(MIN_PART_SIZE, min(MAX_PART_SIZE, size))
+
+
+_shared_limit = None
+_shared_lock = threading.Lock()
+
+
+def shared_limit():
+    """프로세스 전체가 함께 쓰는 동시 요청 제한 (파이프라인의 여러 업로드가 같은 회선을 나눠 씀)"""
+    global _shared_limit
+    with _shared_lock:
+        if _shared_limit is None:
+            _shared_limit = AdaptiveLimit()
+        return _shared_limit
+
+
+class UploadTask:
+    """파일/폴더 하나의 업로드 결과 (failed: 실패한 키 목록, objects: 업로드 응답 {키: ObjectInfo})"""
+
+    def __init__(self, name):
+        self.name = name
+        self.failed = []
+        self.objects = {}
+        self.bytes = 0
+        self.done = False
+
+    @property
+    def ok(self):
+        return self.done and not self.failed
+
+
+class MultipartUpload:
+    """진행 중인 멀티파트 업로드 상태"""
+
+    def __init__(self, task, local_path, key, size, part_size, count):
+        self.task = task
+        self.local_path = local_path
+        self.key = key
+        self.size = size
+        self.part_size = part_size
+        self.count = count
+        self.upload_id = None
+        self.etags = {}
+        self.remaining = count
+        self.failed = False
+
+
+class UploadUnit:
+    """요청 하나 분량의 작업
+
+    kind: "put"(파일 하나), "part"(멀티파트 조각), "complete"(멀티파트 완료), "dir"(폴더 통째로 - rclone)
+    """
+
+    def __init__(self, kind, task, key=None, local_path=None, size=0, multipart=None, number=None, group=None):
+        self.kind = kind
+        self.task = task
+        self.key = key
+        self.local_path = local_path
+        self.size = size
+        self.multipart = multipart
+        self.number = number
+        # 플레이리스트 대기 그룹 (같은 폴더 업로드)
+        self.group = group
+
+
+class UploadScheduler:
+    """파일/폴더 업로드를 요청 단위로 나눠 동시에 실행
+
+    scheduler = UploadScheduler(log=...)
+    mp4 = scheduler.add_file(path, key); hls = scheduler.add_dir(hls_dir, prefix)
+    scheduler.run()  # 모두 끝날 때까지 대기 → 전체 성공 여부, 결과는 mp4.ok / hls.failed
+    """
+
+    def __init__(self, storage=None, limit=None, log=None):
+        self.storage = storage or get_storage()
+        self.limit = limit or shared_limit()
+        self.log = log or (lambda message: None)
+        self.tasks = []
+        self._parts = []
+        self._small = []
+        self._multiparts = []
+        # 그룹(폴더)별 남은 일반 파일 수와 나중에 올릴 플레이리스트
+        self._group_remaining = {}
+        self._group_deferred = {}
+        self._queue = deque()
+        self._pending = 0
+        self._cond = threading.Condition()
+
+    # ---------- 작업 등록 ----------
+
+    def add_file(self, local_path, key):
+        """파일 하나 (큰 파일은 멀티파트 조각으로 나눔)"""
+        task = UploadTask(key)
+        self.tasks.append(task)
+        size = os.path.getsize(local_path)
+        if self.storage.multipart and size > MULTIPART_THRESHOLD:
+            part_size, count = self.storage.part_layout(size, self.limit.part_size())
+            upload = MultipartUpload(task, local_path, key, size, part_size, count)
+            self._multiparts.append(upload)
+            for number in range(1, count + 1):
+                offset = (number - 1) * part_size
+                self._parts.append(UploadUnit("part", task, key, local_path, min(part_size, size - offset),
+                                              multipart=upload, number=number))
+        else:
+            self._small.append(UploadUnit("put", task, key, local_path, size))
+        return task
+
+    def add_dir(self, local_dir, prefix):
+        """폴더 전체 (하위 폴더 포함, 플레이리스트는 마지막)"""
+        task = UploadTask(prefix)
+        self.tasks.append(task)
+        if self.storage.batch_dirs:
+            self._small.append(UploadUnit("dir", task, prefix, local_dir))
+            return task
+
+        group = len(self._group_remaining)
+        self._group_remaining[group] = 0
+        self._group_deferred[group] = []
+        for root, dirs, names in os.walk(local_dir):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, local_dir).replace(os.sep, '/')
+                unit = UploadUnit("put", task, join_key(prefix, rel), path, os.path.getsize(path), group=group)
+                if is_playlist(name):
+                    self._group_deferred[group].append(unit)
+                else:
+                    self._group_remaining[group] += 1
+                    self._small.append(unit)
+        return task
+
+    def upload_now(self, local_path, key):
+        """파일 하나를 큐 없이 바로 업로드 (같은 재시도/백오프와 동시 요청 제한) → ObjectInfo (실패 시 None)
+
+        스트리밍 변환처럼 파일이 하나씩 생기는 경우용. 여러 스레드에서 동시에 호출해도 됨.
+        """
+        task = UploadTask(key)
+        unit = UploadUnit("put", task, key, local_path, os.path.getsize(local_path))
+        if not self.attempt(unit):
+            return None
+        return task.objects.get(key)
+
+    # ---------- 실행 ----------
+
+    def interleave(self):
+        """큰 조각 사이사이에 작은 파일을 고르게 섞은 실행 순서"""
+        parts, small = deque(self._parts), deque(self._small)
+        per_part = max(1, len(small) // max(1, len(parts)))
+        order = []
+        while parts or small:
+            if parts:
+                order.append(parts.popleft())
+            for _ in range(per_part if parts else len(small)):
+                if small:
+                    order.append(small.popleft())
+        return order
+
+    def run(self):
+        """등록한 모든 업로드 실행 후 전체 성공 여부 반환"""
+        for upload in self._multiparts:
+            if not self.start_multipart(upload):
+                upload.failed = True
+                upload.task.failed.append(upload.key)
+
+        order = [unit for unit in self.interleave()
+                 if not (unit.multipart and unit.multipart.failed)]
+        # 세그먼트가 없는 폴더는 플레이리스트를 바로
+        for group, remaining in self._group_remaining.items():
+            if remaining == 0:
+                order += self._group_deferred.pop(group)
+
+        self._queue = deque(order)
+        self._pending = len(order)
+        if order:
+            workers = min(self.limit.maximum, len(order))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _ in range(workers):
+                    executor.submit(self.worker)
+
+        for task in self.tasks:
+            task.done = True
+        return all(task.ok for task in self.tasks)
+
+    def start_multipart(self, upload):
+        for attempt in range(RETRIES):
+            try:
+                upload.upload_id = self.storage.create_multipart(upload.key)
+                return True
+            except StorageError as e:
+                if e.status in PERMANENT_STATUS or attempt == RETRIES - 1:
+                    self.log(f"  ⚠️ {upload.key} 멀티파트 업로드 시작 실패: {e}")
+                    return False
+                time.sleep(backoff(attempt))
+        return False
+
+    def worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and self._pending > 0:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                unit = self._queue.popleft()
+            ok = self.attempt(unit)
+            self.finish(unit, ok)
+
+    def attempt(self, unit):
+        """요청 하나를 재시도 포함 실행 → 성공 여부"""
+        if unit.multipart and unit.multipart.failed:
+            return False
+        for attempt in range(RETRIES):
+            self.limit.acquire()
+            try:
+                self.execute(unit)
+                self.limit.record(unit.size)
+                return True
+            except OSError as e:
+                # 로컬 파일 문제는 재시도해도 같음
+                self.log(f"  ⚠️ {unit.key} 업로드 실패: {e}")
+                return False
+            except StorageError as e:
+                permanent = e.status in PERMANENT_STATUS
+                if not permanent:
+                    self.limit.record(0, ok=False)
+                if permanent or attempt == RETRIES - 1:
+                    self.log(f"  ⚠️ {unit.key} 업로드 실패 ({attempt + 1}회 시도): {e}")
+                    return False
+            except Exception as e:
+                # 응답 해석 오류 등 - 작업자 스레드가 멈추지 않도록 실패로 처리
+                self.log(f"  ⚠️ {unit.key} 업로드 오류: {e}")
+                return False
+            finally:
+                self.limit.release()
+            time.sleep(backoff(attempt))
+        return False
+
+    def execute(self, unit):
+        """실패 시 StorageError"""
+        storage = self.storage
+        if unit.kind == "dir":
+            if not storage.put_dir(unit.local_path, unit.key):
+                raise StorageError(f"{unit.key} 폴더 업로드 실패")
+        elif unit.kind == "put":
+            if storage.multipart:
+                info = storage.put_object(unit.local_path, unit.key)
+            else:
+                info = storage.put_file(unit.local_path, unit.key)
+                if info is None:
+                    raise StorageError(f"{unit.key} 업로드 실패")
+            with self._cond:
+                unit.task.objects[unit.key] = info
+        elif unit.kind == "part":
+            upload = unit.multipart
+            offset = (unit.number - 1) * upload.part_size
+            etag = storage.upload_part(upload.key, upload.upload_id, unit.number, upload.local_path, offset, unit.size)
+            with self._cond:
+                upload.etags[unit.number] = etag
+        elif unit.kind == "complete":
+            upload = unit.multipart
+            etag = storage.complete_multipart(upload.key, upload.upload_id, list(upload.etags.items()))
+            with self._cond:
+                unit.task.objects[upload.key] = ObjectInfo(upload.key, upload.size, etag)
+
+    def finish(self, unit, ok):
+        """요청 완료 처리 - 이어서 할 작업(멀티파트 완료, 플레이리스트)을 큐에 추가"""
+        follow = []
+        abort = None
+        with self._cond:
+            if ok:
+                unit.task.bytes += unit.size if unit.kind != "complete" else 0
+            elif unit.key not in unit.task.failed:
+                unit.task.failed.append(unit.key)
+
+            upload = unit.multipart
+            if unit.kind == "part":
+                if not ok and not upload.failed:
+                    upload.failed = True
+                    abort = upload
+                upload.remaining -= 1
+                if upload.remaining == 0 and not upload.failed:
+                    follow.append(UploadUnit("complete", unit.task, unit.key, multipart=upload))
+            elif unit.kind == "complete" and not ok:
+                abort = upload
+
+            if unit.group is not None and not is_playlist(unit.key):
+                if not ok:
+                    # 세그먼트가 빠진 플레이리스트는 올리지 않음
+                    for deferred in self._group_deferred.pop(unit.group, []):
+                        unit.task.failed.append(deferred.key)
+                self._group_remaining[unit.group] -= 1
+                if self._group_remaining[unit.group] == 0:
+                    follow += self._group_deferred.pop(unit.group, [])
+
+            self._queue.extend(follow)
+            self._pending += len(follow) - 1
+            self._cond.notify_all()
+
+        if abort:
+            self.storage.abort_multipart(abort.key, abort.upload_id)
@@ -6,31 +6,20 @@ JBCH Word Bank 영상 업로더
 """
 
 import os
-import sys
-import subprocess
 import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from pathlib import Path
-import json
-import urllib.request
 import urllib.error
-import shutil
-import glob
-import tempfile
-import hashlib
 
-# Windows에서 subprocess 콘솔 창 숨기기
-if sys.platform == 'win32':
-    SUBPROCESS_FLAGS = subprocess.CREATE_NO_WINDOW
-else:
-    SUBPROCESS_FLAGS = 0
-
-# 설정
-R2_BUCKET = "r2:jbch-word-bank-videos"
-R2_PUBLIC_URL = "https://videos.haebomsoft.com"
-API_BASE_URL = "https://jbch.haebomsoft.com"  # 배포된 사이트 URL
-VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
+from jbch_core import VIDEO_EXTENSIONS, Uploader, collect_video_files
+from kv_client import request_kv_sync, sync_kv_changes
+from journal import Journal
+from ui_events import UIEventQueue
+from progress import STAGE_LABELS, format_progress
+from dedupe import ContentIndex
+from bucket_index import get_bucket_index
+from bulk_delete import BulkDeleter
+from abr_ladder import DEFAULT_LADDER
 
 # R2 카테고리 목록
 CATEGORIES = [
@@ -52,9 +41,17 @@ class UploaderApp:
         
         self.selected_files = []
         self.is_uploading = False
+        # 카테고리/폴더/파일 목록은 로컬 색인에서 바로 (R2 조회는 백그라운드 갱신만)
+        self.index = get_bucket_index()
+        
+        # 작업 스레드의 로그/진행률은 큐를 거쳐 메인 루프에서 반영
+        self.ui = UIEventQueue(root)
         
         self.setup_ui()
+        self.ui.attach_log(self.log_text)
+        self.ui.start()
         self.load_r2_folders()
+        self.refresh_index()
     
     def setup_ui(self):
         # 메인 프레임
@@ -133,12 +130,21 @@ class UploaderApp:
         self.thumbnail_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(option_frame, text="썸네일 자동 생성 및 업로드", variable=self.thumbnail_var).pack(anchor=tk.W)
         
+        self.sprites_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="탐색 미리보기 스프라이트(WebVTT) 생성", variable=self.sprites_var).pack(anchor=tk.W)
+        
+        self.resume_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text="중단된 작업 이어하기 (완료된 단계 건너뜀)", variable=self.resume_var).pack(anchor=tk.W)
+        
+        self.dedupe_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text="같은 영상은 다시 압축/업로드하지 않음 (R2 서버 측 복사)", variable=self.dedupe_var).pack(anchor=tk.W)
+        
         # 압축 옵션
         compress_frame = ttk.Frame(option_frame)
         compress_frame.pack(fill=tk.X, pady=(5, 0))
         
         self.compress_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(compress_frame, text="H.265 자동 압축 (NVENC GPU)", variable=self.compress_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(compress_frame, text="H.265 자동 압축 (NVENC GPU, 없으면 CPU)", variable=self.compress_var).pack(side=tk.LEFT)
         
         ttk.Label(compress_frame, text="화질:").pack(side=tk.LEFT, padx=(20, 5))
         self.quality_var = tk.StringVar(value="균형 (CRF 23)")
@@ -146,6 +152,15 @@ class UploaderApp:
                                       values=["고화질 (CRF 18)", "균형 (CRF 23)", "용량 우선 (CRF 28)"])
         quality_combo.pack(side=tk.LEFT)
         
+        self.sample_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(compress_frame, text="샘플 인코딩으로 판단", variable=self.sample_var).pack(side=tk.LEFT, padx=(20, 0))
+        
+        self.fanout_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text="압축 시 한 번 디코딩으로 MP4 + HLS + 썸네일 동시 생성", variable=self.fanout_var).pack(anchor=tk.W, pady=(5, 0))
+        
+        self.abr_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="다중 화질 HLS (1080p/720p/480p + 오디오, 원본보다 높은 화질 제외)", variable=self.abr_var).pack(anchor=tk.W)
+        
         # === 진행 상황 ===
         progress_frame = ttk.LabelFrame(main_frame, text="4. 진행 상황", padding="10")
         progress_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
@@ -170,11 +185,15 @@ class UploaderApp:
         self.new_folder_var.trace("w", lambda *args: self.update_path_label())
     
     def log(self, message):
-        self.log_text.configure(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.log_text.configure(state=tk.DISABLED)
-        self.root.update()
+        """로그 한 줄 (어느 스레드에서나 - 화면에는 다음 프레임에 반영)"""
+        self.ui.log(message)
+    
+    def set_progress(self, percent, status):
+        self.progress_var.set(percent)
+        self.status_label.configure(text=status)
+    
+    def set_status(self, status):
+        self.status_label.configure(text=status)
     
     def select_files(self):
         files = filedialog.askopenfilenames(
@@ -190,14 +209,10 @@ class UploaderApp:
     def select_folder(self):
         folder = filedialog.askdirectory(title="폴더 선택")
         if folder:
-            for root, dirs, files in os.walk(folder):
-                for f in files:
-                    ext = os.path.splitext(f)[1].lower()
-                    if ext in VIDEO_EXTENSIONS:
-                        full_path = os.path.join(root, f)
-                        if full_path not in self.selected_files:
-                            self.selected_files.append(full_path)
-                            self.file_listbox.insert(tk.END, f)
+            for full_path in collect_video_files([folder]):
+                if full_path not in self.selected_files:
+                    self.selected_files.append(full_path)
+                    self.file_listbox.insert(tk.END, os.path.basename(full_path))
         self.update_file_count()
     
     def clear_files(self):
@@ -209,23 +224,27 @@ class UploaderApp:
         count = len(self.selected_files)
         self.file_count_label.configure(text=f"선택된 파일: {count}개")
     
+    def refresh_index(self, prefix=""):
+        """버킷 색인을 백그라운드에서 갱신 → 끝나면 UI 스레드에서 목록 다시 채움"""
+        def done(ok):
+            self.ui.call(self.on_index_refreshed, ok)
+        self.index.refresh_async(prefix, on_done=done)
+    
+    def on_index_refreshed(self, ok):
+        if not ok:
+            self.log("⚠️ R2 폴더 목록 갱신 실패 (저장된 목록 사용)")
+            return
+        self.load_r2_folders()
+        category = self.category_var.get()
+        if category:
+            self.subfolder_combo['values'] = [""] + self.index.dirs(category, recursive=True)
+    
     def load_r2_folders(self):
-        """R2에서 폴더 목록 로드"""
-        try:
-            result = subprocess.run(
-                ["rclone", "lsf", R2_BUCKET, "--dirs-only"],
-                capture_output=True, text=True, encoding='utf-8',
-                creationflags=SUBPROCESS_FLAGS
-            )
-            if result.returncode == 0:
-                folders = [f.rstrip('/') for f in result.stdout.strip().split('\n') if f]
-                # 카테고리 목록 업데이트
-                for folder in folders:
-                    if folder not in CATEGORIES:
-                        CATEGORIES.append(folder)
-                self.category_combo['values'] = CATEGORIES
-        except Exception as e:
-            self.log(f"폴더 목록 로드 실패: {e}")
+        """색인에서 폴더 목록 로드"""
+        for folder in self.index.dirs():
+            if folder not in CATEGORIES:
+                CATEGORIES.append(folder)
+        self.category_combo['values'] = CATEGORIES
     
     def on_category_change(self, event=None):
         """카테고리 변경 시 하위 폴더 로드"""
@@ -233,18 +252,8 @@ class UploaderApp:
         if not category:
             return
         
-        try:
-            result = subprocess.run(
-                ["rclone", "lsf", f"{R2_BUCKET}/{category}", "--dirs-only", "-R"],
-                capture_output=True, text=True, encoding='utf-8',
-                creationflags=SUBPROCESS_FLAGS
-            )
-            if result.returncode == 0:
-                subfolders = [f.rstrip('/') for f in result.stdout.strip().split('\n') if f]
-                self.subfolder_combo['values'] = [""] + subfolders
-                self.subfolder_var.set("")
-        except Exception as e:
-            self.log(f"하위 폴더 로드 실패: {e}")
+        self.subfolder_combo['values'] = [""] + self.index.dirs(category, recursive=True)
+        self.subfolder_var.set("")
         
         self.update_path_label()
     
@@ -314,413 +323,55 @@ class UploaderApp:
             return "28"
         return "23"  # 기본값
     
-    def get_video_codec(self, file_path):
-        """ffprobe로 영상 코덱 확인"""
-        try:
-            cmd = [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=codec_name",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                file_path
-            ]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                creationflags=SUBPROCESS_FLAGS
-            )
-            if result.returncode == 0:
-                return result.stdout.strip().lower()
-        except:
-            pass
-        return "unknown"
-    
-    def should_skip_compression(self, file_path):
-        """압축 스킵 여부 확인: 600MB 이하면 스킵 (이미 최적화된 파일)"""
-        # 파일 크기 확인 (MB)
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-        
-        # 코덱 확인
-        codec = self.get_video_codec(file_path)
-        
-        # 600MB 이하면 스킵 (H.264, H.265 모두)
-        if file_size_mb <= 600:
-            return True, codec, file_size_mb
-        
-        return False, codec, file_size_mb
-    
-    def convert_to_hls(self, input_path, output_dir, codec="h264"):
-        """MP4를 HLS(m3u8 + ts/fmp4)로 변환. H.265는 fMP4 세그먼트 사용 (TS는 HEVC 미지원)"""
-        os.makedirs(output_dir, exist_ok=True)
-        m3u8_path = os.path.join(output_dir, "index.m3u8")
-        
-        # ffmpeg는 경로 내 쉼표(,) 등 특수문자를 옵션 구분자로 해석하므로
-        # 입력 파일을 안전한 임시 경로로 복사(하드링크)하여 사용
-        safe_input = input_path
-        temp_link = None
-        if any(c in os.path.basename(input_path) for c in [',', ';', "'", '"']):
-            temp_link = os.path.join(tempfile.gettempdir(), f"ffmpeg_input_{hashlib.md5(input_path.encode()).hexdigest()[:12]}.mp4")
-            try:
-                if os.path.exists(temp_link):
-                    os.remove(temp_link)
-                shutil.copy2(input_path, temp_link)
-                safe_input = temp_link
-            except Exception:
-                safe_input = input_path
-                temp_link = None
-        
-        is_hevc = codec.lower() in ("hevc", "h265", "h.265")
-        
-        if is_hevc:
-            # fMP4 세그먼트: H.265 호환 (iOS Safari 지원)
-            # init_filename을 output_dir 전체 경로로 지정
-            init_path = os.path.join(output_dir, "init.mp4")
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", safe_input,
-                "-c:v", "copy",
-                "-c:a", "aac",
-                "-b:a", "128k",
-                "-hls_time", "10",
-                "-hls_list_size", "0",
-                "-hls_segment_type", "fmp4",
-                "-hls_fmp4_init_filename", init_path,
-                "-hls_segment_filename", os.path.join(output_dir, "seg_%03d.m4s"),
-                "-f", "hls",
-                m3u8_path
-            ]
-        else:
-            # TS 세그먼트: H.264 (기존 방식)
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", safe_input,
-                "-c:v", "copy",
-                "-c:a", "aac",
-                "-b:a", "128k",
-                "-hls_time", "10",
-                "-hls_list_size", "0",
-                "-hls_segment_filename", os.path.join(output_dir, "seg_%03d.ts"),
-                "-f", "hls",
-                m3u8_path
-            ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=False,
-            creationflags=SUBPROCESS_FLAGS
-        )
-        
-        # 임시 파일 정리
-        if temp_link and os.path.exists(temp_link):
-            try:
-                os.remove(temp_link)
-            except Exception:
-                pass
-        
-        if result.returncode != 0:
-            stderr = result.stderr.decode('utf-8', errors='replace') if result.stderr else ''
-            self.log(f"  ⚠️ ffmpeg HLS 오류: {stderr[-500:]}")
-            return False
-        
-        # fMP4: m3u8 내의 init.mp4 전체 경로를 상대 경로로 수정
-        if is_hevc and os.path.exists(m3u8_path):
-            with open(m3u8_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            # 전체 경로를 상대 경로 "init.mp4"로 치환
-            init_abs = os.path.join(output_dir, "init.mp4").replace('\\', '/')
-            content = content.replace(init_abs, "init.mp4")
-            init_abs_win = os.path.join(output_dir, "init.mp4")
-            content = content.replace(init_abs_win, "init.mp4")
-            with open(m3u8_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-        
-        return os.path.exists(m3u8_path)
-    
-    def upload_hls_files(self, hls_dir, remote_path):
-        """HLS 파일들을 R2에 업로드"""
-        # rclone copy로 폴더 전체 업로드
-        result = subprocess.run(
-            ["rclone", "copy", hls_dir, f"{R2_BUCKET}/{remote_path}/",
-             "--transfers", "8", "--checkers", "16"],
-            capture_output=True, text=False,
-            creationflags=SUBPROCESS_FLAGS
-        )
-        return result.returncode == 0
-    
-    def compress_video(self, input_path, output_path):
-        """NVENC H.265로 영상 압축"""
-        crf = self.get_crf_value()
-        
-        # 비트레이트 제한 설정 (CRF별)
-        # CRF 18: 고화질 - 8Mbps / CRF 23: 균형 - 4Mbps / CRF 28: 용량우선 - 2Mbps
-        bitrate_map = {"18": "8M", "23": "4M", "28": "2M"}
-        maxrate = bitrate_map.get(crf, "4M")
-        bufsize = maxrate  # bufsize = maxrate와 동일
-        
-        # NVENC H.265 압축 명령어 (VBR 모드 + 비트레이트 제한)
-        cmd = [
-            "ffmpeg", "-y",
-            "-hwaccel", "cuda",
-            "-i", input_path,
-            "-c:v", "hevc_nvenc",
-            "-preset", "p4",
-            "-rc", "vbr",
-            "-cq", crf,
-            "-maxrate", maxrate,
-            "-bufsize", bufsize,
-            "-c:a", "aac",
-            "-b:a", "128k",
-            output_path
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=False,
-            creationflags=SUBPROCESS_FLAGS
-        )
-        
-        return result.returncode == 0
-    
     def upload_files(self, upload_path):
         total = len(self.selected_files)
-        success = 0
-        failed = 0
-        
         self.log(f"업로드 시작: {total}개 파일 → {upload_path}")
         
-        for i, file_path in enumerate(self.selected_files):
-            filename = os.path.basename(file_path)
-            self.status_label.configure(text=f"[{i+1}/{total}] {filename} 처리 중...")
-            self.progress_var.set((i / total) * 100)
-            
-            try:
-                actual_file = file_path
-                compressed_path = None
-                
-                # 압축 옵션이 켜져 있으면 먼저 압축
-                if self.compress_var.get():
-                    # 코덱 및 크기 체크 - H.265/HEVC이고 600MB 이하면 스킵
-                    skip, codec, file_size_mb = self.should_skip_compression(file_path)
-                    
-                    if skip:
-                        self.log(f"[{i+1}/{total}] {filename} - HEVC {file_size_mb:.0f}MB (압축 불필요)")
-                    else:
-                        self.log(f"[{i+1}/{total}] {filename} 압축 중... ({codec} → H.265 NVENC)")
-                        self.status_label.configure(text=f"[{i+1}/{total}] {filename} 압축 중...")
-                        
-                        # 압축된 파일 경로 (특수문자 제거 - ffmpeg 호환)
-                        name, ext = os.path.splitext(filename)
-                        safe_compress_name = hashlib.md5(name.encode('utf-8')).hexdigest()[:12]
-                        compressed_path = os.path.join(os.environ.get('TEMP', '/tmp'), f"{safe_compress_name}_compressed.mp4")
-                        
-                        # 원본 크기
-                        original_size = os.path.getsize(file_path) / (1024 * 1024)  # MB
-                        
-                        if self.compress_video(file_path, compressed_path):
-                            if os.path.exists(compressed_path):
-                                compressed_size = os.path.getsize(compressed_path) / (1024 * 1024)  # MB
-                                
-                                # 압축 결과가 원본보다 크면 원본 사용
-                                if compressed_size >= original_size:
-                                    self.log(f"  ⚠️ 이미 최적화된 파일 (압축 스킵): {original_size:.1f}MB")
-                                    try:
-                                        os.remove(compressed_path)
-                                    except:
-                                        pass
-                                    compressed_path = None
-                                else:
-                                    reduction = (1 - compressed_size / original_size) * 100
-                                    self.log(f"  ✅ 압축 완료: {original_size:.1f}MB → {compressed_size:.1f}MB ({reduction:.0f}% 감소)")
-                                    actual_file = compressed_path
-                            else:
-                                self.log(f"  ⚠️ 압축 실패, 원본으로 업로드")
-                        else:
-                            self.log(f"  ⚠️ 압축 실패, 원본으로 업로드")
-                
-                # 1. HLS 변환 및 업로드
-                # 코덱 확인: 압축했으면 항상 hevc, 아니면 원본 코덱 확인
-                if compressed_path and actual_file == compressed_path:
-                    video_codec = "hevc"
-                else:
-                    video_codec = self.get_video_codec(actual_file)
-                
-                self.log(f"[{i+1}/{total}] {filename} HLS 변환 중... (코덱: {video_codec})")
-                self.status_label.configure(text=f"[{i+1}/{total}] {filename} HLS 변환 중...")
-                
-                # HLS 변환용 임시 디렉토리 (특수문자 제거 - ffmpeg가 쉼표 등을 구분자로 해석)
-                name_without_ext = os.path.splitext(filename)[0]
-                safe_name = hashlib.md5(name_without_ext.encode('utf-8')).hexdigest()[:12]
-                hls_temp_dir = os.path.join(tempfile.gettempdir(), f"hls_{safe_name}")
-                
-                # 기존 임시 디렉토리 정리
-                if os.path.exists(hls_temp_dir):
-                    shutil.rmtree(hls_temp_dir, ignore_errors=True)
-                
-                hls_success = self.convert_to_hls(actual_file, hls_temp_dir, codec=video_codec)
-                
-                if not hls_success:
-                    self.log(f"  ⚠️ HLS 변환 실패, 원본 MP4로 업로드")
-                    # 폴백: 원본 MP4 업로드
-                    result = subprocess.run(
-                        ["rclone", "copy", actual_file, f"{R2_BUCKET}/{upload_path}/"],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    if result.returncode != 0:
-                        self.log(f"  ❌ 업로드 실패")
-                        failed += 1
-                        shutil.rmtree(hls_temp_dir, ignore_errors=True)
-                        continue
-                else:
-                    # 원본 MP4도 업로드 (다운로드용) - 원본 파일명으로 업로드
-                    self.log(f"  📤 원본 MP4 업로드 중...")
-                    mp4_remote_path = f"{R2_BUCKET}/{upload_path}/{filename}"
-                    result = subprocess.run(
-                        ["rclone", "copyto", actual_file, mp4_remote_path],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    if result.returncode != 0:
-                        self.log(f"  ⚠️ 원본 MP4 업로드 실패")
-                    else:
-                        self.log(f"  ✅ 원본 MP4 업로드 완료")
-                    
-                    # HLS 파일 업로드
-                    ts_files = glob.glob(os.path.join(hls_temp_dir, "*.ts"))
-                    m4s_files = glob.glob(os.path.join(hls_temp_dir, "*.m4s"))
-                    init_files = glob.glob(os.path.join(hls_temp_dir, "init.mp4"))
-                    seg_count = len(ts_files) + len(m4s_files)
-                    all_hls_files = os.listdir(hls_temp_dir) if os.path.exists(hls_temp_dir) else []
-                    self.log(f"  � HLS 파일: {all_hls_files}")
-                    self.log(f"  �� HLS 업로드 중... (m3u8 + {seg_count}개 세그먼트)")
-                    self.status_label.configure(text=f"[{i+1}/{total}] {filename} HLS 업로드 중...")
-                    
-                    hls_remote_path = f"{upload_path}/hls/{name_without_ext}"
-                    if not self.upload_hls_files(hls_temp_dir, hls_remote_path):
-                        self.log(f"  ❌ HLS 업로드 실패")
-                        failed += 1
-                        shutil.rmtree(hls_temp_dir, ignore_errors=True)
-                        continue
-                    
-                    self.log(f"  ✅ HLS 업로드 완료")
-                
-                # 압축 파일 삭제 (업로드 완료 후)
-                if compressed_path and os.path.exists(compressed_path):
-                    try:
-                        os.remove(compressed_path)
-                    except:
-                        pass
-                
-                # HLS 임시 디렉토리 정리
-                shutil.rmtree(hls_temp_dir, ignore_errors=True)
-                
-                upload_failed = False
-                if upload_failed:
-                    continue
-                
-                # 2. 썸네일 생성 및 업로드
-                if self.thumbnail_var.get():
-                    self.log(f"  📷 썸네일 생성 중...")
-                    thumb_path = os.path.join(os.environ.get('TEMP', '/tmp'), f"{filename}.thumb.jpg")
-                    
-                    # ffmpeg로 썸네일 생성
-                    ffmpeg_result = subprocess.run(
-                        ["ffmpeg", "-y", "-i", file_path, "-ss", "00:00:01", 
-                         "-vframes", "1", "-vf", "scale=480:-1", "-q:v", "3", thumb_path],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    
-                    if os.path.exists(thumb_path):
-                        # 썸네일 업로드
-                        remote_thumb_path = f"{R2_BUCKET}/thumbnails/{upload_path}/{filename}.jpg"
-                        thumb_result = subprocess.run(
-                            ["rclone", "copyto", thumb_path, remote_thumb_path],
-                            capture_output=True, text=False,
-                            creationflags=SUBPROCESS_FLAGS
-                        )
-                        
-                        if thumb_result.returncode == 0:
-                            self.log(f"  ✅ 썸네일 업로드 완료")
-                        else:
-                            self.log(f"  ⚠️ 썸네일 업로드 실패")
-                        
-                        # 임시 파일 삭제
-                        try:
-                            os.remove(thumb_path)
-                        except:
-                            pass
-                    else:
-                        self.log(f"  ⚠️ 썸네일 생성 실패")
-                
-                self.log(f"  ✅ 완료")
-                success += 1
-                
-                # 3. KV에 파일 정보 등록
-                if hls_success:
-                    self.register_file_to_kv(upload_path, filename, hls_path=f"{upload_path}/hls/{name_without_ext}/index.m3u8")
-                else:
-                    self.register_file_to_kv(upload_path, filename)
-                
-            except Exception as e:
-                self.log(f"  ❌ 오류: {e}")
-                failed += 1
+        uploader = Uploader(
+            compress=self.compress_var.get(),
+            crf=self.get_crf_value(),
+            thumbnail=self.thumbnail_var.get(),
+            journal=Journal() if self.resume_var.get() else None,
+            dedupe=ContentIndex() if self.dedupe_var.get() else None,
+            sample_encode=self.sample_var.get(),
+            fanout=self.fanout_var.get(),
+            abr=DEFAULT_LADDER if self.abr_var.get() else None,
+            sprites=self.sprites_var.get(),
+            emit=self.on_job_event,
+        )
+        completed, failed_items = uploader.run([(f, upload_path) for f in self.selected_files])
+        # 업로드한 폴더 목록만 다시 조회
+        self.refresh_index(upload_path.split('/')[0])
+        success = len(completed)
+        failed = len(failed_items)
         
-        self.progress_var.set(100)
-        self.status_label.configure(text=f"완료! 성공: {success}개, 실패: {failed}개")
+        self.ui.update("progress", self.set_progress, 100, f"완료! 성공: {success}개, 실패: {failed}개")
         self.log(f"\n========================================")
         self.log(f"업로드 완료! 성공: {success}개, 실패: {failed}개")
         self.log(f"========================================")
         
+        self.ui.call(self.finish_uploading)
+        self.ui.call(messagebox.showinfo, "완료", f"업로드 완료!\n성공: {success}개\n실패: {failed}개")
+    
+    def finish_uploading(self):
+        """업로드 종료: 메인 스레드에서 버튼과 작업 중 표시를 함께 되돌림"""
         self.is_uploading = False
         self.upload_btn.configure(state=tk.NORMAL)
-        
-        messagebox.showinfo("완료", f"업로드 완료!\n성공: {success}개\n실패: {failed}개")
     
-    def register_file_to_kv(self, upload_path, filename, hls_path=None):
-        """KV에 파일 정보 등록"""
-        try:
-            # 카테고리 추출 (upload_path의 첫 번째 부분)
-            category = upload_path.split('/')[0]
-            
-            # 파일 정보 (path는 항상 MP4 경로, HLS는 별도 필드)
-            file_info = {
-                "path": f"{upload_path}/{filename}",
-                "name": filename,
-                "size": 0,
-                "category": category
-            }
-            if hls_path:
-                file_info["hls"] = hls_path
-            
-            # API 호출
-            data = json.dumps({
-                "action": "add",
-                "file": file_info
-            }).encode('utf-8')
-            
-            req = urllib.request.Request(
-                f"{API_BASE_URL}/api/videos/files",
-                data=data,
-                headers={
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'JBCH-Uploader/1.0'
-                },
-                method='POST'
-            )
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                if result.get('success'):
-                    self.log(f"  📝 KV 등록 완료")
-                else:
-                    self.log(f"  ⚠️ KV 등록 실패: {result}")
-                    
-        except Exception as e:
-            self.log(f"  ⚠️ KV 등록 오류: {e}")
+    def on_job_event(self, event):
+        """코어 작업 이벤트를 로그/진행률 위젯에 반영"""
+        kind = event["event"]
+        if kind == "log":
+            self.log(event["message"])
+        elif kind == "file":
+            filename = os.path.basename(event["file"])
+            self.ui.update("progress", self.set_progress, (event["done"] / event["total"]) * 100,
+                           f"[{event['done']}/{event['total']}] {filename} 처리 완료")
+        elif kind == "stage_progress":
+            # ffmpeg/다운로드 진행률 (파일 하나 안에서의 진행 - 프레임마다 마지막 값만 표시)
+            filename = os.path.basename(event["file"])
+            self.ui.update("stage", self.set_status,
+                           f"{STAGE_LABELS.get(event['stage'], event['stage'])} {filename} {format_progress(event)}")
     
     def sync_kv(self):
         """R2에서 KV로 파일 목록 동기화"""
@@ -733,43 +384,58 @@ class UploaderApp:
         
         def do_sync():
             try:
-                data = json.dumps({"action": "sync"}).encode('utf-8')
-                req = urllib.request.Request(
-                    f"{API_BASE_URL}/api/videos/files",
-                    data=data,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'JBCH-Uploader/1.0'
-                    },
-                    method='POST'
-                )
-                
-                with urllib.request.urlopen(req, timeout=120) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    if result.get('success'):
-                        count = result.get('count', 0)
-                        self.log(f"✅ KV 동기화 완료! ({count}개 파일)")
-                        messagebox.showinfo("완료", f"KV 동기화 완료!\n{count}개 파일이 등록되었습니다.")
-                    else:
-                        error_msg = result.get('error', str(result))
-                        self.log(f"❌ KV 동기화 실패: {error_msg}")
-                        messagebox.showerror("오류", f"동기화 실패: {error_msg}")
-                        
+                result = request_kv_sync()
+                if result.get('success'):
+                    count = result.get('count', 0)
+                    self.log(f"✅ KV 동기화 완료! ({count}개 파일)")
+                    self.ui.call(messagebox.showinfo, "완료", f"KV 동기화 완료!\n{count}개 파일이 등록되었습니다.")
+                else:
+                    error_msg = result.get('error', str(result))
+                    self.log(f"❌ KV 동기화 실패: {error_msg}")
+                    self.ui.call(messagebox.showerror, "오류", f"동기화 실패: {error_msg}")
+                    
             except urllib.error.HTTPError as e:
                 body = e.read().decode('utf-8', errors='replace')
                 self.log(f"❌ KV 동기화 HTTP 오류: {e.code} {body}")
-                messagebox.showerror("오류", f"동기화 HTTP 오류: {e.code}\n{body[:200]}")
+                self.ui.call(messagebox.showerror, "오류", f"동기화 HTTP 오류: {e.code}\n{body[:200]}")
             except Exception as e:
                 self.log(f"❌ KV 동기화 오류: {e}")
-                messagebox.showerror("오류", f"동기화 오류: {e}")
+                self.ui.call(messagebox.showerror, "오류", f"동기화 오류: {e}")
             finally:
-                self.sync_btn.configure(state=tk.NORMAL)
+                self.ui.call(lambda: self.sync_btn.configure(state=tk.NORMAL))
         
         # 별도 스레드에서 실행
         thread = threading.Thread(target=do_sync)
         thread.daemon = True
         thread.start()
     
+    def delete_videos(self, file_paths):
+        """영상 일괄 삭제 → 삭제된 영상만 KV에서 제거"""
+        try:
+            deleter = BulkDeleter(index=self.index, dedupe=ContentIndex(), log=self.log)
+            result = deleter.run(file_paths)
+        except Exception as e:
+            self.log(f"❌ 삭제 오류: {e}")
+            self.ui.call(messagebox.showerror, "오류", f"삭제 오류: {e}")
+            self.ui.call(lambda: self.delete_btn.configure(state=tk.NORMAL))
+            return
+        
+        success = len(result.deleted)
+        failed = len(result.failed)
+        self.log(f"🗑️ {success}개 파일 삭제 완료" + (f" (실패 {failed}개)" if failed else ""))
+        
+        # 삭제한 파일만 KV에서 제거 (실패하면 전체 동기화로 대신함)
+        self.log("🔄 KV 반영 중...")
+        kv_ok = sync_kv_changes(result.kv_delta(), log=self.log)
+        self.ui.call(lambda: self.delete_btn.configure(state=tk.NORMAL))
+        summary = f"삭제 완료!\n성공: {success}개\n실패: {failed}개"
+        if result.incomplete:
+            summary += f"\n(일부 HLS/썸네일이 남은 영상: {len(result.incomplete)}개)"
+        if kv_ok:
+            self.ui.call(messagebox.showinfo, "완료", summary + "\n\nKV 반영 완료")
+        else:
+            self.ui.call(messagebox.showinfo, "완료", summary + "\n\n⚠️ KV 반영 실패 - 수동으로 동기화해주세요.")
+    
     def open_delete_dialog(self):
         """영상 삭제 다이얼로그 열기"""
         if self.is_uploading:
@@ -817,18 +483,8 @@ class UploaderApp:
             category = cat_var.get()
             if not category:
                 return
-            try:
-                result = subprocess.run(
-                    ["rclone", "lsf", f"{R2_BUCKET}/{category}", "--dirs-only", "-R"],
-                    capture_output=True, text=True, encoding='utf-8',
-                    creationflags=SUBPROCESS_FLAGS
-                )
-                if result.returncode == 0:
-                    subfolders = [f.rstrip('/') for f in result.stdout.strip().split('\n') if f]
-                    subfolder_combo['values'] = [""] + subfolders
-                    subfolder_var.set("")
-            except Exception as e:
-                pass
+            subfolder_combo['values'] = [""] + self.index.dirs(category, recursive=True)
+            subfolder_var.set("")
         
         def load_files():
             category = cat_var.get()
@@ -842,22 +498,13 @@ class UploaderApp:
             
             path = f"{category}/{subfolder}" if subfolder else category
             
-            try:
-                result = subprocess.run(
-                    ["rclone", "lsf", f"{R2_BUCKET}/{path}", "--files-only"],
-                    capture_output=True, text=True, encoding='utf-8',
-                    creationflags=SUBPROCESS_FLAGS
-                )
-                if result.returncode == 0:
-                    files = [f for f in result.stdout.strip().split('\n') if f and f.endswith(('.mp4', '.mkv', '.avi', '.mov', '.webm'))]
-                    for f in files:
-                        file_listbox.insert(tk.END, f)
-                        file_paths.append(f"{path}/{f}")
-                    
-                    if not files:
-                        messagebox.showinfo("알림", "해당 경로에 영상 파일이 없습니다.")
-            except Exception as e:
-                messagebox.showerror("오류", f"파일 목록 조회 실패: {e}")
+            files = [f.key for f in self.index.files(path) if f.key.endswith(VIDEO_EXTENSIONS)]
+            for f in files:
+                file_listbox.insert(tk.END, f)
+                file_paths.append(f"{path}/{f}")
+            
+            if not files:
+                messagebox.showinfo("알림", "해당 경로에 영상 파일이 없습니다.")
         
         def delete_selected():
             selected_indices = file_listbox.curselection()
@@ -870,76 +517,13 @@ class UploaderApp:
             if not messagebox.askyesno("확인", f"{len(selected_files)}개 파일을 삭제하시겠습니까?\n\n영상 파일과 썸네일이 함께 삭제됩니다."):
                 return
             
-            success = 0
-            failed = 0
-            
-            for file_path in selected_files:
-                try:
-                    # 1. 영상 파일 삭제
-                    result = subprocess.run(
-                        ["rclone", "deletefile", f"{R2_BUCKET}/{file_path}"],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    
-                    # 2. HLS 폴더 삭제 (hls/영상명 폴더에 m3u8 + ts 파일들)
-                    name_without_ext = os.path.splitext(os.path.basename(file_path))[0]
-                    dir_path = os.path.dirname(file_path)
-                    hls_folder = f"{dir_path}/hls/{name_without_ext}" if dir_path else f"hls/{name_without_ext}"
-                    subprocess.run(
-                        ["rclone", "purge", f"{R2_BUCKET}/{hls_folder}"],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    
-                    # 3. 썸네일 삭제
-                    thumb_path = f"thumbnails/{file_path}.jpg"
-                    subprocess.run(
-                        ["rclone", "deletefile", f"{R2_BUCKET}/{thumb_path}"],
-                        capture_output=True, text=False,
-                        creationflags=SUBPROCESS_FLAGS
-                    )
-                    
-                    if result.returncode == 0:
-                        success += 1
-                    else:
-                        failed += 1
-                except Exception as e:
-                    failed += 1
-            
             dialog.destroy()
-            self.log(f"🗑️ {success}개 파일 삭제 완료")
+            self.delete_btn.configure(state=tk.DISABLED)
             
-            # 자동으로 KV 동기화 실행
-            self.log("🔄 KV 자동 동기화 중...")
-            try:
-                data = json.dumps({"action": "sync"}).encode('utf-8')
-                req = urllib.request.Request(
-                    f"{API_BASE_URL}/api/videos/files",
-                    data=data,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'JBCH-Uploader/1.0'
-                    },
-                    method='POST'
-                )
-                with urllib.request.urlopen(req, timeout=120) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    if result.get('success'):
-                        count = result.get('count', 0)
-                        self.log(f"✅ KV 동기화 완료! ({count}개 파일)")
-                        messagebox.showinfo("완료", f"삭제 완료!\n성공: {success}개\n실패: {failed}개\n\nKV 동기화 완료 ({count}개 파일)")
-                    else:
-                        error_msg = result.get('error', str(result))
-                        self.log(f"⚠️ KV 동기화 실패: {error_msg}")
-                        messagebox.showinfo("완료", f"삭제 완료!\n성공: {success}개\n실패: {failed}개\n\n⚠️ KV 동기화 실패 - 수동으로 동기화해주세요.")
-            except urllib.error.HTTPError as e:
-                body = e.read().decode('utf-8', errors='replace')
-                self.log(f"⚠️ KV 동기화 HTTP 오류: {e.code} {body}")
-                messagebox.showinfo("완료", f"삭제 완료!\n성공: {success}개\n실패: {failed}개\n\n⚠️ KV 동기화 오류({e.code}) - 수동으로 동기화해주세요.")
-            except Exception as e:
-                self.log(f"⚠️ KV 동기화 오류: {e}")
-                messagebox.showinfo("완료", f"삭제 완료!\n성공: {success}개\n실패: {failed}개\n\n⚠️ KV 동기화 오류 - 수동으로 동기화해주세요.")
+            # 별도 스레드에서 삭제 (영상 + HLS 폴더 + 썸네일을 묶음 요청으로)
+            thread = threading.Thread(target=self.delete_videos, args=(selected_files,))
+            thread.daemon = True
+            thread.start()
         
         cat_combo.bind("<<ComboboxSelected>>", on_category_change)
         load_btn.configure(command=load_files)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+임시 작업 공간 (용량 상한 + 재사용 + 정리)
+- 작업(파일)마다 이름이 정해진 작업 폴더(Area)를 STATE_DIR/work 아래에 만들고 예상 사용량을 예약
+  (이름은 내용 해시 등 고정값 → 실패 후 다시 실행하면 같은 폴더의 중간 결과물을 재사용)
+- 예약 합계 + 쉬고 있는 폴더 크기가 상한을 넘으면 오래 안 쓴 폴더부터 삭제, 그래도 모자라면
+  다른 작업이 끝날 때까지 대기 → 여러 작업/여러 프로세스가 겹쳐도 디스크를 채우지 않음
+- 사용 중인 폴더는 .lease 파일(pid, 예약량)로 표시 - 다른 프로세스도 같은 상한을 함께 계산
+- 특수문자 입력 파일의 링크(safe_path.py)도 작업 폴더에 - 원본과 공간을 나눠 쓰므로 사용량에서 제외
+- MAX_IDLE_SECONDS 넘게 쓰지 않은 폴더는 자동 삭제
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+
+from jbch_common import STATE_DIR
+
+DEFAULT_WORKSPACE_DIR = os.environ.get("JBCH_WORK_DIR") or os.path.join(STATE_DIR, "work")
+# 작업 공간 전체 용량 상한 (기본 20GB)
+DEFAULT_WORKSPACE_BYTES = 20 * 1024 ** 3
+# 쓰지 않는 작업 폴더 보관 기간 (초, 기본 3일)
+MAX_IDLE_SECONDS = 3 * 24 * 3600
+# 공간을 기다릴 때 다시 확인하는 간격 (초) - 다른 프로세스의 반환은 알림이 없으므로
+WAIT_INTERVAL = 1.0
+LEASE_NAME = ".lease"
+
+
+def pid_alive(pid):
+    """프로세스가 살아 있는지 (Windows에서 os.kill(pid, 0)은 프로세스를 종료하므로 따로 확인)"""
+    if pid == os.getpid():
+        return True
+    if sys.platform == 'win32':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        # STILL_ACTIVE
+        return bool(ok) and code.value == 259
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def tree_size(path):
+    """폴더 실제 사용량 (bytes) - 하드 링크로 연결한 입력과 심볼릭 링크는 원본과 공간을 나눠 쓰므로 제외"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if os.path.islink(os.path.join(root, name)) or st.st_nlink > 1:
+                continue
+            total += st.st_size
+    return total
+
+
+class Area:
+    """작업 하나의 임시 폴더 (workspace.area로 생성, 끝나면 release)"""
+
+    def __init__(self, workspace, name, path, reserve=0):
+        self.workspace = workspace
+        self.name = name
+        self.path = path
+        self.reserve = reserve
+        self.released = False
+
+    def file(self, name):
+        """폴더 안 파일 경로"""
+        return os.path.join(self.path, name)
+
+    def dir(self, name, clean=False):
+        """폴더 안 하위 폴더 (clean이면 이전 내용 삭제 후 새로)"""
+        path = os.path.join(self.path, name)
+        if clean:
+            shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def size(self):
+        return tree_size(self.path)
+
+    def release(self, keep=False):
+        """예약 반환. keep이면 결과물을 남겨 다음 실행에서 재사용 (용량/기간 정책으로 나중에 정리)"""
+        self.workspace.release(self, keep)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 실패한 작업의 중간 결과물은 다시 시도할 때 쓰도록 남김
+        self.release(keep=exc_type is not None)
+        return False
+
+
+class Workspace:
+    """작업 폴더 관리 (여러 스레드/프로세스에서 같은 root를 써도 됨)
+
+    max_bytes: 사용 중인 폴더의 예약량(실제 크기가 더 크면 실제 크기) + 쉬고 있는 폴더 크기의 상한.
+    예약량 하나가 상한보다 커도 다른 사용 중인 폴더가 없으면 진행 (무한 대기 방지).
+    """
+
+    def __init__(self, root=DEFAULT_WORKSPACE_DIR, max_bytes=DEFAULT_WORKSPACE_BYTES,
+                 max_idle=MAX_IDLE_SECONDS, log=None):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_idle = max_idle
+        self.log = log or (lambda message: None)
+        self._cond = threading.Condition()
+        self.gc()
+
+    # ---------- 예약 ----------
+
+    def area(self, name, reserve=0):
+        """name 작업 폴더를 reserve bytes만큼 예약해 반환 (공간이 날 때까지 대기)
+
+        같은 이름을 다른 작업이 쓰고 있으면 name.2, name.3 ... 사용.
+        """
+        with self._cond:
+            name = self.free_name(name)
+            area = Area(self, name, os.path.join(self.root, name), reserve)
+            os.makedirs(area.path, exist_ok=True)
+            # 대기 중에는 예약량 0으로 표시 (서로 기다리다 멈추지 않도록)
+            self.write_lease(area, 0)
+            while True:
+                others, idle = self.usage(exclude=area.name)
+                if others + idle + reserve <= self.max_bytes:
+                    break
+                # 쉬고 있는 폴더부터 정리
+                need = others + idle + reserve - self.max_bytes
+                if self.evict(need, exclude=area.name) >= need:
+                    continue
+                if others == 0:
+                    break
+                self._cond.wait(WAIT_INTERVAL)
+            self.write_lease(area, reserve)
+        return area
+
+    def release(self, area, keep=False):
+        with self._cond:
+            if area.released:
+                return
+            area.released = True
+            try:
+                os.remove(os.path.join(area.path, LEASE_NAME))
+            except OSError:
+                pass
+            if keep:
+                # 마지막 사용 시각 (오래된 순 정리 기준)
+                try:
+                    os.utime(area.path)
+                except OSError:
+                    pass
+            else:
+                shutil.rmtree(area.path, ignore_errors=True)
+            self._cond.notify_all()
+
+    # ---------- 상태 ----------
+
+    def write_lease(self, area, reserve):
+        with open(os.path.join(area.path, LEASE_NAME), 'w', encoding='utf-8') as f:
+            json.dump({"pid": os.getpid(), "reserve": reserve, "started": time.time()}, f)
+
+    def read_lease(self, path):
+        """사용 중이면 예약량, 쉬고 있으면 None (pid가 죽은 .lease는 쉬는 것으로 봄)"""
+        try:
+            with open(os.path.join(path, LEASE_NAME), 'r', encoding='utf-8') as f:
+                lease = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not pid_alive(int(lease.get("pid", 0))):
+            return None
+        return int(lease.get("reserve", 0))
+
+    def entries(self):
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return [name for name in names if os.path.isdir(os.path.join(self.root, name))]
+
+    def free_name(self, name):
+        candidate, n = name, 1
+        while self.read_lease(os.path.join(self.root, candidate)) is not None:
+            n += 1
+            candidate = f"{name}.{n}"
+        return candidate
+
+    def usage(self, exclude=None):
+        """(다른 사용 중인 폴더 사용량, 쉬고 있는 폴더 크기)"""
+        active = idle = 0
+        for name in self.entries():
+            if name == exclude:
+                continue
+            path = os.path.join(self.root, name)
+            reserve = self.read_lease(path)
+            if reserve is None:
+                idle += tree_size(path)
+            else:
+                active += max(reserve, tree_size(path))
+        return active, idle
+
+    # ---------- 정리 ----------
+
+    def idle_entries(self, exclude=None):
+        """쉬고 있는 폴더 [(마지막 사용 시각, 경로)] 오래된 순"""
+        result = []
+        for name in self.entries():
+            path = os.path.join(self.root, name)
+            if name == exclude or self.read_lease(path) is not None:
+                continue
+            try:
+                result.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        return sorted(result)
+
+    def evict(self, need, exclude=None):
+        """오래 안 쓴 폴더부터 need bytes 이상 삭제 → 삭제한 bytes"""
+        freed = 0
+        for _, path in self.idle_entries(exclude):
+            if freed >= need:
+                break
+            size = tree_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size
+            self.log(f"  🧹 작업 폴더 정리: {os.path.basename(path)} ({size / 1024 ** 2:.0f}MB)")
+        return freed
+
+    def gc(self):
+        """MAX_IDLE_SECONDS 넘게 쓰지 않은 폴더 삭제, 상한을 넘으면 오래된 순으로 삭제"""
+        with self._cond:
+            cutoff = time.time() - self.max_idle
+            for mtime, path in self.idle_entries():
+                if mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            active, idle = self.usage()
+            if active + idle > self.max_bytes:
+                self.evict(active + idle - self.max_bytes)